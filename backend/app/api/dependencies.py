@@ -5,6 +5,10 @@ Provides reusable dependency injection functions
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import UserModel, get_db_session
 
 from app.core.security import decode_access_token, validate_worker_token
 from app.models.schemas import User, UserRole, TokenData
@@ -15,13 +19,15 @@ security = HTTPBearer()
 
 
 async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security)
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    session: AsyncSession = Depends(get_db_session)
 ) -> User:
     """
     Dependency to get current authenticated user from JWT token
     
     Args:
         credentials: HTTP Bearer token
+        session: Request-scoped session (shared with the endpoint)
         
     Returns:
         Current user
@@ -61,12 +67,8 @@ async def get_current_user(
         )
     
     # Fetch user from Real DB
-    from app.core.database import AsyncSessionLocal, UserModel
-    from sqlalchemy import select
-    
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserModel).where(UserModel.id == user_id))
-        user_model = result.scalar_one_or_none()
+    result = await session.execute(select(UserModel).where(UserModel.id == user_id))
+    user_model = result.scalar_one_or_none()
             
     if not user_model:
         # Fallback (shouldn't happen if token is valid)
@@ -84,6 +86,9 @@ async def get_current_user(
             role=UserRole(user_model.role),
             is_active=bool(user_model.is_active)
         )
+    # End the read-only transaction so the connection goes back to the pool
+    # before the endpoint runs (chat endpoints stream for minutes)
+    await session.rollback()
     
     return user
 
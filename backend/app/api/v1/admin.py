@@ -20,10 +20,11 @@ from app.models.schemas import (
     RuleSetCloneRequest,
 )
 from app.api.dependencies import get_current_user
-from app.core.database import AsyncSessionLocal, UserModel
+from app.core.database import UserModel, database_metrics, get_db_session
 from app.models.company import CompanyProfile
 from app.services.rules import RulesEngine, ruleset_repository
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 
@@ -42,45 +43,45 @@ def check_super_admin(current_user: User = Depends(get_current_user)):
 async def list_users(
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(check_super_admin)
+    current_user: User = Depends(check_super_admin),
+    session: AsyncSession = Depends(get_db_session)
 ):
     """List all users (Super Admin only)"""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserModel).offset(skip).limit(limit))
-        users = result.scalars().all()
-        return [
-            User(
-                id=u.id,
-                username=u.username,
-                tenant_id=u.tenant_id,
-                role=UserRole(u.role),
-                is_active=bool(u.is_active)
-            ) for u in users
-        ]
+    result = await session.execute(select(UserModel).offset(skip).limit(limit))
+    users = result.scalars().all()
+    return [
+        User(
+            id=u.id,
+            username=u.username,
+            tenant_id=u.tenant_id,
+            role=UserRole(u.role),
+            is_active=bool(u.is_active)
+        ) for u in users
+    ]
 
 @router.patch("/users/{user_id}/quota", response_model=User)
 async def update_user_quota(
     user_id: str,
     quota: UserQuota,
-    current_user: User = Depends(check_super_admin)
+    current_user: User = Depends(check_super_admin),
+    session: AsyncSession = Depends(get_db_session)
 ):
     """Update a user's quota limits"""
     # TODO: Implement quota in RDB
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserModel).where(UserModel.id == user_id))
-        user = result.scalar_one_or_none()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        # Currently UserModel doesn't support quota
-        return User(
-            id=user.id,
-            username=user.username,
-            tenant_id=user.tenant_id,
-            role=UserRole(user.role),
-            is_active=bool(user.is_active)
-        )
+    result = await session.execute(select(UserModel).where(UserModel.id == user_id))
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    # Currently UserModel doesn't support quota
+    return User(
+        id=user.id,
+        username=user.username,
+        tenant_id=user.tenant_id,
+        role=UserRole(user.role),
+        is_active=bool(user.is_active)
+    )
 
 @router.post("/domains", response_model=Domain)
 async def create_domain(
@@ -98,47 +99,53 @@ async def create_domain(
 async def grant_domain_access(
     user_id: str,
     domain_id: str,
-    current_user: User = Depends(check_super_admin)
+    current_user: User = Depends(check_super_admin),
+    session: AsyncSession = Depends(get_db_session)
 ):
     """Grant domain access to a user"""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserModel).where(UserModel.id == user_id))
-        user = result.scalar_one_or_none()
+    result = await session.execute(select(UserModel).where(UserModel.id == user_id))
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
         
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-            
-        # TODO: Implement allowed_domains in RDB or UserProjectModel
-        return User(
-            id=user.id,
-            username=user.username,
-            tenant_id=user.tenant_id,
-            role=UserRole(user.role),
-            is_active=bool(user.is_active)
-        )
+    # TODO: Implement allowed_domains in RDB or UserProjectModel
+    return User(
+        id=user.id,
+        username=user.username,
+        tenant_id=user.tenant_id,
+        role=UserRole(user.role),
+        is_active=bool(user.is_active)
+    )
 
 @router.delete("/users/{user_id}/domains/{domain_id}", response_model=User)
 async def revoke_domain_access(
     user_id: str,
     domain_id: str,
-    current_user: User = Depends(check_super_admin)
+    current_user: User = Depends(check_super_admin),
+    session: AsyncSession = Depends(get_db_session)
 ):
     """Revoke domain access from a user"""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(UserModel).where(UserModel.id == user_id))
-        user = result.scalar_one_or_none()
+    result = await session.execute(select(UserModel).where(UserModel.id == user_id))
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
         
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-            
-        # TODO: Implement allowed_domains in RDB or UserProjectModel
-        return User(
-            id=user.id,
-            username=user.username,
-            tenant_id=user.tenant_id,
-            role=UserRole(user.role),
-            is_active=bool(user.is_active)
-        )
+    # TODO: Implement allowed_domains in RDB or UserProjectModel
+    return User(
+        id=user.id,
+        username=user.username,
+        tenant_id=user.tenant_id,
+        role=UserRole(user.role),
+        is_active=bool(user.is_active)
+    )
+
+
+@router.get("/db/metrics")
+async def get_db_metrics(current_user: User = Depends(check_super_admin)):
+    """RDB pool checkout wait, query latency and pool status (this process)."""
+    return database_metrics()
 
 
 @router.get("/rulesets", response_model=List[RuleSet])
@@ -3,20 +3,22 @@
 File Management Endpoints
 Handles file uploads and triggers knowledge ingestion
 """
-import hashlib
+import asyncio
 import json
 import sys
 import uuid
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 
 # [UTF-8] Force stdout/stderr to UTF-8
 if sys.stdout.encoding is None or sys.stdout.encoding.lower() != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status, Form
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, status, Form, Header
+from fastapi.responses import StreamingResponse
 from structlog import get_logger
 
 from app.core.config import settings
@@ -24,7 +26,15 @@ from app.api.dependencies import get_current_user
 from app.models.schemas import User
 from app.services.knowledge_service import knowledge_queue
 from app.services.document_parser_service import document_parser_service
-from app.core.database import _normalize_project_id, AsyncSessionLocal, MessageModel
+from app.services.upload_storage import UploadTooLarge, stage_upload
+from app.core.database import (
+    _normalize_project_id,
+    AsyncSessionLocal,
+    MessageModel,
+    UploadedFileModel,
+    cache_committed_messages,
+    upload_project_key
+)
 from datetime import datetime
 
 logger = get_logger(__name__)
@@ -35,6 +45,8 @@ router = APIRouter(prefix="/files", tags=["files"])
 UPLOAD_DIR = Path("data/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 def _build_error_code_message(reason_code: str, message: str) -> str:
     return f"{reason_code}: {message}"
 
@@ -54,43 +66,44 @@ def _build_folder_result(
     return payload
 
 
-def calculate_file_hash(file_content: bytes) -> str:
-    """Calculate SHA256 hash of file content for deduplication."""
-    return hashlib.sha256(file_content).hexdigest()
+async def check_duplicate_file(session, project_id: str, file_hash: str) -> Optional[UploadedFileModel]:
+    """Check if file with same hash already exists in project (unique index lookup)."""
+    stmt = (
+        select(UploadedFileModel)
+        .where(UploadedFileModel.project_id == upload_project_key(project_id))
+        .where(UploadedFileModel.file_hash == file_hash)
+    )
+    return (await session.execute(stmt)).scalar_one_or_none()
 
-def _project_id_filter(project_id: str):
-    project_uuid = _normalize_project_id(project_id)
-    if project_uuid is None:
-        return MessageModel.project_id.is_(None)
-    return MessageModel.project_id == project_uuid
 
+async def find_existing_hashes(
+    session,
+    project_id: str,
+    file_hashes: Iterable[str]
+) -> Dict[str, UploadedFileModel]:
+    """Which of these hashes are already stored in the project (one query)."""
+    file_hashes = sorted(set(file_hashes))
+    if not file_hashes:
+        return {}
+    stmt = (
+        select(UploadedFileModel)
+        .where(UploadedFileModel.project_id == upload_project_key(project_id))
+        .where(UploadedFileModel.file_hash.in_(file_hashes))
+    )
+    return {row.file_hash: row for row in (await session.execute(stmt)).scalars().all()}
 
-def _normalize_metadata(metadata: object) -> dict:
-    if isinstance(metadata, dict):
-        return metadata
-    if isinstance(metadata, str):
-        try:
-            parsed = json.loads(metadata)
-            return parsed if isinstance(parsed, dict) else {}
-        except json.JSONDecodeError:
-            return {}
-    return {}
 
+def _parse_status(full_text: str, parse_failed: bool) -> str:
+    if parse_failed:
+        return "failed"
+    return "parsed" if full_text else "empty"
+
+
+@router.get("/parser/metrics")
+async def get_parser_metrics(current_user: User = Depends(get_current_user)):
+    """Document parser queue depth and per-extension parse counts/times."""
+    return document_parser_service.metrics()
 
-async def check_duplicate_file(session, project_id: str, file_hash: str) -> Optional[MessageModel]:
-    """Check if file with same hash already exists in project."""
-    stmt = (
-        select(MessageModel)
-        .where(_project_id_filter(project_id))
-        .where(MessageModel.metadata_json.is_not(None))
-        .order_by(MessageModel.timestamp.desc())
-    )
-    rows = (await session.execute(stmt)).scalars().all()
-    for message in rows:
-        metadata = _normalize_metadata(message.metadata_json)
-        if metadata.get("type") == "file_upload" and metadata.get("file_hash") == file_hash:
-            return message
-    return None
 
 @router.post("/upload")
 async def upload_file(
@@ -102,21 +115,6 @@ async def upload_file(
     Upload a file and trigger knowledge ingestion with Deduplication.
     """
     try:
-        # 1. Read content and Calculate Hash
-        content = await file.read()
-        size = len(content)
-        file.file.seek(0) # Reset cursor
-        
-        if size > settings.MAX_FILE_SIZE_BYTES:
-            raise HTTPException(
-                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                detail=_build_error_code_message(
-                    "FILE_TOO_LARGE",
-                    f"File too large. Max size: {settings.MAX_FILE_SIZE_BYTES} bytes"
-                )
-            )
-            
-        file_hash = calculate_file_hash(content)
         ext = os.path.splitext(file.filename)[1].lower()
         if not document_parser_service.is_supported_extension(ext):
             raise HTTPException(
@@ -126,28 +124,40 @@ async def upload_file(
                     f"Unsupported file extension: {ext or 'unknown'}"
                 )
             )
+
+        # 1. Stream to a temp file, hashing as we go
+        try:
+            staged = await stage_upload(file, UPLOAD_DIR, settings.MAX_FILE_SIZE_BYTES)
+        except UploadTooLarge as e:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=_build_error_code_message("FILE_TOO_LARGE", str(e))
+            )
+        size = staged.size
+        file_hash = staged.file_hash
         
         # 2. Check Deduplication
-        async with AsyncSessionLocal() as session:
-            # Check if this hash exists in recent uploads for this project
-            existing = await check_duplicate_file(session, project_id, file_hash)
-            
-            if existing:
-                logger.info("Duplicate file detected, skipping upload", filename=file.filename, hash=file_hash)
-                return {
-                    "filename": file.filename,
-                    "status": "skipped",
-                    "reason": "duplicate",
-                    "message_id": str(existing.message_id)
-                }
+        try:
+            async with AsyncSessionLocal() as session:
+                # Check if this hash exists in recent uploads for this project
+                existing = await check_duplicate_file(session, project_id, file_hash)
+        except BaseException:
+            await staged.discard()
+            raise
 
-        # 3. Save file
+        if existing:
+            await staged.discard()
+            logger.info("Duplicate file detected, skipping upload", filename=file.filename, hash=file_hash)
+            return {
+                "filename": file.filename,
+                "status": "skipped",
+                "reason": "duplicate",
+                "message_id": str(existing.message_id)
+            }
+
+        # 3. Save file (content-addressed, atomic rename)
         file_id = str(uuid.uuid4())
-        safe_filename = f"{file_id}{ext}"
-        file_path = UPLOAD_DIR / safe_filename
-        
-        with open(file_path, "wb") as f:
-            f.write(content)
+        file_path = await staged.commit()
             
         logger.info("File uploaded", filename=file.filename, size=size, user_id=current_user.id)
         
@@ -158,7 +168,7 @@ async def upload_file(
         # Extract text using document parser service
         parse_failed = False
         try:
-            full_text = document_parser_service._parse_file(str(file_path), ext)
+            full_text = await document_parser_service.parse(str(file_path), ext, file_hash=file_hash)
             if full_text:
                 content_preview += f"\n\n--- FILE CONTENT ---\n{full_text[:2000]}... (truncated)"
         except HTTPException as e:
@@ -170,7 +180,7 @@ async def upload_file(
             logger.warning("Failed to parse file content", error=str(e))
             content_preview += f"\n(Parser fallback: {str(e)})"
         
-        # 5. Save to DB
+        # 5. Save to DB (message + dedupe index row in one commit)
         msg_id = str(uuid.uuid4())
         async with AsyncSessionLocal() as session:
             msg = MessageModel(
@@ -189,7 +199,28 @@ async def upload_file(
                 }
             )
             session.add(msg)
-            await session.commit()
+            session.add(UploadedFileModel(
+                project_id=upload_project_key(project_id),
+                file_hash=file_hash,
+                filename=file.filename,
+                storage_path=str(file_path),
+                file_size=size,
+                parse_status=_parse_status(full_text, parse_failed),
+                message_id=msg_id,
+                user_id=current_user.id
+            ))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # A concurrent upload of the same content won the unique index
+                await session.rollback()
+                logger.info("Duplicate file detected on commit", filename=file.filename, hash=file_hash)
+                return {
+                    "filename": file.filename,
+                    "status": "skipped",
+                    "reason": "duplicate",
+                }
+        await cache_committed_messages([msg])
             
         # 6. Trigger Knowledge Ingestion
         if parse_failed:
@@ -226,133 +257,271 @@ async def upload_file(
             detail=f"Upload failed: {str(e)}"
         )
 
-@router.post("/upload-folder")
-async def upload_folder(
-    files: List[UploadFile] = File(...),
-    project_id: str = Form("system-master"),
-    current_user: User = Depends(get_current_user)
+def _folder_message_rows(
+    prepared: Dict[int, Dict],
+    files: List[UploadFile],
+    project_id: str,
+    current_user: User
 ):
+    """MessageModel + UploadedFileModel for each prepared folder file."""
+    rows = []
+    for i, item in sorted(prepared.items()):
+        filename = files[i].filename
+        staged = item["staged"]
+        rows.append(MessageModel(
+            message_id=item["message_id"],
+            project_id=_normalize_project_id(project_id),
+            sender_role="user",
+            content=item["content"],
+            timestamp=datetime.utcnow(),
+            metadata_json={
+                "type": "file_upload",
+                "filename": filename,
+                "file_path": str(item["file_path"]),
+                "file_size": staged.size,
+                "file_hash": staged.file_hash,
+                "user_id": current_user.id
+            }
+        ))
+        rows.append(UploadedFileModel(
+            project_id=upload_project_key(project_id),
+            file_hash=staged.file_hash,
+            filename=filename,
+            storage_path=str(item["file_path"]),
+            file_size=staged.size,
+            parse_status=item["parse_status"],
+            message_id=item["message_id"],
+            user_id=current_user.id
+        ))
+    return rows
+
+
+async def _stage_folder(files: List[UploadFile]):
     """
-    Upload multiple files (Folder) with Deduplication.
+    Stream every supported file to disk, UPLOAD_FOLDER_CONCURRENCY at a time
+
+    Returns:
+        (results with the failures filled in, {index: StagedUpload})
     """
-    results = []
-    
-    for file in files:
+    results: List[Optional[Dict[str, str]]] = [None] * len(files)
+    staged_files = {}
+    slots = asyncio.Semaphore(max(1, settings.UPLOAD_FOLDER_CONCURRENCY))
+
+    async def stage(i: int, file: UploadFile):
+        ext = os.path.splitext(file.filename)[1].lower()
+        if not document_parser_service.is_supported_extension(ext):
+            results[i] = _build_folder_result(
+                file.filename,
+                "failed",
+                reason="unsupported_type",
+                detail=_build_error_code_message(
+                    "UNSUPPORTED_EXTENSION",
+                    f"Unsupported file extension: {ext or 'unknown'}",
+                ),
+            )
+            return
         try:
-            # Reuse logic from upload_file but simplified for batch
-            content = await file.read()
-            size = len(content)
-            
-            if size > settings.MAX_FILE_SIZE_BYTES:
-                results.append(
-                    _build_folder_result(
-                        file.filename,
-                        "failed",
-                        reason="too_large",
-                        detail=_build_error_code_message(
-                            "FILE_TOO_LARGE",
-                            f"File too large. Max size: {settings.MAX_FILE_SIZE_BYTES} bytes",
-                        ),
-                    )
-                )
-                continue
-                
-            file_hash = calculate_file_hash(content)
-            ext = os.path.splitext(file.filename)[1].lower()
-            if not document_parser_service.is_supported_extension(ext):
-                results.append(
-                    _build_folder_result(
-                        file.filename,
-                        "failed",
-                        reason="unsupported_type",
-                        detail=_build_error_code_message(
-                            "UNSUPPORTED_EXTENSION",
-                            f"Unsupported file extension: {ext or 'unknown'}",
-                        ),
-                    )
-                )
+            async with slots:
+                staged_files[i] = await stage_upload(file, UPLOAD_DIR, settings.MAX_FILE_SIZE_BYTES)
+        except UploadTooLarge as e:
+            results[i] = _build_folder_result(
+                file.filename,
+                "failed",
+                reason="too_large",
+                detail=_build_error_code_message("FILE_TOO_LARGE", str(e)),
+            )
+        except Exception as e:
+            logger.error(f"Error processing file {file.filename}", error=str(e))
+            results[i] = _build_folder_result(file.filename, "failed", reason="unknown", detail=str(e))
+
+    try:
+        await asyncio.gather(*(stage(i, file) for i, file in enumerate(files)))
+    except BaseException:
+        for staged in staged_files.values():
+            await staged.discard()
+        raise
+    return results, staged_files
+
+
+async def _ingest_folder(
+    files: List[UploadFile],
+    results: List[Optional[Dict[str, str]]],
+    staged_files: Dict,
+    project_id: str,
+    current_user: User
+) -> AsyncIterator[Dict]:
+    """
+    Dedupe, store and parse staged folder files, filling in `results`
+
+    Yields progress events as it goes: {"event": "file", "index", ...result}
+    once a file's status is final, {"event": "progress", "index",
+    "filename", "stage": "parsed"} when a file has been parsed, and a
+    closing {"event": "done", "total", "processed"}. Stored messages are
+    queued for ingestion before their events are yielded, and staged files
+    still undecided when the generator stops (e.g. the client went away)
+    are discarded.
+    """
+    def file_event(i: int) -> Dict:
+        return {"event": "file", "index": i, **results[i]}
+
+    try:
+        for i, result in enumerate(results):
+            if result is not None:
+                yield file_event(i)
+
+        # Check Dedupe: one query for the whole folder
+        async with AsyncSessionLocal() as session:
+            existing = await find_existing_hashes(
+                session, project_id, (staged.file_hash for staged in staged_files.values())
+            )
+
+        seen_hashes = set(existing)
+        to_store = {}
+        for i, staged in sorted(staged_files.items()):
+            if staged.file_hash in seen_hashes:
+                # Already stored, or repeated within this folder
+                await staged.discard()
+                results[i] = _build_folder_result(files[i].filename, "skipped", reason="duplicate")
+                yield file_event(i)
                 continue
-            
-            # Check Dedupe
-            async with AsyncSessionLocal() as session:
-                existing = await check_duplicate_file(session, project_id, file_hash)
-                
-                if existing:
-                    results.append(
-                        _build_folder_result(
-                            file.filename,
-                            "skipped",
-                            reason="duplicate",
-                        )
+            seen_hashes.add(staged.file_hash)
+            to_store[i] = staged
+
+        # Save (content-addressed, atomic rename) and parse, a few files at a time
+        slots = asyncio.Semaphore(max(1, settings.UPLOAD_FOLDER_CONCURRENCY))
+        prepared: Dict[int, Dict] = {}
+
+        async def prepare(i: int) -> int:
+            staged = to_store[i]
+            async with slots:
+                try:
+                    file_path = await staged.commit()
+                except Exception as e:
+                    logger.error(f"Error processing file {files[i].filename}", error=str(e))
+                    await staged.discard()
+                    results[i] = _build_folder_result(files[i].filename, "failed", reason="unknown", detail=str(e))
+                    return i
+                content_preview = f"[Folder Upload] {files[i].filename}"
+                full_text = ""
+                parse_failed = False
+                try:
+                    full_text = await document_parser_service.parse(
+                        str(file_path), staged.ext, file_hash=staged.file_hash
                     )
-                    continue
+                    if full_text:
+                        content_preview += f"\n\n--- FILE CONTENT ---\n{full_text[:2000]}... (truncated)"
+                except Exception as e:
+                    logger.warning("Failed to parse file content", error=str(e))
+                    parse_failed = True
+            # Keep only the preview; the full text stays in the parse cache
+            prepared[i] = {
+                "staged": staged,
+                "file_path": file_path,
+                "message_id": str(uuid.uuid4()),
+                "content": content_preview,
+                "has_text": bool(full_text),
+                "parse_failed": parse_failed,
+                "parse_status": _parse_status(full_text, parse_failed),
+            }
+            return i
 
-            # Save
-            file_id = str(uuid.uuid4())
-            safe_filename = f"{file_id}{ext}"
-            file_path = UPLOAD_DIR / safe_filename
-            
-            with open(file_path, "wb") as f:
-                f.write(content)
-                
-            # DB & Queue
-            msg_id = str(uuid.uuid4())
-            content_preview = f"[Folder Upload] {file.filename}"
-            full_text = ""
-            parse_failed = False
-            
-            try:
-                full_text = document_parser_service._parse_file(str(file_path), ext)
-                if full_text:
-                    content_preview += f"\n\n--- FILE CONTENT ---\n{full_text[:2000]}... (truncated)"
-            except Exception as e:
-                 logger.warning("Failed to parse file content", error=str(e))
-                 parse_failed = True
-            
+        tasks = [asyncio.create_task(prepare(i)) for i in to_store]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                i = await next_done
+                if results[i] is not None:
+                    yield file_event(i)
+                else:
+                    yield {"event": "progress", "index": i, "filename": files[i].filename, "stage": "parsed"}
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        # DB: every message and dedupe row in one transaction
+        stored = dict(prepared)
+        committed = []
+        try:
             async with AsyncSessionLocal() as session:
-                msg = MessageModel(
-                    message_id=msg_id,
-                    project_id=_normalize_project_id(project_id),
-                    sender_role="user", 
-                    content=content_preview,
-                    timestamp=datetime.utcnow(),
-                    metadata_json={
-                        "type": "file_upload",
-                        "filename": file.filename,
-                        "file_path": str(file_path),
-                        "file_size": size,
-                        "file_hash": file_hash,
-                        "user_id": current_user.id
-                    }
-                )
-                session.add(msg)
-                await session.commit()
-                
-            if full_text:
-                knowledge_queue.put_nowait(msg_id)
-                
-            if parse_failed:
-                results.append(
-                    _build_folder_result(
-                        file.filename,
-                        "saved_only",
-                        reason="parser_fallback",
+                rows = _folder_message_rows(stored, files, project_id, current_user)
+                session.add_all(rows)
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    # A concurrent upload stored some of these hashes first: drop
+                    # those and commit the rest
+                    await session.rollback()
+                    raced = await find_existing_hashes(
+                        session, project_id, (item["staged"].file_hash for item in stored.values())
                     )
-                )
-            else:
-                results.append(_build_folder_result(file.filename, "queued"))
-            
+                    for i in [i for i, item in stored.items() if item["staged"].file_hash in raced]:
+                        del stored[i]
+                        results[i] = _build_folder_result(files[i].filename, "skipped", reason="duplicate")
+                    rows = _folder_message_rows(stored, files, project_id, current_user)
+                    session.add_all(rows)
+                    await session.commit()
+                committed = [row for row in rows if isinstance(row, MessageModel)]
         except Exception as e:
-            logger.error(f"Error processing file {file.filename}", error=str(e))
-            results.append(
-                _build_folder_result(
-                    file.filename,
-                    "failed",
-                    reason="unknown",
-                    detail=str(e),
-                )
-            )
-            
+            logger.error("Folder upload commit failed", project_id=project_id, error=str(e))
+            for i in stored:
+                results[i] = _build_folder_result(files[i].filename, "failed", reason="unknown", detail=str(e))
+            stored = {}
+        await cache_committed_messages(committed)
+
+        # Queue everything stored before the first yield: a client that
+        # disconnects now must not cost the remaining files their ingestion
+        for i in sorted(stored):
+            item = stored[i]
+            if item["has_text"]:
+                knowledge_queue.put_nowait(item["message_id"])
+            if item["parse_failed"]:
+                results[i] = _build_folder_result(files[i].filename, "saved_only", reason="parser_fallback")
+            else:
+                results[i] = _build_folder_result(files[i].filename, "queued")
+        for i in sorted(prepared):
+            yield file_event(i)
+
+        yield {
+            "event": "done",
+            "total": len(files),
+            "processed": len([r for r in results if r and r["status"] == "queued"]),
+        }
+    finally:
+        # No-op for uploads already committed or discarded
+        for staged in staged_files.values():
+            await staged.discard()
+
+
+@router.post("/upload-folder")
+async def upload_folder(
+    files: List[UploadFile] = File(...),
+    project_id: str = Form("system-master"),
+    current_user: User = Depends(get_current_user),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Upload multiple files (Folder) with Deduplication.
+
+    Files are streamed to disk and parsed a few at a time, checked against
+    uploaded_files in one query and stored in one transaction. With
+    `Accept: application/x-ndjson` per-file statuses are streamed back as
+    they are decided; otherwise the full result list is returned at the end.
+    """
+    results, staged_files = await _stage_folder(files)
+    events = _ingest_folder(files, results, staged_files, project_id, current_user)
+
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        async def ndjson():
+            try:
+                async for event in events:
+                    yield json.dumps(event, ensure_ascii=False) + "\n"
+            finally:
+                # Closed early when the client disconnects: let the ingest clean up
+                await events.aclose()
+
+        return StreamingResponse(ndjson(), media_type=NDJSON_MEDIA_TYPE)
+
+    async for _ in events:
+        pass
     return {"results": results, "total": len(files), "processed": len([r for r in results if r['status'] == 'queued'])}
 
 
@@ -360,10 +529,11 @@ async def upload_folder(
 async def upload_batch(
     files: List[UploadFile] = File(...),
     project_id: str = Form("system-master"),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    accept: Optional[str] = Header(None)
 ):
     """
     Alias endpoint for batch file upload.
     Supports the same behavior as /upload-folder.
     """
-    return await upload_folder(files=files, project_id=project_id, current_user=current_user)
+    return await upload_folder(files=files, project_id=project_id, current_user=current_user, accept=accept)
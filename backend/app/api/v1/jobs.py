@@ -2,6 +2,7 @@
 """
 Job management endpoints
 """
+import asyncio
 import json
 import sys
 
@@ -11,11 +12,13 @@ if sys.stdout.encoding is None or sys.stdout.encoding.lower() != 'utf-8':
 if sys.stderr.encoding is None or sys.stderr.encoding.lower() != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status, Request
 from structlog import get_logger
 
+from app.core.config import settings
+
 from app.models.schemas import (
     JobCreate,
     JobCreateResponse,
@@ -23,6 +26,8 @@ from app.models.schemas import (
     JobStatus,
     User,
     JobResult,
+    JobAcknowledgeBatch,
+    JobResultBatch,
     UserRole,
     ExecutionLocation
 )
@@ -31,7 +36,15 @@ from app.api.dependencies import (
     get_current_super_admin,
     verify_worker_credentials
 )
-from app.services.job_manager import JobManager, PermissionDenied, QuotaExceeded
+from app.services.job_manager import (
+    JobManager,
+    LeaseLost,
+    PermissionDenied,
+    QuotaExceeded,
+    ResultBlobError,
+    ResultTooLarge
+)
+from app.services.job_scheduler import select_capabilities
 
 logger = get_logger(__name__)
 
@@ -43,6 +56,18 @@ def get_job_manager(request: Request) -> JobManager:
     return request.app.state.job_manager
 
 
+def _lease_lost_error(e: LeaseLost) -> HTTPException:
+    """A result from a worker whose lease was reclaimed is not applied"""
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+def _result_upload_error(e: ValueError) -> HTTPException:
+    """Map result blob store errors to HTTP errors"""
+    if isinstance(e, ResultTooLarge):
+        return HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+
+
 @router.post("", response_model=JobCreateResponse, status_code=status.HTTP_202_ACCEPTED)
 async def create_job(
     job_request: JobCreate,
@@ -151,6 +176,7 @@ async def create_job(
 @router.get("/{job_id}/status")
 async def get_job_status(
     job_id: UUID,
+    include_output: bool = Query(default=False),
     current_user: User = Depends(get_current_active_user),
     job_manager: JobManager = Depends(get_job_manager)
 ):
@@ -159,6 +185,8 @@ async def get_job_status(
     
     Args:
         job_id: Job identifier
+        include_output: Also fetch a large output kept in the result blob
+            store (by default only its summary and reference are returned)
         current_user: Authenticated user
         job_manager: Job manager service
         
@@ -169,7 +197,9 @@ async def get_job_status(
         HTTPException: If job not found or access denied
     """
     try:
-        job_status = await job_manager.get_job_status(str(job_id), current_user)
+        job_status = await job_manager.get_job_status(
+            str(job_id), current_user, include_output=include_output
+        )
         
         if job_status is None:
             raise HTTPException(
@@ -184,37 +214,146 @@ async def get_job_status(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=str(e)
         )
+    except ResultBlobError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
 
 
 @router.get("/pending")
 async def get_pending_job(
+    worker_id: str = Header(default="worker_001", alias="X-Worker-Id"),
+    capability: Optional[List[str]] = Query(default=None),
+    max_jobs: Optional[int] = Query(default=None, alias="max", ge=1),
     worker_token: str = Depends(verify_worker_credentials),
     job_manager: JobManager = Depends(get_job_manager)
 ):
     """
     Worker endpoint: Poll for pending jobs (Reliable Queue)
+    
+    Only jobs matching the capabilities from the worker's last heartbeat are
+    leased; tenants are served weighted round-robin, jobs by priority.
+    Workers with a concurrency pool pass `capability=PROVIDER:model` (repeatable)
+    to narrow the lease to capabilities that currently have a free slot.
+    
+    With `max=N` up to N jobs (capped at JOB_LEASE_BATCH_MAX) are leased in
+    one atomic step and returned as a list; without it a single job or None.
+    """
+    batch = max_jobs is not None
+    capabilities = select_capabilities(
+        await job_manager.get_worker_capabilities(worker_id), capability
+    )
+    if not capabilities:
+        # No live heartbeat yet: we can't tell what this worker can run
+        logger.debug("Pending poll from worker without live heartbeat", worker_id=worker_id)
+        return [] if batch else None
+    
+    # Pop + lease registration is a single Lua script, so a worker that
+    # disconnects after fetch leaves the job in the processing set where the
+    # lease reaper will find it.
+    jobs = await job_manager.lease_jobs(
+        worker_id,
+        capabilities,
+        max_jobs=min(max_jobs or 1, settings.JOB_LEASE_BATCH_MAX),
+        timeout=30
+    )
+    
+    for job in jobs:
+        logger.info(
+            "Job fetched by worker (Reliable Queue)",
+            job_id=job.get("job_id"),
+            worker_id=worker_id,
+            tenant_id=job.get("tenant_id")
+        )
+    
+    if batch:
+        return jobs
+    return jobs[0] if jobs else None
+
+
+@router.post("/acknowledge")
+async def acknowledge_jobs(
+    request: JobAcknowledgeBatch,
+    worker_token: str = Depends(verify_worker_credentials),
+    job_manager: JobManager = Depends(get_job_manager)
+):
+    """
+    Worker endpoint: Acknowledge several leased jobs in one request
+    
+    Jobs whose lease was already reclaimed are listed under "rejected"
+    (the per-job endpoint answers 409 for those).
+    """
+    if len(request.job_ids) > settings.JOB_LEASE_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.JOB_LEASE_BATCH_MAX} jobs per request"
+        )
+    
+    acked = await job_manager.acknowledge_jobs([str(job_id) for job_id in request.job_ids])
+    return {
+        "acknowledged": [job_id for job_id, ok in acked.items() if ok],
+        "rejected": [job_id for job_id, ok in acked.items() if not ok],
+    }
+
+
+@router.post("/results")
+async def submit_job_results(
+    request: JobResultBatch,
+    worker_id: Optional[str] = Header(default=None, alias="X-Worker-Id"),
+    worker_token: str = Depends(verify_worker_credentials),
+    job_manager: JobManager = Depends(get_job_manager)
+):
     """
-    # In production, determine tenant_id and worker_id from credentials
-    tenant_id = "tenant_hyungnim"
-    worker_id = "worker_001" # Mock for now
+    Worker endpoint: Submit several job results in one request
     
-    queue_key = f"job_queue:{tenant_id}"
-    processing_key = f"job_processing:{tenant_id}:{worker_id}"
+    Each entry is applied exactly like POST /{job_id}/result, independently
+    of the others. Entries that could not be applied are listed under
+    "rejected" with the status code and detail the per-job endpoint would
+    have answered; the rest are listed under "applied".
+    """
+    if len(request.results) > settings.JOB_LEASE_BATCH_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.JOB_LEASE_BATCH_MAX} results per request"
+        )
     
-    # BRPOPLPUSH: Move job from queue to processing list atomically
-    # This prevents orphaned jobs if worker disconnects after fetch
-    job_json = await job_manager.redis.brpoplpush(queue_key, processing_key, timeout=30)
+    outcomes = await asyncio.gather(*(
+        job_manager.update_job_status(
+            str(item.job_id),
+            item.status,
+            JobResult(**item.dict(exclude={"job_id"})),
+            worker_id=worker_id
+        )
+        for item in request.results
+    ), return_exceptions=True)
     
-    if job_json is None:
-        return None
+    applied = []
+    rejected = []
+    for item, outcome in zip(request.results, outcomes):
+        job_id = str(item.job_id)
+        if not isinstance(outcome, BaseException):
+            applied.append(job_id)
+            continue
+        if isinstance(outcome, (ResultBlobError, ResultTooLarge)):
+            error = _result_upload_error(outcome)
+        elif isinstance(outcome, LeaseLost):
+            error = _lease_lost_error(outcome)
+        elif isinstance(outcome, Exception):
+            logger.error("Job result submission failed", job_id=job_id, error=str(outcome))
+            error = HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(outcome))
+        else:
+            raise outcome
+        rejected.append({"job_id": job_id, "status_code": error.status_code, "detail": error.detail})
     
     logger.info(
-        "Job fetched by worker (Reliable Queue)",
-        worker_id=worker_id,
-        tenant_id=tenant_id
+        "Job results submitted",
+        applied=len(applied),
+        rejected=len(rejected),
+        worker_token=worker_token[:20] + "..."
     )
     
-    return json.loads(job_json)
+    return {"applied": applied, "rejected": rejected}
 
 @router.post("/{job_id}/acknowledge")
 async def acknowledge_job(
@@ -224,52 +363,85 @@ async def acknowledge_job(
 ):
     """
     Worker endpoint: Acknowledge job receipt and start execution
-    Removes job from processing list.
+    Extends the lease to cover execution and marks the job RUNNING (O(1)).
     """
-    tenant_id = "tenant_hyungnim"
-    worker_id = "worker_001"
-    processing_key = f"job_processing:{tenant_id}:{worker_id}"
-    
-    # To remove from processing list, we need the exact value.
-    # Since we only have job_id, we scan the processing list.
-    # (In high-scale, we'd use a different structure like a Hash)
-    items = await job_manager.redis.lrange(processing_key, 0, -1)
-    for item in items:
-        job_data = json.loads(item)
-        if job_data.get("job_id") == str(job_id):
-            await job_manager.redis.lrem(processing_key, 1, item)
-            break
-            
-    # Mark job as RUNNING
-    await job_manager.update_job_status(str(job_id), JobStatus.RUNNING)
+    acknowledged = await job_manager.acknowledge_job(str(job_id))
+    if not acknowledged:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} has no active lease"
+        )
     
     return {"message": "Job acknowledged"}
 
 
+@router.put("/{job_id}/result/chunks/{index}")
+async def upload_job_result_chunk(
+    job_id: UUID,
+    index: int,
+    request: Request,
+    worker_token: str = Depends(verify_worker_credentials),
+    job_manager: JobManager = Depends(get_job_manager)
+):
+    """
+    Worker endpoint: Upload one chunk of a large compressed output
+    
+    The body is raw bytes of the zstd/gzip-compressed output JSON; chunks
+    are numbered from 0 and chunk 0 restarts the upload. The result posted
+    to POST /{job_id}/result names the blob in `output_ref`, which verifies
+    and commits the staged chunks.
+    """
+    if index < 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Chunk index must be >= 0")
+    if int(request.headers.get("content-length") or 0) > settings.JOB_RESULT_CHUNK_MAX_BYTES:
+        # Refuse before buffering the body
+        raise _result_upload_error(
+            ResultTooLarge(f"Chunk exceeds {settings.JOB_RESULT_CHUNK_MAX_BYTES} bytes")
+        )
+    data = await request.body()
+    try:
+        staged = await job_manager.stage_result_chunk(str(job_id), index, data)
+    except (ResultBlobError, ResultTooLarge) as e:
+        raise _result_upload_error(e)
+    
+    return {"job_id": str(job_id), "index": index, "staged_bytes": staged}
+
+
 @router.post("/{job_id}/result")
 async def submit_job_result(
     job_id: UUID,
     result: JobResult,
+    worker_id: Optional[str] = Header(default=None, alias="X-Worker-Id"),
     worker_token: str = Depends(verify_worker_credentials),
     job_manager: JobManager = Depends(get_job_manager)
 ):
     """
     Worker endpoint: Submit job execution result
     
+    With `X-Worker-Id` the result is only applied while that worker still
+    holds the job's lease (409 once it was reclaimed by the reaper).
+    
     Args:
         job_id: Job identifier
         result: Job execution result
+        worker_id: Reporting worker (lease holder)
         worker_token: Validated worker token
         job_manager: Job manager service
         
     Returns:
         Confirmation message
     """
-    await job_manager.update_job_status(
-        str(job_id),
-        result.status,
-        result
-    )
+    try:
+        await job_manager.update_job_status(
+            str(job_id),
+            result.status,
+            result,
+            worker_id=worker_id
+        )
+    except (ResultBlobError, ResultTooLarge) as e:
+        raise _result_upload_error(e)
+    except LeaseLost as e:
+        raise _lease_lost_error(e)
     
     logger.info(
         "Job result submitted",
@@ -6,7 +6,9 @@ import sys
 if sys.stdout.encoding is None or sys.stdout.encoding.lower() != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query, Request
 from fastapi.responses import StreamingResponse, JSONResponse
 from app.models.master import MasterAgentConfig, ChatRequest, ChatResponse, ChatMessage
 from app.services.master_agent_service import MasterAgentService
@@ -19,6 +21,18 @@ import uuid # [v4.2]
 router = APIRouter()
 service = MasterAgentService()
 
+
+async def _registry_worker_status(http_request: Request) -> Optional[Dict[str, Any]]:
+    """Worker status for the master agent, read from the backend's worker registry."""
+    job_manager = getattr(http_request.app.state, "job_manager", None)
+    if job_manager is None:
+        return None
+    try:
+        return await job_manager.get_worker_status()
+    except Exception as e:
+        print(f"DEBUG: Worker registry unavailable: {e}")
+        return None
+
 @router.get("/config", response_model=MasterAgentConfig)
 async def get_config():
     """Get current master agent configuration"""
@@ -34,10 +48,12 @@ async def update_config(config: MasterAgentConfig):
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     request: ChatRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """
     Send a message to the master agent (REST API - non-streaming).
+    worker_status comes from the worker registry, not from the client.
     """
     print(f"DEBUG: Chat endpoint received project_id: {request.project_id} from User: {current_user.username}")
     
@@ -47,7 +63,7 @@ async def chat(
         request.project_id, 
         request.thread_id,
         user=current_user,
-        worker_status=request.worker_status
+        worker_status=await _registry_worker_status(http_request)
     )
     return ChatResponse(
         message=response["message"],
@@ -57,15 +73,18 @@ async def chat(
 @router.post("/chat-stream")
 async def chat_stream(
     request: ChatRequest,
+    http_request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """
     [v3.2] Streaming chat with v3.2 Intent Router and Guardrails.
     [v4.2] Added X-Request-Id header and Admin Debug Logic.
+    worker_status comes from the worker registry, not from the client.
     """
     # [v4.2] 1. Request ID 생성 및 Admin 체크
     request_id = str(uuid.uuid4())
     is_admin = (current_user.role == "super_admin")
+    worker_status = await _registry_worker_status(http_request)
     
     async def event_generator():
         try:
@@ -76,7 +95,7 @@ async def chat_stream(
                 request.project_id, 
                 request.thread_id,
                 user=current_user,
-                worker_status=request.worker_status,
+                worker_status=worker_status,
                 request_id=request_id,  # [v4.2]
                 is_admin=is_admin,      # [v4.2]
                 mode=request.mode       # [v4.0]
@@ -8,49 +8,79 @@ if sys.stdout.encoding is None or sys.stdout.encoding.lower() != 'utf-8':
 if sys.stderr.encoding is None or sys.stderr.encoding.lower() != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
 from structlog import get_logger
-from redis.asyncio import Redis
+
+from app.api.dependencies import get_current_user
+from app.models.schemas import User, UserRole
+from app.services.orchestration_events import OrchestrationEventHub
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+def get_event_hub(app) -> OrchestrationEventHub:
+    """Process-wide hub; created lazily so tests and scripts can mount the router alone."""
+    hub = getattr(app.state, "event_hub", None)
+    if hub is None:
+        hub = OrchestrationEventHub(app.state.redis)
+        app.state.event_hub = hub
+    return hub
+
+
+@router.get("/ws/stats")
+async def websocket_stats(request: Request, current_user: User = Depends(get_current_user)):
+    """Event hub connection/delivery counters (Super Admin only)"""
+    if current_user.role != UserRole.SUPER_ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return get_event_hub(request.app).stats()
+
+
 @router.websocket("/ws/{project_id}")
-async def websocket_endpoint(websocket: WebSocket, project_id: str):
+async def websocket_endpoint(websocket: WebSocket, project_id: str, last_event_id: Optional[str] = None):
     """
     WebSocket endpoint for streaming orchestration events.
-    Subscribes to Redis channel `orchestration:{project_id}`.
+    Fed by the shared event hub reading `events:stream:{project_id}`.
+    
+    Every message carries an `event_id`; a reconnecting client passes the last
+    one it saw as `?last_event_id=` and receives exactly the events it missed.
+    Without it only new events are sent. A client too slow to keep up is
+    closed with code 1013 and should reconnect with its last event_id.
     """
     await websocket.accept()
     
-    # Get Redis from app state
-    redis_client: Redis = websocket.app.state.redis
-    pubsub = redis_client.pubsub()
-    channel_name = f"orchestration:{project_id}"
+    hub = get_event_hub(websocket.app)
+    sub = await hub.subscribe(project_id, last_event_id)
+    logger.info(f"WebSocket connected for project {project_id}, resuming from {last_event_id or 'latest'}")
     
-    await pubsub.subscribe(channel_name)
-    logger.info(f"WebSocket connected for project {project_id}, subscribed to {channel_name}")
+    async def forward_events():
+        for payload in await hub.replay(sub):
+            await websocket.send_text(payload)
+        while True:
+            payload = await sub.queue.get()
+            if payload is None:
+                await websocket.close(code=1013, reason="event consumer too slow")
+                return
+            await websocket.send_text(payload)
     
+    forwarder = asyncio.create_task(forward_events())
     try:
-        while True:
-            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
-            if message:
-                # Forward Redis message to WebSocket
-                data = message["data"]
-                # Ensure data is string
-                if isinstance(data, bytes):
-                    data = data.decode("utf-8")
-                
-                await websocket.send_text(data)
-            
-            # Keep connection alive and check for client disconnect
-            # We can send a ping or just rely on get_message timeout loop
-            await asyncio.sleep(0.1)
+        # Reading from the socket is how we notice the client going away
+        while not forwarder.done():
+            receiver = asyncio.create_task(websocket.receive())
+            done, _ = await asyncio.wait({receiver, forwarder}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver not in done:
+                receiver.cancel()
+                break
+            if receiver.result().get("type") == "websocket.disconnect":
+                raise WebSocketDisconnect()
+        forwarder.result()
             
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected for project {project_id}")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
     finally:
-        await pubsub.unsubscribe(channel_name)
-        await pubsub.close()
+        forwarder.cancel()
+        hub.unsubscribe(sub)
@@ -7,7 +7,7 @@ if sys.stdout.encoding is None or sys.stdout.encoding.lower() != 'utf-8':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
 if sys.stderr.encoding is None or sys.stderr.encoding.lower() != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from fastapi.responses import HTMLResponse, PlainTextResponse, Response
 from datetime import datetime
 import uuid
@@ -16,7 +16,7 @@ from app.models.schemas import Project, ProjectAgentConfig, User, AgentDefinitio
 from app.models.company import CompanyProfile
 from app.api.dependencies import get_current_user
 from app.core.neo4j_client import neo4j_client
-from app.core.database import get_messages_from_rdb, MessageModel, AsyncSessionLocal
+from app.core.database import get_messages_from_rdb, MessageModel, AsyncSessionLocal, cache_committed_messages
 from app.services.knowledge_service import knowledge_queue
 from app.services.growth_support_service import growth_support_service
 
@@ -220,6 +220,7 @@ async def create_project(
                 )
                 session.add(msg)
                 await session.commit()
+            await cache_committed_messages([msg])
             
             knowledge_queue.put_nowait(msg_id)
             # structlog.get_logger(__name__).info(f"Seed knowledge queued for project {project_id}")
@@ -390,6 +391,7 @@ async def execute_project(
     Start project execution workflow
     """
     # structlog.get_logger(__name__).info(f"Starting execution for Project: {project_id}")
+    from app.services.orchestration_service import OrchestrationService, WorkflowAlreadyRunning
     try:
         project_data = await _get_project_or_recover(project_id, current_user)
         project = Project(**project_data)
@@ -407,7 +409,6 @@ async def execute_project(
         job_manager = request.app.state.job_manager
         redis_client = request.app.state.redis
         
-        from app.services.orchestration_service import OrchestrationService
         orchestrator = OrchestrationService(job_manager, redis_client)
         
         # Start execution
@@ -424,12 +425,44 @@ async def execute_project(
     except HTTPException:
         # Re-raise HTTP exceptions as they are
         raise
+    except WorkflowAlreadyRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         import traceback
         # structlog.get_logger(__name__).error(f"Execution failed for {project_id}: {str(e)}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/{project_id}/resume", status_code=status.HTTP_202_ACCEPTED)
+async def resume_project(
+    request: Request,
+    project_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Resume an interrupted project workflow from its last completed node
+    """
+    from app.services.orchestration_service import OrchestrationService, WorkflowAlreadyRunning
+    from app.services.job_manager import PermissionDenied
+
+    project_data = await _get_project_or_recover(project_id, current_user)
+    project = Project(**project_data)
+    if project_id == "system-master" and (not project.repo_path or project.repo_path == ""):
+        project.repo_path = "D:/project/myllm"
+    if not project.agent_config:
+        raise HTTPException(status_code=400, detail="Project has no agent configuration")
+
+    orchestrator = OrchestrationService(request.app.state.job_manager, request.app.state.redis)
+    try:
+        message = await orchestrator.resume_workflow(project, current_user)
+    except WorkflowAlreadyRunning as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except PermissionDenied as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"message": message}
+
 @router.post("/{project_id}/test-agents")
 async def test_agents(
     project_id: str,
@@ -554,12 +587,16 @@ async def get_project_threads(
 async def get_thread_messages(
     project_id: str,
     thread_id: str,
-    limit: int = 50,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
     """
     Get messages for a specific thread in a project.
     Strictly isolated by thread_id.
+    Paged like chat-history (before/after cursors, X-Before-Cursor/X-After-Cursor).
     """
     import structlog
     logger = structlog.get_logger(__name__)
@@ -569,7 +606,9 @@ async def get_thread_messages(
     print(f"DEBUG: get_thread_messages - ProjectID: {project_id}, ThreadID: {thread_id}")
 
     # Reuse existing logic but force thread_id
-    result = await get_chat_history(project_id, limit, thread_id, current_user)
+    result = await get_chat_history(
+        project_id, response, limit=limit, thread_id=thread_id, before=before, after=after, current_user=current_user
+    )
     
     # [CRITICAL FIX] Print result count
     print(f"DEBUG: Returning {len(result)} messages for thread {thread_id}")
@@ -579,11 +618,20 @@ async def get_thread_messages(
 @router.get("/{project_id}/chat-history", response_model=List[ChatMessageResponse])
 async def get_chat_history(
     project_id: str,
-    limit: int = 50,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
     thread_id: Optional[str] = None,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
     current_user: User = Depends(get_current_user)
 ):
-    """Get chat history for a project (Global Timeline for the project)"""
+    """
+    Get chat history for a project (Global Timeline for the project)
+
+    Returns the newest `limit` messages, oldest first. Pass the
+    X-Before-Cursor response header back as `before` to load older messages
+    (absent once there are none), or X-After-Cursor as `after` for newer ones.
+    """
     import structlog
     logger = structlog.get_logger(__name__)
     logger.info("AUDIT: get_chat_history called", project_id=project_id, thread_id=thread_id, user_id=current_user.id)
@@ -597,43 +645,21 @@ async def get_chat_history(
         else:
             raise e
     
-    from sqlalchemy import select, or_
-    from app.core.database import AsyncSessionLocal, MessageModel, _normalize_project_id
-    
-    async with AsyncSessionLocal() as session:
-        # [CRITICAL] system-master인 경우 project_id가 NULL인 데이터도 함께 가져와야 함
-        p_id = _normalize_project_id(project_id)
-        
-        # [CRITICAL FIX] Print debug before query
-        print(f"DEBUG: SQL Query - project_id normalized: {p_id}, thread_id filter: {thread_id}")
-        
-        if project_id == "system-master":
-            stmt = select(MessageModel).where(
-                or_(MessageModel.project_id == None, MessageModel.project_id == "system-master")
-            )
-        else:
-            stmt = select(MessageModel).where(MessageModel.project_id == p_id)
-            
-        # [Fix] Filter by Thread ID if provided (Room Architecture)
-        if thread_id:
-            stmt = stmt.where(MessageModel.thread_id == thread_id)
-            print(f"DEBUG: Applied thread_id filter: {thread_id}")
-            
-        stmt = stmt.order_by(MessageModel.timestamp.desc()).limit(limit)
-        
-        result = await session.execute(stmt)
-        messages = result.scalars().all()
-        
-        # [CRITICAL FIX] Print raw query result
-        print(f"DEBUG: Raw query returned {len(messages)} messages")
-        if messages:
-            print(f"DEBUG: Sample message thread_id: {messages[0].thread_id}")
-        
-        # 사용자가 보기 편하게 다시 과거->현재 순으로 뒤집음
-        messages = sorted(messages, key=lambda x: x.timestamp)
-        
-        logger.info("AUDIT: get_chat_history result", count=len(messages), project_id=project_id, thread_id=thread_id)
-    
+    from app.core.database import get_message_page
+
+    try:
+        messages, before_cursor, after_cursor = await get_message_page(
+            project_id, thread_id, limit, before=before, after=after
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if before_cursor:
+        response.headers["X-Before-Cursor"] = before_cursor
+    if after_cursor:
+        response.headers["X-After-Cursor"] = after_cursor
+
+    logger.info("AUDIT: get_chat_history result", count=len(messages), project_id=project_id, thread_id=thread_id)
+
     # Filter roles and empty content for chat history
     chat_list = []
     for m in messages:
@@ -10,18 +10,29 @@ if sys.stdout.encoding is None or sys.stdout.encoding.lower() != 'utf-8':
 if sys.stderr.encoding is None or sys.stderr.encoding.lower() != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request, WebSocket, WebSocketDisconnect, status
 from structlog import get_logger
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
-from app.api.dependencies import verify_worker_credentials
+from app.api.dependencies import get_current_super_admin, verify_worker_credentials
+from app.core.security import validate_worker_token
+from app.models.schemas import User
 from app.services.job_manager import JobManager
+from app.services.worker_push import WorkerPushSession
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/workers", tags=["workers"])
 
+
+def get_job_manager(request: Request) -> JobManager:
+    """Dependency to get JobManager from app state"""
+    return request.app.state.job_manager
+
+
 class WorkerCapability(BaseModel):
     provider: str
     model: str
@@ -30,21 +41,90 @@ class HeartbeatRequest(BaseModel):
     worker_id: str
     status: str
     capabilities: List[WorkerCapability]
+    in_flight: Optional[int] = None  # jobs leased and not finished
+    capacity: Optional[int] = None   # jobs the worker runs at once
 
 @router.post("/heartbeat")
 async def worker_heartbeat(
     heartbeat: HeartbeatRequest,
-    worker_token: str = Depends(verify_worker_credentials)
+    worker_token: str = Depends(verify_worker_credentials),
+    job_manager: JobManager = Depends(get_job_manager)
 ):
     """
     Receive worker heartbeat
+    
+    The worker's registry entry (capabilities, in-flight count, capacity) is
+    kept in Redis until WORKER_HEARTBEAT_TIMEOUT_SEC passes without another
+    heartbeat; the job scheduler only leases matching jobs and prefers the
+    least loaded waiting worker.
     """
-    # In a real implementation, we would update the worker's status in Redis/DB
-    # For now, just log it to confirm connectivity
+    await job_manager.record_worker_heartbeat(
+        heartbeat.worker_id,
+        heartbeat.status,
+        [cap.dict() for cap in heartbeat.capabilities],
+        in_flight=heartbeat.in_flight,
+        capacity=heartbeat.capacity
+    )
     logger.debug(
         "Worker heartbeat received",
         worker_id=heartbeat.worker_id,
-        status=heartbeat.status
+        status=heartbeat.status,
+        in_flight=heartbeat.in_flight
     )
     
     return {"status": "ok"}
+
+
+@router.get("")
+async def list_workers(
+    current_user: User = Depends(get_current_super_admin),
+    job_manager: JobManager = Depends(get_job_manager)
+):
+    """
+    Live workers from the registry, least loaded first (super admin only:
+    workers are shared across tenants)
+    
+    Each entry has capabilities, in_flight, capacity, load and the job
+    latency EWMA (latency_ewma_ms) measured from acknowledge to result.
+    """
+    return await job_manager.get_worker_status()
+
+
+@router.websocket("/ws")
+async def worker_push_channel(websocket: WebSocket):
+    """
+    Push channel for workers (protocol in app.services.worker_push)
+    
+    Authenticated with the same `Authorization: Bearer <worker token>` and
+    `X-Worker-Id` headers as the HTTP endpoints. Jobs are pushed as soon as
+    they are leasable instead of waiting for the worker's next long-poll;
+    GET /jobs/pending remains the fallback.
+    """
+    scheme, _, token = (websocket.headers.get("authorization") or "").partition(" ")
+    if scheme.lower() != "bearer" or not validate_worker_token(token):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    worker_id = websocket.headers.get("x-worker-id") or "worker_001"
+    
+    await websocket.accept()
+    session = WorkerPushSession(websocket.app.state.job_manager, worker_id, websocket.send_json)
+    leaser = asyncio.create_task(session.lease_loop())
+    logger.info("Worker push channel connected", worker_id=worker_id)
+    
+    try:
+        while not leaser.done():
+            receiver = asyncio.create_task(websocket.receive_json())
+            done, _ = await asyncio.wait({receiver, leaser}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver not in done:
+                receiver.cancel()
+                break
+            await session.handle(receiver.result())
+        leaser.result()
+    
+    except WebSocketDisconnect:
+        # Jobs leased but not yet acknowledged go back to the queue via the lease reaper
+        logger.info("Worker push channel closed", worker_id=worker_id, pushed=session.pushed)
+    except Exception as e:
+        logger.error("Worker push channel error", worker_id=worker_id, error=str(e))
+    finally:
+        leaser.cancel()
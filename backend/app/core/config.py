@@ -36,6 +36,13 @@ class Settings(BaseSettings):
     STARTUP_WITHOUT_REDIS: bool = False
     STARTUP_WITHOUT_POSTGRES: bool = False
     STRICT_DB_MODE: bool = False
+    # RDB connection pool (per backend process)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SEC: float = 30.0  # checkout wait before TimeoutError
+    DB_POOL_RECYCLE_SEC: int = 1800  # replace connections older than this
+    DB_POOL_PRE_PING: bool = True
+    DB_SLOW_QUERY_MS: int = 500  # queries slower than this are logged
     NEO4J_URI: Optional[str] = Field(
         default=None,
         validation_alias=AliasChoices("NEO4J_URI", "NEO4J_URL"),
@@ -85,15 +92,80 @@ class Settings(BaseSettings):
     JOB_MAX_TIMEOUT_SEC: int = 3600
     JOB_MAX_RETRIES: int = 2
     JOB_DLQ_TTL_SEC: int = 1209600
+    JOB_LEASE_POLL_INTERVAL_SEC: float = 1.0
+    JOB_COMPLETION_FALLBACK_POLL_SEC: float = 30.0
+    # Allowance for queueing on top of a job's own attempts when waiting for it
+    JOB_COMPLETION_QUEUE_GRACE_SEC: int = 600
+    # Upper bound for GET /jobs/pending?max=N and the bulk ack/result endpoints
+    JOB_LEASE_BATCH_MAX: int = 32
+    # Tenant fairness weights for the scheduler, e.g. "tenant_a:3,tenant_b:1" (default 1)
+    JOB_TENANT_WEIGHTS: str = ""
     
     # Worker Management
     WORKER_HEARTBEAT_TIMEOUT_SEC: int = 120
     WORKER_MAX_REASSIGN_COUNT: int = 2
+    JOB_LEASE_REAPER_INTERVAL_SEC: int = 15
+    # Leave new jobs to a less loaded capable worker that is waiting for one
+    WORKER_LOAD_AWARE_DISPATCH: bool = True
+    # Weight of the newest sample in each worker's job latency EWMA
+    WORKER_LATENCY_EWMA_ALPHA: float = 0.3
+    # Longest a worker push channel blocks on one lease attempt before it
+    # re-reads the worker's latest credits/capabilities
+    WORKER_PUSH_LEASE_WAIT_SEC: int = 10
+
+    # Job results: outputs above the inline limit are compressed into the
+    # blob store and Redis keeps only a summary and a reference
+    JOB_RESULT_BLOB_DIR: str = "data/job_results"
+    JOB_RESULT_INLINE_MAX_BYTES: int = 16384  # 16 KB
+    JOB_RESULT_CHUNK_MAX_BYTES: int = 4194304  # 4 MB per uploaded chunk
+    JOB_RESULT_MAX_BYTES: int = 67108864  # 64 MB compressed
+    JOB_RESULT_MAX_OUTPUT_BYTES: int = 268435456  # 256 MB once decompressed
+
+    # Orchestration event stream (per project, XADD MAXLEN ~)
+    ORCHESTRATION_EVENT_STREAM_MAXLEN: int = 1000
+    ORCHESTRATION_EVENT_STREAM_TTL_SEC: int = 86400
+    ORCHESTRATION_EVENT_BLOCK_MS: int = 5000
+    # Per-WebSocket buffer; a watcher that falls this far behind is disconnected
+    ORCHESTRATION_WS_QUEUE_SIZE: int = 256
+    
+    # Workflow checkpoints (resume after restart)
+    WORKFLOW_CHECKPOINT_TTL_SEC: int = 604800  # 7 days
+    WORKFLOW_RUN_LOCK_TTL_SEC: int = 90
     
     # File System Safety
-    MAX_FILE_SIZE_BYTES: int = 1048576  # 1 MB
+    MAX_FILE_SIZE_BYTES: int = 26214400  # 25 MB (uploads stream to disk)
+    # Folder uploads: files staged/parsed at once (parsing is further capped by PARSER_MAX_WORKERS)
+    UPLOAD_FOLDER_CONCURRENCY: int = 8
     MAX_TOTAL_JOB_SIZE_BYTES: int = 10485760  # 10 MB
-    
+
+    # Document parsing (process pool; parsed text cached by file hash)
+    PARSER_MAX_WORKERS: int = 2
+    PARSER_TIMEOUT_SEC: int = 120
+    PARSER_MEMORY_LIMIT_MB: int = 2048  # per worker process, POSIX only (0: no limit)
+    PARSE_CACHE_DIR: str = "data/parse_cache"
+
+    # Document ingestion: parsed uploads are streamed into overlapping
+    # token-sized chunks and extracted a few chunks at a time
+    DOC_CHUNK_TOKENS: int = 1500
+    DOC_CHUNK_OVERLAP_TOKENS: int = 150
+    DOC_INGEST_CONCURRENCY: int = 3
+
+    # Recent-message tail cache (newest messages per thread, write-through
+    # from save_message_to_rdb; shared through Redis when it is available)
+    MESSAGE_TAIL_CACHE_SIZE: int = 50  # messages kept per thread
+    MESSAGE_TAIL_CACHE_THREADS: int = 1000  # threads kept in process (LRU)
+    MESSAGE_TAIL_CACHE_TTL_SEC: int = 3600  # Redis tier
+    # With Redis, an in-process copy is trusted this long before re-reading
+    # Redis (other workers may have written to the thread)
+    MESSAGE_TAIL_CACHE_LOCAL_TTL_SEC: float = 5.0
+
+    # Write-behind message journal for chat turns (batched INSERTs; see
+    # app/core/message_journal.py for the loss window)
+    MESSAGE_JOURNAL_ENABLED: bool = True
+    MESSAGE_JOURNAL_FLUSH_MS: int = 10
+    MESSAGE_JOURNAL_BATCH_SIZE: int = 100
+    MESSAGE_JOURNAL_MAX_PENDING: int = 2000
+
     # CORS
     CORS_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000,http://100.77.67.1:3000"
     CORS_ALLOW_CREDENTIALS: bool = True
@@ -1,14 +1,17 @@
 # -*- coding: utf-8 -*-
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import Column, String, DateTime, Text, JSON, Integer, Float
+from sqlalchemy import Column, String, DateTime, Text, JSON, Integer, Float, Index
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 import uuid
-from typing import Tuple, Optional, List
+from typing import Tuple, Optional, List, Sequence
 from datetime import datetime
 import os
+import base64
 import importlib.util
 from app.core.config import settings
+from app.core.db_metrics import TimedAsyncQueuePool, db_metrics, instrument_engine
+from app.core.message_cache import CachedMessage, message_tail_cache
 from structlog import get_logger
 
 # For SQLite compatibility with UUID-like strings if not using PostgreSQL
@@ -51,6 +54,12 @@ Base = declarative_base()
 
 class MessageModel(Base):
     __tablename__ = "messages"
+    # History reads filter by project (and thread) and page by (timestamp, message_id);
+    # existing databases get these from scripts/migrate_message_indexes.py
+    __table_args__ = (
+        Index("ix_messages_project_thread_ts", "project_id", "thread_id", "timestamp", "message_id"),
+        Index("ix_messages_project_ts", "project_id", "timestamp", "message_id"),
+    )
 
     message_id = Column(GUID(), primary_key=True, default=uuid.uuid4)
     project_id = Column(GUID(), nullable=True)
@@ -139,6 +148,26 @@ class GrowthArtifactModel(Base):
     content_text = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
+class UploadedFileModel(Base):
+    """One stored upload per (project, content hash): the dedupe index for /files uploads"""
+    __tablename__ = "uploaded_files"
+    __table_args__ = (
+        Index("ux_uploaded_files_project_hash", "project_id", "file_hash", unique=True),
+    )
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    # upload_project_key(): normalized project UUID or "system-master" (never NULL,
+    # so the unique index also covers the system project)
+    project_id = Column(String(64), nullable=False)
+    file_hash = Column(String(64), nullable=False)
+    filename = Column(String(512), nullable=False)
+    storage_path = Column(String(1024), nullable=False)
+    file_size = Column(Integer, nullable=False)
+    parse_status = Column(String(20), nullable=False)  # parsed | empty | failed
+    message_id = Column(GUID(), nullable=True)  # ingestion message
+    user_id = Column(String(50), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 # Database URL Handling
 DATABASE_URL = (settings.DATABASE_URL or "").strip()
 IS_PRODUCTION = settings.ENVIRONMENT.lower() == "production"
@@ -205,6 +234,21 @@ def _resolve_database_url() -> str:
 
 DATABASE_URL = _resolve_database_url()
 
+
+def _pool_options(url: str) -> dict:
+    """Pool settings from Settings; in-memory SQLite keeps its single static connection."""
+    if url.startswith("sqlite") and ":memory:" in url:
+        return {}
+    return {
+        "poolclass": TimedAsyncQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SEC,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SEC,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
 # [UTF-8] Ensure all JSON serialization in DB uses ensure_ascii=False
 engine = create_async_engine(
     DATABASE_URL, 
@@ -213,10 +257,34 @@ engine = create_async_engine(
     connect_args={
         "check_same_thread": False,
         "timeout": 30
-    } if "sqlite" in DATABASE_URL else {}
+    } if "sqlite" in DATABASE_URL else {},
+    **_pool_options(DATABASE_URL)
 )
+instrument_engine(engine)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+
+async def get_db_session():
+    """
+    Request-scoped session (FastAPI dependency)
+
+    Dependencies and the endpoint of one request share this session instead
+    of opening one per operation. A connection is checked out on the first
+    statement and returned when the transaction ends, so read-only steps
+    that run before long (streaming) work should end their transaction.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+def database_metrics() -> dict:
+    """Pool checkout-wait, query-latency, pool-status and message journal metrics."""
+    from app.core.message_journal import message_journal
+    return {
+        **db_metrics.snapshot(engine.pool),
+        "message_journal": {**message_journal.stats, "pending": message_journal.pending},
+    }
+
 # [UTF-8] Force SQLite to use UTF-8 encoding
 from sqlalchemy import event
 @event.listens_for(engine.sync_engine, "connect")
@@ -257,6 +325,16 @@ def _normalize_project_id(project_id: str) -> Optional[uuid.UUID]:
         return uuid.uuid5(uuid.NAMESPACE_DNS, normalized)
 
 
+def _project_key(project_id: str) -> str:
+    project_uuid = _normalize_project_id(project_id)
+    return str(project_uuid) if project_uuid else "system-master"
+
+
+def upload_project_key(project_id: str) -> str:
+    """uploaded_files.project_id for a request's project_id"""
+    return _project_key(project_id)
+
+
 async def save_message_to_rdb(
     role: str, 
     content: str, 
@@ -292,29 +370,150 @@ async def save_message_to_rdb(
         )
         session.add(new_msg)
         await session.commit()
-        return (msg_id, thread_id)
+
+    await message_tail_cache.append(_project_key(project_id), CachedMessage.from_model(new_msg))
+    return (msg_id, thread_id)
+
+
+async def cache_committed_messages(messages: Sequence[MessageModel]) -> None:
+    """
+    Tail-cache write-through for messages committed without save_message_to_rdb()
+    (file uploads, project seeds); call it after the commit
+    """
+    entries = [(_project_key(m.project_id), CachedMessage.from_model(m)) for m in messages]
+    for project_key, message in entries:
+        message_tail_cache.append_local(project_key, message)
+    await message_tail_cache.publish(entries)
+
+def _filter_message_scope(query, project_id: str = None, thread_id: str = None):
+    from sqlalchemy import or_
+
+    # [Task 1.4/1.5 Update] system-master는 NULL로 저장되므로 명시적으로 필터링
+    if project_id == "system-master":
+        query = query.filter(or_(MessageModel.project_id == None, MessageModel.project_id == "system-master"))
+    elif project_id:
+        query = query.filter(MessageModel.project_id == _normalize_project_id(project_id))
+    if thread_id:
+        query = query.filter(MessageModel.thread_id == thread_id)
+    return query
+
+
+async def _flush_message_journal(project_id: str = None) -> None:
+    """Read-your-writes: the project's queued chat messages reach the RDB before its history is read."""
+    from app.core.message_journal import message_journal
+    await message_journal.flush_project(project_id)
+
 
 async def get_messages_from_rdb(project_id: str = None, thread_id: str = None, limit: int = 50):
+    """Newest `limit` messages, oldest first"""
     if thread_id in ["null", "undefined", ""]:
         thread_id = None
+    await _flush_message_journal(project_id)
         
-    from sqlalchemy import select, or_
+    from sqlalchemy import select
     async with AsyncSessionLocal() as session:
-        query = select(MessageModel)
-        
-        # [Task 1.4/1.5 Update] system-master는 NULL로 저장되므로 명시적으로 필터링
-        if project_id == "system-master":
-            query = query.filter(or_(MessageModel.project_id == None, MessageModel.project_id == "system-master"))
-        elif project_id:
-            p_id = _normalize_project_id(project_id)
-            query = query.filter(MessageModel.project_id == p_id)
-            
-        if thread_id:
-            query = query.filter(MessageModel.thread_id == thread_id)
-        
-        query = query.order_by(MessageModel.timestamp.asc()).limit(limit)
+        query = _filter_message_scope(select(MessageModel), project_id, thread_id)
+        query = query.order_by(MessageModel.timestamp.desc(), MessageModel.message_id.desc()).limit(limit)
         result = await session.execute(query)
-        return result.scalars().all()
+        return list(reversed(result.scalars().all()))
+
+
+async def get_recent_messages(project_id: str = None, thread_id: str = None, limit: int = 10):
+    """
+    Newest `limit` messages of a thread (thread_id None: whole project),
+    oldest first, served from the tail cache
+
+    Items are CachedMessage (MessageModel when the cache is bypassed); both
+    expose message_id, sender_role, content, timestamp and metadata_json.
+    """
+    if thread_id in ["null", "undefined", ""]:
+        thread_id = None
+    if not project_id:
+        return await get_messages_from_rdb(project_id, thread_id, limit)
+
+    async def load(n: int):
+        return await get_messages_from_rdb(project_id, thread_id, n)
+
+    return await message_tail_cache.get(_project_key(project_id), thread_id, limit, load)
+
+def encode_message_cursor(message: MessageModel) -> str:
+    """Opaque keyset cursor for a message: its (timestamp, message_id)."""
+    raw = f"{message.timestamp.isoformat()}|{message.message_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_message_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Raises:
+        ValueError: not a cursor from encode_message_cursor()
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        timestamp, message_id = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), str(uuid.UUID(message_id))
+    except Exception:
+        raise ValueError("Invalid message cursor")
+
+
+async def get_message_page(
+    project_id: str = None,
+    thread_id: str = None,
+    limit: int = 50,
+    before: str = None,
+    after: str = None
+) -> Tuple[List[MessageModel], Optional[str], Optional[str]]:
+    """
+    Keyset-paginated messages in chronological order
+
+    Without a cursor the newest `limit` messages are returned; `before`
+    pages towards older messages and `after` towards newer ones. Each page
+    is one index range scan on (project_id[, thread_id], timestamp,
+    message_id), however deep it is.
+
+    Returns:
+        (messages, before_cursor, after_cursor): before_cursor is set only
+        when older messages exist; after_cursor is the last message's
+        cursor (poll it for new messages), None for an empty page.
+
+    Raises:
+        ValueError: invalid cursor, or both cursors given
+    """
+    from sqlalchemy import select, or_, and_
+
+    if before and after:
+        raise ValueError("Use either before or after, not both")
+    if thread_id in ["null", "undefined", ""]:
+        thread_id = None
+    limit = max(1, limit)
+    await _flush_message_journal(project_id)
+
+    query = _filter_message_scope(select(MessageModel), project_id, thread_id)
+    ts, mid = MessageModel.timestamp, MessageModel.message_id
+    if after:
+        cursor_ts, cursor_id = decode_message_cursor(after)
+        query = query.where(and_(ts >= cursor_ts, or_(ts > cursor_ts, mid > cursor_id)))
+        query = query.order_by(ts.asc(), mid.asc())
+    else:
+        if before:
+            cursor_ts, cursor_id = decode_message_cursor(before)
+            query = query.where(and_(ts <= cursor_ts, or_(ts < cursor_ts, mid < cursor_id)))
+        query = query.order_by(ts.desc(), mid.desc())
+
+    async with AsyncSessionLocal() as session:
+        rows = list((await session.execute(query.limit(limit + 1))).scalars().all())
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not after:
+        rows.reverse()
+    if not rows:
+        return [], None, None
+    older = more if not after else True
+    return (
+        rows,
+        encode_message_cursor(rows[0]) if older else None,
+        encode_message_cursor(rows[-1]),
+    )
 
 # ===== [v3.2] Shadow Mining - Draft Storage =====
 
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+RDB connection pool and query instrumentation
+
+- checkout wait: time to obtain a connection from the pool (including
+  opening a new one), and checkouts that gave up after pool_timeout
+- query latency: every cursor execution on the engine; queries slower than
+  DB_SLOW_QUERY_MS are also logged
+- pool status: size / checked out / overflow at the time of the snapshot
+
+Exposed to super admins at GET /api/v1/admin/db/metrics.
+"""
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from structlog import get_logger
+
+from app.core.config import settings
+
+logger = get_logger(__name__)
+
+# Recent samples kept per series for percentiles
+SAMPLE_WINDOW = 1024
+
+
+class _Series:
+    __slots__ = ("count", "total_ms", "max_ms", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.samples: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+
+    def add(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.samples.append(elapsed_ms)
+
+    def summary(self) -> Dict[str, Any]:
+        recent = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))], 2) if recent else 0.0
+
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 2) if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max_ms, 2),
+        }
+
+
+class DatabaseMetrics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self._checkout = _Series()
+        self._queries = _Series()
+        self.checkout_timeouts = 0
+        self.slow_queries = 0
+
+    def record_checkout(self, elapsed_ms: float, timed_out: bool = False) -> None:
+        if timed_out:
+            self.checkout_timeouts += 1
+        else:
+            self._checkout.add(elapsed_ms)
+
+    def record_query(self, elapsed_ms: float, statement: str) -> None:
+        self._queries.add(elapsed_ms)
+        if elapsed_ms >= settings.DB_SLOW_QUERY_MS:
+            self.slow_queries += 1
+            logger.warning("Slow query", elapsed_ms=round(elapsed_ms, 1), statement=statement[:200])
+
+    def snapshot(self, pool=None) -> Dict[str, Any]:
+        data = {
+            "checkout_wait": {**self._checkout.summary(), "timeouts": self.checkout_timeouts},
+            "queries": {**self._queries.summary(), "slow": self.slow_queries},
+        }
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            data["pool"] = {
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+            }
+        return data
+
+
+db_metrics = DatabaseMetrics()
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            db_metrics.record_checkout((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        db_metrics.record_checkout((time.perf_counter() - started) * 1000)
+        return connection
+
+
+def instrument_engine(engine, metrics: Optional[DatabaseMetrics] = None) -> None:
+    """Record the latency of every statement executed on `engine` (sync or async)."""
+    metrics = metrics or db_metrics
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_query_started", None)
+        if started is not None:
+            metrics.record_query((time.perf_counter() - started) * 1000, statement)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Recent-message tail cache
+
+Keeps the newest MESSAGE_TAIL_CACHE_SIZE messages of each thread (and of
+each project's whole timeline) as a ring buffer, so the recent-history
+reads of a chat turn are memory lookups instead of repeated RDB queries.
+
+Two tiers:
+- in process: bounded deques in an LRU of MESSAGE_TAIL_CACHE_THREADS keys
+- Redis (when attached): capped lists `msgtail:{project}:{thread}` shared by
+  all backend workers; the in-process copy is then only trusted for
+  MESSAGE_TAIL_CACHE_LOCAL_TTL_SEC
+
+save_message_to_rdb() writes through after its commit, and so does every
+other path that inserts messages (cache_committed_messages()); the message
+journal appends in process when a message is queued and publishes to Redis
+after the batch commits. Only buffers that were loaded from the RDB are appended
+to (RPUSHX), and a load that raced with a write to the same key is returned
+but not cached, so a buffer never misses a message.
+"""
+import json
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from structlog import get_logger
+
+from app.core.config import settings
+
+logger = get_logger(__name__)
+
+# Thread key of a project's whole timeline (all threads)
+ALL_THREADS = "*"
+
+_RING_PREFIX = "msgtail:"
+_GENERATION_PREFIX = "msgtail:gen:"
+
+CacheKey = Tuple[str, str]
+
+
+@dataclass
+class CachedMessage:
+    """The MessageModel fields history readers use, detached from the session."""
+    message_id: str
+    project_id: Optional[str]
+    thread_id: Optional[str]
+    sender_role: str
+    content: str
+    timestamp: datetime
+    metadata_json: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_model(cls, message) -> "CachedMessage":
+        return cls(
+            message_id=str(message.message_id),
+            project_id=str(message.project_id) if message.project_id else None,
+            thread_id=message.thread_id,
+            sender_role=message.sender_role,
+            content=message.content,
+            timestamp=message.timestamp or datetime.utcnow(),
+            metadata_json=message.metadata_json,
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["timestamp"] = self.timestamp.isoformat()
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CachedMessage":
+        data = json.loads(raw)
+        data["timestamp"] = datetime.fromisoformat(data["timestamp"])
+        return cls(**data)
+
+
+def ring_key(project_key: str, thread_id: str) -> str:
+    return f"{_RING_PREFIX}{project_key}:{thread_id}"
+
+
+def generation_key(project_key: str, thread_id: str) -> str:
+    """Write counter; a Redis fill is dropped if it moved during the RDB load."""
+    return f"{_GENERATION_PREFIX}{project_key}:{thread_id}"
+
+
+class _Ring:
+    __slots__ = ("messages", "loaded_at")
+
+    def __init__(self, messages: Sequence[CachedMessage], size: int):
+        self.messages: Deque[CachedMessage] = deque(messages, maxlen=size)
+        self.loaded_at = time.monotonic()
+
+
+class _Load:
+    """An in-flight RDB load; set stale by a write to the same key."""
+    __slots__ = ("stale",)
+
+    def __init__(self):
+        self.stale = False
+
+
+class MessageTailCache:
+    def __init__(self, size: Optional[int] = None, max_threads: Optional[int] = None):
+        self.size = size or settings.MESSAGE_TAIL_CACHE_SIZE
+        self.max_threads = max_threads or settings.MESSAGE_TAIL_CACHE_THREADS
+        self.redis = None
+        self._rings: "OrderedDict[CacheKey, _Ring]" = OrderedDict()
+        self._loads: Dict[CacheKey, List[_Load]] = {}
+
+    def attach_redis(self, redis_client) -> None:
+        """Share buffers through Redis (None: in-process only)."""
+        self.redis = redis_client
+        self._rings.clear()
+
+    async def get(
+        self,
+        project_key: str,
+        thread_id: Optional[str],
+        limit: int,
+        loader: Callable[[int], Awaitable[Sequence[Any]]],
+    ) -> List[Any]:
+        """
+        Newest `limit` messages of the thread (ALL_THREADS/None: whole
+        project), oldest first
+
+        `loader(n)` returns the newest n messages from the RDB, oldest first;
+        it is called on a miss, or directly when `limit` exceeds the buffer.
+        """
+        if limit > self.size:
+            return list(await loader(limit))
+        key = (project_key, thread_id or ALL_THREADS)
+
+        ring = self._local(key)
+        if ring is not None:
+            return self._tail(ring.messages, limit)
+
+        generation = None
+        if self.redis is not None:
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.lrange(ring_key(*key), 0, -1)
+                    pipe.get(generation_key(*key))
+                    raw, generation = await pipe.execute()
+                if raw:
+                    messages = [CachedMessage.from_json(item) for item in raw]
+                    self._store(key, messages)
+                    return self._tail(messages, limit)
+            except Exception as e:
+                logger.warning("Message tail cache: Redis read failed", error=str(e))
+                generation = None
+
+        load = _Load()
+        self._loads.setdefault(key, []).append(load)
+        try:
+            rows = await loader(self.size)
+        finally:
+            loads = self._loads[key]
+            loads.remove(load)
+            if not loads:
+                del self._loads[key]
+
+        messages = [CachedMessage.from_model(row) for row in rows]
+        if not load.stale:
+            self._store(key, messages)
+            if self.redis is not None and messages:
+                await self._fill_redis(key, messages, generation)
+        return self._tail(messages, limit)
+
+    async def append(self, project_key: str, message: CachedMessage) -> None:
+        """Write-through of a committed message to its thread and project buffers."""
+        self.append_local(project_key, message)
+        await self.publish([(project_key, message)])
+
+    def append_local(self, project_key: str, message: CachedMessage) -> None:
+        """In-process half of append(); takes effect before the caller's next await."""
+        for key in self._keys(project_key, message):
+            ring = self._rings.get(key)
+            if ring is not None:
+                ring.messages.append(message)
+            for load in self._loads.get(key, ()):
+                load.stale = True
+
+    async def publish(self, entries: Sequence[Tuple[str, CachedMessage]]) -> None:
+        """Redis half of append() for committed messages, one round-trip per batch."""
+        if self.redis is None or not entries:
+            return
+        ttl = settings.MESSAGE_TAIL_CACHE_TTL_SEC
+        touched = set()
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for project_key, message in entries:
+                    raw = message.to_json()
+                    for key in self._keys(project_key, message):
+                        touched.add(ring_key(*key))
+                        pipe.incr(generation_key(*key))
+                        pipe.expire(generation_key(*key), ttl)
+                        pipe.rpushx(ring_key(*key), raw)
+                        pipe.ltrim(ring_key(*key), -self.size, -1)
+                await pipe.execute()
+        except Exception as e:
+            # A buffer that missed these messages must not be served again
+            logger.warning("Message tail cache: Redis write failed", error=str(e))
+            try:
+                await self.redis.delete(*touched)
+            except Exception:
+                pass
+
+    @staticmethod
+    def _keys(project_key: str, message: CachedMessage) -> List[CacheKey]:
+        keys = [(project_key, ALL_THREADS)]
+        if message.thread_id:
+            keys.insert(0, (project_key, message.thread_id))
+        return keys
+
+    def _local(self, key: CacheKey) -> Optional[_Ring]:
+        ring = self._rings.get(key)
+        if ring is None:
+            return None
+        if self.redis is not None and time.monotonic() - ring.loaded_at > settings.MESSAGE_TAIL_CACHE_LOCAL_TTL_SEC:
+            del self._rings[key]
+            return None
+        self._rings.move_to_end(key)
+        return ring
+
+    def _store(self, key: CacheKey, messages: Sequence[CachedMessage]) -> None:
+        self._rings[key] = _Ring(messages, self.size)
+        self._rings.move_to_end(key)
+        while len(self._rings) > self.max_threads:
+            self._rings.popitem(last=False)
+
+    async def _fill_redis(self, key: CacheKey, messages: Sequence[CachedMessage], generation) -> None:
+        from redis.exceptions import WatchError
+
+        gen_key = generation_key(*key)
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                await pipe.watch(gen_key)
+                if await pipe.get(gen_key) != generation:
+                    return
+                pipe.multi()
+                pipe.delete(ring_key(*key))
+                pipe.rpush(ring_key(*key), *(m.to_json() for m in messages[-self.size:]))
+                pipe.expire(ring_key(*key), settings.MESSAGE_TAIL_CACHE_TTL_SEC)
+                await pipe.execute()
+        except WatchError:
+            pass
+        except Exception as e:
+            logger.warning("Message tail cache: Redis fill failed", error=str(e))
+
+    @staticmethod
+    def _tail(messages: Sequence[CachedMessage], limit: int) -> List[CachedMessage]:
+        messages = list(messages)
+        return messages[-limit:] if limit > 0 else []
+
+
+message_tail_cache = MessageTailCache()
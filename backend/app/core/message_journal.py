@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Write-behind message journal
+
+Chat turns persist their messages through message_journal.append(): the
+message id, thread id and timestamp are assigned immediately and the row is
+buffered in memory; a background task writes buffered rows with one
+multi-row INSERT per batch, MESSAGE_JOURNAL_FLUSH_MS after the first row or
+as soon as MESSAGE_JOURNAL_BATCH_SIZE rows are waiting. The RDB stays the
+source of truth:
+
+- RDB readers of message history flush first when their project has
+  queued rows, and the knowledge worker when its message is still queued
+  (read-your-writes); the tail cache already has queued rows
+- close() flushes everything on shutdown
+- loss window: rows not yet flushed when the process dies, normally at most
+  MESSAGE_JOURNAL_FLUSH_MS worth; while the RDB is failing, up to
+  MESSAGE_JOURNAL_MAX_PENDING rows, beyond which append() waits for a flush
+
+Without a running journal (scripts, tests, MESSAGE_JOURNAL_ENABLED=false)
+append() writes synchronously through save_message_to_rdb().
+"""
+import asyncio
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+from structlog import get_logger
+
+from app.core import database
+from app.core.config import settings
+from app.core.message_cache import CachedMessage, message_tail_cache
+
+logger = get_logger(__name__)
+
+# A batch that failed this many times is retried row by row to find bad rows
+MAX_BATCH_ATTEMPTS = 3
+RETRY_DELAY_SEC = 0.5
+
+
+class MessageJournal:
+    def __init__(self):
+        # (tail cache project key, messages row) in append order
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        # What is queued, for readers that only need to wait for their rows
+        self._pending_ids: Set[str] = set()
+        self._pending_projects: Counter = Counter()
+        self._attempts = 0
+        self._lock = asyncio.Lock()
+        self._wake = asyncio.Event()
+        self._batch_ready = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"appended": 0, "flushed": 0, "batches": 0, "failures": 0, "dropped": 0}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def is_pending(self, message_id) -> bool:
+        return str(message_id) in self._pending_ids
+
+    async def flush_message(self, message_id) -> bool:
+        """flush() if message_id is still queued (e.g. before looking it up)."""
+        return await self.flush() if self.is_pending(message_id) else True
+
+    async def flush_project(self, project_id: str = None) -> bool:
+        """flush() if the project has queued rows (before reading its history from the RDB)."""
+        return await self.flush() if self._pending_projects[database._project_key(project_id)] else True
+
+    def start(self) -> None:
+        if self._task is None and settings.MESSAGE_JOURNAL_ENABLED:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the flush loop and write everything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            if not await self.flush():
+                logger.error("Message journal: unflushed rows at shutdown", count=len(self._pending))
+                break
+
+    async def append(
+        self,
+        role: str,
+        content: str,
+        project_id: str = None,
+        thread_id: str = None,
+        metadata: dict = None
+    ) -> Tuple[uuid.UUID, str]:
+        """
+        Queue a message for persistence; same arguments and result as
+        save_message_to_rdb(), without waiting for the RDB
+        """
+        if self._task is None:
+            return await database.save_message_to_rdb(role, content, project_id, thread_id, metadata)
+
+        if thread_id in ["null", "undefined", ""]:
+            thread_id = None
+        if thread_id is None:
+            thread_id = f"thread-{uuid.uuid4()}"
+        while len(self._pending) >= settings.MESSAGE_JOURNAL_MAX_PENDING:
+            # RDB is behind: hold the caller rather than grow the loss window
+            self._drained.clear()
+            await self._drained.wait()
+
+        msg_id = uuid.uuid4()
+        row = {
+            "message_id": msg_id,
+            "project_id": database._normalize_project_id(project_id),
+            "thread_id": thread_id,
+            "sender_role": role,
+            "content": content,
+            "timestamp": datetime.utcnow(),
+            "metadata_json": metadata,
+        }
+        project_key = database._project_key(project_id)
+        self._pending.append((project_key, row))
+        self._pending_ids.add(str(msg_id))
+        self._pending_projects[project_key] += 1
+        self.stats["appended"] += 1
+        message_tail_cache.append_local(project_key, _cached(row))
+
+        self._wake.set()
+        if len(self._pending) >= settings.MESSAGE_JOURNAL_BATCH_SIZE:
+            self._batch_ready.set()
+        return (msg_id, thread_id)
+
+    async def flush(self) -> bool:
+        """
+        Write every row queued so far
+
+        Returns:
+            False if the RDB write failed (rows stay queued for a retry)
+        """
+        if not self._pending:
+            return True
+        async with self._lock:
+            while self._pending:
+                batch = self._pending[:settings.MESSAGE_JOURNAL_BATCH_SIZE]
+                rows = [row for _, row in batch]
+                started = time.perf_counter()
+                try:
+                    await self._insert(rows)
+                    self._take(len(batch))
+                    written = batch
+                except Exception as e:
+                    self.stats["failures"] += 1
+                    self._attempts += 1
+                    logger.warning("Message journal: batch insert failed", rows=len(rows),
+                                   attempt=self._attempts, error=str(e))
+                    if self._attempts < MAX_BATCH_ATTEMPTS:
+                        return False
+                    try:
+                        written = await self._insert_each(batch)
+                    except Exception:
+                        # RDB unavailable rather than bad rows: keep everything queued
+                        return False
+                self._attempts = 0
+                self.stats["flushed"] += len(written)
+                self.stats["batches"] += 1
+                logger.debug("Message journal: batch flushed", rows=len(written),
+                             elapsed_ms=round((time.perf_counter() - started) * 1000, 1))
+                await message_tail_cache.publish([(key, _cached(row)) for key, row in written])
+            self._drained.set()
+        return True
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        async with database.AsyncSessionLocal() as session:
+            await session.execute(insert(database.MessageModel), rows)
+            await session.commit()
+
+    async def _insert_each(self, batch: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Row-by-row fallback for a batch that keeps failing
+
+        Rows the RDB rejects (constraint/data errors) are dropped so they do
+        not block the journal; any other error propagates. Each handled row
+        leaves the queue as it goes, so a retry does not write it twice.
+        """
+        written = []
+        for entry in batch:
+            row = entry[1]
+            try:
+                await self._insert([row])
+                written.append(entry)
+            except (IntegrityError, DataError) as e:
+                self.stats["dropped"] += 1
+                logger.error("Message journal: dropping message", message_id=str(row["message_id"]), error=str(e))
+            self._take(1)
+        return written
+
+    def _take(self, count: int) -> None:
+        """Drop the first `count` queued rows (appends only add to the end)."""
+        for project_key, row in self._pending[:count]:
+            self._pending_ids.discard(str(row["message_id"]))
+            self._pending_projects[project_key] -= 1
+            if not self._pending_projects[project_key]:
+                del self._pending_projects[project_key]
+        del self._pending[:count]
+
+    async def _run(self) -> None:
+        interval = settings.MESSAGE_JOURNAL_FLUSH_MS / 1000
+        while True:
+            await self._wake.wait()
+            if len(self._pending) < settings.MESSAGE_JOURNAL_BATCH_SIZE:
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), timeout=interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wake.clear()
+            self._batch_ready.clear()
+            try:
+                flushed = await self.flush()
+            except Exception as e:
+                logger.error("Message journal: flush loop error", error=str(e))
+                flushed = False
+            if not flushed:
+                await asyncio.sleep(RETRY_DELAY_SEC)
+            if self._pending:
+                self._wake.set()
+
+
+def _cached(row: Dict[str, Any]) -> CachedMessage:
+    return CachedMessage(
+        message_id=str(row["message_id"]),
+        project_id=str(row["project_id"]) if row["project_id"] else None,
+        thread_id=row["thread_id"],
+        sender_role=row["sender_role"],
+        content=row["content"],
+        timestamp=row["timestamp"],
+        metadata_json=row["metadata_json"],
+    )
+
+
+message_journal = MessageJournal()
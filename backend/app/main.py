@@ -27,9 +27,13 @@ from structlog import get_logger
 from app.core.config import settings
 from app.core.database import AsyncSessionLocal, init_db
 from app.core.logging_config import setup_logging
+from app.core.message_cache import message_tail_cache
+from app.core.message_journal import message_journal
 from app.core.neo4j_client import neo4j_client
 from app.services.job_manager import JobManager
+from app.services.orchestration_events import OrchestrationEventHub
 from app.services.knowledge_service import knowledge_worker
+from app.services.document_parser_service import document_parser_service
 
 # Setup logging before any other imports that might use it
 setup_logging()
@@ -113,23 +117,41 @@ async def lifespan(app: FastAPI):
     # Start Knowledge Worker
     worker_task = asyncio.create_task(knowledge_worker())
 
+    # Start lease reaper (re-queues jobs whose worker died mid-lease)
+    reaper_task = None
+    if not isinstance(redis_client, _InMemoryFallbackRedis):
+        reaper_task = asyncio.create_task(job_manager.lease_reaper_loop())
+
     # Store in app state
     app.state.redis = redis_client
     app.state.redis_is_fallback = isinstance(redis_client, _InMemoryFallbackRedis)
     app.state.job_manager = job_manager
     app.state.knowledge_worker = worker_task
+    app.state.lease_reaper = reaper_task
+    # One shared Redis reader fans orchestration events out to all WebSockets
+    app.state.event_hub = OrchestrationEventHub(redis_client)
+    # Recent-message buffers are shared between workers through Redis
+    if not app.state.redis_is_fallback:
+        message_tail_cache.attach_redis(redis_client)
+    # Chat messages are written behind the response in batches
+    message_journal.start()
 
     logger.info("Application startup complete")
     yield
 
     # Shutdown
     logger.info("Shutting down application")
-    if worker_task:
-        worker_task.cancel()
-        try:
-            await worker_task
-        except asyncio.CancelledError:
-            pass
+    await message_journal.close()
+    for task in (worker_task, reaper_task):
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    await app.state.event_hub.close()
+    document_parser_service.shutdown()
+    message_tail_cache.attach_redis(None)
     await redis_client.close()
     logger.info("Redis connection closed")
 
@@ -212,7 +234,7 @@ app.add_middleware(
     allow_credentials=settings.CORS_ALLOW_CREDENTIALS,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["X-Request-Id"],
+    expose_headers=["X-Request-Id", "X-Before-Cursor", "X-After-Cursor"],
 )
 
 # Include routers
@@ -97,7 +97,7 @@ class ChatRequest(BaseModel):
     history: List[ChatMessage] = Field(default_factory=list)
     project_id: Optional[str] = None
     thread_id: Optional[str] = None
-    worker_status: Optional[Dict[str, Any]] = None # Frontend's worker status context
+    worker_status: Optional[Dict[str, Any]] = None # Ignored: the backend reads its worker registry
     mode: ConversationMode = Field(default=ConversationMode.NATURAL, description="Current conversation mode")
 
 class ChatResponse(BaseModel):
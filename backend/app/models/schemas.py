@@ -179,6 +179,13 @@ class Job(BaseModel):
         }
 
 
+class ResultBlobRef(BaseModel):
+    """Compressed job output kept in the result blob store"""
+    sha256: str = Field(..., pattern=r"^[0-9a-f]{64}$")
+    size: int = Field(..., ge=1)
+    encoding: Literal["zstd", "gzip"]
+
+
 class JobResult(BaseModel):
     """Job execution result"""
     status: JobStatus
@@ -186,6 +193,26 @@ class JobResult(BaseModel):
     error: Optional[str] = None
     execution_time_ms: Optional[int] = None
     metrics: Optional[Dict[str, Any]] = None
+    # Large outputs: summary + blob reference instead of `output`
+    output_summary: Optional[Dict[str, Any]] = None
+    output_ref: Optional[ResultBlobRef] = None
+    # FAILED only: False when running the job again would fail the same way
+    retryable: bool = True
+
+
+class JobAcknowledgeBatch(BaseModel):
+    """Bulk acknowledge request from a worker"""
+    job_ids: List[UUID] = Field(..., min_length=1)
+
+
+class JobResultSubmission(JobResult):
+    """One entry of a bulk result upload"""
+    job_id: UUID
+
+
+class JobResultBatch(BaseModel):
+    """Bulk result upload from a worker"""
+    results: List[JobResultSubmission] = Field(..., min_length=1)
 
 
 class JobStatusResponse(BaseModel):
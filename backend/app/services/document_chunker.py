@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Token-sized chunking for document ingestion
+
+Sections streamed from the document parser are packed line by line into
+chunks of about `chunk_tokens` tokens; each chunk repeats the last
+`overlap_tokens` worth of lines from the previous one so facts spanning a
+boundary are seen whole at least once. Chunks carry their character range
+in the parsed text and the page range they came from, which is stored as
+provenance on the extracted knowledge. Works on an iterator, so only the
+current chunk is held in memory.
+"""
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+from structlog import get_logger
+
+from app.services.document_parser_service import DocumentSection
+
+logger = get_logger(__name__)
+
+TokenCounter = Callable[[str], int]
+
+_LINE_RE = re.compile(r"[^\n]*\n|[^\n]+")
+
+
+@dataclass
+class DocumentChunk:
+    index: int
+    text: str
+    start: int
+    end: int
+    page_start: int
+    page_end: int
+    tokens: int
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:  # not installed, or the BPE file cannot be fetched offline
+        logger.info("tiktoken unavailable, estimating token counts", error=str(e))
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token for ASCII, one per character otherwise (Hangul, CJK)."""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _split_long_line(line: str, tokens: int, limit: int) -> List[str]:
+    """Cut a line that alone exceeds the chunk size into roughly limit-token pieces."""
+    pieces = -(-tokens // limit)
+    size = max(1, -(-len(line) // pieces))
+    return [line[i:i + size] for i in range(0, len(line), size)]
+
+
+def chunk_sections(
+    sections: Iterable[DocumentSection],
+    chunk_tokens: int,
+    overlap_tokens: int,
+    counter: Optional[TokenCounter] = None,
+) -> Iterator[DocumentChunk]:
+    """
+    Pack section lines into overlapping chunks of at most chunk_tokens
+
+    Lines are never split unless a single line is larger than a chunk.
+    """
+    if chunk_tokens <= 0:
+        raise ValueError("chunk_tokens must be positive")
+    overlap_tokens = max(0, min(overlap_tokens, chunk_tokens // 2))
+    counter = counter or count_tokens
+
+    # (start, end, page, tokens, text) of the lines in the current chunk
+    window: List[Tuple[int, int, int, int, str]] = []
+    window_tokens = 0
+    emitted_end = 0
+    index = 0
+
+    def emit() -> DocumentChunk:
+        return DocumentChunk(
+            index=index,
+            text="".join(unit[4] for unit in window),
+            start=window[0][0],
+            end=window[-1][1],
+            page_start=window[0][2],
+            page_end=window[-1][2],
+            tokens=window_tokens,
+        )
+
+    for section in sections:
+        for match in _LINE_RE.finditer(section.text):
+            line = match.group(0)
+            line_start = section.start + match.start()
+            line_tokens = counter(line)
+            parts = [line] if line_tokens <= chunk_tokens else _split_long_line(line, line_tokens, chunk_tokens)
+            for part in parts:
+                part_tokens = line_tokens if len(parts) == 1 else counter(part)
+                if window and window_tokens + part_tokens > chunk_tokens:
+                    chunk = emit()
+                    emitted_end = chunk.end
+                    yield chunk
+                    index += 1
+                    # Carry trailing lines over as overlap
+                    kept: List[Tuple[int, int, int, int, str]] = []
+                    kept_tokens = 0
+                    for unit in reversed(window):
+                        if kept_tokens + unit[3] > overlap_tokens or kept_tokens + unit[3] + part_tokens > chunk_tokens:
+                            break
+                        kept.insert(0, unit)
+                        kept_tokens += unit[3]
+                    window, window_tokens = kept, kept_tokens
+                window.append((line_start, line_start + len(part), section.page, part_tokens, part))
+                window_tokens += part_tokens
+                line_start += len(part)
+
+    # Skip a final window that is nothing but overlap already sent
+    if window and window[-1][1] > emitted_end:
+        yield emit()
@@ -1,13 +1,309 @@
-﻿import os
+﻿"""
+Document parsing for uploads
+
+Loaders for binary formats (PDF, Office, HWP) run in a process pool so a
+large document never blocks the event loop; each parse has a timeout and
+the worker processes a memory limit. Text formats are read in a thread.
+Parsed text is cached on disk by file hash, so re-uploads and
+re-ingestion of the same content skip parsing. Per-extension metrics are
+available from metrics().
+
+For ingestion, iter_sections() streams the parsed text back a page (or
+heading-delimited section) at a time from the cache or the source file
+instead of holding the whole document in memory.
+"""
+import asyncio
+import multiprocessing
+import os
 import tempfile
+import time
+import uuid
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from fastapi import HTTPException, UploadFile
+from structlog import get_logger
+
+from app.core.config import settings
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limit for parser workers
+    resource = None
+
+logger = get_logger(__name__)
+
+# Bump when a loader changes so stale cached text is not reused
+PARSER_VERSION = "v3"
+
+# Cheap to read in-process; everything else goes to the pool
+TEXT_EXTENSIONS = (".txt", ".md", ".csv")
+
+# Separates pages in parsed text (v2+), so ingestion can keep page provenance
+PAGE_BREAK = "\f"
+
+# Sections without page breaks or headings are cut at a line boundary past this
+SECTION_MAX_CHARS = 8000
+
+
+@dataclass
+class DocumentSection:
+    """A page (or heading-delimited part of one) of parsed text"""
+    index: int
+    page: int
+    start: int  # character offset in the parsed text
+    text: str
+
+
+def iter_text_sections(lines: Iterable[str], max_chars: int = SECTION_MAX_CHARS) -> Iterator[DocumentSection]:
+    """
+    Group lines of parsed text into sections; a new section starts at each
+    page break, at markdown headings and once max_chars is reached.
+    """
+    index = 0
+    page = 1
+    offset = 0
+    start = 0
+    buf: List[str] = []
+    size = 0
+    for line in lines:
+        for i, piece in enumerate(line.split(PAGE_BREAK)):
+            if i > 0:
+                if buf:
+                    yield DocumentSection(index, page, start, "".join(buf))
+                    index += 1
+                    buf, size = [], 0
+                page += 1
+                offset += len(PAGE_BREAK)
+            if not piece:
+                continue
+            if buf and (piece.startswith("#") or size + len(piece) > max_chars):
+                yield DocumentSection(index, page, start, "".join(buf))
+                index += 1
+                buf, size = [], 0
+            if not buf:
+                start = offset
+            buf.append(piece)
+            size += len(piece)
+            offset += len(piece)
+    if buf:
+        yield DocumentSection(index, page, start, "".join(buf))
+
+
+def _limit_worker_memory(limit_mb: int) -> None:
+    """Process pool initializer: cap the worker's address space."""
+    if resource is None or limit_mb <= 0:
+        return
+    limit = limit_mb * 1024 * 1024
+    try:
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ValueError, OSError):
+        pass
+
+
+def _parse_in_worker(file_path: str, suffix: str) -> Tuple[str, Any, Any]:
+    """
+    Pool entry point; errors come back as values since HTTPException does
+    not survive pickling.
+    """
+    try:
+        return ("ok", DocumentParserService()._parse_file(file_path, suffix), None)
+    except HTTPException as e:
+        return ("error", e.status_code, e.detail)
+    except MemoryError:
+        return ("error", 500, "Document parsing failed: memory limit exceeded")
 
 
 class DocumentParserService:
     """Parse uploaded documents with fallback strategies."""
     supported_extensions = [".pdf", ".docx", ".xlsx", ".xls", ".excel", ".ppt", ".pptx", ".hwp", ".hwpx", ".txt", ".md", ".csv"]
 
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(cache_dir or settings.PARSE_CACHE_DIR) / PARSER_VERSION
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Pools torn down on purpose: their other calls are re-run once
+        self._retired: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+        # One per pool worker, so a call's timeout starts when a worker is free
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=settings.PARSER_MAX_WORKERS,
+                # spawn: never fork the server's event loop and threads
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_limit_worker_memory,
+                initargs=(settings.PARSER_MEMORY_LIMIT_MB,),
+            )
+        return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor) -> None:
+        """Kill a pool with a stuck or dead worker; the next parse starts a fresh one."""
+        if self._pool is pool:
+            self._pool = None
+        self._retired.add(pool)
+        # ProcessPoolExecutor cannot cancel a running call, so terminate its workers
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def _cache_path(self, file_hash: str, suffix: str) -> Path:
+        return self.cache_dir / file_hash[:2] / f"{file_hash}{suffix}.txt"
+
+    def _read_cache(self, path: Path) -> Optional[str]:
+        try:
+            return path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+
+    def _write_cache(self, path: Path, text: str) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _record(self, suffix: str, outcome: str, elapsed_ms: float = 0.0) -> None:
+        stats = self._stats.setdefault(suffix, {
+            "parsed": 0, "failed": 0, "timeouts": 0, "cache_hits": 0, "total_ms": 0.0, "max_ms": 0.0,
+        })
+        stats[outcome] += 1
+        if outcome in ("parsed", "failed", "timeouts"):
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and per-extension parse counts/times."""
+        extensions = {}
+        for suffix, stats in sorted(self._stats.items()):
+            runs = stats["parsed"] + stats["failed"] + stats["timeouts"]
+            extensions[suffix] = {
+                **{key: int(value) for key, value in stats.items() if key not in ("total_ms", "max_ms")},
+                "avg_ms": round(stats["total_ms"] / runs, 1) if runs else 0.0,
+                "max_ms": round(stats["max_ms"], 1),
+            }
+        return {
+            "pending": self._pending,
+            "queue_depth": max(0, self._pending - settings.PARSER_MAX_WORKERS),
+            "workers": settings.PARSER_MAX_WORKERS,
+            "extensions": extensions,
+        }
+
+    async def _run_in_pool(self, file_path: str, suffix: str) -> str:
+        """
+        Parse in the process pool; PARSER_TIMEOUT_SEC starts once a worker
+        is free (waiting behind other parses does not count)
+
+        A timed-out call that is running stalls its worker, so the pool is
+        torn down; the other calls it was running are re-run once on a
+        fresh pool instead of failing.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(1, settings.PARSER_MAX_WORKERS))
+        async with self._slots:
+            for attempt in range(2):
+                pool = self._get_pool()
+                future = pool.submit(_parse_in_worker, file_path, suffix)
+                try:
+                    status, value, detail = await asyncio.wait_for(
+                        asyncio.wrap_future(future), timeout=settings.PARSER_TIMEOUT_SEC
+                    )
+                    break
+                except asyncio.TimeoutError:
+                    # cancel() only fails for a call a worker is running
+                    if not future.cancel():
+                        self._reset_pool(pool)
+                    raise HTTPException(
+                        status_code=504,
+                        detail=f"Document parsing timed out after {settings.PARSER_TIMEOUT_SEC}s",
+                    )
+                except BrokenProcessPool:
+                    if attempt == 0 and pool in self._retired:
+                        logger.warning("Parser pool was reset under this parse; retrying", suffix=suffix)
+                        continue
+                    self._reset_pool(pool)
+                    raise HTTPException(status_code=500, detail="Document parsing failed: parser process died")
+        if status == "error":
+            raise HTTPException(status_code=value, detail=detail)
+        return value
+
+    async def parse(self, file_path: str, suffix: str, file_hash: Optional[str] = None) -> str:
+        """
+        Extract text without blocking the event loop
+
+        With file_hash, text parsed earlier from the same content is
+        returned from the cache and fresh results are cached.
+
+        Raises:
+            HTTPException: unsupported type, parse failure (500) or timeout (504)
+        """
+        suffix = suffix.lower()
+        cache_path = self._cache_path(file_hash, suffix) if file_hash else None
+        if cache_path is not None:
+            cached = await asyncio.to_thread(self._read_cache, cache_path)
+            if cached is not None:
+                self._record(suffix, "cache_hits")
+                return cached
+
+        started = time.perf_counter()
+        self._pending += 1
+        try:
+            if suffix in TEXT_EXTENSIONS:
+                text = await asyncio.to_thread(self._parse_file, file_path, suffix)
+            else:
+                text = await self._run_in_pool(file_path, suffix)
+        except HTTPException as e:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._record(suffix, "timeouts" if e.status_code == 504 else "failed", elapsed_ms)
+            raise
+        finally:
+            self._pending -= 1
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(suffix, "parsed", elapsed_ms)
+        logger.info("Document parsed", suffix=suffix, elapsed_ms=round(elapsed_ms, 1), chars=len(text or ""))
+        if cache_path is not None and suffix not in TEXT_EXTENSIONS:
+            try:
+                await asyncio.to_thread(self._write_cache, cache_path, text or "")
+            except OSError as e:
+                logger.warning("Failed to cache parsed text", error=str(e))
+        return text
+
+    async def section_source(self, file_path: str, suffix: str, file_hash: Optional[str]) -> Path:
+        """
+        File to stream parsed text from: the source itself for text formats,
+        otherwise the parse cache (parsing first on a miss)
+
+        Raises:
+            HTTPException: parse failure, or no cached text to stream from
+        """
+        suffix = suffix.lower()
+        if suffix in TEXT_EXTENSIONS:
+            return Path(file_path)
+        if not file_hash:
+            raise HTTPException(status_code=400, detail="file_hash is required to stream a parsed document")
+        cache_path = self._cache_path(file_hash, suffix)
+        if not await asyncio.to_thread(cache_path.exists):
+            await self.parse(file_path, suffix, file_hash=file_hash)
+            if not await asyncio.to_thread(cache_path.exists):
+                raise HTTPException(status_code=500, detail="Parsed text could not be cached for streaming")
+        return cache_path
+
+    def iter_sections(self, source: Path, max_chars: int = SECTION_MAX_CHARS) -> Iterator[DocumentSection]:
+        """Stream sections from a section_source() file (blocking; run in a thread)."""
+        with open(source, "r", encoding="utf-8", errors="ignore") as f:
+            yield from iter_text_sections(f, max_chars)
+
     async def parse_upload_file(self, file: UploadFile) -> str:
         if not file.filename:
             raise HTTPException(status_code=400, detail="Filename missing")
@@ -21,7 +317,7 @@ class DocumentParserService:
             tmp_path = tmp.name
 
         try:
-            return self._parse_file(tmp_path, suffix)
+            return await self.parse(tmp_path, suffix)
         finally:
             if os.path.exists(tmp_path):
                 os.remove(tmp_path)
@@ -37,7 +333,7 @@ class DocumentParserService:
 
                 loader = PyPDFLoader(file_path)
                 docs = loader.load()
-                return "\n".join([doc.page_content for doc in docs])
+                return PAGE_BREAK.join([doc.page_content for doc in docs])
 
             if suffix == ".docx":
                 from langchain_community.document_loaders import Docx2txtLoader
@@ -59,16 +355,18 @@ class DocumentParserService:
 
                     loader = UnstructuredPowerPointLoader(file_path)
                     docs = loader.load()
-                    return "\n".join([doc.page_content for doc in docs])
+                    return PAGE_BREAK.join([doc.page_content for doc in docs])
                 except Exception:
                     with open(file_path, "rb") as f:
                         return f.read().decode("utf-8", errors="ignore")
 
             if suffix in [".hwp", ".hwpx"]:
-                # Best effort fallback. Dedicated parser can be added later.
-                with open(file_path, "rb") as f:
-                    raw = f.read().decode("utf-8", errors="ignore")
-                return raw if raw.strip() else "[HWP/HWPX content could not be fully parsed]"
+                from app.services.hwp_extractor import HwpFormatError, iter_paragraphs
+
+                try:
+                    return "\n".join(iter_paragraphs(file_path))
+                except HwpFormatError as e:
+                    raise HTTPException(status_code=422, detail=f"Document parsing failed: {e}")
 
             if suffix in [".txt", ".md", ".csv"]:
                 with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
@@ -23,11 +23,11 @@ async def detect_topic_shift_with_context(ctx: StreamContext) -> bool:
         False: 연속된 대화 또는 판단 불가
     """
     try:
-        from app.core.database import get_messages_from_rdb
+        from app.core.database import get_recent_messages
         from app.core.config import settings
         
         # 1. 이전 3~5개 대화 가져오기
-        recent_messages = await get_messages_from_rdb(
+        recent_messages = await get_recent_messages(
             ctx.project_id, 
             ctx.thread_id, 
             limit=5
@@ -11,8 +11,9 @@ if sys.stdout.encoding is None or sys.stdout.encoding.lower() != 'utf-8':
 if sys.stderr.encoding is None or sys.stderr.encoding.lower() != 'utf-8':
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, AsyncIterator, Sequence, Set, Tuple
 from uuid import uuid4
+import asyncio
 import time
 import hashlib
 import json
@@ -23,6 +24,24 @@ from structlog import get_logger
 
 from app.core.config import settings
 from app.core.security import sign_job_payload, SecurityError
+from app.services.job_scheduler import (
+    WeightedRoundRobin,
+    capability_id,
+    deferred_capability_ids,
+    matching_capability_ids,
+    parse_tenant_weights,
+    queue_score,
+    worker_rank,
+)
+from app.services.result_store import (
+    LocalResultBlobStore,
+    ResultBlobError,
+    ResultTooLarge,
+    compress,
+    decompress,
+    encode_output,
+    summarize_output,
+)
 from app.models.schemas import (
     Job,
     JobCreate,
@@ -30,11 +49,295 @@ from app.models.schemas import (
     ExecutionLocation,
     User,
     UserRole,
-    JobResult
+    JobResult,
+    ResultBlobRef
 )
 
 logger = get_logger(__name__)
 
+# Job state lives in a single hash per job; every field shares this TTL.
+JOB_TTL_SEC = 604800  # 7 days
+
+# Completion signals only need to outlive the waiter.
+JOB_DONE_SIGNAL_TTL_SEC = 3600
+
+# Result blobs outlive every job hash that can refer to them; chunk uploads
+# idle this long belong to a worker that died mid-upload.
+RESULT_BLOB_MAX_AGE_SEC = JOB_TTL_SEC + 86400
+RESULT_UPLOAD_MAX_AGE_SEC = 3600
+RESULT_SWEEP_INTERVAL_SEC = 3600
+
+TERMINAL_STATUSES = (JobStatus.COMPLETED.value, JobStatus.FAILED.value)
+
+
+def job_key(job_id: str) -> str:
+    """Redis hash key holding spec, status, result, timestamps and counters."""
+    return f"job:{job_id}"
+
+
+def queue_key(tenant_id: str, cap_id: str) -> str:
+    """Sorted set of queued job_ids for one tenant and provider/model pair."""
+    return f"job_queue:{tenant_id}:{cap_id}"
+
+
+def tenant_queues_key(tenant_id: str) -> str:
+    """Set of capability ids (provider:model) a tenant has queued jobs for."""
+    return f"job_queues:{tenant_id}"
+
+
+def processing_key(tenant_id: str) -> str:
+    """Sorted set of leased job_ids scored by lease deadline (unix seconds)."""
+    return f"job_processing:{tenant_id}"
+
+
+def tenant_jobs_key(tenant_id: str) -> str:
+    """Set of every job_id created for a tenant (index for admin scans)."""
+    return f"job_index:{tenant_id}"
+
+
+def status_index_key(tenant_id: str, status: str) -> str:
+    """Set of a tenant's job_ids currently in the given status."""
+    return f"job_index:{tenant_id}:{status}"
+
+
+def job_done_key(job_id: str) -> str:
+    """List that receives the terminal status once; waiters BLPOP on it."""
+    return f"job_done:{job_id}"
+
+
+def worker_key(worker_id: str) -> str:
+    """Hash with a worker's last heartbeat (expires with the heartbeat timeout)."""
+    return f"worker:{worker_id}"
+
+
+# Tenants that have ever queued a job; the scheduler and reaper walk this set.
+JOB_TENANTS_KEY = "job_tenants"
+
+# Worker registry: ids that have sent a heartbeat (expired hashes are pruned
+# when listed) and the workers currently blocked waiting for a lease, scored
+# by when that wait lapses, with the capabilities they are waiting for.
+WORKERS_KEY = "workers"
+WORKERS_WAITING_KEY = "workers:waiting"
+WORKERS_WAITING_CAPS_KEY = "workers:waiting_caps"
+
+# ---------------------------------------------------------------------------
+# Reliable-queue Lua scripts
+#
+# Each script is a single atomic step on the queue/processing/job-hash trio.
+# Job hash, processing and status index keys are derived inside the scripts
+# from the job_id / tenant_id, which is fine for the single-instance Redis we
+# deploy.
+# ---------------------------------------------------------------------------
+
+# Lease up to ARGV[4] jobs in one atomic step. Tenants are visited round-robin
+# in the order given (the scheduler's weighted pick first), taking the best
+# head across each tenant's capable queues.
+# KEYS: per tenant, its processing key followed by its candidate queues
+# ARGV[1]=deadline, ARGV[2]=worker_id, ARGV[3]=now, ARGV[4]=max jobs,
+# ARGV[5..]=number of candidate queues per tenant (same order as KEYS)
+_LEASE_SCRIPT = """
+local groups = {}
+local first = 1
+for g = 5, #ARGV do
+    local count = tonumber(ARGV[g])
+    groups[#groups + 1] = {first, count}
+    first = first + count + 1
+end
+
+local function lease_head(group)
+    while true do
+        local best_key, best_score = nil, nil
+        for i = group[1] + 1, group[1] + group[2] do
+            local head = redis.call('ZRANGE', KEYS[i], 0, 0, 'WITHSCORES')
+            if head[1] and (not best_score or tonumber(head[2]) < best_score) then
+                best_key = KEYS[i]
+                best_score = tonumber(head[2])
+            end
+        end
+        if not best_key then
+            return nil
+        end
+        local job_id = redis.call('ZPOPMIN', best_key)[1]
+        local jkey = 'job:' .. job_id
+        local spec = redis.call('HGET', jkey, 'spec')
+        -- A queued id whose hash already expired is dropped; try the next head.
+        if spec then
+            redis.call('ZADD', KEYS[group[1]], ARGV[1], job_id)
+            redis.call('HSET', jkey, 'worker_id', ARGV[2], 'lease_deadline', ARGV[1], 'updated_at', ARGV[3])
+            return spec
+        end
+    end
+end
+
+local max_jobs = tonumber(ARGV[4])
+local leased = {}
+local active = true
+while active and #leased < max_jobs do
+    active = false
+    for _, group in ipairs(groups) do
+        if #leased >= max_jobs then
+            break
+        end
+        if not group[3] then
+            local spec = lease_head(group)
+            if spec then
+                leased[#leased + 1] = spec
+                active = true
+            else
+                group[3] = true
+            end
+        end
+    end
+end
+-- Count the leases against the worker's load until its next heartbeat
+local wkey = 'worker:' .. ARGV[2]
+if #leased > 0 and redis.call('EXISTS', wkey) == 1 then
+    redis.call('HINCRBY', wkey, 'in_flight', #leased)
+end
+return leased
+"""
+
+# Acknowledge receipt: extend each lease to cover execution and mark RUNNING.
+# KEYS[i]=job hash  ARGV[1]=lease grace (sec), ARGV[2]=now, ARGV[2+i]=job_id
+# Returns 1/0 per job (0 = no active lease)
+_ACK_SCRIPT = """
+local acked = {}
+for i = 1, #KEYS do
+    local job_id = ARGV[2 + i]
+    local tenant_id = redis.call('HGET', KEYS[i], 'tenant_id')
+    local pkey = tenant_id and ('job_processing:' .. tenant_id)
+    if pkey and redis.call('ZSCORE', pkey, job_id) then
+        local timeout = tonumber(redis.call('HGET', KEYS[i], 'timeout_sec') or '0')
+        local deadline = tonumber(ARGV[2]) + timeout + tonumber(ARGV[1])
+        redis.call('ZADD', pkey, deadline, job_id)
+        redis.call('HSET', KEYS[i], 'status', 'RUNNING', 'lease_deadline', deadline,
+            'execution_started_at', ARGV[2], 'updated_at', ARGV[2])
+        redis.call('SREM', 'job_index:' .. tenant_id .. ':QUEUED', job_id)
+        redis.call('SADD', 'job_index:' .. tenant_id .. ':RUNNING', job_id)
+        acked[i] = 1
+    else
+        acked[i] = 0
+    end
+end
+return acked
+"""
+
+# Reclaim an expired lease: re-queue at its original position, or fail past
+# the reassign cap.
+# KEYS[1]=processing, KEYS[2]=job hash
+# ARGV[1]=job_id, ARGV[2]=now, ARGV[3]=max reassign count, ARGV[4]=done signal TTL
+_REQUEUE_EXPIRED_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not score or tonumber(score) > tonumber(ARGV[2]) then
+    return nil
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+local fields = redis.call('HMGET', KEYS[2], 'spec', 'queue', 'queue_score', 'tenant_id', 'worker_id')
+if not fields[1] or not fields[2] then
+    return 'MISSING'
+end
+-- The lease no longer counts against the worker that lost it
+if fields[5] then
+    local wkey = 'worker:' .. fields[5]
+    if tonumber(redis.call('HGET', wkey, 'in_flight') or '0') > 0 then
+        redis.call('HINCRBY', wkey, 'in_flight', -1)
+    end
+end
+local index = 'job_index:' .. (fields[4] or '') .. ':'
+redis.call('HDEL', KEYS[2], 'worker_id', 'lease_deadline')
+local count = redis.call('HINCRBY', KEYS[2], 'reassign_count', 1)
+if count > tonumber(ARGV[3]) then
+    redis.call('HSET', KEYS[2], 'status', 'FAILED', 'completed_at', ARGV[2], 'updated_at', ARGV[2])
+    redis.call('SREM', index .. 'QUEUED', ARGV[1])
+    redis.call('SREM', index .. 'RUNNING', ARGV[1])
+    redis.call('SADD', index .. 'FAILED', ARGV[1])
+    local done_key = 'job_done:' .. ARGV[1]
+    redis.call('RPUSH', done_key, 'FAILED')
+    redis.call('EXPIRE', done_key, ARGV[4])
+    return 'FAILED'
+end
+redis.call('HSET', KEYS[2], 'status', 'QUEUED', 'updated_at', ARGV[2])
+redis.call('SREM', index .. 'RUNNING', ARGV[1])
+redis.call('SADD', index .. 'QUEUED', ARGV[1])
+redis.call('ZADD', fields[2], fields[3] or 0, ARGV[1])
+return 'REQUEUED'
+"""
+
+
+# A worker reports on a job: only the current lease holder may. A terminal
+# report also releases the lease here, so a second report (or the reaper)
+# can no longer act on the same attempt.
+# KEYS[1]=job hash  ARGV[1]=job_id, ARGV[2]=worker_id, ARGV[3]=1 to release
+_CHECK_LEASE_SCRIPT = """
+local fields = redis.call('HMGET', KEYS[1], 'tenant_id', 'worker_id')
+if not fields[1] or fields[2] ~= ARGV[2] then
+    return 0
+end
+local pkey = 'job_processing:' .. fields[1]
+if not redis.call('ZSCORE', pkey, ARGV[1]) then
+    return 0
+end
+if ARGV[3] == '1' then
+    redis.call('ZREM', pkey, ARGV[1])
+end
+return 1
+"""
+
+
+# Give up on a job that has not finished: take it out of its queue and the
+# processing set and mark it FAILED (a worker still running it has its
+# result rejected). Returns 0 if it already finished.
+# KEYS[1]=job hash  ARGV[1]=job_id, ARGV[2]=now, ARGV[3]=done signal TTL,
+# ARGV[4]=result JSON
+_FAIL_UNFINISHED_SCRIPT = """
+local fields = redis.call('HMGET', KEYS[1], 'status', 'tenant_id', 'queue')
+if not fields[1] or fields[1] == 'COMPLETED' or fields[1] == 'FAILED' then
+    return 0
+end
+if fields[3] then
+    redis.call('ZREM', fields[3], ARGV[1])
+end
+if fields[2] then
+    local index = 'job_index:' .. fields[2] .. ':'
+    redis.call('ZREM', 'job_processing:' .. fields[2], ARGV[1])
+    redis.call('SREM', index .. 'QUEUED', ARGV[1])
+    redis.call('SREM', index .. 'RUNNING', ARGV[1])
+    redis.call('SADD', index .. 'FAILED', ARGV[1])
+end
+redis.call('HSET', KEYS[1], 'status', 'FAILED', 'result', ARGV[4],
+    'completed_at', ARGV[2], 'updated_at', ARGV[2])
+local done_key = 'job_done:' .. ARGV[1]
+redis.call('RPUSH', done_key, 'FAILED')
+redis.call('EXPIRE', done_key, ARGV[3])
+return 1
+"""
+
+
+# A worker finished a job: release its in-flight slot and fold the job's
+# execution time into its latency EWMA. Expired workers are left alone.
+# KEYS[1]=worker hash  ARGV[1]=latency ms (negative if unknown), ARGV[2]=alpha
+_WORKER_DONE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local in_flight = tonumber(redis.call('HGET', KEYS[1], 'in_flight') or '0')
+if in_flight > 0 then
+    redis.call('HSET', KEYS[1], 'in_flight', in_flight - 1)
+end
+local sample = tonumber(ARGV[1])
+if sample >= 0 then
+    local previous = redis.call('HGET', KEYS[1], 'latency_ewma_ms')
+    local ewma = sample
+    if previous then
+        local alpha = tonumber(ARGV[2])
+        ewma = alpha * sample + (1 - alpha) * tonumber(previous)
+    end
+    redis.call('HSET', KEYS[1], 'latency_ewma_ms', math.floor(ewma + 0.5))
+    redis.call('HINCRBY', KEYS[1], 'jobs_completed', 1)
+end
+return 1
+"""
+
 
 class PermissionDenied(Exception):
     """Raised when user lacks permission for an operation"""
@@ -46,6 +349,19 @@ class QuotaExceeded(Exception):
     pass
 
 
+class LeaseLost(Exception):
+    """Raised when a worker reports on a job it no longer holds the lease for"""
+    pass
+
+
+def _index_status(pipe, tenant_id: str, job_id: str, status: str) -> None:
+    """Queue commands moving job_id into the status index for `status`."""
+    for other in JobStatus:
+        if other.value != status:
+            pipe.srem(status_index_key(tenant_id, other.value), job_id)
+    pipe.sadd(status_index_key(tenant_id, status), job_id)
+
+
 class JobManager:
     """
     Manages job lifecycle: creation, signing, queueing, and status tracking
@@ -53,30 +369,55 @@ class JobManager:
     Responsibilities:
     - Create and sign jobs
     - Push to Redis queue
+    - Lease jobs to capable workers (priority + tenant fairness)
     - Track job status
     - Enforce permissions and quotas
     """
     
-    def __init__(self, redis_client: redis.Redis):
+    def __init__(self, redis_client: redis.Redis, result_store: Optional[LocalResultBlobStore] = None):
         """
         Initialize Job Manager
         
         Args:
             redis_client: Async Redis client
+            result_store: Blob store for large outputs (default: JOB_RESULT_BLOB_DIR)
         """
         self.redis = redis_client
+        self.result_store = result_store or LocalResultBlobStore(settings.JOB_RESULT_BLOB_DIR)
+        self._scripts: Dict[str, Any] = {}
+        self._tenant_rr = WeightedRoundRobin(parse_tenant_weights(settings.JOB_TENANT_WEIGHTS))
+        # Wakes long-polling lease_job calls when this process enqueues a job
+        self._enqueued = asyncio.Condition()
+
+    def _script(self, name: str, source: str):
+        """Register a Lua script lazily (the startup fallback client has no scripting)."""
+        script = self._scripts.get(name)
+        if script is None:
+            script = self.redis.register_script(source)
+            self._scripts[name] = script
+        return script
 
     async def _load_job(self, job_id: str) -> Optional[Job]:
         """Load job spec from Redis."""
-        job_json = await self.redis.get(f"job:{job_id}:spec")
+        job_json = await self.redis.hget(job_key(job_id), "spec")
         if not job_json:
             return None
         return Job.parse_raw(job_json)
 
     async def _save_job_spec(self, job: Job) -> None:
-        """Persist updated job spec."""
-        await self.redis.set(f"job:{job.job_id}:spec", job.json())
-        await self.redis.expire(f"job:{job.job_id}:spec", 604800)
+        """Persist updated job spec together with its mirrored status/counters."""
+        key = job_key(str(job.job_id))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "spec": job.json(),
+                "status": job.status.value,
+                "retry_count": job.retry_count,
+                "reassign_count": job.reassign_count,
+                "updated_at": int(time.time()),
+            })
+            pipe.expire(key, JOB_TTL_SEC)
+            _index_status(pipe, job.tenant_id, str(job.job_id), job.status.value)
+            await pipe.execute()
 
     async def _move_to_dlq(
         self,
@@ -95,8 +436,10 @@ class JobManager:
             "reason": reason,
             "result": json.loads(result.json()) if result else None,
         }
-        await self.redis.rpush(dlq_key, json.dumps(entry, ensure_ascii=False))
-        await self.redis.expire(dlq_key, settings.JOB_DLQ_TTL_SEC)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.rpush(dlq_key, json.dumps(entry, ensure_ascii=False))
+            pipe.expire(dlq_key, settings.JOB_DLQ_TTL_SEC)
+            await pipe.execute()
         logger.error(
             "Job moved to DLQ",
             job_id=str(job.job_id),
@@ -287,78 +630,486 @@ class JobManager:
         """
         Save job to Redis for tracking
         
-        Storage:
-        - job:{job_id}:spec - Full job JSON
-        - job:{job_id}:status - Current status
-        - job:{job_id}:created_at - Creation timestamp
+        Storage (single hash, one TTL, one round-trip):
+        - job:{job_id} -> spec, status, tenant_id, timeout_sec, created_at,
+          updated_at, retry_count, reassign_count
+          (+ worker_id, lease_deadline, result, completed_at later)
+        - job_index:{tenant_id} / job_index:{tenant_id}:{status} -> job_id
+          index sets, so admin scans never need KEYS
         """
         job_id = str(job.job_id)
-        
-        # Save full job spec
-        await self.redis.set(
-            f"job:{job_id}:spec",
-            job.json()
-        )
-        
-        # Save status
-        await self.redis.set(
-            f"job:{job_id}:status",
-            job.status.value
-        )
-        
-        # Save creation timestamp
-        await self.redis.set(
-            f"job:{job_id}:created_at",
-            job.created_at_ts
-        )
-        
-        # Set TTL (7 days)
-        for key in [f"job:{job_id}:spec", f"job:{job_id}:status", f"job:{job_id}:created_at"]:
-            await self.redis.expire(key, 604800)
+        key = job_key(job_id)
+        now = int(time.time())
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "spec": job.json(),
+                "status": job.status.value,
+                "tenant_id": job.tenant_id,
+                "timeout_sec": job.timeout_sec,
+                "created_at": job.created_at_ts,
+                "updated_at": now,
+                "retry_count": job.retry_count,
+                "reassign_count": job.reassign_count,
+            })
+            pipe.expire(key, JOB_TTL_SEC)
+            pipe.sadd(tenant_jobs_key(job.tenant_id), job_id)
+            _index_status(pipe, job.tenant_id, job_id, job.status.value)
+            await pipe.execute()
     
     async def _queue_job(self, job: Job) -> None:
         """
         Push job to appropriate queue
         
         Queue structure:
-        - job_queue:{tenant_id} - FIFO list for tenant's jobs
+        - job_queue:{tenant_id}:{provider}:{model} - sorted set of job_ids,
+          scored so higher priority pops first and equal priority is FIFO
+        - job_queues:{tenant_id} - provider:model pairs with queues
+        - job_processing:{tenant_id} - leased job_ids by lease deadline
         
         Args:
             job: Job to queue
         """
-        queue_key = f"job_queue:{job.tenant_id}"
+        job_id = str(job.job_id)
+        cap_id = capability_id(job.provider.value, job.model)
+        q_key = queue_key(job.tenant_id, cap_id)
         
         # Check queue size limit
-        queue_size = await self.redis.llen(queue_key)
+        queue_size = await self.get_queue_depth(job.tenant_id)
         if queue_size >= settings.MAX_QUEUED_JOBS_PER_TENANT:
             raise QuotaExceeded(
                 f"Job queue full. Maximum {settings.MAX_QUEUED_JOBS_PER_TENANT} "
                 f"queued jobs per tenant."
             )
         
-        # Push to queue (RPUSH = add to end)
-        await self.redis.rpush(queue_key, job.json())
+        score = queue_score(job.priority, int(time.time() * 1000))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(q_key, {job_id: score})
+            pipe.sadd(tenant_queues_key(job.tenant_id), cap_id)
+            pipe.sadd(JOB_TENANTS_KEY, job.tenant_id)
+            # Remember the queue position so an expired lease goes back in place
+            pipe.hset(job_key(job_id), mapping={"queue": q_key, "queue_score": score})
+            await pipe.execute()
+        
+        await self._notify_enqueued()
         
         logger.info(
             "Job added to queue",
-            job_id=str(job.job_id),
+            job_id=job_id,
             tenant_id=job.tenant_id,
+            capability=cap_id,
+            priority=job.priority,
             queue_size=queue_size + 1
         )
+
+    async def _notify_enqueued(self) -> None:
+        async with self._enqueued:
+            self._enqueued.notify_all()
+
+    async def _wait_for_enqueue(self, timeout: float) -> None:
+        async with self._enqueued:
+            try:
+                await asyncio.wait_for(self._enqueued.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def get_queue_depth(self, tenant_id: str) -> int:
+        """Number of queued (not yet leased) jobs across a tenant's queues."""
+        cap_ids = await self.redis.smembers(tenant_queues_key(tenant_id))
+        if not cap_ids:
+            return 0
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for cap_id in cap_ids:
+                pipe.zcard(queue_key(tenant_id, cap_id))
+            sizes = await pipe.execute()
+        return sum(sizes)
+
+    async def lease_job(
+        self,
+        worker_id: str,
+        capabilities: List[Dict[str, str]],
+        timeout: int = 30
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Lease the next job this worker can run (Reliable Queue)
+        
+        Scheduling:
+        1. Only provider/model queues matching the worker's capabilities
+        2. Weighted round-robin across tenants with a matching backlog
+        3. Highest priority (then oldest) job within the chosen tenant
+        
+        The pop and the lease registration happen in one Lua script, so a job
+        is always either queued or in the processing set. The worker has
+        WORKER_HEARTBEAT_TIMEOUT_SEC to acknowledge before the reaper reclaims it.
+        
+        Args:
+            worker_id: Worker receiving the lease
+            capabilities: Worker capabilities ({"provider", "model"} dicts)
+            timeout: Seconds to wait for a job
+            
+        Returns:
+            Job payload or None if nothing arrived within the timeout
+        """
+        jobs = await self.lease_jobs(worker_id, capabilities, max_jobs=1, timeout=timeout)
+        return jobs[0] if jobs else None
+
+    async def lease_jobs(
+        self,
+        worker_id: str,
+        capabilities: List[Dict[str, str]],
+        max_jobs: int,
+        timeout: int = 30
+    ) -> List[Dict[str, Any]]:
+        """
+        Lease up to max_jobs jobs in one atomic script (see lease_job)
+        
+        Waits up to `timeout` for the first job only; once anything is
+        leasable it returns whatever the backlog holds, up to max_jobs.
+        Tenants take turns within a batch, starting with the round's pick.
+        
+        Returns:
+            Job payloads (empty if nothing arrived within the timeout)
+        """
+        max_jobs = max(1, int(max_jobs))
+        wait_until = time.monotonic() + timeout
+        waiting = False
+
+        while True:
+            jobs = await self._try_lease(worker_id, capabilities, max_jobs)
+            remaining = wait_until - time.monotonic()
+            if jobs or remaining <= 0:
+                if waiting:
+                    await self._set_waiting(worker_id, None)
+                return jobs
+
+            # Advertise the wait so busier workers leave new jobs to us
+            await self._set_waiting(worker_id, capabilities)
+            waiting = True
+            # Local enqueues wake us immediately; the poll interval bounds the
+            # latency for jobs queued by other backend processes.
+            await self._wait_for_enqueue(min(remaining, settings.JOB_LEASE_POLL_INTERVAL_SEC))
+
+    async def _set_waiting(
+        self,
+        worker_id: str,
+        capabilities: Optional[List[Dict[str, str]]]
+    ) -> None:
+        """Mark a worker as blocked in lease_jobs (None clears the mark)."""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if capabilities is None:
+                pipe.zrem(WORKERS_WAITING_KEY, worker_id)
+                pipe.hdel(WORKERS_WAITING_CAPS_KEY, worker_id)
+            else:
+                # Lapses unless refreshed by the next loop iteration
+                lapse = time.time() + 2 * settings.JOB_LEASE_POLL_INTERVAL_SEC
+                pipe.zadd(WORKERS_WAITING_KEY, {worker_id: lapse})
+                pipe.hset(WORKERS_WAITING_CAPS_KEY, worker_id, json.dumps(capabilities))
+            await pipe.execute()
+
+    async def _deferred_capabilities(self, worker_id: str, cap_ids: Set[str]) -> Set[str]:
+        """
+        Capability ids to leave to better-ranked workers that are waiting
+
+        Least-loaded dispatch for a pull queue: a job goes to whichever
+        capable worker is waiting with the lowest load (then latency EWMA).
+        """
+        if not cap_ids or not settings.WORKER_LOAD_AWARE_DISPATCH:
+            return set()
+        others = [
+            w for w in await self.redis.zrangebyscore(WORKERS_WAITING_KEY, time.time(), "+inf")
+            if w != worker_id
+        ]
+        if not others:
+            return set()
+
+        fields = ("in_flight", "capacity", "latency_ewma_ms")
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for wid in [worker_id, *others]:
+                pipe.hmget(worker_key(wid), *fields)
+            pipe.hmget(WORKERS_WAITING_CAPS_KEY, *others)
+            *loads, waiting_caps = await pipe.execute()
+
+        me = {"worker_id": worker_id, **dict(zip(fields, loads[0]))}
+        waiting = [
+            {"worker_id": wid, **dict(zip(fields, load)), "capabilities": json.loads(caps)}
+            for wid, load, caps in zip(others, loads[1:], waiting_caps)
+            if caps and any(v is not None for v in load)  # skip workers whose heartbeat expired
+        ]
+        return deferred_capability_ids(me, cap_ids, waiting)
+
+    async def _try_lease(
+        self,
+        worker_id: str,
+        capabilities: List[Dict[str, str]],
+        max_jobs: int
+    ) -> List[Dict[str, Any]]:
+        tenants = sorted(await self.redis.smembers(JOB_TENANTS_KEY))
+        if not tenants or not capabilities:
+            return []
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tenant_id in tenants:
+                pipe.smembers(tenant_queues_key(tenant_id))
+            queued_caps = await pipe.execute()
+
+        matched = {
+            tenant_id: matching_capability_ids(cap_ids, capabilities)
+            for tenant_id, cap_ids in zip(tenants, queued_caps)
+        }
+        deferred = await self._deferred_capabilities(
+            worker_id, {c for cap_ids in matched.values() for c in cap_ids}
+        )
+        candidates: Dict[str, List[str]] = {}
+        for tenant_id, cap_ids in matched.items():
+            keys = [queue_key(tenant_id, c) for c in cap_ids if c not in deferred]
+            if keys:
+                candidates[tenant_id] = keys
+        if not candidates:
+            return []
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for keys in candidates.values():
+                for key in keys:
+                    pipe.zcard(key)
+            sizes = iter(await pipe.execute())
+        backlogged = [
+            tenant_id for tenant_id, keys in candidates.items()
+            if sum(next(sizes) for _ in keys) > 0
+        ]
+        order = self._tenant_rr.order(backlogged)
+        if not order:
+            return []
+
+        keys: List[str] = []
+        for tenant_id in order:
+            keys.append(processing_key(tenant_id))
+            keys.extend(candidates[tenant_id])
+        lease_script = self._script("lease", _LEASE_SCRIPT)
+        now = int(time.time())
+        payloads = await lease_script(
+            keys=keys,
+            args=[
+                now + settings.WORKER_HEARTBEAT_TIMEOUT_SEC, worker_id, now, max_jobs,
+                *(len(candidates[tenant_id]) for tenant_id in order),
+            ],
+        )
+        return [json.loads(payload) for payload in payloads or []]
+
+    async def record_worker_heartbeat(
+        self,
+        worker_id: str,
+        status: str,
+        capabilities: List[Dict[str, str]],
+        in_flight: Optional[int] = None,
+        capacity: Optional[int] = None
+    ) -> None:
+        """
+        Register the worker's reported state until the heartbeat times out
+        
+        in_flight/capacity come from the worker's own pool; between
+        heartbeats the lease and completion paths keep in_flight current.
+        """
+        key = worker_key(worker_id)
+        fields: Dict[str, Any] = {
+            "status": status,
+            "capabilities": json.dumps(capabilities, ensure_ascii=False),
+            "last_seen": int(time.time()),
+        }
+        if in_flight is not None:
+            fields["in_flight"] = max(0, int(in_flight))
+        if capacity is not None:
+            fields["capacity"] = max(1, int(capacity))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, settings.WORKER_HEARTBEAT_TIMEOUT_SEC)
+            pipe.sadd(WORKERS_KEY, worker_id)
+            await pipe.execute()
+
+    async def get_worker_capabilities(self, worker_id: str) -> List[Dict[str, str]]:
+        """Capabilities from the worker's last live heartbeat (empty if expired)."""
+        raw = await self.redis.hget(worker_key(worker_id), "capabilities")
+        return json.loads(raw) if raw else []
+
+    async def list_workers(self) -> List[Dict[str, Any]]:
+        """
+        Live workers from the registry, least loaded first (dispatch order)
+        
+        Workers whose heartbeat expired are dropped from the index.
+        """
+        worker_ids = sorted(await self.redis.smembers(WORKERS_KEY))
+        if not worker_ids:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for worker_id in worker_ids:
+                pipe.hgetall(worker_key(worker_id))
+            states = await pipe.execute()
+
+        expired = [wid for wid, state in zip(worker_ids, states) if not state]
+        if expired:
+            await self.redis.srem(WORKERS_KEY, *expired)
+
+        workers = []
+        for worker_id, state in zip(worker_ids, states):
+            if not state:
+                continue
+            capacity = int(state.get("capacity") or 1)
+            in_flight = int(state.get("in_flight") or 0)
+            workers.append({
+                "worker_id": worker_id,
+                "status": state.get("status"),
+                "capabilities": json.loads(state.get("capabilities") or "[]"),
+                "in_flight": in_flight,
+                "capacity": capacity,
+                "load": round(in_flight / max(1, capacity), 3),
+                "latency_ewma_ms": int(state["latency_ewma_ms"]) if state.get("latency_ewma_ms") else None,
+                "jobs_completed": int(state.get("jobs_completed") or 0),
+                "last_seen": int(state.get("last_seen") or 0),
+            })
+        return sorted(workers, key=worker_rank)
+
+    async def get_worker_status(self) -> Dict[str, Any]:
+        """Registry summary for status displays and the master agent's context."""
+        workers = await self.list_workers()
+        return {
+            "online": len(workers),
+            "in_flight": sum(w["in_flight"] for w in workers),
+            "capacity": sum(w["capacity"] for w in workers),
+            "workers": workers,
+        }
+
+    async def _record_worker_done(
+        self,
+        worker_id: str,
+        started_at: Optional[str],
+        finished_at: int
+    ) -> None:
+        latency_ms = (finished_at - int(started_at)) * 1000 if started_at else -1
+        done_script = self._script("worker_done", _WORKER_DONE_SCRIPT)
+        await done_script(
+            keys=[worker_key(worker_id)],
+            args=[latency_ms, settings.WORKER_LATENCY_EWMA_ALPHA],
+        )
+
+    async def acknowledge_job(self, job_id: str) -> bool:
+        """
+        Acknowledge a leased job and mark it RUNNING in one atomic step
+        
+        The lease deadline is extended to the job timeout plus the heartbeat
+        grace period so long-running jobs are not reclaimed mid-execution.
+        
+        Returns:
+            False if the job is unknown or its lease was already reclaimed
+        """
+        return (await self.acknowledge_jobs([job_id]))[job_id]
+
+    async def acknowledge_jobs(self, job_ids: List[str]) -> Dict[str, bool]:
+        """
+        Acknowledge several leased jobs in one script call (see acknowledge_job)
+        
+        Returns:
+            job_id -> whether its lease was still active
+        """
+        job_ids = list(dict.fromkeys(job_ids))
+        if not job_ids:
+            return {}
+        ack_script = self._script("ack", _ACK_SCRIPT)
+        flags = await ack_script(
+            keys=[job_key(job_id) for job_id in job_ids],
+            args=[settings.WORKER_HEARTBEAT_TIMEOUT_SEC, int(time.time()), *job_ids],
+        )
+        acked = {job_id: bool(flag) for job_id, flag in zip(job_ids, flags)}
+        for job_id, ok in acked.items():
+            if ok:
+                logger.info("Job acknowledged", job_id=job_id)
+            else:
+                logger.warning("Acknowledge for job without active lease", job_id=job_id)
+        return acked
+
+    async def reap_expired_leases(self, batch_size: int = 100) -> List[str]:
+        """
+        Re-queue jobs whose lease expired because the worker died
+        
+        Jobs reassigned more than WORKER_MAX_REASSIGN_COUNT times are failed
+        and moved to the dead-letter queue instead.
+        
+        Returns:
+            Job IDs that were reclaimed
+        """
+        requeue_script = self._script("requeue_expired", _REQUEUE_EXPIRED_SCRIPT)
+        reclaimed: List[str] = []
+        now = int(time.time())
+
+        for tenant_id in await self.redis.smembers(JOB_TENANTS_KEY):
+            p_key = processing_key(tenant_id)
+            expired = await self.redis.zrangebyscore(p_key, "-inf", now, start=0, num=batch_size)
+            for job_id in expired:
+                outcome = await requeue_script(
+                    keys=[p_key, job_key(job_id)],
+                    args=[job_id, now, settings.WORKER_MAX_REASSIGN_COUNT, JOB_DONE_SIGNAL_TTL_SEC],
+                )
+                if outcome is None:
+                    continue
+                reclaimed.append(job_id)
+                if outcome == "REQUEUED":
+                    await self._notify_enqueued()
+                elif outcome == "FAILED":
+                    job = await self._load_job(job_id)
+                    if job:
+                        await self._move_to_dlq(job, reason="lease_expired")
+                logger.warning(
+                    "Expired job lease reclaimed",
+                    job_id=job_id,
+                    tenant_id=tenant_id,
+                    outcome=outcome,
+                )
+        return reclaimed
+
+    async def sweep_result_blobs(self) -> Dict[str, int]:
+        """Delete expired result blobs and abandoned chunk uploads."""
+        removed = await asyncio.to_thread(
+            self.result_store.sweep, RESULT_BLOB_MAX_AGE_SEC, RESULT_UPLOAD_MAX_AGE_SEC
+        )
+        if any(removed.values()):
+            logger.info("Result blobs swept", **removed)
+        return removed
+
+    async def lease_reaper_loop(self) -> None:
+        """Background task that periodically reclaims expired leases (and sweeps result blobs)."""
+        last_sweep: Optional[float] = None
+        while True:
+            try:
+                await self.reap_expired_leases()
+                if last_sweep is None or time.monotonic() - last_sweep >= RESULT_SWEEP_INTERVAL_SEC:
+                    last_sweep = time.monotonic()
+                    await self.sweep_result_blobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Lease reaper iteration failed", error=str(e))
+            await asyncio.sleep(settings.JOB_LEASE_REAPER_INTERVAL_SEC)
     
-    async def get_job_status(self, job_id: str, user: User) -> Optional[Dict[str, Any]]:
+    async def get_job_status(
+        self,
+        job_id: str,
+        user: User,
+        include_output: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Get job status and details
         
         Args:
             job_id: Job identifier
             user: Current user (for permission check)
+            include_output: Fetch an offloaded output from the blob store
+                (otherwise only its summary and reference are returned)
             
         Returns:
             Job status dictionary or None if not found
         """
-        # Get job spec
-        job_json = await self.redis.get(f"job:{job_id}:spec")
+        # Single round-trip: spec, status and result from the job hash
+        job_json, status, result_json = await self.redis.hmget(
+            job_key(job_id), "spec", "status", "result"
+        )
         if not job_json:
             return None
         
@@ -369,15 +1120,12 @@ class JobManager:
             if job.user_id != user.id or job.tenant_id != user.tenant_id:
                 raise PermissionDenied("Cannot access other users' jobs")
         
-        # Get current status
-        status = await self.redis.get(f"job:{job_id}:status")
-        
-        # Get result if completed
+        # Result is only meaningful once the job reached a terminal state
         result = None
-        if status in [JobStatus.COMPLETED.value, JobStatus.FAILED.value]:
-            result_json = await self.redis.get(f"job:{job_id}:result")
-            if result_json:
-                result = json.loads(result_json)
+        if status in [JobStatus.COMPLETED.value, JobStatus.FAILED.value] and result_json:
+            result = json.loads(result_json)
+            if include_output and result.get("output_ref"):
+                result["output"] = await self.load_result_output(result["output_ref"])
         
         return {
             "job_id": job_id,
@@ -392,26 +1140,71 @@ class JobManager:
         self,
         job_id: str,
         status: JobStatus,
-        result: Optional[JobResult] = None
+        result: Optional[JobResult] = None,
+        worker_id: Optional[str] = None
     ) -> None:
         """
         Update job status (called by workers or internal processes)
+        
+        All hash writes for one transition go out in a single pipeline.
+        A report from a worker (worker_id given) is only applied while that
+        worker still holds the job's lease; a terminal report releases it.
+        
+        Raises:
+            LeaseLost: the lease expired and was reclaimed, or went to
+                another worker (the job may be running again)
         """
-        job = await self._load_job(job_id)
-
-        # Save result payload if provided.
+        key = job_key(job_id)
         if result:
-            await self.redis.set(f"job:{job_id}:result", result.json())
+            result = await self._offload_result(job_id, result)
+        if worker_id is not None:
+            check_script = self._script("check_lease", _CHECK_LEASE_SCRIPT)
+            terminal = status in [JobStatus.COMPLETED, JobStatus.FAILED]
+            held = await check_script(keys=[key], args=[job_id, worker_id, 1 if terminal else 0])
+            if not held:
+                logger.warning("Report from worker without the lease", job_id=job_id, worker_id=worker_id,
+                               status=status.value)
+                raise LeaseLost(f"Worker {worker_id} does not hold the lease for job {job_id}")
+        job_json, worker_id, started_at = await self.redis.hmget(
+            key, "spec", "worker_id", "execution_started_at"
+        )
+        job = Job.parse_raw(job_json) if job_json else None
+        now = int(time.time())
+
+        # The attempt is over either way (retry or terminal): update the
+        # worker's load and latency in the registry.
+        if worker_id and status in [JobStatus.COMPLETED, JobStatus.FAILED]:
+            await self._record_worker_done(worker_id, started_at, now)
 
-        # Retry/DLQ branch for failed jobs.
+        # Retry/DLQ branch for failed jobs (no retry if the result says it would not help).
         if status == JobStatus.FAILED and job:
             job.retry_count += 1
             max_retries = max(0, int(settings.JOB_MAX_RETRIES))
-            if job.retry_count <= max_retries:
+            retryable = result is None or result.retryable
+            if retryable and job.retry_count <= max_retries:
                 job.status = JobStatus.QUEUED
-                await self._save_job_spec(job)
-                await self.redis.set(f"job:{job_id}:status", JobStatus.QUEUED.value)
-                await self.redis.rpush(f"job_queue:{job.tenant_id}", job.json())
+                cap_id = capability_id(job.provider.value, job.model)
+                q_key = queue_key(job.tenant_id, cap_id)
+                score = queue_score(job.priority, now * 1000)
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    fields = {
+                        "spec": job.json(),
+                        "status": JobStatus.QUEUED.value,
+                        "retry_count": job.retry_count,
+                        "queue": q_key,
+                        "queue_score": score,
+                        "updated_at": now,
+                    }
+                    if result:
+                        fields["result"] = result.json()
+                    pipe.hset(key, mapping=fields)
+                    pipe.expire(key, JOB_TTL_SEC)
+                    pipe.zrem(processing_key(job.tenant_id), job_id)
+                    pipe.zadd(q_key, {job_id: score})
+                    pipe.sadd(tenant_queues_key(job.tenant_id), cap_id)
+                    _index_status(pipe, job.tenant_id, job_id, JobStatus.QUEUED.value)
+                    await pipe.execute()
+                await self._notify_enqueued()
                 logger.warning(
                     "Job failed and requeued",
                     job_id=job_id,
@@ -421,49 +1214,280 @@ class JobManager:
                 return
 
             # Retries exhausted: keep FAILED status and push to DLQ.
-            await self._move_to_dlq(job, result=result)
+            await self._move_to_dlq(job, result=result,
+                                    reason="max_retries_exceeded" if retryable else "not_retryable")
             job.status = JobStatus.FAILED
-            await self._save_job_spec(job)
-
-        # Update status
-        await self.redis.set(f"job:{job_id}:status", status.value)
 
-        # Set completion timestamp
+        fields = {"status": status.value, "updated_at": now}
+        if job and status == JobStatus.FAILED:
+            fields["spec"] = job.json()
+            fields["retry_count"] = job.retry_count
+        if result:
+            fields["result"] = result.json()
         if status in [JobStatus.COMPLETED, JobStatus.FAILED]:
-            await self.redis.set(f"job:{job_id}:completed_at", int(time.time()))
+            fields["completed_at"] = now
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, JOB_TTL_SEC)
+            if job:
+                _index_status(pipe, job.tenant_id, job_id, status.value)
+            if status in [JobStatus.COMPLETED, JobStatus.FAILED]:
+                if job:
+                    # Terminal state releases the lease
+                    pipe.zrem(processing_key(job.tenant_id), job_id)
+                # Wake anyone blocked in wait_for_completion
+                pipe.rpush(job_done_key(job_id), status.value)
+                pipe.expire(job_done_key(job_id), JOB_DONE_SIGNAL_TTL_SEC)
+            await pipe.execute()
 
         logger.info("Job status updated", job_id=job_id, status=status.value)
 
+    async def stage_result_chunk(self, job_id: str, index: int, data: bytes) -> int:
+        """
+        Stage one chunk of a compressed output upload (committed by the result)
+
+        Returns:
+            Bytes staged for the job so far
+
+        Raises:
+            ResultTooLarge: chunk or running total over the configured limits
+            ResultBlobError: upload not started with chunk 0
+        """
+        if len(data) > settings.JOB_RESULT_CHUNK_MAX_BYTES:
+            raise ResultTooLarge(f"Chunk exceeds {settings.JOB_RESULT_CHUNK_MAX_BYTES} bytes")
+        return await asyncio.to_thread(
+            self.result_store.stage_chunk, job_id, index, data, settings.JOB_RESULT_MAX_BYTES
+        )
+
+    async def _offload_result(self, job_id: str, result: JobResult) -> JobResult:
+        """
+        Keep large outputs out of the job hash
+
+        A result naming an uploaded blob commits the staged chunks; an inline
+        output over JOB_RESULT_INLINE_MAX_BYTES is compressed and stored by
+        the backend. Either way only a summary and the reference remain.
+        """
+        if result.output_ref:
+            ref = result.output_ref
+            await asyncio.to_thread(self.result_store.commit, job_id, ref.sha256, ref.size)
+            return result.copy(update={
+                "output": None,
+                "output_summary": summarize_output(result.output_summary),
+            })
+
+        if not result.output:
+            return result
+        raw = encode_output(result.output)
+        if len(raw) <= settings.JOB_RESULT_INLINE_MAX_BYTES:
+            return result
+        blob, encoding = compress(raw)
+        digest = await asyncio.to_thread(self.result_store.put, blob)
+        logger.info("Job output offloaded", job_id=job_id, size=len(raw), stored=len(blob))
+        return result.copy(update={
+            "output": None,
+            "output_summary": summarize_output(result.output),
+            "output_ref": ResultBlobRef(sha256=digest, size=len(blob), encoding=encoding),
+        })
+
+    async def load_result_output(self, ref: Dict[str, Any]) -> Dict[str, Any]:
+        """Read, decompress and parse an offloaded output (off the event loop)."""
+        def load() -> Dict[str, Any]:
+            blob = self.result_store.get(ref["sha256"])
+            return json.loads(decompress(blob, ref["encoding"], settings.JOB_RESULT_MAX_OUTPUT_BYTES))
+
+        return await asyncio.to_thread(load)
+
+    async def completion_wait_timeout(self, job_id: str) -> int:
+        """
+        How long a caller should wait for a job before giving up on it
+
+        Covers every attempt the job can get (JOB_MAX_RETRIES re-queues and
+        WORKER_MAX_REASSIGN_COUNT reclaimed leases), each its own timeout_sec
+        plus the lease grace and a reaper pass, and some time queued.
+        """
+        timeout_sec = await self.redis.hget(job_key(job_id), "timeout_sec")
+        timeout_sec = int(timeout_sec or settings.JOB_DEFAULT_TIMEOUT_SEC)
+        attempts = 1 + max(0, int(settings.JOB_MAX_RETRIES)) + max(0, int(settings.WORKER_MAX_REASSIGN_COUNT))
+        per_attempt = timeout_sec + settings.WORKER_HEARTBEAT_TIMEOUT_SEC + settings.JOB_LEASE_REAPER_INTERVAL_SEC
+        return attempts * per_attempt + settings.JOB_COMPLETION_QUEUE_GRACE_SEC
+
+    async def fail_unfinished_job(self, job_id: str, error: str) -> bool:
+        """
+        Mark a job that is still queued or running FAILED and drop its lease
+
+        Returns:
+            False if the job had already finished (or does not exist)
+        """
+        fail_script = self._script("fail_unfinished", _FAIL_UNFINISHED_SCRIPT)
+        result = JobResult(status=JobStatus.FAILED, error=error)
+        failed = await fail_script(
+            keys=[job_key(job_id)],
+            args=[job_id, int(time.time()), JOB_DONE_SIGNAL_TTL_SEC, result.json()],
+        )
+        if failed:
+            logger.warning("Unfinished job failed", job_id=job_id, error=error)
+        return bool(failed)
+
+    async def wait_for_completion(
+        self,
+        job_id: str,
+        timeout: float,
+        fallback_poll_sec: Optional[float] = None
+    ) -> Optional[str]:
+        """
+        Wait until a job reaches COMPLETED/FAILED
+        
+        Blocks on the job's completion signal (BLPOP) instead of polling. The
+        status hash is re-checked every fallback_poll_sec in case a signal was
+        lost (e.g. the job hash was rewritten by an older backend).
+        
+        Returns:
+            Terminal status value, or None if the timeout elapsed
+        """
+        if fallback_poll_sec is None:
+            fallback_poll_sec = settings.JOB_COMPLETION_FALLBACK_POLL_SEC
+        wait_until = time.monotonic() + timeout
+
+        while True:
+            status = await self.redis.hget(job_key(job_id), "status")
+            if status in TERMINAL_STATUSES:
+                return status
+
+            remaining = wait_until - time.monotonic()
+            if remaining <= 0:
+                return None
+            popped = await self.redis.blpop(
+                [job_done_key(job_id)], timeout=min(remaining, fallback_poll_sec)
+            )
+            if popped:
+                return popped[1]
+
+    async def iter_jobs(
+        self,
+        tenant_id: str,
+        status: Optional[JobStatus] = None,
+        fields: Sequence[str] = ("status", "spec"),
+        batch_size: int = 200
+    ) -> AsyncIterator[Tuple[str, List[Optional[str]]]]:
+        """
+        Iterate a tenant's jobs through the index sets
+        
+        Walks job_index:{tenant_id} (or the per-status index) with SSCAN and
+        reads each batch of hashes with one pipelined HMGET, so the cost is
+        proportional to the tenant's jobs rather than the whole keyspace.
+        Members whose job hash already expired are pruned from the index.
+        
+        Yields:
+            (job_id, values of `fields` in order)
+        """
+        index = status_index_key(tenant_id, status.value) if status else tenant_jobs_key(tenant_id)
+        seen = set()
+        cursor = 0
+        while True:
+            cursor, members = await self.redis.sscan(index, cursor=cursor, count=batch_size)
+            members = [m for m in members if m not in seen]
+            seen.update(members)
+            if members:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for job_id in members:
+                        pipe.hmget(job_key(job_id), *fields, "spec")
+                    rows = await pipe.execute()
+
+                stale = [job_id for job_id, row in zip(members, rows) if row[-1] is None]
+                if stale:
+                    await self.redis.srem(index, *stale)
+                for job_id, row in zip(members, rows):
+                    if row[-1] is not None:
+                        yield job_id, list(row[:-1])
+            if cursor == 0:
+                break
+
     async def clear_queue(self, tenant_id: str) -> int:
-        """Clear all jobs from a tenant's queue"""
-        queue_key = f"job_queue:{tenant_id}"
-        processing_pattern = f"job_processing:{tenant_id}:*"
-        
-        # Delete main queue
-        count = await self.redis.delete(queue_key)
-        
-        # Delete all processing lists for this tenant
-        p_keys = await self.redis.keys(processing_pattern)
-        if p_keys:
-            await self.redis.delete(*p_keys)
-            count += len(p_keys)
-            
-        return count
-
-    async def fix_orphaned_jobs(self, tenant_id: str) -> List[str]:
-        """Find jobs marked as QUEUED but not in any queue, and mark them as FAILED"""
-        fixed_ids = []
-        # Find all job status keys
-        keys = await self.redis.keys(f"job:*:status")
-        for key in keys:
-            status = await self.redis.get(key)
-            if status == "QUEUED":
-                # Check if it belongs to this tenant
-                job_id = key.split(":")[1]
-                spec_json = await self.redis.get(f"job:{job_id}:spec")
-                if spec_json:
-                    spec = json.loads(spec_json)
-                    if spec.get("tenant_id") == tenant_id:
-                        await self.redis.set(key, "FAILED")
-                        fixed_ids.append(job_id)
+        """
+        Clear all jobs from a tenant's queues and processing set
+        
+        Jobs that were waiting or leased are marked FAILED (and their
+        waiters woken) so they don't linger as QUEUED or RUNNING; a worker
+        still running one has its result rejected. Returns the number of
+        jobs dropped.
+        """
+        cap_ids = await self.redis.smembers(tenant_queues_key(tenant_id))
+        keys = [queue_key(tenant_id, c) for c in cap_ids]
+        keys.append(tenant_queues_key(tenant_id))
+        await self.redis.delete(*keys)
+
+        p_key = processing_key(tenant_id)
+        leased = await self.redis.zrange(p_key, 0, -1)
+        if leased:
+            now = int(time.time())
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for job_id in leased:
+                    pipe.zrem(p_key, job_id)
+                    pipe.hset(job_key(job_id), mapping={
+                        "status": JobStatus.FAILED.value,
+                        "completed_at": now,
+                        "updated_at": now,
+                    })
+                    _index_status(pipe, tenant_id, job_id, JobStatus.FAILED.value)
+                    pipe.rpush(job_done_key(job_id), JobStatus.FAILED.value)
+                    pipe.expire(job_done_key(job_id), JOB_DONE_SIGNAL_TTL_SEC)
+                await pipe.execute()
+            logger.warning("Leased jobs failed by queue clear", tenant_id=tenant_id, count=len(leased))
+        return len(leased) + len(await self.fix_orphaned_jobs(tenant_id))
+
+    async def fix_orphaned_jobs(self, tenant_id: str, batch_size: int = 200) -> List[str]:
+        """
+        Find jobs marked as QUEUED but not in any queue, and mark them as FAILED
+        
+        Only the tenant's QUEUED index is scanned. A job counts as orphaned
+        when it is neither in the queue recorded on its hash nor leased in the
+        processing set.
+        """
+        candidates = []
+        async for job_id, (status, q_key) in self.iter_jobs(
+            tenant_id, JobStatus.QUEUED, fields=("status", "queue"), batch_size=batch_size
+        ):
+            if status == JobStatus.QUEUED.value:
+                candidates.append((job_id, q_key))
+            elif status:
+                # Index drifted (e.g. hash written by an older backend)
+                await self.redis.srem(status_index_key(tenant_id, JobStatus.QUEUED.value), job_id)
+
+        p_key = processing_key(tenant_id)
+        fixed_ids: List[str] = []
+        now = int(time.time())
+        for i in range(0, len(candidates), batch_size):
+            batch = candidates[i:i + batch_size]
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for job_id, q_key in batch:
+                    pipe.zscore(p_key, job_id)
+                    if q_key:
+                        pipe.zscore(q_key, job_id)
+                replies = iter(await pipe.execute())
+
+            orphans = []
+            for job_id, q_key in batch:
+                leased = next(replies) is not None
+                queued = next(replies) is not None if q_key else False
+                if not leased and not queued:
+                    orphans.append(job_id)
+            if not orphans:
+                continue
+
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for job_id in orphans:
+                    pipe.hset(job_key(job_id), mapping={
+                        "status": JobStatus.FAILED.value,
+                        "completed_at": now,
+                        "updated_at": now,
+                    })
+                    _index_status(pipe, tenant_id, job_id, JobStatus.FAILED.value)
+                    pipe.rpush(job_done_key(job_id), JobStatus.FAILED.value)
+                    pipe.expire(job_done_key(job_id), JOB_DONE_SIGNAL_TTL_SEC)
+                await pipe.execute()
+            fixed_ids.extend(orphans)
+
+        if fixed_ids:
+            logger.warning("Orphaned jobs marked FAILED", tenant_id=tenant_id, count=len(fixed_ids))
         return fixed_ids
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+Job Scheduler helpers
+
+Pure scheduling policy used by JobManager when leasing jobs to workers:
+- queue scoring (priority first, FIFO within a priority)
+- per-tenant smooth weighted round-robin
+- worker capability matching (provider/model)
+- worker ranking for load-aware dispatch (in-flight / capacity, latency)
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Capability model that matches every model of a provider.
+ANY_MODEL = "*"
+
+# Job.priority ranges 1..10 (10 = most urgent).
+_MAX_PRIORITY = 10
+_PRIORITY_BAND = 10 ** 13  # wider than any millisecond timestamp
+
+
+def queue_score(priority: int, enqueued_at_ms: int) -> int:
+    """
+    Sorted-set score for a queued job.
+
+    Lower scores pop first: higher priority wins, ties are FIFO.
+    """
+    priority = min(max(int(priority), 1), _MAX_PRIORITY)
+    return (_MAX_PRIORITY - priority) * _PRIORITY_BAND + int(enqueued_at_ms)
+
+
+def capability_id(provider: str, model: str) -> str:
+    """Queue suffix identifying a provider/model pair."""
+    return f"{str(provider).upper()}:{model}"
+
+
+def split_capability_id(cap_id: str) -> Tuple[str, str]:
+    """Inverse of capability_id (model names may themselves contain ':')."""
+    provider, _, model = cap_id.partition(":")
+    return provider, model
+
+
+def matching_capability_ids(
+    queued_ids: Iterable[str],
+    capabilities: Iterable[Dict[str, str]]
+) -> List[str]:
+    """
+    Filter queued provider/model pairs down to the ones a worker can run.
+
+    Args:
+        queued_ids: capability_id values that currently have queues
+        capabilities: Worker capabilities as reported in heartbeats
+            ({"provider": ..., "model": ...}; model "*" matches any model)
+
+    Returns:
+        Sorted list of matching capability ids
+    """
+    exact = set()
+    any_model = set()
+    for cap in capabilities:
+        provider = str(cap.get("provider", "")).upper()
+        model = cap.get("model") or ""
+        if model == ANY_MODEL:
+            any_model.add(provider)
+        else:
+            exact.add(capability_id(provider, model))
+
+    matched = []
+    for cap_id in queued_ids:
+        provider, _ = split_capability_id(cap_id)
+        if cap_id in exact or provider in any_model:
+            matched.append(cap_id)
+    return sorted(matched)
+
+
+def select_capabilities(
+    capabilities: List[Dict[str, str]],
+    cap_ids: Optional[Iterable[str]]
+) -> List[Dict[str, str]]:
+    """
+    Narrow heartbeat capabilities to the requested provider:model ids.
+
+    Workers pass the capabilities that currently have a free slot; an empty
+    or missing request keeps everything the worker heartbeated.
+    """
+    if not cap_ids:
+        return list(capabilities)
+    wanted = {capability_id(*split_capability_id(c)) for c in cap_ids}
+    return [
+        c for c in capabilities
+        if capability_id(c.get("provider", ""), c.get("model", "")) in wanted
+    ]
+
+
+def worker_rank(worker: Dict[str, Any]) -> Tuple[float, float, str]:
+    """
+    Sort key for dispatch: least loaded first, then lowest latency EWMA.
+
+    Load is in-flight jobs over advertised capacity (1 if not reported);
+    the worker id breaks ties so every backend process agrees on the order.
+    """
+    capacity = max(1, int(worker.get("capacity") or 1))
+    load = int(worker.get("in_flight") or 0) / capacity
+    return load, float(worker.get("latency_ewma_ms") or 0.0), str(worker.get("worker_id", ""))
+
+
+def deferred_capability_ids(
+    worker: Dict[str, Any],
+    cap_ids: Iterable[str],
+    waiting: Iterable[Dict[str, Any]]
+) -> Set[str]:
+    """
+    Capability ids a worker should leave to better-ranked waiting workers.
+
+    Args:
+        worker: Requesting worker (registry fields, see worker_rank)
+        cap_ids: Queued capability ids the worker could lease
+        waiting: Other workers currently blocked waiting for a lease, with
+            the capabilities they are waiting for under "capabilities"
+
+    Returns:
+        cap_ids some waiting worker able to run them outranks the worker for
+    """
+    own_rank = worker_rank(worker)
+    better = [w for w in waiting if worker_rank(w) < own_rank]
+    return {
+        cap_id for cap_id in cap_ids
+        if any(matching_capability_ids([cap_id], w.get("capabilities") or []) for w in better)
+    }
+
+
+def parse_tenant_weights(raw: Optional[str]) -> Dict[str, int]:
+    """Parse "tenant_a:3,tenant_b:1" into a weight map (invalid entries ignored)."""
+    weights: Dict[str, int] = {}
+    for entry in (raw or "").split(","):
+        name, sep, value = entry.strip().rpartition(":")
+        if not sep or not name:
+            continue
+        try:
+            weights[name] = max(1, int(value))
+        except ValueError:
+            continue
+    return weights
+
+
+class WeightedRoundRobin:
+    """
+    Smooth weighted round-robin (nginx style) over a changing set of names
+
+    Only names passed to order() take part in a round, so tenants with an
+    empty backlog neither accumulate credit nor block the others.
+    """
+
+    def __init__(self, weights: Optional[Dict[str, int]] = None, default_weight: int = 1):
+        self.weights = dict(weights or {})
+        self.default_weight = max(1, default_weight)
+        self._current: Dict[str, int] = {}
+
+    def weight(self, name: str) -> int:
+        return self.weights.get(name, self.default_weight)
+
+    def order(self, names: Iterable[str]) -> List[str]:
+        """
+        Advance one round and return names in the order they should be tried.
+
+        The first entry is the round's pick; the rest are fallbacks in case
+        the pick's backlog was drained by a concurrent lease.
+        """
+        eligible = sorted(set(names))
+        if not eligible:
+            return []
+
+        total = 0
+        for name in eligible:
+            w = self.weight(name)
+            self._current[name] = self._current.get(name, 0) + w
+            total += w
+
+        ranked = sorted(eligible, key=lambda n: (-self._current[n], n))
+        self._current[ranked[0]] -= total
+        return ranked
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import json
+import os
 import sys
 
 # [UTF-8] Force stdout/stderr to UTF-8
@@ -18,7 +19,10 @@ from structlog import get_logger
 
 from app.core.neo4j_client import neo4j_client
 from app.core.database import AsyncSessionLocal, MessageModel, CostLogModel
+from app.core.message_journal import message_journal
 from app.core.config import settings
+from app.services.document_chunker import DocumentChunk, chunk_sections
+from app.services.document_parser_service import document_parser_service
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage
 from sqlalchemy import select, func, and_
@@ -701,8 +705,10 @@ CONTEXT:
             print(f"ERROR: [Batch Extraction] Failed to parse LLM response: {e}")
             return None, {}
 
-    async def _upsert_batch_to_neo4j(self, project_id: str, extracted: Dict[str, Any]):
+    async def _upsert_batch_to_neo4j(self, project_id: str, extracted: Dict[str, Any]) -> List[str]:
+        """Upsert extracted nodes/relationships; returns the stored node IDs."""
         p_id = project_id if project_id != "global" and project_id != "system-master" else "system-master"
+        stored_ids = []
         async with neo4j_client.driver.session() as session:
             await session.run("MERGE (p:Project {id: $p_id}) ON CREATE SET p.name = 'Auto Project'", {"p_id": p_id})
             
@@ -739,6 +745,7 @@ CONTEXT:
                     
                 await session.run(f"MERGE (n:{n_type} {{id: $n_id}}) SET n += $props", {"n_id": n_id, "props": props})
                 await session.run("MATCH (p:Project {id: $p_id}), (n {id: $n_id}) MERGE (p)-[:HAS_KNOWLEDGE]->(n)", {"p_id": p_id, "n_id": n_id})
+                stored_ids.append(n_id)
 
             # [v5.0 CRITICAL] Build Node ID mapping (LLM ID -> Real Neo4j ID)
             node_id_map = {}
@@ -869,6 +876,196 @@ CONTEXT:
                         error=str(e)
                     )
 
+        return stored_ids
+
+    def _document_metadata(self, msg: MessageModel) -> Optional[Dict[str, Any]]:
+        """Upload metadata when the message is a stored file upload, else None."""
+        metadata = msg.metadata_json
+        if isinstance(metadata, str):
+            try:
+                metadata = json.loads(metadata)
+            except json.JSONDecodeError:
+                return None
+        if not isinstance(metadata, dict) or metadata.get("type") != "file_upload":
+            return None
+        if not metadata.get("file_path") or not metadata.get("file_hash"):
+            return None
+        return metadata
+
+    async def process_document_pipeline(self, message_id: uuid.UUID):
+        """
+        Full-document extraction for file uploads.
+        The upload message only previews the first 2000 characters; this
+        streams the whole parsed document through merged extraction.
+        """
+        async with AsyncSessionLocal() as session:
+            existing = await session.execute(select(CostLogModel.id).where(CostLogModel.message_id == message_id))
+            if existing.first():
+                logger.info("Document already processed, skipping", message_id=str(message_id))
+                return
+
+            result = await session.execute(select(MessageModel).filter(MessageModel.message_id == message_id))
+            msg = result.scalar_one_or_none()
+            if not msg:
+                logger.error("Message not found for document pipeline", message_id=str(message_id))
+                return
+
+        metadata = self._document_metadata(msg)
+        if metadata is None:
+            await self.process_message_pipeline(message_id)
+            return
+
+        await self.check_budget_and_mode()
+        tier = "low"  # Chunks go through the batch (low tier) extractor
+        project_id = str(msg.project_id or "system-master")
+        try:
+            stats = await self.ingest_document(
+                project_id,
+                metadata["file_path"],
+                os.path.splitext(metadata["file_path"])[1],
+                metadata["file_hash"],
+                metadata.get("filename") or os.path.basename(metadata["file_path"]),
+                str(msg.message_id),
+                tier,
+            )
+        except Exception as e:
+            logger.error("Document pipeline failed", message_id=str(message_id), error=str(e))
+            await self._log_cost(msg, "document", tier, 0, 0, 0.0, "fail")
+            return
+
+        usage = {"prompt_tokens": stats["prompt_tokens"], "completion_tokens": stats["completion_tokens"]}
+        await self._log_cost(
+            msg, "document", tier, usage["prompt_tokens"], usage["completion_tokens"],
+            self._estimate_cost(tier, usage), "success" if stats["extracted"] else "fail"
+        )
+        logger.info("Document knowledge stored", message_id=str(message_id), **stats)
+
+    async def ingest_document(
+        self,
+        project_id: str,
+        file_path: str,
+        suffix: str,
+        file_hash: str,
+        filename: str,
+        message_id: str,
+        tier: str = "low"
+    ) -> Dict[str, int]:
+        """
+        Stream a parsed document through merged extraction chunk by chunk
+
+        Chunks are produced lazily and at most DOC_INGEST_CONCURRENCY are in
+        flight, so memory and prompt size are bounded by the chunk size
+        whatever the document length. Extracted nodes are linked to a File
+        node with the chunk's character and page range.
+
+        Returns:
+            {"chunks", "extracted", "failed", "prompt_tokens", "completion_tokens"}
+        """
+        source = await document_parser_service.section_source(file_path, suffix, file_hash)
+        chunks = chunk_sections(
+            document_parser_service.iter_sections(source),
+            settings.DOC_CHUNK_TOKENS,
+            settings.DOC_CHUNK_OVERLAP_TOKENS,
+        )
+
+        p_id_uuid = None
+        if project_id != "global" and project_id != "system-master":
+            try: p_id_uuid = uuid.UUID(project_id)
+            except: pass
+        context_snapshot = await self._get_context_snapshot(p_id_uuid)
+        file_node_id = await self._upsert_file_node(project_id, file_hash, filename, message_id)
+
+        stats = {"chunks": 0, "extracted": 0, "failed": 0, "prompt_tokens": 0, "completion_tokens": 0}
+        slots = asyncio.Semaphore(max(1, settings.DOC_INGEST_CONCURRENCY))
+        in_flight = set()
+
+        async def extract(chunk: DocumentChunk):
+            try:
+                header = f"[DOCUMENT {filename} | chunk {chunk.index} | pages {chunk.page_start}-{chunk.page_end}]"
+                extracted, usage = await self._llm_extract_merged(
+                    f"{header}\n{chunk.text}", tier, context_snapshot, project_id, [message_id]
+                )
+                stats["prompt_tokens"] += usage.get("prompt_tokens", 0)
+                stats["completion_tokens"] += usage.get("completion_tokens", 0)
+                if not extracted:
+                    stats["failed"] += 1
+                    return
+                node_ids = await self._upsert_batch_to_neo4j(project_id, extracted)
+                await self._link_file_provenance(file_node_id, node_ids, chunk)
+                stats["extracted"] += 1
+            except Exception as e:
+                stats["failed"] += 1
+                logger.error("Document chunk extraction failed", file_hash=file_hash, chunk=chunk.index, error=str(e))
+            finally:
+                slots.release()
+
+        try:
+            while True:
+                # Take a slot before reading the next chunk so at most
+                # DOC_INGEST_CONCURRENCY chunks are held at once
+                await slots.acquire()
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    slots.release()
+                    break
+                stats["chunks"] += 1
+                task = asyncio.create_task(extract(chunk))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        except BaseException:
+            for task in in_flight:
+                task.cancel()
+            raise
+
+        await self._mark_file_ingested(file_node_id, stats["chunks"])
+        return stats
+
+    async def _upsert_file_node(self, project_id: str, file_hash: str, filename: str, message_id: str) -> str:
+        p_id = project_id if project_id != "global" and project_id != "system-master" else "system-master"
+        f_id = f"file-{hashlib.sha256(f'{p_id}:{file_hash}'.encode('utf-8')).hexdigest()[:16]}"
+        async with neo4j_client.driver.session() as session:
+            await session.run("MERGE (p:Project {id: $p_id}) ON CREATE SET p.name = 'Auto Project'", {"p_id": p_id})
+            await session.run("""
+                MERGE (f:File {id: $f_id})
+                SET f.project_id = $p_id, f.file_hash = $file_hash, f.filename = $filename,
+                    f.title = $filename, f.source_message_id = $message_id
+                WITH f
+                MATCH (p:Project {id: $p_id})
+                MERGE (p)-[:HAS_FILE]->(f)
+            """, {"f_id": f_id, "p_id": p_id, "file_hash": file_hash, "filename": filename, "message_id": message_id})
+        return f_id
+
+    async def _mark_file_ingested(self, file_node_id: str, chunk_count: int):
+        async with neo4j_client.driver.session() as session:
+            await session.run(
+                "MATCH (f:File {id: $f_id}) SET f.chunk_count = $chunks, f.ingested_at = $now",
+                {"f_id": file_node_id, "chunks": chunk_count, "now": datetime.utcnow().isoformat()}
+            )
+
+    async def _link_file_provenance(self, file_node_id: str, node_ids: List[str], chunk: DocumentChunk):
+        """(node)-[:EXTRACTED_FROM {chunk_index, char/page range}]->(File), one edge per chunk."""
+        if not node_ids:
+            return
+        async with neo4j_client.driver.session() as session:
+            await session.run("""
+                MATCH (f:File {id: $f_id})
+                UNWIND $node_ids AS n_id
+                MATCH (n {id: n_id})
+                MERGE (n)-[r:EXTRACTED_FROM {chunk_index: $chunk_index}]->(f)
+                SET r.char_start = $char_start, r.char_end = $char_end,
+                    r.page_start = $page_start, r.page_end = $page_end
+            """, {
+                "f_id": file_node_id,
+                "node_ids": node_ids,
+                "chunk_index": chunk.index,
+                "char_start": chunk.start,
+                "char_end": chunk.end,
+                "page_start": chunk.page_start,
+                "page_end": chunk.page_end,
+            })
+
 knowledge_service = KnowledgeService()
 
 async def knowledge_worker():
@@ -881,6 +1078,8 @@ async def knowledge_worker():
             try:
                 # Wait for message with short timeout to check for batch inactivity
                 message_id = await asyncio.wait_for(knowledge_queue.get(), timeout=2.0)
+                # Chat messages may still be in the write-behind journal
+                await message_journal.flush_message(message_id)
                 
                 async with AsyncSessionLocal() as session:
                     res = await session.execute(select(MessageModel).filter(MessageModel.message_id == message_id))
@@ -891,7 +1090,10 @@ async def knowledge_worker():
                         importance, _ = knowledge_service._evaluate_importance(msg.content, metadata)
                         p_id = str(msg.project_id or "system-master")
                         
-                        if importance == "HIGH":
+                        if knowledge_service._document_metadata(msg) is not None:
+                            # Uploads: extract from the whole document, not the preview
+                            await knowledge_service.process_document_pipeline(message_id)
+                        elif importance == "HIGH":
                             await knowledge_service.process_message_pipeline(message_id)
                         else:
                             if p_id not in pending_batch: pending_batch[p_id] = []
@@ -24,7 +24,8 @@ from app.core.config import settings
 from app.models.master import MasterAgentConfig, ChatMessage, AgentConfigUpdate, MasterIntent, Draft
 from app.core.neo4j_client import neo4j_client
 from app.core.logging_config import get_recent_logs
-from app.core.database import save_message_to_rdb, get_messages_from_rdb
+from app.core.database import save_message_to_rdb, get_recent_messages
+from app.services.workflow_dag import find_cycle
 
 # [v3.2] Import refactored stream_message
 from app.services.v32_stream_message_refactored import stream_message_v32
@@ -192,14 +193,13 @@ async def manage_job_queue_tool(action: str, tenant_id: str = "tenant_hyungnim")
     import redis.asyncio as redis
     redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
     try:
-        if action == "LIST": return f"대기열 길이: {await redis_client.llen(f'job_queue:{tenant_id}')}"
-        elif action == "CLEAR": await redis_client.delete(f"job_queue:{tenant_id}"); return "큐 초기화 완료."
+        from app.services.job_manager import JobManager
+        job_manager = JobManager(redis_client)
+        if action == "LIST": return f"대기열 길이: {await job_manager.get_queue_depth(tenant_id)}"
+        elif action == "CLEAR": await job_manager.clear_queue(tenant_id); return "큐 초기화 완료."
         elif action == "FIX_STUCK":
-            count = 0
-            for key in await redis_client.keys("job:*:status"):
-                if await redis_client.get(key) == "QUEUED":
-                    await redis_client.set(key, "FAILED"); count += 1
-            return f"{count}개의 멈춘 작업을 정리했습니다."
+            fixed = await job_manager.fix_orphaned_jobs(tenant_id)
+            return f"{len(fixed)}개의 멈춘 작업을 정리했습니다."
         return "알 수 없는 액션."
     finally: await redis_client.close()
 
@@ -550,34 +550,16 @@ class MasterAgentService:
         if not agents:
             return {"issues": [], "recommendations": []}
         
-        # 1. 순환 참조 감지 (DFS)
+        # 1. 순환 참조 감지 (DFS) - PARALLEL(DAG) 실행과 같은 검사를 사용
         agent_map = {a.get("agent_id"): a.get("next_agents", []) for a in agents}
-        
-        def has_cycle(node, visited, rec_stack):
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for neighbor in agent_map.get(node, []):
-                if neighbor not in visited:
-                    if has_cycle(neighbor, visited, rec_stack):
-                        return True
-                elif neighbor in rec_stack:
-                    return True
-            
-            rec_stack.remove(node)
-            return False
-        
-        visited = set()
-        for agent_id in agent_map.keys():
-            if agent_id not in visited:
-                if has_cycle(agent_id, visited, set()):
-                    issues.append({
-                        "severity": "ERROR",
-                        "agent": "전체 워크플로우",
-                        "reason": f"순환 참조가 감지되었습니다. 에이전트 {agent_id}가 자기 자신으로 돌아오는 경로가 있습니다.",
-                    })
-                    recommendations.append("setup_standard_workflow_tool을 호출하여 워크플로우 순서를 재설정하세요.")
-                    break
+        cycle_at = find_cycle(agent_map)
+        if cycle_at is not None:
+            issues.append({
+                "severity": "ERROR",
+                "agent": "전체 워크플로우",
+                "reason": f"순환 참조가 감지되었습니다. 에이전트 {cycle_at}가 자기 자신으로 돌아오는 경로가 있습니다.",
+            })
+            recommendations.append("setup_standard_workflow_tool을 호출하여 워크플로우 순서를 재설정하세요.")
         
         # 2. 고립된 에이전트 감지 (next_agents가 비어있고, 다른 에이전트에서도 참조되지 않는 경우)
         all_next_agents = set()
@@ -785,7 +767,7 @@ class MasterAgentService:
         def clean(c: str) -> str: return c.replace("형님", "사용자님").replace("하겠습쇼", "하겠습니다") if c else ""
         
         # 3. 과거 대화 주입 (기억력 대폭 강화: 40개까지 로드하여 복잡한 요구사항 보존)
-        db_messages = await get_messages_from_rdb(project_id, None, 40)
+        db_messages = await get_recent_messages(project_id, None, 40)
         for m in db_messages:
             if m.sender_role == "user": msgs.append(HumanMessage(content=clean(m.content)))
             elif m.sender_role == "assistant": msgs.append(AIMessage(content=clean(m.content)))
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Orchestration event stream
+
+Workflow events are appended once to a capped Redis Stream per project
+(`events:stream:{project_id}`). WebSocket clients read it with XREAD BLOCK
+from the last event id they saw, so a reconnecting client replays exactly
+the events it missed.
+
+Each backend process shares one OrchestrationEventHub between all of its
+WebSockets, so watchers cost a bounded queue each rather than a Redis
+connection each.
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+from uuid import uuid4
+
+from structlog import get_logger
+
+from app.core.config import settings
+
+logger = get_logger(__name__)
+
+# XREAD id meaning "only events added after we start reading"
+LATEST_EVENT_ID = "$"
+
+_STREAM_PREFIX = "events:stream:"
+
+
+def event_stream_key(project_id: str) -> str:
+    """Capped stream of orchestration events for one project."""
+    return f"{_STREAM_PREFIX}{project_id}"
+
+
+async def publish_event(
+    redis_client,
+    project_id: str,
+    event_type: str,
+    data: Dict[str, Any]
+) -> str:
+    """
+    Append an event to the project's stream (XADD MAXLEN ~ + EXPIRE, one round-trip)
+    
+    Returns:
+        Stream id of the new event
+    """
+    event = {
+        "type": event_type,
+        "project_id": project_id,
+        "data": data,
+        "timestamp": time.time()
+    }
+    key = event_stream_key(project_id)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.xadd(
+            key,
+            {"event": json.dumps(event, ensure_ascii=False)},
+            maxlen=settings.ORCHESTRATION_EVENT_STREAM_MAXLEN,
+            approximate=True,
+        )
+        pipe.expire(key, settings.ORCHESTRATION_EVENT_STREAM_TTL_SEC)
+        event_id, _ = await pipe.execute()
+    return event_id
+
+
+async def latest_event_id(redis_client, project_id: str) -> str:
+    """Concrete id of the newest event ("0-0" if none), to pin a "$" cursor."""
+    newest = await redis_client.xrevrange(event_stream_key(project_id), count=1)
+    return newest[0][0] if newest else "0-0"
+
+
+def format_event(event_id: str, fields: Dict[str, str]) -> str:
+    """Stream entry -> WebSocket payload, tagged with its `event_id` for resume."""
+    event = json.loads(fields.get("event") or "{}")
+    event["event_id"] = event_id
+    return json.dumps(event, ensure_ascii=False)
+
+
+async def read_events(
+    redis_client,
+    project_id: str,
+    last_event_id: str = LATEST_EVENT_ID,
+    block_ms: Optional[int] = None,
+    count: int = 100
+) -> List[Tuple[str, Dict[str, str]]]:
+    """
+    Block until events newer than last_event_id arrive (or block_ms elapses)
+    
+    Returns:
+        [(event_id, fields), ...] in stream order; empty on timeout
+    """
+    if block_ms is None:
+        block_ms = settings.ORCHESTRATION_EVENT_BLOCK_MS
+    reply = await redis_client.xread(
+        {event_stream_key(project_id): last_event_id}, count=count, block=block_ms
+    )
+    if not reply:
+        return []
+    _, entries = reply[0]
+    return entries
+
+
+class EventSubscription:
+    """
+    One WebSocket's view of a project stream
+    
+    Live events arrive in a bounded queue filled by the hub. If the consumer
+    falls behind and the queue fills up, the subscription is dropped: the
+    queue is emptied and a single None sentinel tells the consumer to close,
+    after which the client reconnects with its last event_id and replays.
+    """
+
+    def __init__(self, project_id: str, last_event_id: Optional[str], maxsize: int):
+        self.project_id = project_id
+        self.last_event_id = last_event_id
+        # Events up to this id are replayed from the stream, later ones are pushed
+        self.start_cursor = "0-0"
+        self.queue: "asyncio.Queue[Optional[str]]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def offer(self, payload: str) -> bool:
+        """Enqueue without blocking the dispatcher; False if this drops the subscription."""
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            self.close()
+            return False
+
+    def close(self) -> None:
+        """Discard buffered events and wake the consumer with the None sentinel."""
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+
+class OrchestrationEventHub:
+    """
+    Process-wide fan-out of project event streams to WebSocket subscribers
+    
+    A single dispatcher task XREADs every stream that has at least one
+    subscriber on one Redis connection, formats each event once, and offers
+    it to the subscribers' bounded queues. A per-hub wake stream interrupts
+    the blocking XREAD when a subscriber joins a project not yet watched.
+    """
+
+    def __init__(self, redis_client, queue_size: Optional[int] = None):
+        self.redis = redis_client
+        self.queue_size = queue_size or settings.ORCHESTRATION_WS_QUEUE_SIZE
+        self._subscribers: Dict[str, Set[EventSubscription]] = {}
+        self._cursors: Dict[str, str] = {}
+        self._wake_key = f"events:hub:{uuid4().hex}"
+        self._wake_cursor = "0-0"
+        self._has_subscribers = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.delivered_total = 0
+        self.dropped_total = 0
+        self.connections_total = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Connection and delivery counters for monitoring."""
+        return {
+            "connections": sum(len(subs) for subs in self._subscribers.values()),
+            "projects": len(self._subscribers),
+            "connections_total": self.connections_total,
+            "delivered_total": self.delivered_total,
+            "dropped_total": self.dropped_total,
+        }
+
+    async def subscribe(self, project_id: str, last_event_id: Optional[str] = None) -> EventSubscription:
+        sub = EventSubscription(project_id, last_event_id, self.queue_size)
+        if project_id not in self._cursors:
+            cursor = await latest_event_id(self.redis, project_id)
+            # Another subscriber may have started watching while we awaited
+            self._cursors.setdefault(project_id, cursor)
+            await self._wake()
+        # No await between reading the cursor and registering: the dispatcher
+        # pushes exactly the events after start_cursor.
+        sub.start_cursor = self._cursors[project_id]
+        self._subscribers.setdefault(project_id, set()).add(sub)
+        self.connections_total += 1
+        self._has_subscribers.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._dispatch_loop())
+        return sub
+
+    def unsubscribe(self, sub: EventSubscription) -> None:
+        subs = self._subscribers.get(sub.project_id)
+        if subs is None:
+            return
+        subs.discard(sub)
+        if not subs:
+            # The dispatcher stops reading the stream on its next round
+            del self._subscribers[sub.project_id]
+            self._cursors.pop(sub.project_id, None)
+        if not self._subscribers:
+            self._has_subscribers.clear()
+
+    async def replay(self, sub: EventSubscription) -> List[str]:
+        """Events the client missed: (last_event_id, start_cursor] from the stream."""
+        if not sub.last_event_id or sub.last_event_id == LATEST_EVENT_ID:
+            return []
+        entries = await self.redis.xrange(
+            event_stream_key(sub.project_id), min=f"({sub.last_event_id}", max=sub.start_cursor
+        )
+        return [format_event(event_id, fields) for event_id, fields in entries]
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for subs in self._subscribers.values():
+            for sub in subs:
+                sub.close()
+        self._subscribers.clear()
+        self._cursors.clear()
+
+    async def _wake(self) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.xadd(self._wake_key, {"w": "1"}, maxlen=10, approximate=True)
+            pipe.expire(self._wake_key, 3600)
+            await pipe.execute()
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            try:
+                await self._has_subscribers.wait()
+                await self._dispatch_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Event hub dispatch failed", error=str(e))
+                await asyncio.sleep(1)
+
+    async def _dispatch_once(self) -> None:
+        streams = {event_stream_key(p): cursor for p, cursor in self._cursors.items()}
+        streams[self._wake_key] = self._wake_cursor
+        reply = await self.redis.xread(
+            streams, count=100, block=settings.ORCHESTRATION_EVENT_BLOCK_MS
+        )
+        for key, entries in reply or []:
+            if not entries:
+                continue
+            if key == self._wake_key:
+                self._wake_cursor = entries[-1][0]
+                continue
+            project_id = key[len(_STREAM_PREFIX):]
+            if project_id not in self._cursors:
+                continue
+            self._cursors[project_id] = entries[-1][0]
+            payloads = [format_event(event_id, fields) for event_id, fields in entries]
+            for sub in list(self._subscribers.get(project_id, ())):
+                for payload in payloads:
+                    if not sub.offer(payload):
+                        self.dropped_total += 1
+                        logger.warning("Dropping slow event subscriber", project_id=project_id)
+                        self.unsubscribe(sub)
+                        break
+                    self.delivered_total += 1
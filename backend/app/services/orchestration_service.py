@@ -1,7 +1,7 @@
 import asyncio
 import json
-from typing import Dict, Any, List
-from uuid import UUID
+from typing import Dict, Any, List, Optional
+from uuid import UUID, uuid4
 
 from langgraph.graph import StateGraph, END
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
@@ -14,10 +14,24 @@ from app.models.schemas import (
     ExecutionLocation, 
     ProviderType, 
     JobStatus,
-    User
+    User,
+    UserRole
 )
-from app.services.job_manager import JobManager
+from app.services.job_manager import JobManager, PermissionDenied
+from app.services.orchestration_events import event_stream_key, publish_event
 from app.services.agent_config_service import AgentState
+from app.services.workflow_checkpoint import (
+    CHECKPOINT_FAILED,
+    CHECKPOINT_FINISHED,
+    WorkflowCheckpointStore,
+)
+from app.services.workflow_dag import DagWorkflow, merge_state_update
+
+
+class WorkflowAlreadyRunning(ValueError):
+    """Raised when a project's workflow is started while another run is alive"""
+    pass
+
 
 class OrchestrationService:
     """
@@ -27,6 +41,8 @@ class OrchestrationService:
     def __init__(self, job_manager: JobManager, redis_client=None):
         self.job_manager = job_manager
         self.redis_client = redis_client
+        # AgentState is checkpointed after every node so runs survive restarts
+        self.checkpoints = WorkflowCheckpointStore(redis_client) if redis_client else None
 
     async def execute_workflow(self, project: Project, user: User) -> str:
         """
@@ -35,8 +51,11 @@ class OrchestrationService:
         if not project.agent_config:
             raise ValueError("Project has no agent configuration")
 
-        # Build the graph
-        workflow = self._build_langgraph(project, user)
+        # Build the graph (PARALLEL runs independent agents concurrently)
+        if project.agent_config.workflow_type == "PARALLEL":
+            workflow = self._build_dag(project, user)
+        else:
+            workflow = self._build_langgraph(project, user)
         
         # Initialize state
         initial_state = AgentState(
@@ -50,14 +69,76 @@ class OrchestrationService:
             retry_count=0
         )
         
+        run_id = uuid4().hex
+        if self.checkpoints:
+            if not await self.checkpoints.acquire_run(project.id, run_id):
+                raise WorkflowAlreadyRunning(f"Workflow for project {project.id} is already running")
+            await self.checkpoints.start(
+                project.id, run_id, project.agent_config.workflow_type, user, initial_state
+            )
+        
         # Run the workflow (Async)
-        asyncio.create_task(self._run_workflow(workflow, initial_state, project.id))
+        asyncio.create_task(self._run_workflow(workflow, initial_state, project.id, run_id))
         
         return "Workflow started"
 
-    def _build_langgraph(self, project: Project, user: User):
+    async def resume_workflow(self, project: Project, user: User) -> str:
+        """
+        Resume a project's interrupted workflow from its last completed node
+        
+        The run continues as the user who started it with the checkpointed
+        AgentState. Jobs dispatched before the interruption are adopted by
+        their agent nodes instead of being created again.
+        """
+        if not project.agent_config:
+            raise ValueError("Project has no agent configuration")
+        if not self.checkpoints:
+            raise ValueError("Workflow checkpoints require Redis")
+
+        checkpoint = await self.checkpoints.load(project.id)
+        if not checkpoint:
+            raise ValueError(f"Project {project.id} has no workflow checkpoint")
+        if checkpoint["status"] == CHECKPOINT_FINISHED:
+            raise ValueError(f"Workflow for project {project.id} already finished")
+
+        run_user = checkpoint["user"]
+        if user.role != UserRole.SUPER_ADMIN and user.id != run_user.id:
+            raise PermissionDenied("Cannot resume another user's workflow")
+
+        state = checkpoint["state"]
+        completed = checkpoint["completed"]
+        if project.agent_config.workflow_type == "PARALLEL":
+            workflow = self._build_dag(project, run_user).resuming(completed)
+        else:
+            start_at = self._resume_point(project.agent_config, checkpoint["last_node"], state)
+            if start_at == END:
+                await self.checkpoints.finish(project.id, CHECKPOINT_FINISHED)
+                return "Workflow already complete"
+            workflow = self._build_langgraph(project, run_user, start_at=start_at)
+
+        run_id = checkpoint["run_id"]
+        if not await self.checkpoints.acquire_run(project.id, run_id):
+            raise WorkflowAlreadyRunning(f"Workflow for project {project.id} is already running")
+
+        asyncio.create_task(self._run_workflow(workflow, state, project.id, run_id, completed=completed))
+        return "Workflow resumed"
+
+    def _resume_point(self, config: ProjectAgentConfig, last_node: Optional[str], state: AgentState) -> str:
+        """Node a sequential graph continues from after last_node (END if done)."""
+        if not last_node:
+            return "master_planning"
+        if last_node == "master_planning":
+            return config.entry_agent_id
+        agent = next((a for a in config.agents if a.agent_id == last_node), None)
+        if not agent:
+            return END
+        return self._route_after(agent, config, state)
+
+    def _build_langgraph(self, project: Project, user: User, start_at: Optional[str] = None):
         """
         Build the StateGraph with nodes that dispatch jobs
+        
+        start_at overrides the entry node when resuming from a checkpoint.
         """
         print(f"DEBUG: Building LangGraph for Project: {project.id}")
         workflow = StateGraph(AgentState)
@@ -66,8 +147,6 @@ class OrchestrationService:
         if not config or not config.agents:
             raise ValueError(f"Project {project.id} has no agents configured")
 
-        agent_ids = [a.agent_id for a in config.agents]
-        
         # 1. Add Master/Planning Node (Virtual)
         async def master_planning(state: AgentState):
             print("🚀 [Master] Planning complete.")
@@ -84,48 +163,16 @@ class OrchestrationService:
             workflow.add_node(agent.agent_id, create_node())
             
         # 3. Define Edges
-        workflow.set_entry_point("master_planning")
+        workflow.set_entry_point(start_at or "master_planning")
         workflow.add_edge("master_planning", config.entry_agent_id)
 
         # Agent to Agent Edges
         for agent in config.agents:
-            # [고도화] 검수자(REVIEWER) 또는 QA 역할의 피드백 루프 처리
-            if agent.role in ["REVIEWER", "QA"]:
-                # [Fix] Use default argument to capture current agent in closure
-                def reviewer_routing(state: AgentState, current_agent=agent):
-                    # 1. 마지막 작업 결과 확인
-                    last_result = state.get("artifacts", {}).get(current_agent.agent_id, {})
-                    is_failed = last_result.get("status") == "FAILED" or last_result.get("need_fix") is True
-                    
-                    if is_failed:
-                        # 2. 재시도 횟수 체크 (최대 3회)
-                        current_retry = state.get("retry_count", 0)
-                        if current_retry < 3:
-                            # 3. 되돌아갈 개발자(CODER) 찾기
-                            coder_id = next((a.agent_id for a in config.agents if a.role in ["CODER", "DEVELOPER"]), None)
-                            if coder_id:
-                                print(f"🔄 [피드백 루프] 검수 실패. 개발자({coder_id})에게 재작업 요청 (시도 {current_retry + 1}/3)")
-                                return coder_id
-                        
-                        print(f"❌ [피드백 루프] {current_retry}회 재시도 초과. 작업을 강제 종료합니다.")
-                        return END
-                    
-                    # 4. 검수 통과 시 다음 단계로 진행 (마지막이면 종료)
-                    if not current_agent.next_agents:
-                        return END
-                    return current_agent.next_agents[0]
-                
-                workflow.add_conditional_edges(agent.agent_id, reviewer_routing)
-            else:
-                # [Fix] Use default argument to capture current agent in closure
-                def sequential_routing(state: AgentState, current_agent=agent):
-                    if not current_agent.next_agents:
-                        return END
-                    
-                    next_id = current_agent.next_agents[0]
-                    return next_id if next_id in agent_ids else END
+            # [Fix] Use default argument to capture current agent in closure
+            def routing(state: AgentState, current_agent=agent):
+                return self._route_after(current_agent, config, state)
 
-                workflow.add_conditional_edges(agent.agent_id, sequential_routing)
+            workflow.add_conditional_edges(agent.agent_id, routing)
         
         # [Fix] Increase recursion limit and return compiled graph
         compiled_graph = workflow.compile()
@@ -144,10 +191,85 @@ class OrchestrationService:
         # [Fix] Increase recursion limit to handle complex feedback loops
         return workflow.compile()
 
-    async def _run_workflow(self, workflow, initial_state: AgentState, project_id: str):
+    def _route_after(self, agent: AgentDefinition, config: ProjectAgentConfig, state: AgentState) -> str:
+        """
+        Next node after `agent` in a sequential workflow (shared by graph edges and resume)
+        """
+        agent_ids = [a.agent_id for a in config.agents]
+
+        # [고도화] 검수자(REVIEWER) 또는 QA 역할의 피드백 루프 처리
+        if agent.role in ["REVIEWER", "QA"]:
+            # 1. 마지막 작업 결과 확인
+            last_result = state.get("artifacts", {}).get(agent.agent_id, {})
+            is_failed = last_result.get("status") == "FAILED" or last_result.get("need_fix") is True
+            
+            if is_failed:
+                # 2. 재시도 횟수 체크 (최대 3회)
+                current_retry = state.get("retry_count", 0)
+                if current_retry < 3:
+                    # 3. 되돌아갈 개발자(CODER) 찾기
+                    coder_id = next((a.agent_id for a in config.agents if a.role in ["CODER", "DEVELOPER"]), None)
+                    if coder_id:
+                        print(f"🔄 [피드백 루프] 검수 실패. 개발자({coder_id})에게 재작업 요청 (시도 {current_retry + 1}/3)")
+                        return coder_id
+                
+                print(f"❌ [피드백 루프] {current_retry}회 재시도 초과. 작업을 강제 종료합니다.")
+                return END
+            
+            # 4. 검수 통과 시 다음 단계로 진행 (마지막이면 종료)
+            if not agent.next_agents:
+                return END
+            return agent.next_agents[0]
+
+        if not agent.next_agents:
+            return END
+        
+        next_id = agent.next_agents[0]
+        return next_id if next_id in agent_ids else END
+
+    def _build_dag(self, project: Project, user: User) -> DagWorkflow:
+        """
+        Build the PARALLEL (DAG) runner: every next_agents edge is a dependency
+        
+        Agents whose predecessors are all complete are dispatched as
+        concurrent jobs and fan-in waits for all of them. Reviewer feedback
+        loops would be cycles, so they are not available in this mode.
+        """
+        config = project.agent_config
+        if not config or not config.agents:
+            raise ValueError(f"Project {project.id} has no agents configured")
+
+        async def master_planning(state: AgentState):
+            print("🚀 [Master] Planning complete.")
+            return {"messages": [AIMessage(content='Planning finished.')]}
+
+        agents = [a for a in config.agents if a.enabled]
+        nodes = {"master_planning": master_planning}
+        for agent in agents:
+            nodes[agent.agent_id] = self._create_agent_node(agent, project, user)
+        graph = {a.agent_id: list(a.next_agents) for a in agents}
+
+        return DagWorkflow(nodes, graph, config.entry_agent_id, prelude=["master_planning"])
+
+    async def _run_workflow(
+        self,
+        workflow,
+        initial_state: AgentState,
+        project_id: str,
+        run_id: Optional[str] = None,
+        completed: Optional[List[str]] = None
+    ):
         """
         Internal loop to run the compiled graph
+        
+        State is checkpointed after every node; `completed` carries over the
+        nodes finished before a resume.
         """
+        state = dict(initial_state)
+        completed = list(completed or [])
+        keepalive = None
+        if self.checkpoints and run_id:
+            keepalive = asyncio.create_task(self.checkpoints.keep_alive(project_id, run_id))
         try:
             print(f"DEBUG: Starting Graph Execution for Project: {project_id}")
             await self._publish_event(project_id, "WORKFLOW_STARTED", {
@@ -158,6 +280,10 @@ class OrchestrationService:
             async for event in workflow.astream(initial_state):
                 for node_name, state_update in event.items():
                     print(f"DEBUG: [Node: {node_name}] completed.")
+                    merge_state_update(state, state_update)
+                    completed.append(node_name)
+                    if self.checkpoints:
+                        await self.checkpoints.save(project_id, node_name, state, completed)
                     
                     # 노드 이름별 한글 설명 매핑
                     display_names = {
@@ -177,6 +303,8 @@ class OrchestrationService:
                         "message": f"✅ {display_name} 완료"
                     })
             
+            if self.checkpoints:
+                await self.checkpoints.finish(project_id, CHECKPOINT_FINISHED)
             await self._publish_event(project_id, "WORKFLOW_FINISHED", {
                 "project_id": project_id,
                 "message": "🎉 모든 작업이 끝났습니다! 이제 결과를 확인해 보세요."
@@ -186,38 +314,40 @@ class OrchestrationService:
             import traceback
             print(f"ERROR: [OrchestrationService] Graph execution failed: {e}")
             traceback.print_exc()
+            if self.checkpoints:
+                await self.checkpoints.finish(project_id, CHECKPOINT_FAILED)
             await self._publish_event(project_id, "WORKFLOW_FAILED", {
                 "error": str(e),
                 "message": f"❌ 워크플로우 실행 중 오류 발생: {str(e)}"
             })
+        finally:
+            if keepalive:
+                keepalive.cancel()
+                await self.checkpoints.release_run(project_id, run_id)
 
     async def _publish_event(self, project_id: str, event_type: str, data: Dict[str, Any]):
         """
-        Publish execution events to Redis for frontend log synchronization
+        Publish execution events to the project's Redis stream for frontend log synchronization
         """
         if not self.redis_client:
             return
-            
-        import time
-        event = {
-            "type": event_type,
-            "project_id": project_id,
-            "data": data,
-            "timestamp": time.time()
-        }
-        
-        event_json = json.dumps(event, ensure_ascii=False)
-        
-        # [Fix] Channel name MUST match WebSocket subscription in orchestration.py
-        channel = f"orchestration:{project_id}"
-        await self.redis_client.publish(channel, event_json)
         
-        # Also store in Redis LIST with TTL for late joiners
-        event_key = f"events:history:{project_id}"
-        await self.redis_client.rpush(event_key, event_json)
-        await self.redis_client.expire(event_key, 600)  # 10 minute TTL
+        # [Fix] Stream key MUST match the WebSocket reader in orchestration.py
+        event_id = await publish_event(self.redis_client, project_id, event_type, data)
         
-        print(f"DEBUG: [Event] {event_type} published to {channel}")
+        print(f"DEBUG: [Event] {event_type} published to {event_stream_key(project_id)} ({event_id})")
+
+    async def _adopt_pending_job(self, project_id: str, agent_id: str, user: User) -> Optional[str]:
+        """Job an interrupted run dispatched for this agent, if it can still finish."""
+        if not self.checkpoints:
+            return None
+        job_id = await self.checkpoints.pending_job(project_id, agent_id)
+        if not job_id:
+            return None
+        status_data = await self.job_manager.get_job_status(job_id, user)
+        if not status_data or status_data["status"] == JobStatus.FAILED.value:
+            return None
+        return job_id
 
     def _create_agent_node(self, agent_def: AgentDefinition, project: Project, user: User):
         """
@@ -280,29 +410,59 @@ class OrchestrationService:
                 }
             )
             
-            try:
-                job = await self.job_manager.create_job(user, job_request)
+            # A job dispatched before a restart is adopted instead of duplicated
+            job_id = await self._adopt_pending_job(project.id, agent_def.agent_id, user)
+            if job_id:
                 await self._publish_event(project.id, "JOB_CREATED", {
                     "agent_id": agent_def.agent_id, 
-                    "job_id": str(job.job_id),
-                    "message": f"⚙️ 워커에 일감이 생성되었습니다 (Job ID: {str(job.job_id)[:8]})"
+                    "job_id": job_id,
+                    "message": f"♻️ 이전 실행의 일감을 이어서 기다립니다 (Job ID: {job_id[:8]})"
                 })
-            except Exception as e:
-                await self._publish_event(project.id, "AGENT_FAILED", {
-                    "agent_id": agent_def.agent_id, 
-                    "error": str(e),
-                    "message": f"❌ 일감 생성 실패: {str(e)}"
-                })
-                return {"messages": [AIMessage(content=f"Job creation failed: {e}")]}
+            else:
+                try:
+                    job = await self.job_manager.create_job(user, job_request)
+                    await self._publish_event(project.id, "JOB_CREATED", {
+                        "agent_id": agent_def.agent_id, 
+                        "job_id": str(job.job_id),
+                        "message": f"⚙️ 워커에 일감이 생성되었습니다 (Job ID: {str(job.job_id)[:8]})"
+                    })
+                except Exception as e:
+                    await self._publish_event(project.id, "AGENT_FAILED", {
+                        "agent_id": agent_def.agent_id, 
+                        "error": str(e),
+                        "message": f"❌ 일감 생성 실패: {str(e)}"
+                    })
+                    return {"messages": [AIMessage(content=f"Job creation failed: {e}")]}
 
-            job_id = str(job.job_id)
-            while True:
+                job_id = str(job.job_id)
+                if self.checkpoints:
+                    await self.checkpoints.set_pending_job(project.id, agent_def.agent_id, job_id)
+            # Push-based wait: update_job_status signals completion, polling is
+            # only a slow fallback inside wait_for_completion.
+            wait_timeout = await self.job_manager.completion_wait_timeout(job_id)
+            status = await self.job_manager.wait_for_completion(job_id, timeout=wait_timeout)
+            if status is None and not await self.job_manager.fail_unfinished_job(
+                job_id, f"No result within {wait_timeout}s"
+            ):
+                # Finished just as the wait ran out
                 status_data = await self.job_manager.get_job_status(job_id, user)
-                status = status_data["status"]
-                if status in [JobStatus.COMPLETED.value, JobStatus.FAILED.value]:
-                    result = status_data.get("result")
-                    break
-                await asyncio.sleep(2)
+                status = status_data["status"] if status_data else None
+            result = None
+            if status is None:
+                await self._publish_event(project.id, "AGENT_FAILED", {
+                    "agent_id": agent_def.agent_id,
+                    "job_id": job_id,
+                    "error": "timeout",
+                    "message": f"⏱️ {role_kr} 에이전트 작업 시간 초과 ({wait_timeout}초)."
+                })
+                return {
+                    "current_agent": agent_def.agent_id,
+                    "messages": [AIMessage(content=f"Agent {agent_def.agent_id} timed out.")]
+                }
+            # The agent's output drives the next step: fetch it even if offloaded
+            status_data = await self.job_manager.get_job_status(job_id, user, include_output=True)
+            if status_data:
+                result = status_data.get("result")
                 
             if status == JobStatus.COMPLETED.value:
                 output = result.get("output", {}) if result else {}
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""
+Job result blob store
+
+Large job outputs (diffs, logs, file lists) are kept out of Redis: the job
+hash stores only a short summary and a reference {"sha256", "size",
+"encoding"} to a compressed, content-addressed blob on disk. Workers upload
+the compressed output in chunks (PUT /jobs/{id}/result/chunks/{n}) and name
+the blob when they submit the result; oversized inline outputs are
+compressed and offloaded by the backend itself. The output is only read
+back when a caller asks for it.
+
+Blobs are addressed by the SHA-256 of the stored (compressed) bytes, so a
+chunked upload is verified without decompressing it. An S3-compatible store
+only needs the same put/stage_chunk/commit/get/sweep methods (sweep maps to
+a bucket lifecycle rule).
+
+Blobs are not reference counted: storing content again refreshes the
+blob's mtime, and sweep() deletes blobs older than the longest a job hash
+can refer to them, along with staged uploads abandoned by dead workers.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # Optional: gzip is always available
+    zstandard = None
+
+SUMMARY_MAX_FIELDS = 20
+SUMMARY_MAX_CHARS = 200
+
+_READ_BLOCK = 1024 * 1024
+
+_DECOMPRESS_ERRORS = (OSError, EOFError) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+class ResultBlobError(ValueError):
+    """Raised when an uploaded result blob is incomplete, corrupt or unknown"""
+    pass
+
+
+class ResultTooLarge(ValueError):
+    """Raised when a result upload exceeds the configured size limits"""
+    pass
+
+
+def available_encodings() -> Tuple[str, ...]:
+    return ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+def compress(data: bytes, encoding: Optional[str] = None) -> Tuple[bytes, str]:
+    """Compress with zstd when installed, else gzip (deterministic: no mtime)."""
+    encoding = encoding or available_encodings()[0]
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data), "zstd"
+    return gzip.compress(data, mtime=0), "gzip"
+
+
+def decompress(data: bytes, encoding: str, max_size: int) -> bytes:
+    """Decompress a blob, refusing to inflate past max_size bytes."""
+    if encoding == "zstd":
+        if zstandard is None:
+            raise ResultBlobError("zstd result blob but zstandard is not installed")
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data))
+    elif encoding == "gzip":
+        reader = gzip.GzipFile(fileobj=io.BytesIO(data))
+    else:
+        raise ResultBlobError(f"Unknown result encoding: {encoding}")
+    try:
+        with reader:
+            out = reader.read(max_size + 1)
+    except _DECOMPRESS_ERRORS as e:
+        raise ResultBlobError(f"Corrupt {encoding} result blob: {e}") from e
+    if len(out) > max_size:
+        raise ResultTooLarge(f"Result output inflates past {max_size} bytes")
+    return out
+
+
+def encode_output(output: Dict[str, Any]) -> bytes:
+    return json.dumps(output, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def summarize_output(output: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Small stand-in for an offloaded output
+
+    Keeps scalar top-level fields (strings truncated) and replaces
+    containers by their length, so status polls still show what happened.
+    """
+    summary: Dict[str, Any] = {}
+    for key, value in list((output or {}).items())[:SUMMARY_MAX_FIELDS]:
+        if isinstance(value, str):
+            summary[key] = value if len(value) <= SUMMARY_MAX_CHARS else value[:SUMMARY_MAX_CHARS] + "…"
+        elif value is None or isinstance(value, (bool, int, float)):
+            summary[key] = value
+        elif isinstance(value, (list, dict)):
+            summary[key] = {"items": len(value)}
+    return summary
+
+
+class LocalResultBlobStore:
+    """
+    Content-addressed blobs on local disk
+
+    Layout: blobs/<sha[:2]>/<sha> plus uploads/<upload_id>/<index> for
+    chunks staged before commit. Methods block on file I/O; async callers
+    run them in a thread.
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.blob_dir = self.root / "blobs"
+        self.upload_dir = self.root / "uploads"
+
+    def _blob_path(self, digest: str) -> Path:
+        if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+            raise ResultBlobError(f"Invalid blob digest: {digest!r}")
+        return self.blob_dir / digest[:2] / digest
+
+    def _staging(self, upload_id: str) -> Path:
+        if not upload_id or "/" in upload_id or "\\" in upload_id or upload_id.startswith("."):
+            raise ResultBlobError(f"Invalid upload id: {upload_id!r}")
+        return self.upload_dir / upload_id
+
+    def _publish(self, tmp_path: Path, digest: str) -> None:
+        path = self._blob_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            # Same content already stored: a new job refers to it now
+            try:
+                os.utime(path)
+                tmp_path.unlink()
+                return
+            except FileNotFoundError:
+                pass  # Swept meanwhile
+        os.replace(tmp_path, path)
+
+    def put(self, data: bytes) -> str:
+        """Store bytes and return their digest."""
+        digest = hashlib.sha256(data).hexdigest()
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.blob_dir / f".tmp-{uuid.uuid4().hex}"
+        tmp_path.write_bytes(data)
+        self._publish(tmp_path, digest)
+        return digest
+
+    def stage_chunk(self, upload_id: str, index: int, data: bytes, max_total: int) -> int:
+        """
+        Stage chunk `index` of an upload; returns the bytes staged so far
+
+        Chunk 0 starts the upload over, so a retried attempt never mixes
+        with the chunks of an earlier one.
+        """
+        staging = self._staging(upload_id)
+        if index == 0:
+            shutil.rmtree(staging, ignore_errors=True)
+        elif not staging.is_dir():
+            raise ResultBlobError(f"Upload {upload_id} was not started with chunk 0")
+        staging.mkdir(parents=True, exist_ok=True)
+        (staging / f"{index:06d}").write_bytes(data)
+        total = sum(part.stat().st_size for part in staging.iterdir())
+        if total > max_total:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise ResultTooLarge(f"Result upload exceeds {max_total} bytes")
+        return total
+
+    def commit(self, upload_id: str, digest: str, size: int) -> None:
+        """Join the staged chunks, verify size and digest, then publish the blob."""
+        staging = self._staging(upload_id)
+        parts = sorted(staging.iterdir()) if staging.is_dir() else []
+        if not parts or [p.name for p in parts] != [f"{i:06d}" for i in range(len(parts))]:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise ResultBlobError(f"Upload {upload_id} is missing chunks")
+
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.blob_dir / f".tmp-{uuid.uuid4().hex}"
+        hasher = hashlib.sha256()
+        written = 0
+        try:
+            with open(tmp_path, "wb") as out:
+                for part in parts:
+                    with open(part, "rb") as src:
+                        while block := src.read(_READ_BLOCK):
+                            hasher.update(block)
+                            out.write(block)
+                            written += len(block)
+            if written != size or hasher.hexdigest() != digest:
+                raise ResultBlobError(f"Upload {upload_id} does not match its size/sha256")
+            self._publish(tmp_path, digest)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def get(self, digest: str) -> bytes:
+        path = self._blob_path(digest)
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            raise ResultBlobError(f"Result blob {digest} not found") from None
+
+    def sweep(self, blob_max_age: float, upload_max_age: float) -> Dict[str, int]:
+        """
+        Delete blobs last stored more than blob_max_age seconds ago, and
+        staged uploads (and temp files) idle for upload_max_age seconds
+
+        Returns:
+            {"blobs": n, "uploads": n} removed
+        """
+        now = time.time()
+        removed = {"blobs": 0, "uploads": 0}
+        if self.blob_dir.is_dir():
+            for path in self.blob_dir.glob("*/*"):
+                if _idle(path, now) > blob_max_age:
+                    path.unlink(missing_ok=True)
+                    removed["blobs"] += 1
+            for path in self.blob_dir.glob(".tmp-*"):
+                if _idle(path, now) > upload_max_age:
+                    path.unlink(missing_ok=True)
+        if self.upload_dir.is_dir():
+            for staging in self.upload_dir.iterdir():
+                try:
+                    parts = list(staging.iterdir())
+                except FileNotFoundError:
+                    continue
+                # A live upload keeps adding chunks
+                if min([_idle(staging, now)] + [_idle(p, now) for p in parts]) > upload_max_age:
+                    shutil.rmtree(staging, ignore_errors=True)
+                    removed["uploads"] += 1
+        return removed
+
+
+def _idle(path: Path, now: float) -> float:
+    """Seconds since path was last written (0 if it is already gone)."""
+    try:
+        return now - path.stat().st_mtime
+    except FileNotFoundError:
+        return 0.0
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming upload storage
+
+Uploads are copied to a temp file chunk by chunk while their SHA-256 is
+updated incrementally, so memory per upload stays at one chunk however big
+the file is. File I/O runs in worker threads to keep the event loop free,
+the copy stops as soon as the size limit is crossed, and a kept upload is
+renamed atomically to its content-addressed path
+<upload_dir>/<sha[:2]>/<sha><ext>.
+"""
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import BinaryIO
+
+from fastapi import UploadFile
+
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the size limit (the partial copy is removed)"""
+    pass
+
+
+def _write_chunk(fh: BinaryIO, hasher, chunk: bytes) -> None:
+    hasher.update(chunk)
+    fh.write(chunk)
+
+
+def _publish(tmp_path: Path, dest: Path) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.exists():
+        # Identical content is already stored
+        tmp_path.unlink()
+    else:
+        os.replace(tmp_path, dest)
+
+
+class StagedUpload:
+    """An upload copied to a temp file; commit() keeps it, discard() drops it"""
+
+    def __init__(self, upload_dir: Path, tmp_path: Path, ext: str, size: int, file_hash: str):
+        self.upload_dir = upload_dir
+        self.tmp_path = tmp_path
+        self.ext = ext
+        self.size = size
+        self.file_hash = file_hash
+
+    @property
+    def final_path(self) -> Path:
+        return self.upload_dir / self.file_hash[:2] / f"{self.file_hash}{self.ext}"
+
+    async def commit(self) -> Path:
+        """Atomically move the upload to its content-addressed path."""
+        path = self.final_path
+        await asyncio.to_thread(_publish, self.tmp_path, path)
+        return path
+
+    async def discard(self) -> None:
+        await asyncio.to_thread(self.tmp_path.unlink, missing_ok=True)
+
+
+async def stage_upload(
+    file: UploadFile,
+    upload_dir: Path,
+    max_bytes: int,
+    chunk_size: int = UPLOAD_CHUNK_BYTES
+) -> StagedUpload:
+    """
+    Stream an upload into a temp file under upload_dir, hashing as it goes
+
+    Raises:
+        UploadTooLarge: more than max_bytes were sent
+    """
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    incoming = upload_dir / ".incoming"
+    await asyncio.to_thread(incoming.mkdir, parents=True, exist_ok=True)
+    tmp_path = incoming / f"{uuid.uuid4().hex}.part"
+
+    hasher = hashlib.sha256()
+    size = 0
+    fh = await asyncio.to_thread(open, tmp_path, "wb")
+    try:
+        while chunk := await file.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLarge(f"File too large. Max size: {max_bytes} bytes")
+            await asyncio.to_thread(_write_chunk, fh, hasher, chunk)
+    except BaseException:
+        await asyncio.to_thread(fh.close)
+        await asyncio.to_thread(tmp_path.unlink, missing_ok=True)
+        raise
+    await asyncio.to_thread(fh.close)
+    return StagedUpload(upload_dir, tmp_path, ext, size, hasher.hexdigest())
@@ -8,7 +8,7 @@ from typing import AsyncGenerator, List, Dict, Any, Optional
 
 from app.models.stream_context import StreamContext
 from app.models.master import ChatMessage, ConversationMode, MasterIntent # [v4.0]
-from app.core.database import save_message_to_rdb
+from app.core.message_journal import message_journal
 from app.services.knowledge_service import knowledge_queue # [v4.2] Knowledge Ingestion
 
 # Step 함수들 import
@@ -21,6 +21,18 @@ from app.services.response_builder import handle_function_read, handle_function_
 from app.services.debug_service import debug_service  # [v4.2]
 from app.schemas.debug import DebugInfo, RetrievalChunk, RetrievalDebug  # [v4.2]
 
+def _worker_status_line(worker_status: Optional[Dict[str, Any]]) -> str:
+    """워커 레지스트리 요약 한 줄 (정보가 없으면 빈 문자열)"""
+    if not worker_status:
+        return ""
+    if not worker_status.get("online"):
+        return "연결된 로컬 워커가 없습니다."
+    return (
+        f"로컬 워커 {worker_status['online']}대 연결됨 "
+        f"(실행 중 작업 {worker_status.get('in_flight', 0)}/{worker_status.get('capacity', 0)})"
+    )
+
+
 async def stream_message_v32(
     message: str,
     history: List[ChatMessage],
@@ -115,7 +127,7 @@ async def stream_message_v32(
         from app.services.embedding_service import embedding_service
         from app.core.vector_store import PineconeClient
         from app.core.neo4j_client import neo4j_client
-        from app.core.database import get_messages_from_rdb  # [FIX] 누락된 import 추가
+        from app.core.database import get_recent_messages
         
         try:
             # [중요] OPENROUTER로 통일 (Provider 분기 금지)
@@ -218,7 +230,7 @@ async def stream_message_v32(
                 # Vector 검색 실패는 무시하고 계속 진행
             
             # [v3.2.1 FIX] 직전 대화 이력 로드 (최근 10개)
-            recent_messages = await get_messages_from_rdb(
+            recent_messages = await get_recent_messages(
                 project_id=ctx.project_id,
                 thread_id=ctx.thread_id,
                 limit=10
@@ -242,6 +254,7 @@ async def stream_message_v32(
 
 [현재 프로젝트 상태]
 {mes_info}
+{_worker_status_line(worker_status)}
 {vector_context_str}
 
 사용자의 요구사항을 이해하고 다음 단계를 안내하세요:
@@ -300,7 +313,8 @@ START TASK, READY_TO_START, MISSION READINESS 같은 시스템 메시지는 절
     # [TODO] MES/Hash/Draft/verification_state를 Redis/DB에 저장
     # 지금은 메시지만 저장
     # [v4.2 Update] 사용자 메시지 저장 및 Knowledge Queue 등록
-    user_msg_id, saved_thread_id = await save_message_to_rdb("user", message, project_id, thread_id, metadata={"user_id": user_id})
+    # Write-behind: ids are assigned now, rows are batched into the RDB off the response path
+    user_msg_id, saved_thread_id = await message_journal.append("user", message, project_id, thread_id, metadata={"user_id": user_id})
     
     # [KNOW-001] Knowledge Ingestion Trigger
     # 사용자의 메시지를 지식 큐에 등록하여 비동기로 처리 (중요도 필터링은 worker가 수행)
@@ -311,11 +325,11 @@ START TASK, READY_TO_START, MISSION READINESS 같은 시스템 메시지는 절
     except Exception as e:
         ctx.add_log("knowledge_ingestion", f"Failed to queue message: {e}")
 
-    asst_msg_id, _ = await save_message_to_rdb(
+    asst_msg_id, _ = await message_journal.append(
         "assistant", 
         ctx.final_response, 
         project_id, 
-        thread_id,
+        saved_thread_id,
         metadata={"request_id": ctx.request_id} if ctx.request_id else None # [v4.2] Save Request ID
     )
     
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Worker push channel
+
+A worker connected to /workers/ws grants job credits instead of
+long-polling /jobs/pending; the backend leases jobs for it as soon as they
+are queued and pushes them down the socket. Heartbeats and acknowledgements
+travel over the same connection. Long polling remains the fallback.
+
+Protocol (JSON text frames):
+- worker -> backend
+  {"type": "heartbeat", "status", "capabilities": [{"provider", "model"}],
+   "in_flight", "capacity"}
+  {"type": "ready", "count": N, "capabilities": ["PROVIDER:model", ...]}
+      grants N more jobs, narrowed to the capabilities with a free slot
+  {"type": "ack", "request_id", "job_ids": [...]}
+- backend -> worker
+  {"type": "jobs", "jobs": [...]}  (never more than the credits granted)
+  {"type": "ack_result", "request_id", "acknowledged": [...], "rejected": [...]}
+  {"type": "error", "detail"}
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+
+from structlog import get_logger
+
+from app.core.config import settings
+from app.services.job_scheduler import select_capabilities
+
+logger = get_logger(__name__)
+
+
+class WorkerPushSession:
+    """Credits, capabilities and lease loop of one worker's push connection"""
+
+    def __init__(
+        self,
+        job_manager,
+        worker_id: str,
+        send: Callable[[Dict[str, Any]], Awaitable[None]]
+    ):
+        self.job_manager = job_manager
+        self.worker_id = worker_id
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self._demand = asyncio.Event()
+        self.credits = 0
+        self.cap_ids: List[str] = []
+        self.pushed = 0
+
+    async def send(self, message: Dict[str, Any]) -> None:
+        # The lease loop and ack replies share the socket
+        async with self._send_lock:
+            await self._send(message)
+
+    async def handle(self, message: Dict[str, Any]) -> None:
+        """Apply one message from the worker."""
+        kind = message.get("type")
+        if kind == "heartbeat":
+            await self.job_manager.record_worker_heartbeat(
+                self.worker_id,
+                message.get("status") or "active",
+                message.get("capabilities") or [],
+                in_flight=message.get("in_flight"),
+                capacity=message.get("capacity")
+            )
+            if self.credits > 0:
+                self._demand.set()
+        elif kind == "ready":
+            self.credits += max(0, int(message.get("count") or 0))
+            self.cap_ids = list(message.get("capabilities") or [])
+            if self.credits > 0:
+                self._demand.set()
+        elif kind == "ack":
+            job_ids = [str(job_id) for job_id in message.get("job_ids") or []]
+            acked = await self.job_manager.acknowledge_jobs(job_ids[:settings.JOB_LEASE_BATCH_MAX])
+            await self.send({
+                "type": "ack_result",
+                "request_id": message.get("request_id"),
+                "acknowledged": [job_id for job_id, ok in acked.items() if ok],
+                "rejected": [job_id for job_id, ok in acked.items() if not ok],
+            })
+        else:
+            await self.send({"type": "error", "detail": f"Unknown message type: {kind}"})
+
+    async def lease_loop(self) -> None:
+        """
+        Lease and push jobs while the worker has credits (run as a task)
+
+        Each attempt blocks at most WORKER_PUSH_LEASE_WAIT_SEC, so credits
+        and capabilities granted meanwhile apply to the next attempt.
+        """
+        while True:
+            await self._demand.wait()
+            capabilities = select_capabilities(
+                await self.job_manager.get_worker_capabilities(self.worker_id), self.cap_ids
+            )
+            if self.credits <= 0 or not capabilities:
+                # Woken again by the next grant or heartbeat
+                self._demand.clear()
+                continue
+
+            jobs = await self.job_manager.lease_jobs(
+                self.worker_id,
+                capabilities,
+                max_jobs=min(self.credits, settings.JOB_LEASE_BATCH_MAX),
+                timeout=settings.WORKER_PUSH_LEASE_WAIT_SEC
+            )
+            if not jobs:
+                continue
+            self.credits -= len(jobs)
+            self.pushed += len(jobs)
+            await self.send({"type": "jobs", "jobs": jobs})
+            logger.info(
+                "Jobs pushed to worker",
+                worker_id=self.worker_id,
+                job_ids=[job.get("job_id") for job in jobs]
+            )
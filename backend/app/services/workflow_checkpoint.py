@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Workflow checkpoints
+
+The orchestrator persists AgentState after every completed node so a run
+interrupted by a backend restart can be resumed from its last completed
+node instead of starting over.
+
+Storage:
+- workflow:checkpoint:{project_id} -> hash with run_id, status, workflow_type,
+  user, state, completed, last_node, updated_at and job:{agent_id} fields for
+  jobs dispatched but not yet completed (adopted on resume)
+- workflow:run:{project_id} -> run_id of the live run; short TTL kept alive
+  while the run's task exists, so a crashed run frees it quickly
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.messages import messages_from_dict, messages_to_dict
+
+from app.core.config import settings
+from app.models.schemas import User
+
+CHECKPOINT_RUNNING = "RUNNING"
+CHECKPOINT_FINISHED = "FINISHED"
+CHECKPOINT_FAILED = "FAILED"
+
+
+def checkpoint_key(project_id: str) -> str:
+    """Hash holding a project's latest workflow checkpoint."""
+    return f"workflow:checkpoint:{project_id}"
+
+
+def run_lock_key(project_id: str) -> str:
+    """run_id of the workflow currently executing for a project."""
+    return f"workflow:run:{project_id}"
+
+
+def serialize_state(state: Dict[str, Any]) -> str:
+    """AgentState -> JSON (LangChain messages via messages_to_dict)."""
+    data = dict(state)
+    data["messages"] = messages_to_dict(list(data.get("messages") or []))
+    return json.dumps(data, ensure_ascii=False, default=str)
+
+
+def deserialize_state(raw: str) -> Dict[str, Any]:
+    data = json.loads(raw)
+    data["messages"] = messages_from_dict(data.get("messages") or [])
+    return data
+
+
+class WorkflowCheckpointStore:
+    """Redis-backed checkpoints and run lock for orchestrated workflows"""
+
+    def __init__(self, redis_client):
+        self.redis = redis_client
+
+    async def acquire_run(self, project_id: str, run_id: str) -> bool:
+        """Claim the project's run lock; False if another run is alive."""
+        return bool(await self.redis.set(
+            run_lock_key(project_id), run_id, nx=True, ex=settings.WORKFLOW_RUN_LOCK_TTL_SEC
+        ))
+
+    async def keep_alive(self, project_id: str, run_id: str) -> None:
+        """Refresh the run lock until cancelled (run as a background task)."""
+        interval = max(1, settings.WORKFLOW_RUN_LOCK_TTL_SEC // 3)
+        while True:
+            await asyncio.sleep(interval)
+            await self.redis.set(
+                run_lock_key(project_id), run_id, xx=True, ex=settings.WORKFLOW_RUN_LOCK_TTL_SEC
+            )
+
+    async def release_run(self, project_id: str, run_id: str) -> None:
+        key = run_lock_key(project_id)
+        if await self.redis.get(key) == run_id:
+            await self.redis.delete(key)
+
+    async def start(
+        self,
+        project_id: str,
+        run_id: str,
+        workflow_type: str,
+        user: User,
+        state: Dict[str, Any]
+    ) -> None:
+        """Replace any previous checkpoint with a fresh run."""
+        key = checkpoint_key(project_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            pipe.hset(key, mapping={
+                "run_id": run_id,
+                "status": CHECKPOINT_RUNNING,
+                "workflow_type": workflow_type,
+                "user": user.json(),
+                "state": serialize_state(state),
+                "completed": "[]",
+                "last_node": "",
+                "updated_at": int(time.time()),
+            })
+            pipe.expire(key, settings.WORKFLOW_CHECKPOINT_TTL_SEC)
+            await pipe.execute()
+
+    async def save(
+        self,
+        project_id: str,
+        node: str,
+        state: Dict[str, Any],
+        completed: List[str]
+    ) -> None:
+        """Persist state after `node` completed (one round-trip)."""
+        key = checkpoint_key(project_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "status": CHECKPOINT_RUNNING,
+                "state": serialize_state(state),
+                "completed": json.dumps(completed),
+                "last_node": node,
+                "updated_at": int(time.time()),
+            })
+            pipe.hdel(key, f"job:{node}")
+            pipe.expire(key, settings.WORKFLOW_CHECKPOINT_TTL_SEC)
+            await pipe.execute()
+
+    async def finish(self, project_id: str, status: str) -> None:
+        await self.redis.hset(checkpoint_key(project_id), mapping={
+            "status": status,
+            "updated_at": int(time.time()),
+        })
+
+    async def set_pending_job(self, project_id: str, agent_id: str, job_id: str) -> None:
+        await self.redis.hset(checkpoint_key(project_id), f"job:{agent_id}", job_id)
+
+    async def pending_job(self, project_id: str, agent_id: str) -> Optional[str]:
+        """Job dispatched for agent_id by an interrupted run, if any."""
+        return await self.redis.hget(checkpoint_key(project_id), f"job:{agent_id}")
+
+    async def load(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Latest checkpoint for a project
+
+        Returns:
+            {run_id, status, workflow_type, user, state, completed, last_node}
+            or None if the project has no checkpoint
+        """
+        data = await self.redis.hgetall(checkpoint_key(project_id))
+        if not data or "state" not in data:
+            return None
+        return {
+            "run_id": data.get("run_id"),
+            "status": data.get("status"),
+            "workflow_type": data.get("workflow_type"),
+            "user": User.parse_raw(data["user"]),
+            "state": deserialize_state(data["state"]),
+            "completed": json.loads(data.get("completed") or "[]"),
+            "last_node": data.get("last_node") or None,
+        }
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Workflow DAG helpers
+
+Graph checks shared by the master agent's workflow validation and the
+orchestrator's PARALLEL (DAG) execution mode, plus the runner that
+dispatches every agent as soon as all of its predecessors have finished.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+# node(state) -> partial state update, same contract as a LangGraph node
+NodeFn = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+class WorkflowCycleError(ValueError):
+    """Raised when a workflow meant to run as a DAG contains a cycle"""
+    pass
+
+
+def find_cycle(graph: Dict[str, List[str]]) -> Optional[str]:
+    """
+    Detect a cycle with DFS over agent_id -> next_agents
+
+    Returns:
+        agent_id whose traversal found the cycle, or None if the graph is acyclic
+    """
+    def has_cycle(node, visited, rec_stack):
+        visited.add(node)
+        rec_stack.add(node)
+
+        for neighbor in graph.get(node, []):
+            if neighbor not in visited:
+                if has_cycle(neighbor, visited, rec_stack):
+                    return True
+            elif neighbor in rec_stack:
+                return True
+
+        rec_stack.remove(node)
+        return False
+
+    visited: Set[str] = set()
+    for agent_id in graph.keys():
+        if agent_id not in visited:
+            if has_cycle(agent_id, visited, set()):
+                return agent_id
+    return None
+
+
+def reachable_predecessors(graph: Dict[str, List[str]], entry: str) -> Dict[str, Set[str]]:
+    """
+    Predecessor sets for every node reachable from entry
+
+    Edges to unknown agents are ignored, and so are predecessors that can't
+    run because they are not reachable from the entry.
+    """
+    reachable: List[str] = []
+    stack = [entry]
+    while stack:
+        node = stack.pop()
+        if node in reachable or node not in graph:
+            continue
+        reachable.append(node)
+        stack.extend(graph[node])
+
+    preds: Dict[str, Set[str]] = {node: set() for node in reachable}
+    for node in reachable:
+        for succ in graph[node]:
+            if succ in preds:
+                preds[succ].add(node)
+    return preds
+
+
+def merge_artifacts(left: Optional[Dict[str, Any]], right: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-agent artifacts independent of completion order
+
+    Keys are agent ids, so concurrent branches never collide; the result is
+    key-sorted so the merged state is identical however branches finish.
+    """
+    merged = dict(left or {})
+    merged.update(right or {})
+    return {key: merged[key] for key in sorted(merged)}
+
+
+def merge_state_update(state: Dict[str, Any], update: Dict[str, Any]) -> None:
+    """Apply a node's update to the shared DAG state (AgentState semantics)."""
+    for key, value in (update or {}).items():
+        if key in ("messages", "ux_issues"):
+            state[key] = list(state.get(key) or []) + list(value or [])
+        elif key == "artifacts":
+            state[key] = merge_artifacts(state.get(key), value)
+        elif key == "retry_count":
+            state[key] = max(state.get(key) or 0, value or 0)
+        elif key == "large_change_detected":
+            state[key] = bool(state.get(key)) or bool(value)
+        else:
+            state[key] = value
+
+
+class DagWorkflow:
+    """
+    Runs agent nodes over a DAG with maximum concurrency
+
+    Exposes the same astream() shape as a compiled LangGraph graph, so the
+    orchestrator's event loop is unchanged. A node starts the moment its last
+    predecessor completes (fan-in waits for all of them); independent
+    branches therefore overlap and wall-clock time follows the critical path.
+    Each node sees a snapshot of the state merged from everything finished
+    before it was dispatched.
+    """
+
+    def __init__(
+        self,
+        nodes: Dict[str, NodeFn],
+        graph: Dict[str, List[str]],
+        entry: str,
+        prelude: Iterable[str] = ()
+    ):
+        cycle_at = find_cycle(graph)
+        if cycle_at is not None:
+            raise WorkflowCycleError(f"Workflow has a cycle through agent {cycle_at}")
+        if entry not in graph:
+            raise ValueError(f"Entry agent {entry} is not part of the workflow")
+
+        self.nodes = nodes
+        self.graph = graph
+        self.entry = entry
+        # Nodes run one by one before the DAG (e.g. master_planning)
+        self.prelude = list(prelude)
+        # Nodes finished by an earlier, interrupted run (see resuming())
+        self.completed: Set[str] = set()
+
+    def resuming(self, completed: Iterable[str]) -> "DagWorkflow":
+        """Skip nodes an interrupted run already completed; their successors start once unblocked."""
+        self.completed = set(completed)
+        return self
+
+    async def astream(self, initial_state: Dict[str, Any]) -> AsyncIterator[Dict[str, Dict[str, Any]]]:
+        state = dict(initial_state)
+        for name in self.prelude:
+            if name in self.completed:
+                continue
+            update = await self.nodes[name](dict(state))
+            merge_state_update(state, update)
+            yield {name: update}
+
+        waiting = reachable_predecessors(self.graph, self.entry)
+        for node in self.completed & set(waiting):
+            del waiting[node]
+        for preds in waiting.values():
+            preds -= self.completed
+        running: Dict[asyncio.Task, str] = {}
+
+        def dispatch_ready():
+            for node in sorted(n for n, preds in waiting.items() if not preds):
+                del waiting[node]
+                running[asyncio.create_task(self.nodes[node](dict(state)))] = node
+
+        dispatch_ready()
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                # Same-instant completions are applied in name order
+                for task in sorted(done, key=lambda t: running[t]):
+                    node = running.pop(task)
+                    update = task.result()
+                    merge_state_update(state, update)
+                    for succ in self.graph.get(node, []):
+                        if succ in waiting:
+                            waiting[succ].discard(node)
+                    yield {node: update}
+                dispatch_ready()
+        finally:
+            for task in running:
+                task.cancel()
@@ -5,6 +5,7 @@ from datetime import datetime
 from typing import List, Dict, Any
 from app.core.config import settings
 from app.models.schemas import JobStatus
+from app.services.job_manager import JobManager, JOB_TENANTS_KEY
 from langchain.tools import tool
 
 @tool
@@ -50,44 +51,43 @@ async def get_job_history_internal(limit: int = 20, active_only: bool = False) -
     try:
         r = redis.from_url(settings.REDIS_URL, decode_responses=True)
         jobs = []
-        async for key in r.scan_iter("job:*:status"):
-            try:
-                status = await r.get(key)
-                
-                if active_only and status not in [JobStatus.QUEUED.value, JobStatus.RUNNING.value]:
-                    continue
-                    
-                job_id = key.split(":")[1]
-                spec_json = await r.get(f"job:{job_id}:spec")
-                created_at_raw = await r.get(f"job:{job_id}:created_at")
-                
-                if spec_json:
-                    spec = json.loads(spec_json)
-                    metadata = spec.get("metadata", {})
-                    
-                    # 날짜 변환 (방어 코드 추가)
-                    date_str = "Unknown"
-                    ts = 0
+        job_manager = JobManager(r)
+        # 인덱스 세트(SSCAN)만 순회 - KEYS/전체 SCAN 금지
+        index_statuses = [JobStatus.QUEUED, JobStatus.RUNNING] if active_only else [None]
+        for tenant_id in await r.smembers(JOB_TENANTS_KEY):
+            for index_status in index_statuses:
+                async for job_id, (status, spec_json, created_at_raw) in job_manager.iter_jobs(
+                    tenant_id, index_status, fields=("status", "spec", "created_at")
+                ):
+                    if active_only and status not in [JobStatus.QUEUED.value, JobStatus.RUNNING.value]:
+                        continue
                     try:
-                        if created_at_raw:
-                            ts = int(float(created_at_raw))
-                            date_str = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
-                    except (ValueError, TypeError):
-                        pass
+                        spec = json.loads(spec_json)
+                        metadata = spec.get("metadata", {})
+                        
+                        # 날짜 변환 (방어 코드 추가)
+                        date_str = "Unknown"
+                        ts = 0
+                        try:
+                            if created_at_raw:
+                                ts = int(float(created_at_raw))
+                                date_str = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+                        except (ValueError, TypeError):
+                            pass
 
-                    jobs.append({
-                        "job_id": job_id,
-                        "status": status,
-                        "created_at": date_str,
-                        "timestamp": ts,
-                        "role": metadata.get("role") or spec.get("metadata", {}).get("role", "Unknown"),
-                        "project_id": metadata.get("project_id") or spec.get("metadata", {}).get("project_id", "Unknown"),
-                        "repo_path": spec.get("repo_root") or spec.get("repo_path", "N/A"),
-                        "model": spec.get("model")
-                    })
-            except Exception as inner_e:
-                print(f"Error processing job key {key}: {inner_e}")
-                continue
+                        jobs.append({
+                            "job_id": job_id,
+                            "status": status,
+                            "created_at": date_str,
+                            "timestamp": ts,
+                            "role": metadata.get("role") or spec.get("metadata", {}).get("role", "Unknown"),
+                            "project_id": metadata.get("project_id") or spec.get("metadata", {}).get("project_id", "Unknown"),
+                            "repo_path": spec.get("repo_root") or spec.get("repo_path", "N/A"),
+                            "model": spec.get("model")
+                        })
+                    except Exception as inner_e:
+                        print(f"Error processing job {job_id}: {inner_e}")
+                        continue
         
         await r.close()
         
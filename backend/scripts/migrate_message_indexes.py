@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Migration Script: Composite indexes for message history
+
+목적:
+- 히스토리 조회(프로젝트/스레드별 최신순, 커서 페이지네이션)가 messages 전체를
+  스캔하지 않도록 (project_id, thread_id, timestamp, message_id),
+  (project_id, timestamp, message_id) 복합 인덱스 생성
+- 새 DB는 init_db()의 create_all로 생성되므로 기존 DB에만 필요
+- PostgreSQL에서는 CREATE INDEX CONCURRENTLY로 쓰기를 막지 않고 생성
+
+실행 방법:
+python backend/scripts/migrate_message_indexes.py
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from structlog import get_logger
+
+from app.core.database import MessageModel, engine, init_db
+
+logger = get_logger(__name__)
+
+
+async def migrate():
+    """
+    MessageModel에 선언된 인덱스를 기존 messages 테이블에 생성 (이미 있으면 건너뜀)
+    """
+    # messages 테이블 생성 (없을 경우); create_all은 기존 테이블에 인덱스를 추가하지 않음
+    await init_db()
+
+    table = MessageModel.__table__
+    postgres = engine.dialect.name == "postgresql"
+    # CONCURRENTLY cannot run inside a transaction block
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            columns = ", ".join(column.name for column in index.columns)
+            logger.info("Creating index", index=index.name, columns=columns)
+            await conn.execute(text(
+                f"CREATE INDEX {'CONCURRENTLY ' if postgres else ''}IF NOT EXISTS "
+                f"{index.name} ON {table.name} ({columns})"
+            ))
+        await conn.execute(text(f"ANALYZE {table.name}"))
+
+    logger.info(f"✅ Message indexes ready: {', '.join(sorted(i.name for i in table.indexes))}")
+
+
+async def main():
+    try:
+        await migrate()
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
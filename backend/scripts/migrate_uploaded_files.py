@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Migration Script: Backfill uploaded_files from file_upload messages
+
+목적:
+- 파일 중복 검사가 messages.metadata_json 스캔에서 uploaded_files 테이블
+  (project_id, file_hash 유니크 인덱스) 조회로 바뀜
+- 기존 업로드 메시지를 uploaded_files에 등록하여 이전 업로드도 중복으로 인식되도록 함
+- 같은 (project, hash)가 여러 번 있으면 가장 최근 메시지를 사용
+
+실행 방법:
+python backend/scripts/migrate_uploaded_files.py
+"""
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from sqlalchemy import select
+from structlog import get_logger
+
+from app.core.database import (
+    AsyncSessionLocal,
+    MessageModel,
+    UploadedFileModel,
+    init_db,
+)
+
+logger = get_logger(__name__)
+
+BATCH_SIZE = 500
+
+
+def _metadata(message: MessageModel) -> dict:
+    metadata = message.metadata_json
+    if isinstance(metadata, str):
+        try:
+            metadata = json.loads(metadata)
+        except json.JSONDecodeError:
+            return {}
+    return metadata if isinstance(metadata, dict) else {}
+
+
+async def migrate():
+    """
+    file_upload 메시지를 uploaded_files로 복사
+    """
+    logger.info("Starting uploaded_files backfill")
+    # uploaded_files 테이블 생성 (없을 경우)
+    await init_db()
+
+    async with AsyncSessionLocal() as session:
+        existing = {
+            (row.project_id, row.file_hash)
+            for row in (await session.execute(select(UploadedFileModel))).scalars().all()
+        }
+
+        stmt = (
+            select(MessageModel)
+            .where(MessageModel.metadata_json.is_not(None))
+            .order_by(MessageModel.timestamp.desc())
+        )
+        added = 0
+        for message in (await session.execute(stmt)).scalars().all():
+            metadata = _metadata(message)
+            if metadata.get("type") != "file_upload" or not metadata.get("file_hash"):
+                continue
+            project_key = str(message.project_id) if message.project_id else "system-master"
+            key = (project_key, metadata["file_hash"])
+            if key in existing:
+                continue
+            existing.add(key)
+            session.add(UploadedFileModel(
+                project_id=project_key,
+                file_hash=metadata["file_hash"],
+                filename=metadata.get("filename") or "",
+                storage_path=metadata.get("file_path") or "",
+                file_size=int(metadata.get("file_size") or 0),
+                parse_status="parsed" if "--- FILE CONTENT ---" in (message.content or "") else "empty",
+                message_id=message.message_id,
+                user_id=metadata.get("user_id"),
+                created_at=message.timestamp,
+            ))
+            added += 1
+            if added % BATCH_SIZE == 0:
+                await session.commit()
+        await session.commit()
+
+    logger.info(f"✅ Backfilled {added} uploaded_files rows")
+
+
+async def main():
+    try:
+        await migrate()
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
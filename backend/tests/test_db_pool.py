@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.dependencies import get_current_user
+from app.core import database
+from app.core.database import Base, UserModel, get_db_session
+from app.core.db_metrics import DatabaseMetrics, TimedAsyncQueuePool, db_metrics, instrument_engine
+from app.core.security import create_access_token
+from app.models.schemas import User, UserRole
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.mark.asyncio
+async def test_pool_records_checkout_wait_timeouts_and_query_latency(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=TimedAsyncQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.2,
+    )
+    metrics = DatabaseMetrics()
+    instrument_engine(engine, metrics)
+    db_metrics.reset()
+    try:
+        async with engine.connect() as held:
+            await held.execute(text("SELECT 1"))
+            assert metrics.snapshot(engine.pool)["pool"]["checked_out"] == 1
+            # The only connection is taken: the next checkout waits, then gives up
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+
+        async def query():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        await asyncio.gather(*(query() for _ in range(5)))
+    finally:
+        await engine.dispose()
+
+    snapshot = db_metrics.snapshot()
+    assert snapshot["checkout_wait"]["timeouts"] == 1
+    assert snapshot["checkout_wait"]["count"] == 6
+    assert snapshot["checkout_wait"]["max_ms"] >= snapshot["checkout_wait"]["p50_ms"] >= 0
+    queries = metrics.snapshot(engine.pool)
+    assert queries["queries"]["count"] == 6 and queries["queries"]["slow"] == 0
+    assert queries["pool"] == {"size": 1, "checked_out": 0, "overflow": 0}
+
+
+@pytest.mark.asyncio
+async def test_request_shares_one_session_and_releases_it_after_auth(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    opened = []
+
+    class TrackingSession(AsyncSession):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            opened.append(self)
+
+    session_factory = async_sessionmaker(engine, class_=TrackingSession, expire_on_commit=False)
+    async with session_factory() as session:
+        session.add(UserModel(id="u-1", username="kim", hashed_password="x", tenant_id="t-1", role="standard_user"))
+        await session.commit()
+    opened.clear()
+    monkeypatch.setattr(database, "AsyncSessionLocal", session_factory)
+
+    app = FastAPI()
+
+    @app.get("/me")
+    async def me(user: User = Depends(get_current_user), session: AsyncSession = Depends(get_db_session)):
+        in_transaction = session.in_transaction()
+        row = (await session.execute(select(UserModel).where(UserModel.id == user.id))).scalar_one()
+        return {"username": row.username, "in_transaction_after_auth": in_transaction}
+
+    token = create_access_token({"sub": "u-1", "tenant_id": "t-1", "role": UserRole.STANDARD_USER.value})
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        res = await client.get("/me", headers={"Authorization": f"Bearer {token}"})
+
+    assert res.status_code == 200
+    assert res.json() == {"username": "kim", "in_transaction_after_auth": False}
+    assert len(opened) == 1
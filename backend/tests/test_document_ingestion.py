@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from app.services.document_chunker import chunk_sections, estimate_tokens
+from app.services.document_parser_service import PAGE_BREAK, iter_text_sections
+from app.services.knowledge_service import KnowledgeService
+
+
+def _words(text):
+    return len(text.split())
+
+
+def test_sections_split_on_page_breaks_and_headings_with_offsets():
+    text = f"intro line\n# Heading\nbody\n{PAGE_BREAK}page two\nmore\n"
+    sections = list(iter_text_sections(text.splitlines(keepends=True)))
+
+    assert [(s.page, s.text) for s in sections] == [
+        (1, "intro line\n"),
+        (1, "# Heading\nbody\n"),
+        (2, "page two\nmore\n"),
+    ]
+    assert all(text[s.start:s.start + len(s.text)] == s.text for s in sections)
+
+
+def test_chunks_respect_size_overlap_and_cover_document():
+    text = PAGE_BREAK.join("".join(f"p{page} w{i} w w w\n" for i in range(40)) for page in range(1, 4))
+    sections = iter_text_sections(text.splitlines(keepends=True), max_chars=200)
+
+    chunks = list(chunk_sections(sections, chunk_tokens=50, overlap_tokens=10, counter=_words))
+
+    assert len(chunks) > 3
+    assert all(c.tokens <= 50 for c in chunks)
+    assert [c.index for c in chunks] == list(range(len(chunks)))
+    for chunk in chunks:
+        assert text[chunk.start:chunk.end].replace(PAGE_BREAK, "") == chunk.text
+    # Consecutive chunks overlap, and together they reach the end of the text
+    assert all(b.start < a.end for a, b in zip(chunks, chunks[1:]))
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+    assert chunks[0].page_start == 1 and chunks[-1].page_end == 3
+
+
+def test_oversized_line_is_split():
+    chunks = list(chunk_sections(iter_text_sections(["x" * 1000]), chunk_tokens=100, overlap_tokens=0, counter=estimate_tokens))
+    assert "".join(c.text for c in chunks) == "x" * 1000
+    assert all(c.tokens <= 100 for c in chunks)
+
+
+@pytest.mark.asyncio
+async def test_ingest_document_streams_every_chunk_with_bounded_concurrency(tmp_path, monkeypatch):
+    from app.services import knowledge_service as module
+
+    doc = tmp_path / "spec.md"
+    doc.write_text("".join(f"# Section {i}\n" + "requirement text line\n" * 30 for i in range(20)), encoding="utf-8")
+    monkeypatch.setattr(module.settings, "DOC_CHUNK_TOKENS", 200)
+    monkeypatch.setattr(module.settings, "DOC_CHUNK_OVERLAP_TOKENS", 20)
+    monkeypatch.setattr(module.settings, "DOC_INGEST_CONCURRENCY", 2)
+
+    service = KnowledgeService()
+    active = 0
+    peak = 0
+    seen = []
+    links = []
+
+    async def extract(text, tier, context, project_id, message_ids):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        seen.append(text)
+        return {"nodes": [{"id": str(len(seen)), "type": "Requirement", "title": text[:20]}]}, {"prompt_tokens": 10, "completion_tokens": 2}
+
+    async def upsert(project_id, extracted):
+        return [f"kg-{node['id']}" for node in extracted["nodes"]]
+
+    async def link(file_node_id, node_ids, chunk):
+        links.append((file_node_id, node_ids, chunk.index, chunk.start, chunk.end))
+
+    async def noop(*args, **kwargs):
+        return {}
+
+    async def file_node(*args):
+        return "file-1"
+
+    monkeypatch.setattr(service, "_llm_extract_merged", extract)
+    monkeypatch.setattr(service, "_upsert_batch_to_neo4j", upsert)
+    monkeypatch.setattr(service, "_link_file_provenance", link)
+    monkeypatch.setattr(service, "_get_context_snapshot", noop)
+    monkeypatch.setattr(service, "_upsert_file_node", file_node)
+    monkeypatch.setattr(service, "_mark_file_ingested", noop)
+
+    stats = await service.ingest_document("global", str(doc), ".md", "ab" * 32, "spec.md", "msg-1")
+
+    assert stats["chunks"] == len(seen) == len(links) > 5
+    assert stats["extracted"] == stats["chunks"] and stats["failed"] == 0
+    assert stats["prompt_tokens"] == 10 * stats["chunks"]
+    assert peak == 2
+    # The last section made it into extraction, not just the first 2000 characters
+    assert any("Section 19" in text for text in seen)
+    assert sorted(index for _, _, index, _, _ in links) == list(range(stats["chunks"]))
@@ -3,7 +3,8 @@ import pytest
 from fastapi import HTTPException
 from tempfile import NamedTemporaryFile
 
-from app.services.document_parser_service import document_parser_service
+from app.services.document_parser_service import DocumentParserService, document_parser_service
+from fixtures.hwp_samples import build_hwpx
 
 
 def test_supported_extensions_include_excel_variant():
@@ -20,3 +21,115 @@ def test_parse_unsupported_extension_raises_http_error():
         document_parser_service._parse_file(temp_path, ".zzz")
 
     os.remove(temp_path)
+
+
+def _sleepy_parse(file_path, suffix):
+    import time
+    time.sleep(30)
+    return ("ok", "never", None)
+
+
+def _timed_parse(file_path, suffix):
+    """Sleeps for the seconds named in the file name, e.g. sleep-1.5.pdf."""
+    import time
+    seconds = float(os.path.basename(file_path)[len("sleep-"):-len(suffix)])
+    time.sleep(seconds)
+    return ("ok", os.path.basename(file_path), None)
+
+
+@pytest.mark.asyncio
+async def test_binary_formats_parse_in_pool_and_are_cached_by_hash(tmp_path):
+    service = DocumentParserService(cache_dir=str(tmp_path / "cache"))
+    doc = tmp_path / "report.hwpx"
+    doc.write_bytes(build_hwpx([["한글 문서 본문"]]))
+    try:
+        assert await service.parse(str(doc), ".HWPX", file_hash="ab" * 32) == "한글 문서 본문"
+
+        # Same content again: served from the cache without parsing
+        doc.unlink()
+        assert await service.parse(str(doc), ".hwpx", file_hash="ab" * 32) == "한글 문서 본문"
+    finally:
+        service.shutdown()
+
+    stats = service.metrics()
+    assert stats["pending"] == 0 and stats["queue_depth"] == 0
+    assert stats["extensions"][".hwpx"]["parsed"] == 1
+    assert stats["extensions"][".hwpx"]["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_parse_times_out_and_pool_recovers(tmp_path, monkeypatch):
+    from app.services import document_parser_service as parser_module
+
+    service = DocumentParserService(cache_dir=str(tmp_path / "cache"))
+    doc = tmp_path / "slow.pdf"
+    doc.write_bytes(b"%PDF")
+    monkeypatch.setattr(parser_module.settings, "PARSER_TIMEOUT_SEC", 1)
+    monkeypatch.setattr(parser_module, "_parse_in_worker", _sleepy_parse)
+    try:
+        with pytest.raises(HTTPException) as exc:
+            await service.parse(str(doc), ".pdf")
+        assert exc.value.status_code == 504
+        assert service.metrics()["extensions"][".pdf"]["timeouts"] == 1
+
+        # A fresh pool serves the next document
+        monkeypatch.undo()
+        hwpx = tmp_path / "next.hwpx"
+        hwpx.write_bytes(build_hwpx([["next"]]))
+        assert await service.parse(str(hwpx), ".hwpx") == "next"
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_parse_timeout_excludes_time_queued_for_a_worker(tmp_path, monkeypatch):
+    import asyncio
+
+    from app.services import document_parser_service as parser_module
+
+    monkeypatch.setattr(parser_module.settings, "PARSER_MAX_WORKERS", 1)
+    monkeypatch.setattr(parser_module.settings, "PARSER_TIMEOUT_SEC", 3)
+    monkeypatch.setattr(parser_module, "_parse_in_worker", _timed_parse)
+    service = DocumentParserService(cache_dir=str(tmp_path / "cache"))
+    # Warm the pool so worker start-up does not count against the first parse
+    warm = tmp_path / "sleep-0.pdf"
+    warm.write_bytes(b"%PDF")
+    first, second = tmp_path / "sleep-2.pdf", tmp_path / "sleep-2.1.pdf"
+    first.write_bytes(b"%PDF")
+    second.write_bytes(b"%PDF")
+    try:
+        await service.parse(str(warm), ".pdf")
+        # The second parse waits 2s for the only worker, then runs 2.1s
+        results = await asyncio.gather(service.parse(str(first), ".pdf"), service.parse(str(second), ".pdf"))
+        assert results == ["sleep-2.pdf", "sleep-2.1.pdf"]
+    finally:
+        service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_parses_sharing_a_reset_pool_are_retried(tmp_path, monkeypatch):
+    import asyncio
+
+    from app.services import document_parser_service as parser_module
+
+    monkeypatch.setattr(parser_module.settings, "PARSER_MAX_WORKERS", 2)
+    monkeypatch.setattr(parser_module.settings, "PARSER_TIMEOUT_SEC", 3)
+    monkeypatch.setattr(parser_module, "_parse_in_worker", _timed_parse)
+    service = DocumentParserService(cache_dir=str(tmp_path / "cache"))
+    for name in ("sleep-0.pdf", "sleep-30.pdf", "sleep-1.5.pdf"):
+        (tmp_path / name).write_bytes(b"%PDF")
+    try:
+        await service.parse(str(tmp_path / "sleep-0.pdf"), ".pdf")
+
+        async def later():
+            await asyncio.sleep(2)
+            return await service.parse(str(tmp_path / "sleep-1.5.pdf"), ".pdf")
+
+        stuck, innocent = await asyncio.gather(
+            service.parse(str(tmp_path / "sleep-30.pdf"), ".pdf"), later(), return_exceptions=True
+        )
+        # The stuck parse times out; the one running beside it survives the reset
+        assert isinstance(stuck, HTTPException) and stuck.status_code == 504
+        assert innocent == "sleep-1.5.pdf"
+    finally:
+        service.shutdown()
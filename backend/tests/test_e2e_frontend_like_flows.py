@@ -290,8 +290,13 @@ async def test_upload_folder_and_batch_status_harmonization(monkeypatch):
         async def __aexit__(self, exc_type, exc, tb):
             return False
 
-        def add(self, *_):
-            return None
+        def add(self, obj):
+            if isinstance(obj, files_module.UploadedFileModel):
+                seen_hashes.add(obj.file_hash)
+
+        def add_all(self, objs):
+            for obj in objs:
+                self.add(obj)
 
         async def commit(self):
             return None
@@ -300,18 +305,15 @@ async def test_upload_folder_and_batch_status_harmonization(monkeypatch):
     class FakeDuplicateMessage:
         message_id = "dup-msg-id"
 
-    async def fake_check_duplicate_file(_session, _project_id, file_hash):
-        if file_hash in seen_hashes:
-            return FakeDuplicateMessage()
-        seen_hashes.add(file_hash)
-        return None
+    async def fake_find_existing_hashes(_session, _project_id, file_hashes):
+        return {file_hash: FakeDuplicateMessage() for file_hash in file_hashes if file_hash in seen_hashes}
 
     class DummySessionFactory:
         def __call__(self):
             return DummySession()
 
     monkeypatch.setattr(files_module, "AsyncSessionLocal", DummySessionFactory())
-    monkeypatch.setattr(files_module, "check_duplicate_file", fake_check_duplicate_file)
+    monkeypatch.setattr(files_module, "find_existing_hashes", fake_find_existing_hashes)
     monkeypatch.setattr(files_module.settings, "MAX_FILE_SIZE_BYTES", 8)
     app.dependency_overrides[get_current_user] = fake_user
 
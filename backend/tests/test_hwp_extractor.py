@@ -0,0 +1,68 @@
+import pytest
+from fastapi import HTTPException
+
+from app.services import hwp_extractor
+from app.services.document_parser_service import DocumentParserService
+from app.services.hwp_extractor import HwpFormatError, iter_paragraphs
+from fixtures.hwp_samples import HWP_FLAG_PASSWORD, build_hwp, build_hwpx
+
+
+def _write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_hwpx_paragraphs_in_section_order_with_tables(tmp_path):
+    sections = [[f"섹션 {i} 본문"] for i in range(12)]
+    sections[0] = ["제목", "이름\t값\n다음 줄", "a < b & c"]
+    path = _write(tmp_path, "doc.hwpx", build_hwpx(sections, table=[["셀 A", "셀 B"]]))
+
+    paragraphs = list(iter_paragraphs(path))
+
+    assert paragraphs[:6] == ["제목", "이름\t값\n다음 줄", "a < b & c", "셀 A", "셀 B", "표:"]
+    # section10/section11 come after section9, not after section1
+    assert paragraphs[6:] == [f"섹션 {i} 본문" for i in range(1, 12)]
+
+
+@pytest.mark.parametrize("compressed", [True, False])
+def test_hwp_body_text_sections_are_decoded(tmp_path, compressed):
+    path = _write(tmp_path, "doc.hwp", build_hwp(
+        [["보고서 제목", "항목\t설명", "😀 이모지"], ["둘째 구역"]], compressed=compressed
+    ))
+
+    # The section-definition control and trailing paragraph break are dropped
+    assert list(iter_paragraphs(path)) == ["보고서 제목", "항목\t설명", "😀 이모지", "둘째 구역"]
+
+
+def test_large_hwp_streams_in_bounded_reads(tmp_path, monkeypatch):
+    monkeypatch.setattr(hwp_extractor, "READ_CHUNK_BYTES", 4096)
+    paragraphs = [f"{i}번째 문단 " + "가나다라마바사 " * 30 for i in range(3000)]
+    path = _write(tmp_path, "big.hwp", build_hwp([paragraphs[:1500], paragraphs[1500:]]))
+
+    with open(path, "rb") as fh:
+        cfb = hwp_extractor.CompoundFile(fh)
+        chunks = list(cfb.iter_stream("BodyText/Section0"))
+    assert len(chunks) > 1 and max(len(c) for c in chunks) <= 4096
+
+    assert list(iter_paragraphs(path)) == [p.strip() for p in paragraphs]
+
+
+def test_unreadable_documents_are_rejected(tmp_path):
+    with pytest.raises(HwpFormatError, match="Password"):
+        list(iter_paragraphs(_write(tmp_path, "locked.hwp", build_hwp([["x"]], flags=HWP_FLAG_PASSWORD))))
+    with pytest.raises(HwpFormatError):
+        list(iter_paragraphs(_write(tmp_path, "text.hwp", "그냥 텍스트".encode("utf-8"))))
+    with pytest.raises(HwpFormatError):
+        list(iter_paragraphs(_write(tmp_path, "trunc.hwp", build_hwp([["x" * 5000]])[:2048])))
+
+
+def test_parser_returns_text_or_422_for_hwp(tmp_path):
+    service = DocumentParserService(cache_dir=str(tmp_path / "cache"))
+    good = _write(tmp_path, "ok.hwp", build_hwp([["첫 문단", "둘째 문단"]]))
+    assert service._parse_file(good, ".hwp") == "첫 문단\n둘째 문단"
+
+    bad = _write(tmp_path, "bad.hwp", b"\x00\x01binary noise")
+    with pytest.raises(HTTPException) as exc:
+        service._parse_file(bad, ".hwp")
+    assert exc.value.status_code == 422
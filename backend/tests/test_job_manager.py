@@ -0,0 +1,538 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.models.schemas import (
+    ExecutionLocation,
+    JobCreate,
+    JobResult,
+    JobStatus,
+    ProviderType,
+    User,
+    UserRole,
+)
+from app.services.job_manager import JobManager, LeaseLost, job_key, status_index_key
+from app.services.result_store import LocalResultBlobStore, ResultBlobError, compress
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def _user() -> User:
+    return User(
+        id="user_001",
+        username="tester",
+        tenant_id="tenant_test",
+        role=UserRole.SUPER_ADMIN,
+    )
+
+
+def _job_request(
+    provider: ProviderType = ProviderType.OPENROUTER,
+    model: str = "gpt-4o-mini",
+    priority: int = 5,
+) -> JobCreate:
+    return JobCreate(
+        execution_location=ExecutionLocation.CLOUD,
+        provider=provider,
+        model=model,
+        priority=priority,
+    )
+
+
+CLOUD_WORKER = [{"provider": "OPENROUTER", "model": "*"}]
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.mark.asyncio
+async def test_create_job_stores_single_hash(redis_client):
+    manager = JobManager(redis_client)
+    job = await manager.create_job(_user(), _job_request())
+
+    key = job_key(str(job.job_id))
+    stored = await redis_client.hgetall(key)
+    assert stored["status"] == JobStatus.QUEUED.value
+    assert json.loads(stored["spec"])["job_id"] == str(job.job_id)
+    assert int(stored["created_at"]) == job.created_at_ts
+    assert stored["retry_count"] == "0"
+    assert 0 < await redis_client.ttl(key) <= 604800
+    assert not await redis_client.exists(f"job:{job.job_id}:spec")
+
+
+@pytest.mark.asyncio
+async def test_completed_job_status_includes_result(redis_client):
+    manager = JobManager(redis_client)
+    job = await manager.create_job(_user(), _job_request())
+    job_id = str(job.job_id)
+
+    await manager.update_job_status(
+        job_id,
+        JobStatus.COMPLETED,
+        JobResult(status=JobStatus.COMPLETED, output={"message": "done"}),
+    )
+
+    status = await manager.get_job_status(job_id, _user())
+    assert status["status"] == JobStatus.COMPLETED.value
+    assert status["result"]["output"] == {"message": "done"}
+    assert await redis_client.hget(job_key(job_id), "completed_at")
+
+
+@pytest.mark.asyncio
+async def test_failed_job_is_requeued_until_retries_exhausted(redis_client, monkeypatch):
+    from app.services import job_manager as job_manager_module
+
+    monkeypatch.setattr(job_manager_module.settings, "JOB_MAX_RETRIES", 1)
+    manager = JobManager(redis_client)
+    job = await manager.create_job(_user(), _job_request())
+    job_id = str(job.job_id)
+    failed = JobResult(status=JobStatus.FAILED, error="boom")
+
+    await manager.update_job_status(job_id, JobStatus.FAILED, failed)
+    assert await redis_client.hget(job_key(job_id), "status") == JobStatus.QUEUED.value
+    assert await redis_client.hget(job_key(job_id), "retry_count") == "1"
+
+    await manager.update_job_status(job_id, JobStatus.FAILED, failed)
+    assert await redis_client.hget(job_key(job_id), "status") == JobStatus.FAILED.value
+    assert await redis_client.llen("job_dlq:tenant_test") == 1
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_failure_is_not_requeued(redis_client, monkeypatch):
+    from app.services import job_manager as job_manager_module
+
+    monkeypatch.setattr(job_manager_module.settings, "JOB_MAX_RETRIES", 2)
+    manager = JobManager(redis_client)
+    job = await manager.create_job(_user(), _job_request())
+    job_id = str(job.job_id)
+
+    await manager.update_job_status(
+        job_id,
+        JobStatus.FAILED,
+        JobResult(status=JobStatus.FAILED, error="Result output upload failed", retryable=False),
+    )
+
+    assert await redis_client.hget(job_key(job_id), "status") == JobStatus.FAILED.value
+    assert await redis_client.lrange(f"job_done:{job_id}", 0, -1) == [JobStatus.FAILED.value]
+    entry = json.loads(await redis_client.lindex("job_dlq:tenant_test", 0))
+    assert entry["reason"] == "not_retryable"
+
+
+@pytest.mark.asyncio
+async def test_lease_acknowledge_and_complete_releases_lease(redis_client):
+    pytest.importorskip("lupa")
+    manager = JobManager(redis_client)
+    job = await manager.create_job(_user(), _job_request())
+    job_id = str(job.job_id)
+
+    leased = await manager.lease_job("worker_a", CLOUD_WORKER, timeout=1)
+    assert leased["job_id"] == job_id
+    assert await redis_client.zscore("job_processing:tenant_test", job_id) is not None
+
+    assert await manager.acknowledge_job(job_id) is True
+    assert await redis_client.hget(job_key(job_id), "status") == JobStatus.RUNNING.value
+    assert await redis_client.smembers(status_index_key("tenant_test", "RUNNING")) == {job_id}
+    assert await redis_client.scard(status_index_key("tenant_test", "QUEUED")) == 0
+
+    await manager.update_job_status(
+        job_id, JobStatus.COMPLETED, JobResult(status=JobStatus.COMPLETED)
+    )
+    assert await redis_client.zscore("job_processing:tenant_test", job_id) is None
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_then_fails_expired_leases(redis_client, monkeypatch):
+    pytest.importorskip("lupa")
+    from app.services import job_manager as job_manager_module
+
+    monkeypatch.setattr(job_manager_module.settings, "WORKER_MAX_REASSIGN_COUNT", 1)
+    manager = JobManager(redis_client)
+    job = await manager.create_job(_user(), _job_request())
+    job_id = str(job.job_id)
+
+    await manager.lease_job("worker_a", CLOUD_WORKER, timeout=1)
+    await redis_client.zadd("job_processing:tenant_test", {job_id: 0})
+    assert await manager.reap_expired_leases() == [job_id]
+    assert await redis_client.hget(job_key(job_id), "status") == JobStatus.QUEUED.value
+    assert await manager.get_queue_depth("tenant_test") == 1
+
+    # A late acknowledge from the dead worker is rejected
+    assert await manager.acknowledge_job(job_id) is False
+
+    await manager.lease_job("worker_b", CLOUD_WORKER, timeout=1)
+    await redis_client.zadd("job_processing:tenant_test", {job_id: 0})
+    assert await manager.reap_expired_leases() == [job_id]
+    assert await redis_client.hget(job_key(job_id), "status") == JobStatus.FAILED.value
+    assert await redis_client.llen("job_dlq:tenant_test") == 1
+
+
+@pytest.mark.asyncio
+async def test_results_are_only_taken_from_the_lease_holder(redis_client):
+    pytest.importorskip("lupa")
+    manager = JobManager(redis_client)
+    job_id = str((await manager.create_job(_user(), _job_request())).job_id)
+
+    await manager.lease_job("worker_a", CLOUD_WORKER, timeout=1)
+    await redis_client.zadd("job_processing:tenant_test", {job_id: 0})
+    assert await manager.reap_expired_leases() == [job_id]
+    await manager.lease_job("worker_b", CLOUD_WORKER, timeout=1)
+    await manager.acknowledge_job(job_id)
+
+    # The reclaimed worker's late reports change nothing
+    for status in (JobStatus.COMPLETED, JobStatus.FAILED):
+        with pytest.raises(LeaseLost):
+            await manager.update_job_status(job_id, status, JobResult(status=status), worker_id="worker_a")
+    assert await redis_client.hget(job_key(job_id), "status") == JobStatus.RUNNING.value
+    assert await redis_client.zscore("job_processing:tenant_test", job_id) is not None
+
+    result = JobResult(status=JobStatus.COMPLETED, output={"by": "worker_b"})
+    await manager.update_job_status(job_id, JobStatus.COMPLETED, result, worker_id="worker_b")
+    assert await redis_client.zscore("job_processing:tenant_test", job_id) is None
+    # A repeated report for the finished attempt is rejected too
+    with pytest.raises(LeaseLost):
+        await manager.update_job_status(job_id, JobStatus.FAILED, JobResult(status=JobStatus.FAILED),
+                                        worker_id="worker_b")
+    assert json.loads(await redis_client.hget(job_key(job_id), "result"))["output"] == {"by": "worker_b"}
+
+
+@pytest.mark.asyncio
+async def test_lease_job_times_out_on_empty_queue(redis_client):
+    pytest.importorskip("lupa")
+    manager = JobManager(redis_client)
+    assert await manager.lease_job("worker_a", CLOUD_WORKER, timeout=1) is None
+
+
+@pytest.mark.asyncio
+async def test_lease_prefers_priority_and_matches_capabilities(redis_client):
+    pytest.importorskip("lupa")
+    manager = JobManager(redis_client)
+    user = _user()
+    low = await manager.create_job(user, _job_request(priority=2))
+    high = await manager.create_job(user, _job_request(priority=9))
+    local = await manager.create_job(
+        user, _job_request(provider=ProviderType.OLLAMA, model="mimo-v2-flash")
+    )
+
+    ollama_worker = [{"provider": "OLLAMA", "model": "mimo-v2-flash"}]
+    leased = await manager.lease_job("worker_local", ollama_worker, timeout=0)
+    assert leased["job_id"] == str(local.job_id)
+    assert await manager.lease_job("worker_local", ollama_worker, timeout=0) is None
+
+    first = await manager.lease_job("worker_cloud", CLOUD_WORKER, timeout=0)
+    second = await manager.lease_job("worker_cloud", CLOUD_WORKER, timeout=0)
+    assert [first["job_id"], second["job_id"]] == [str(high.job_id), str(low.job_id)]
+
+
+@pytest.mark.asyncio
+async def test_lease_round_robins_across_tenants(redis_client):
+    pytest.importorskip("lupa")
+    manager = JobManager(redis_client)
+    busy = _user()
+    quiet = User(id="user_002", username="quiet", tenant_id="tenant_quiet", role=UserRole.SUPER_ADMIN)
+    for _ in range(3):
+        await manager.create_job(busy, _job_request())
+    await manager.create_job(quiet, _job_request())
+
+    tenants = []
+    for _ in range(2):
+        job = await manager.lease_job("worker_cloud", CLOUD_WORKER, timeout=0)
+        tenants.append(job["tenant_id"])
+    assert sorted(tenants) == ["tenant_quiet", "tenant_test"]
+
+
+@pytest.mark.asyncio
+async def test_lease_jobs_batches_across_tenants_and_bulk_acks(redis_client):
+    pytest.importorskip("lupa")
+    manager = JobManager(redis_client)
+    busy = _user()
+    quiet = User(id="user_002", username="quiet", tenant_id="tenant_quiet", role=UserRole.SUPER_ADMIN)
+    busy_jobs = [await manager.create_job(busy, _job_request(priority=p)) for p in (3, 9, 5)]
+    quiet_job = await manager.create_job(quiet, _job_request())
+
+    leased = await manager.lease_jobs("worker_cloud", CLOUD_WORKER, max_jobs=3, timeout=0)
+    assert len(leased) == 3
+    # Tenants alternate within a batch; each tenant's jobs come out by priority
+    assert str(quiet_job.job_id) in [job["job_id"] for job in leased]
+    busy_order = [job["job_id"] for job in leased if job["tenant_id"] == "tenant_test"]
+    assert busy_order == [str(busy_jobs[1].job_id), str(busy_jobs[2].job_id)]
+    assert await manager.get_queue_depth("tenant_test") == 1
+    assert await redis_client.zcard("job_processing:tenant_test") == 2
+
+    # Already-reclaimed (here: never leased) jobs are rejected, the rest acked
+    acked = await manager.acknowledge_jobs(
+        [job["job_id"] for job in leased] + [str(busy_jobs[0].job_id)]
+    )
+    assert acked == {**{job["job_id"]: True for job in leased}, str(busy_jobs[0].job_id): False}
+    assert await redis_client.scard(status_index_key("tenant_test", "RUNNING")) == 2
+
+    rest = await manager.lease_jobs("worker_cloud", CLOUD_WORKER, max_jobs=5, timeout=0)
+    assert [job["job_id"] for job in rest] == [str(busy_jobs[0].job_id)]
+    assert await manager.lease_jobs("worker_cloud", CLOUD_WORKER, max_jobs=5, timeout=0) == []
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_capabilities_expire_with_timeout(redis_client):
+    manager = JobManager(redis_client)
+    await manager.record_worker_heartbeat("worker_a", "active", CLOUD_WORKER)
+    assert await manager.get_worker_capabilities("worker_a") == CLOUD_WORKER
+    assert 0 < await redis_client.ttl("worker:worker_a") <= 120
+    assert await manager.get_worker_capabilities("worker_missing") == []
+
+
+@pytest.mark.asyncio
+async def test_wait_for_completion_wakes_on_status_update(redis_client):
+    import asyncio
+
+    manager = JobManager(redis_client)
+    job = await manager.create_job(_user(), _job_request())
+    job_id = str(job.job_id)
+
+    waiter = asyncio.create_task(manager.wait_for_completion(job_id, timeout=5))
+    await asyncio.sleep(0.05)
+    assert not waiter.done()
+
+    await manager.update_job_status(
+        job_id, JobStatus.COMPLETED, JobResult(status=JobStatus.COMPLETED)
+    )
+    assert await asyncio.wait_for(waiter, timeout=2) == JobStatus.COMPLETED.value
+    assert await manager.wait_for_completion(job_id, timeout=0) == JobStatus.COMPLETED.value
+
+
+@pytest.mark.asyncio
+async def test_unfinished_job_is_failed_after_its_wait_budget(redis_client, monkeypatch):
+    pytest.importorskip("lupa")
+    from app.services import job_manager as job_manager_module
+
+    settings = job_manager_module.settings
+    monkeypatch.setattr(settings, "JOB_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "WORKER_MAX_REASSIGN_COUNT", 1)
+    manager = JobManager(redis_client)
+    request = _job_request()
+    request.timeout_sec = 1200
+    job_id = str((await manager.create_job(_user(), request)).job_id)
+    per_attempt = 1200 + settings.WORKER_HEARTBEAT_TIMEOUT_SEC + settings.JOB_LEASE_REAPER_INTERVAL_SEC
+    assert await manager.completion_wait_timeout(job_id) == 4 * per_attempt + settings.JOB_COMPLETION_QUEUE_GRACE_SEC
+
+    await manager.lease_job("worker_a", CLOUD_WORKER, timeout=1)
+    await manager.acknowledge_job(job_id)
+    assert await manager.fail_unfinished_job(job_id, "No result within 1s") is True
+    assert await redis_client.hget(job_key(job_id), "status") == JobStatus.FAILED.value
+    assert await redis_client.zcard("job_processing:tenant_test") == 0
+    assert await manager.wait_for_completion(job_id, timeout=1) == JobStatus.FAILED.value
+    # The worker's late result is not applied, and a finished job is left alone
+    with pytest.raises(LeaseLost):
+        await manager.update_job_status(
+            job_id, JobStatus.COMPLETED, JobResult(status=JobStatus.COMPLETED), worker_id="worker_a"
+        )
+    assert await manager.fail_unfinished_job(job_id, "again") is False
+
+
+@pytest.mark.asyncio
+async def test_wait_for_completion_times_out(redis_client):
+    manager = JobManager(redis_client)
+    job = await manager.create_job(_user(), _job_request())
+    assert await manager.wait_for_completion(str(job.job_id), timeout=0.2) is None
+
+
+@pytest.mark.asyncio
+async def test_fix_orphaned_jobs_uses_status_index(redis_client):
+    manager = JobManager(redis_client)
+    queued = await manager.create_job(_user(), _job_request())
+    orphan = await manager.create_job(_user(), _job_request())
+    orphan_id = str(orphan.job_id)
+    await redis_client.zrem(f"job_queue:tenant_test:OPENROUTER:gpt-4o-mini", orphan_id)
+
+    # An index entry whose hash expired is pruned, not reported
+    await redis_client.sadd(status_index_key("tenant_test", "QUEUED"), "expired-job")
+
+    assert await manager.fix_orphaned_jobs("tenant_test") == [orphan_id]
+    assert await redis_client.hget(job_key(orphan_id), "status") == JobStatus.FAILED.value
+    assert await redis_client.smembers(status_index_key("tenant_test", "QUEUED")) == {str(queued.job_id)}
+    assert await redis_client.smembers(status_index_key("tenant_test", "FAILED")) == {orphan_id}
+
+
+@pytest.mark.asyncio
+async def test_clear_queue_fails_waiting_jobs(redis_client):
+    manager = JobManager(redis_client)
+    await manager.create_job(_user(), _job_request())
+    await manager.create_job(_user(), _job_request(model="gpt-4o"))
+
+    assert await manager.clear_queue("tenant_test") == 2
+    assert await manager.get_queue_depth("tenant_test") == 0
+    assert await redis_client.scard(status_index_key("tenant_test", "QUEUED")) == 0
+    assert await redis_client.scard(status_index_key("tenant_test", "FAILED")) == 2
+
+
+@pytest.mark.asyncio
+async def test_clear_queue_fails_running_jobs_and_wakes_waiters(redis_client):
+    pytest.importorskip("lupa")
+    manager = JobManager(redis_client)
+    job_id = str((await manager.create_job(_user(), _job_request())).job_id)
+    await manager.create_job(_user(), _job_request(model="gpt-4o"))
+    await manager.lease_job("worker_a", [{"provider": "OPENROUTER", "model": "gpt-4o-mini"}], timeout=1)
+    await manager.acknowledge_job(job_id)
+    waiter = asyncio.create_task(manager.wait_for_completion(job_id, timeout=5))
+    await asyncio.sleep(0.05)
+
+    assert await manager.clear_queue("tenant_test") == 2
+    assert await asyncio.wait_for(waiter, 1) == JobStatus.FAILED.value
+    assert await redis_client.zcard("job_processing:tenant_test") == 0
+    assert await redis_client.scard(status_index_key("tenant_test", "RUNNING")) == 0
+    assert await redis_client.scard(status_index_key("tenant_test", "FAILED")) == 2
+
+
+@pytest.mark.asyncio
+async def test_worker_registry_tracks_load_and_latency(redis_client):
+    pytest.importorskip("lupa")
+    manager = JobManager(redis_client)
+    await manager.record_worker_heartbeat("worker_a", "active", CLOUD_WORKER, in_flight=0, capacity=2)
+    job = await manager.create_job(_user(), _job_request())
+    job_id = str(job.job_id)
+
+    await manager.lease_job("worker_a", CLOUD_WORKER, timeout=0)
+    assert (await manager.list_workers())[0]["in_flight"] == 1
+
+    await manager.acknowledge_job(job_id)
+    await redis_client.hset(job_key(job_id), "execution_started_at", int(time.time()) - 2)
+    await manager.update_job_status(job_id, JobStatus.COMPLETED, JobResult(status=JobStatus.COMPLETED))
+
+    status = await manager.get_worker_status()
+    assert status["online"] == 1 and status["capacity"] == 2
+    worker = status["workers"][0]
+    assert worker["in_flight"] == 0
+    assert 2000 <= worker["latency_ewma_ms"] <= 3000
+    assert worker["jobs_completed"] == 1
+
+    # Expired heartbeats drop out of the registry
+    await redis_client.delete("worker:worker_a")
+    assert await manager.list_workers() == []
+    assert await redis_client.scard("workers") == 0
+
+
+@pytest.mark.asyncio
+async def test_busy_worker_leaves_jobs_to_idle_waiting_worker(redis_client):
+    pytest.importorskip("lupa")
+    manager = JobManager(redis_client)
+    await manager.record_worker_heartbeat("busy", "active", CLOUD_WORKER, in_flight=3, capacity=4)
+    await manager.record_worker_heartbeat("idle", "active", CLOUD_WORKER, in_flight=0, capacity=4)
+
+    # "idle" is blocked in a long-poll when the job arrives
+    idle_poll = asyncio.create_task(manager.lease_job("idle", CLOUD_WORKER, timeout=2))
+    await asyncio.sleep(0.05)
+    await manager.create_job(_user(), _job_request())
+
+    assert await manager.lease_job("busy", CLOUD_WORKER, timeout=0) is None
+    assert (await idle_poll)["tenant_id"] == "tenant_test"
+
+    # Once nobody better is waiting the busy worker is served normally
+    await manager.create_job(_user(), _job_request(priority=6))
+    assert await manager.lease_job("busy", CLOUD_WORKER, timeout=0) is not None
+
+
+@pytest.mark.asyncio
+async def test_large_output_is_offloaded_and_fetched_on_request(redis_client, tmp_path):
+    manager = JobManager(redis_client, LocalResultBlobStore(str(tmp_path)))
+    job = await manager.create_job(_user(), _job_request())
+    job_id = str(job.job_id)
+    output = {"status": "SUCCESS", "diff": "+line\n" * 20000, "files": ["a.py", "b.py"]}
+
+    await manager.update_job_status(
+        job_id, JobStatus.COMPLETED, JobResult(status=JobStatus.COMPLETED, output=output)
+    )
+
+    stored = json.loads(await redis_client.hget(job_key(job_id), "result"))
+    assert stored["output"] is None
+    assert stored["output_summary"]["status"] == "SUCCESS"
+    assert stored["output_summary"]["files"] == {"items": 2}
+    assert len(stored["output_summary"]["diff"]) <= 201
+    assert stored["output_ref"]["size"] < 10000
+
+    status = await manager.get_job_status(job_id, _user())
+    assert status["result"]["output"] is None
+    status = await manager.get_job_status(job_id, _user(), include_output=True)
+    assert status["result"]["output"] == output
+
+
+@pytest.mark.asyncio
+async def test_chunked_output_upload_is_verified_before_commit(redis_client, tmp_path):
+    import hashlib
+
+    manager = JobManager(redis_client, LocalResultBlobStore(str(tmp_path)))
+    job = await manager.create_job(_user(), _job_request())
+    job_id = str(job.job_id)
+    output = {"log": "x" * 50000}
+    blob, encoding = compress(json.dumps(output).encode())
+    ref = {"sha256": hashlib.sha256(blob).hexdigest(), "size": len(blob), "encoding": encoding}
+
+    # A corrupted upload is rejected and nothing is recorded
+    await manager.stage_result_chunk(job_id, 0, blob[:10])
+    bad = JobResult(status=JobStatus.COMPLETED, output_ref=ref)
+    with pytest.raises(ResultBlobError):
+        await manager.update_job_status(job_id, JobStatus.COMPLETED, bad)
+    assert await redis_client.hget(job_key(job_id), "status") == JobStatus.QUEUED.value
+
+    for index, offset in enumerate(range(0, len(blob), 64)):
+        await manager.stage_result_chunk(job_id, index, blob[offset:offset + 64])
+    result = JobResult(status=JobStatus.COMPLETED, output_ref=ref, output_summary={"log": "x" * 500})
+    await manager.update_job_status(job_id, JobStatus.COMPLETED, result)
+
+    status = await manager.get_job_status(job_id, _user(), include_output=True)
+    assert status["result"]["output"] == output
+    assert len(status["result"]["output_summary"]["log"]) <= 201
+    assert not any((tmp_path / "uploads").iterdir())
+
+
+@pytest.mark.asyncio
+async def test_sweep_drops_expired_blobs_and_abandoned_uploads(redis_client, tmp_path):
+    import os
+
+    from app.services import job_manager as job_manager_module
+
+    store = LocalResultBlobStore(str(tmp_path))
+    manager = JobManager(redis_client, store)
+    old = time.time() - job_manager_module.RESULT_BLOB_MAX_AGE_SEC - 60
+    expired = store.put(b"expired output")
+    reused = store.put(b"reused output")
+    for digest in (expired, reused):
+        os.utime(store._blob_path(digest), (old, old))
+    # Storing the same content again (a newer job) keeps the blob alive
+    assert store.put(b"reused output") == reused
+
+    store.stage_chunk("dead-worker", 0, b"partial", 1024)
+    store.stage_chunk("live-worker", 0, b"partial", 1024)
+    stale = time.time() - job_manager_module.RESULT_UPLOAD_MAX_AGE_SEC - 60
+    dead = tmp_path / "uploads" / "dead-worker"
+    for path in (dead, dead / "000000"):
+        os.utime(path, (stale, stale))
+
+    assert await manager.sweep_result_blobs() == {"blobs": 1, "uploads": 1}
+    with pytest.raises(ResultBlobError):
+        store.get(expired)
+    assert store.get(reused) == b"reused output"
+    assert [p.name for p in (tmp_path / "uploads").iterdir()] == ["live-worker"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_results_report_each_entry(redis_client, tmp_path):
+    from app.api.v1.jobs import submit_job_results
+    from app.models.schemas import JobResultBatch
+
+    manager = JobManager(redis_client, LocalResultBlobStore(str(tmp_path)))
+    good = str((await manager.create_job(_user(), _job_request())).job_id)
+    bad = str((await manager.create_job(_user(), _job_request())).job_id)
+    missing_blob = {"sha256": "0" * 64, "size": 10, "encoding": "gzip"}
+    batch = JobResultBatch(results=[
+        {"job_id": good, "status": "COMPLETED", "output": {"status": "SUCCESS"}},
+        {"job_id": bad, "status": "COMPLETED", "output_ref": missing_blob},
+    ])
+
+    response = await submit_job_results(batch, worker_id=None, worker_token="w" * 32, job_manager=manager)
+
+    assert response["applied"] == [good]
+    assert [(r["job_id"], r["status_code"]) for r in response["rejected"]] == [(bad, 422)]
+    assert await redis_client.hget(job_key(good), "status") == JobStatus.COMPLETED.value
+    assert await redis_client.hget(job_key(bad), "status") == JobStatus.QUEUED.value
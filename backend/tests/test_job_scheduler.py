@@ -0,0 +1,63 @@
+from app.services.job_scheduler import (
+    WeightedRoundRobin,
+    deferred_capability_ids,
+    matching_capability_ids,
+    parse_tenant_weights,
+    queue_score,
+    worker_rank,
+)
+
+
+def test_queue_score_orders_priority_then_fifo():
+    assert queue_score(9, 2_000) < queue_score(5, 1_000)
+    assert queue_score(5, 1_000) < queue_score(5, 2_000)
+    assert queue_score(99, 0) == queue_score(10, 0)
+
+
+def test_matching_capability_ids_supports_model_wildcard():
+    queued = ["OLLAMA:mimo-v2-flash", "OLLAMA:qwen:7b", "OPENROUTER:gpt-4o-mini"]
+
+    assert matching_capability_ids(queued, [{"provider": "ollama", "model": "qwen:7b"}]) == [
+        "OLLAMA:qwen:7b"
+    ]
+    assert matching_capability_ids(queued, [{"provider": "OPENROUTER", "model": "*"}]) == [
+        "OPENROUTER:gpt-4o-mini"
+    ]
+    assert matching_capability_ids(queued, []) == []
+
+
+def test_parse_tenant_weights_ignores_invalid_entries():
+    assert parse_tenant_weights("a:3, b:1,broken,c:x,d:0") == {"a": 3, "b": 1, "d": 1}
+    assert parse_tenant_weights(None) == {}
+
+
+def test_weighted_round_robin_respects_weights():
+    rr = WeightedRoundRobin({"a": 3})
+    picks = [rr.order(["a", "b"])[0] for _ in range(8)]
+
+    assert picks.count("a") == 6
+    assert picks.count("b") == 2
+    # Smooth WRR never starves the light tenant for a full cycle
+    assert "b" in picks[:4]
+
+
+def test_worker_rank_prefers_low_load_then_latency():
+    idle = {"worker_id": "b", "in_flight": 1, "capacity": 4, "latency_ewma_ms": 900}
+    busy = {"worker_id": "a", "in_flight": 1, "capacity": 1}
+    fast = {"worker_id": "c", "in_flight": 2, "capacity": 8, "latency_ewma_ms": 100}
+
+    assert [w["worker_id"] for w in sorted([busy, idle, fast], key=worker_rank)] == ["c", "b", "a"]
+
+
+def test_deferred_capability_ids_only_for_better_capable_waiters():
+    me = {"worker_id": "me", "in_flight": 2, "capacity": 4}
+    waiting = [
+        {"worker_id": "idle_local", "in_flight": 0, "capacity": 2,
+         "capabilities": [{"provider": "OLLAMA", "model": "llama3"}]},
+        {"worker_id": "busy_cloud", "in_flight": 4, "capacity": 4,
+         "capabilities": [{"provider": "OPENROUTER", "model": "*"}]},
+    ]
+    queued = ["OLLAMA:llama3", "OPENROUTER:gpt-4o-mini"]
+
+    assert deferred_capability_ids(me, queued, waiting) == {"OLLAMA:llama3"}
+    assert deferred_capability_ids(me, queued, []) == set()
@@ -0,0 +1,136 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.dependencies import get_current_user
+from app.api.v1 import projects as projects_module
+from app.core import database
+from app.core.database import Base, MessageModel, _normalize_project_id, encode_message_cursor, get_message_page
+from app.models.schemas import User, UserRole
+
+pytest.importorskip("aiosqlite")
+
+BASE_TIME = datetime(2026, 1, 1, 9, 0, 0)
+
+
+async def _seed(monkeypatch, project_id="proj-a", thread_id="thread-1", count=25):
+    """`count` messages, three per timestamp so paging has to break ties on message_id."""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(database, "AsyncSessionLocal", session_factory)
+
+    async with session_factory() as session:
+        for i in range(count):
+            session.add(MessageModel(
+                message_id=uuid.uuid4(),
+                project_id=_normalize_project_id(project_id),
+                thread_id=thread_id,
+                sender_role="user" if i % 2 == 0 else "assistant",
+                content=f"message {i}",
+                timestamp=BASE_TIME + timedelta(seconds=i // 3),
+            ))
+        # Other threads and projects must not leak into the page
+        session.add(MessageModel(project_id=_normalize_project_id(project_id), thread_id="thread-2",
+                                 sender_role="user", content="other thread", timestamp=BASE_TIME))
+        session.add(MessageModel(project_id=_normalize_project_id("proj-b"), thread_id=thread_id,
+                                 sender_role="user", content="other project", timestamp=BASE_TIME))
+        await session.commit()
+    return session_factory
+
+
+def _order(messages):
+    return [(m.timestamp, str(m.message_id)) for m in messages]
+
+
+@pytest.mark.asyncio
+async def test_before_cursor_walks_back_through_whole_thread(monkeypatch):
+    await _seed(monkeypatch)
+
+    page, before, after = await get_message_page("proj-a", "thread-1", limit=10)
+    assert _order(page) == sorted(_order(page))
+    assert page[-1].content == "message 24"
+    assert before and after
+
+    seen = list(page)
+    while before:
+        older, before, _ = await get_message_page("proj-a", "thread-1", limit=10, before=before)
+        assert _order(older) == sorted(_order(older))
+        assert _order(older)[-1] < _order(seen)[0]
+        seen = older + seen
+
+    assert len(seen) == 25 and len({m.message_id for m in seen}) == 25
+    assert {m.thread_id for m in seen} == {"thread-1"}
+    assert _order(seen) == sorted(_order(seen))
+
+
+@pytest.mark.asyncio
+async def test_after_cursor_returns_only_newer_messages(monkeypatch):
+    await _seed(monkeypatch)
+
+    newest, before, after = await get_message_page("proj-a", "thread-1", limit=4)
+    assert await get_message_page("proj-a", "thread-1", limit=4, after=after) == ([], None, None)
+
+    older, _, _ = await get_message_page("proj-a", "thread-1", limit=4, before=before)
+    newer, newer_before, _ = await get_message_page("proj-a", "thread-1", limit=10, after=encode_message_cursor(older[-1]))
+    assert [m.message_id for m in newer] == [m.message_id for m in newest]
+    assert newer_before == encode_message_cursor(newer[0])
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursors_are_rejected(monkeypatch):
+    await _seed(monkeypatch, count=3)
+    with pytest.raises(ValueError):
+        await get_message_page("proj-a", "thread-1", before="not-a-cursor")
+    _, _, after = await get_message_page("proj-a", "thread-1")
+    with pytest.raises(ValueError):
+        await get_message_page("proj-a", "thread-1", before=after, after=after)
+
+
+@pytest.mark.asyncio
+async def test_history_query_uses_composite_index(monkeypatch):
+    session_factory = await _seed(monkeypatch, count=3)
+    async with session_factory() as session:
+        plan = (await session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT * FROM messages WHERE project_id = :p AND thread_id = :t "
+            "ORDER BY timestamp DESC, message_id DESC LIMIT 10"
+        ), {"p": str(_normalize_project_id("proj-a")), "t": "thread-1"})).all()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_messages_project_thread_ts" in detail
+    assert "TEMP B-TREE" not in detail
+
+
+@pytest.mark.asyncio
+async def test_thread_messages_endpoint_pages_with_cursor_headers(monkeypatch):
+    await _seed(monkeypatch)
+
+    async def fake_user():
+        return User(id="u-1", username="u", tenant_id="t-1", role=UserRole.STANDARD_USER, is_active=True)
+
+    async def no_project(project_id, current_user):
+        raise HTTPException(status_code=404, detail="Project not found")
+
+    app = FastAPI()
+    app.include_router(projects_module.router, prefix="/api/v1/projects")
+    app.dependency_overrides[get_current_user] = fake_user
+    monkeypatch.setattr(projects_module, "_get_project_or_recover", no_project)
+
+    url = "/api/v1/projects/proj-a/threads/thread-1/messages"
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = await client.get(url, params={"limit": 20})
+        second = await client.get(url, params={"limit": 20, "before": first.headers["x-before-cursor"]})
+        bad = await client.get(url, params={"before": "garbage"})
+
+    assert first.status_code == 200 and second.status_code == 200
+    history = second.json() + first.json()
+    assert len(first.json()) == 20 and len(second.json()) == 5
+    assert {m["content"] for m in history} == {f"message {i}" for i in range(25)}
+    assert [m["created_at"] for m in history] == sorted(m["created_at"] for m in history)
+    assert "x-before-cursor" not in second.headers
+    assert bad.status_code == 400
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import database
+from app.core import message_journal as journal_module
+from app.core.database import Base, MessageModel, get_messages_from_rdb
+from app.core.message_cache import MessageTailCache
+from app.core.message_journal import MessageJournal
+
+pytest.importorskip("aiosqlite")
+
+
+async def _setup(monkeypatch, flush_ms=20, batch_size=100):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    commits = []
+
+    class CountingSession(AsyncSession):
+        async def commit(self):
+            commits.append(len(self.new))
+            await super().commit()
+
+    session_factory = async_sessionmaker(engine, class_=CountingSession, expire_on_commit=False)
+    monkeypatch.setattr(database, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(database, "message_tail_cache", MessageTailCache(size=20))
+    monkeypatch.setattr(journal_module, "message_tail_cache", database.message_tail_cache)
+    monkeypatch.setattr(journal_module.settings, "MESSAGE_JOURNAL_FLUSH_MS", flush_ms)
+    monkeypatch.setattr(journal_module.settings, "MESSAGE_JOURNAL_BATCH_SIZE", batch_size)
+
+    journal = MessageJournal()
+    monkeypatch.setattr(journal_module, "message_journal", journal)
+    return journal, session_factory, commits
+
+
+async def _count(session_factory):
+    async with session_factory() as session:
+        return (await session.execute(select(func.count()).select_from(MessageModel))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_turn_messages_get_ids_now_and_land_in_one_batch(monkeypatch):
+    journal, session_factory, commits = await _setup(monkeypatch)
+    journal.start()
+    try:
+        user_id, thread_id = await journal.append("user", "question", "proj-a", None, {"user_id": "u-1"})
+        asst_id, same_thread = await journal.append("assistant", "answer", "proj-a", thread_id)
+        assert thread_id.startswith("thread-") and same_thread == thread_id
+        assert commits == [] and journal.pending == 2
+
+        await asyncio.sleep(0.1)
+        assert journal.pending == 0 and len(commits) == 1
+        async with session_factory() as session:
+            rows = (await session.execute(select(MessageModel).order_by(MessageModel.timestamp))).scalars().all()
+        assert [(r.message_id, r.sender_role, r.thread_id) for r in rows] == [
+            (user_id, "user", thread_id), (asst_id, "assistant", thread_id)
+        ]
+        assert rows[0].metadata_json == {"user_id": "u-1"}
+    finally:
+        await journal.close()
+
+
+@pytest.mark.asyncio
+async def test_history_reads_see_queued_messages(monkeypatch):
+    journal, _, _ = await _setup(monkeypatch, flush_ms=60000)
+    journal.start()
+    try:
+        _, thread_id = await journal.append("user", "not flushed yet", "proj-a", None)
+        # The tail cache sees it at once, the RDB read flushes first
+        recent = await database.get_recent_messages("proj-a", thread_id, 5)
+        assert [m.content for m in recent] == ["not flushed yet"]
+        assert [m.content for m in await get_messages_from_rdb("proj-a", thread_id, 5)] == ["not flushed yet"]
+        assert journal.pending == 0
+    finally:
+        await journal.close()
+
+
+@pytest.mark.asyncio
+async def test_reads_only_wait_for_their_own_queued_rows(monkeypatch):
+    journal, _, commits = await _setup(monkeypatch, flush_ms=60000)
+    journal.start()
+    try:
+        _, thread_id = await journal.append("user", "first", "proj-a", None)
+        # A cold buffer is loaded from the RDB, so the project is flushed first
+        assert [m.content for m in await database.get_recent_messages("proj-a", thread_id, 5)] == ["first"]
+        assert len(commits) == 1 and journal.pending == 0
+        commits.clear()
+
+        # A warm buffer already has queued rows: nothing is written
+        asked_id, _ = await journal.append("user", "second", "proj-a", thread_id)
+        assert [m.content for m in await database.get_recent_messages("proj-a", thread_id, 5)] == ["first", "second"]
+        # Another project's history and lookups of written ids don't flush
+        await get_messages_from_rdb("proj-b", None, 5)
+        assert await journal.flush_message("not-queued") is True
+        assert commits == [] and journal.pending == 1
+
+        assert await journal.flush_message(asked_id) is True
+        assert journal.pending == 0 and not journal.is_pending(asked_id)
+    finally:
+        await journal.close()
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting_for_the_interval(monkeypatch):
+    journal, session_factory, commits = await _setup(monkeypatch, flush_ms=60000, batch_size=5)
+    journal.start()
+    try:
+        for i in range(12):
+            await journal.append("user", f"m{i}", "proj-a", "thread-1")
+        await asyncio.sleep(0.1)
+        # Batches of at most five rows, one commit each
+        assert await _count(session_factory) == 12 and len(commits) == 3
+
+        for i in range(2):
+            await journal.append("user", f"late{i}", "proj-a", "thread-1")
+        await asyncio.sleep(0.05)
+        assert journal.pending == 2
+    finally:
+        await journal.close()
+    # Shutdown writes what the interval had not
+    assert await _count(session_factory) == 14 and journal.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_stay_queued_until_the_rdb_recovers(monkeypatch):
+    journal, session_factory, _ = await _setup(monkeypatch, flush_ms=5)
+    monkeypatch.setattr(journal_module, "RETRY_DELAY_SEC", 0.01)
+    original = journal._insert
+    failures = {"left": 5}
+
+    async def flaky(rows):
+        if failures["left"]:
+            failures["left"] -= 1
+            raise OperationalError("INSERT", {}, Exception("database is locked"))
+        await original(rows)
+
+    monkeypatch.setattr(journal, "_insert", flaky)
+    journal.start()
+    try:
+        for i in range(3):
+            await journal.append("user", f"m{i}", "proj-a", "thread-1")
+        await asyncio.sleep(0.3)
+    finally:
+        await journal.close()
+
+    assert failures["left"] == 0
+    assert await _count(session_factory) == 3
+    assert journal.stats["dropped"] == 0 and journal.stats["flushed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_without_running_journal_append_writes_through(monkeypatch):
+    journal, session_factory, commits = await _setup(monkeypatch)
+    message_id, thread_id = await journal.append("user", "direct", "proj-a", "thread-1")
+    assert commits == [1] and journal.pending == 0
+    assert await _count(session_factory) == 1
@@ -0,0 +1,162 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import database
+from app.core.database import Base, MessageModel, _normalize_project_id, get_recent_messages, save_message_to_rdb
+from app.core.message_cache import MessageTailCache
+
+pytest.importorskip("aiosqlite")
+
+BASE_TIME = datetime(2026, 1, 1, 9, 0, 0)
+
+
+async def _setup(monkeypatch, count=30, cache=None):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(database, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(database, "message_tail_cache", cache or MessageTailCache(size=20))
+
+    async with session_factory() as session:
+        for i in range(count):
+            session.add(MessageModel(
+                message_id=uuid.uuid4(),
+                project_id=_normalize_project_id("proj-a"),
+                thread_id="thread-1" if i % 3 else "thread-2",
+                sender_role="user",
+                content=f"message {i}",
+                timestamp=BASE_TIME + timedelta(seconds=i),
+            ))
+        await session.commit()
+
+    queries = []
+    original = database.get_messages_from_rdb
+
+    async def counting(project_id=None, thread_id=None, limit=50):
+        queries.append((thread_id, limit))
+        return await original(project_id, thread_id, limit)
+
+    monkeypatch.setattr(database, "get_messages_from_rdb", counting)
+    return queries
+
+
+def _contents(messages):
+    return [m.content for m in messages]
+
+
+@pytest.mark.asyncio
+async def test_rdb_read_returns_newest_messages_oldest_first(monkeypatch):
+    await _setup(monkeypatch)
+    messages = await database.get_messages_from_rdb("proj-a", None, 5)
+    assert _contents(messages) == [f"message {i}" for i in range(25, 30)]
+
+
+@pytest.mark.asyncio
+async def test_one_load_serves_every_read_and_writes_go_through(monkeypatch):
+    queries = await _setup(monkeypatch)
+    thread_one = [f"message {i}" for i in range(30) if i % 3]
+
+    assert _contents(await get_recent_messages("proj-a", "thread-1", 5)) == thread_one[-5:]
+    assert _contents(await get_recent_messages("proj-a", "thread-1", 10)) == thread_one[-10:]
+    assert _contents(await get_recent_messages("proj-a", None, 3)) == ["message 27", "message 28", "message 29"]
+    assert queries == [("thread-1", 20), (None, 20)]
+
+    await save_message_to_rdb("assistant", "fresh", "proj-a", "thread-1")
+    assert _contents(await get_recent_messages("proj-a", "thread-1", 2)) == [thread_one[-1], "fresh"]
+    assert _contents(await get_recent_messages("proj-a", None, 2)) == ["message 29", "fresh"]
+    # Another thread's buffer is untouched; larger reads bypass the buffer
+    assert _contents(await get_recent_messages("proj-a", "thread-2", 1)) == ["message 27"]
+    assert len(await get_recent_messages("proj-a", None, 40)) == 31
+    assert queries[2:] == [("thread-2", 20), (None, 40)]
+
+
+@pytest.mark.asyncio
+async def test_write_during_load_is_not_lost(monkeypatch):
+    await _setup(monkeypatch, count=3)
+    original = database.get_messages_from_rdb
+    saved = asyncio.Event()
+
+    async def slow(project_id=None, thread_id=None, limit=50):
+        rows = await original(project_id, thread_id, limit)
+        await saved.wait()
+        return rows
+
+    monkeypatch.setattr(database, "get_messages_from_rdb", slow)
+    reader = asyncio.create_task(get_recent_messages("proj-a", "thread-1", 5))
+    await asyncio.sleep(0.05)
+    await save_message_to_rdb("user", "during load", "proj-a", "thread-1")
+    saved.set()
+    await reader
+
+    # The raced load was not cached, so the next read goes back to the RDB
+    assert _contents(await get_recent_messages("proj-a", "thread-1", 5))[-1] == "during load"
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_is_shared_between_workers(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    redis_client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    worker_a = MessageTailCache(size=20)
+    worker_b = MessageTailCache(size=20)
+    worker_a.attach_redis(redis_client)
+    worker_b.attach_redis(redis_client)
+    monkeypatch.setattr(database.settings, "MESSAGE_TAIL_CACHE_LOCAL_TTL_SEC", 0)
+
+    queries = await _setup(monkeypatch, cache=worker_a)
+    first = await get_recent_messages("proj-a", "thread-1", 5)
+    assert len(queries) == 1
+
+    async def no_rdb(n):
+        raise AssertionError("served from Redis")
+
+    project_key = str(_normalize_project_id("proj-a"))
+    assert _contents(await worker_b.get(project_key, "thread-1", 5, no_rdb)) == _contents(first)
+
+    await save_message_to_rdb("assistant", "from worker A", "proj-a", "thread-1")
+    assert _contents(await worker_b.get(project_key, "thread-1", 2, no_rdb))[-1] == "from worker A"
+    assert await redis_client.llen(f"msgtail:{project_key}:thread-1") == 20
+
+
+@pytest.mark.asyncio
+async def test_file_upload_messages_reach_a_warm_buffer(tmp_path, monkeypatch):
+    from fastapi import FastAPI
+    from httpx import ASGITransport, AsyncClient
+
+    from app.api.dependencies import get_current_user
+    from app.api.v1 import files as files_module
+    from app.models.schemas import User, UserRole
+
+    await _setup(monkeypatch, count=3)
+    # Warm the project-wide buffer, as a chat turn's context read does
+    assert len(await get_recent_messages("proj-a", None, 20)) == 3
+
+    async def fake_user():
+        return User(id="u-1", username="u", tenant_id="t-1", role=UserRole.STANDARD_USER, is_active=True)
+
+    app = FastAPI()
+    app.include_router(files_module.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = fake_user
+    monkeypatch.setattr(files_module, "AsyncSessionLocal", database.AsyncSessionLocal)
+    monkeypatch.setattr(files_module, "UPLOAD_DIR", tmp_path)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        single = await client.post(
+            "/api/v1/files/upload", data={"project_id": "proj-a"},
+            files={"file": ("notes.md", b"single file", "text/markdown")},
+        )
+        folder = await client.post(
+            "/api/v1/files/upload-folder", data={"project_id": "proj-a"},
+            files=[("files", ("docs/a.md", b"folder file", "text/markdown"))],
+        )
+    while not files_module.knowledge_queue.empty():
+        files_module.knowledge_queue.get_nowait()
+
+    assert single.status_code == 200 and folder.status_code == 200
+    recent = _contents(await get_recent_messages("proj-a", None, 20))
+    assert recent[-2].startswith("[File Upload] notes.md")
+    assert recent[-1].startswith("[Folder Upload] docs/a.md")
+    assert recent == _contents(await database.get_messages_from_rdb("proj-a", None, 20))
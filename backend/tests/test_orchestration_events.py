@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from app.services.orchestration_events import (
+    event_stream_key,
+    format_event,
+    latest_event_id,
+    publish_event,
+    read_events,
+)
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+@pytest.mark.asyncio
+async def test_reconnect_replays_only_missed_events(redis_client):
+    first = await publish_event(redis_client, "p1", "WORKFLOW_STARTED", {"message": "start"})
+    await publish_event(redis_client, "p1", "AGENT_STARTED", {"message": "a"})
+    await publish_event(redis_client, "p1", "AGENT_COMPLETED", {"message": "b"})
+
+    missed = await read_events(redis_client, "p1", first, block_ms=10)
+    payloads = [json.loads(format_event(event_id, fields)) for event_id, fields in missed]
+    assert [p["type"] for p in payloads] == ["AGENT_STARTED", "AGENT_COMPLETED"]
+    assert payloads[-1]["event_id"] == missed[-1][0]
+    assert payloads[0]["project_id"] == "p1"
+
+
+@pytest.mark.asyncio
+async def test_read_from_latest_times_out_without_new_events(redis_client):
+    await publish_event(redis_client, "p1", "WORKFLOW_STARTED", {})
+    cursor = await latest_event_id(redis_client, "p1")
+    assert await read_events(redis_client, "p1", cursor, block_ms=10) == []
+    assert await latest_event_id(redis_client, "empty") == "0-0"
+
+
+@pytest.mark.asyncio
+async def test_stream_is_capped_and_expires(redis_client, monkeypatch):
+    from app.services import orchestration_events
+
+    monkeypatch.setattr(orchestration_events.settings, "ORCHESTRATION_EVENT_STREAM_MAXLEN", 5)
+    for i in range(50):
+        await publish_event(redis_client, "p1", "TICK", {"i": i})
+
+    key = event_stream_key("p1")
+    # MAXLEN ~ trims lazily, but never lets the stream grow unbounded
+    assert await redis_client.xlen(key) < 50
+    assert await redis_client.ttl(key) > 0
+
+
+@pytest.mark.asyncio
+async def test_hub_fans_out_one_read_to_all_subscribers(redis_client):
+    import asyncio
+
+    from app.services.orchestration_events import OrchestrationEventHub
+
+    hub = OrchestrationEventHub(redis_client)
+    first = await publish_event(redis_client, "p1", "WORKFLOW_STARTED", {})
+    a = await hub.subscribe("p1")
+    b = await hub.subscribe("p1", last_event_id="0-0")
+    assert hub.stats()["connections"] == 2
+
+    await publish_event(redis_client, "p1", "AGENT_STARTED", {})
+    for sub in (a, b):
+        payload = json.loads(await asyncio.wait_for(sub.queue.get(), timeout=2))
+        assert payload["type"] == "AGENT_STARTED"
+
+    # b asked to resume from the start, so it also gets what it missed
+    assert [json.loads(p)["event_id"] for p in await hub.replay(b)] == [first]
+    assert await hub.replay(a) == []
+
+    hub.unsubscribe(a)
+    hub.unsubscribe(b)
+    assert hub.stats()["connections"] == 0
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_hub_drops_slow_subscriber(redis_client):
+    import asyncio
+
+    from app.services.orchestration_events import OrchestrationEventHub
+
+    hub = OrchestrationEventHub(redis_client, queue_size=2)
+    slow = await hub.subscribe("p1")
+    for i in range(3):
+        await publish_event(redis_client, "p1", "TICK", {"i": i})
+
+    assert await asyncio.wait_for(slow.queue.get(), timeout=2) is None
+    assert slow.dropped
+    stats = hub.stats()
+    assert stats["dropped_total"] == 1
+    assert stats["connections"] == 0
+    await hub.close()
@@ -0,0 +1,49 @@
+import hashlib
+import io
+
+import pytest
+from fastapi import UploadFile
+
+from app.services.upload_storage import UploadTooLarge, stage_upload
+
+
+def _upload(data: bytes, filename: str = "Report.TXT") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+
+@pytest.mark.asyncio
+async def test_upload_is_hashed_while_streamed_and_content_addressed(tmp_path):
+    data = b"0123456789" * 1000
+    staged = await stage_upload(_upload(data), tmp_path, max_bytes=len(data), chunk_size=777)
+
+    digest = hashlib.sha256(data).hexdigest()
+    assert staged.size == len(data)
+    assert staged.file_hash == digest
+
+    path = await staged.commit()
+    assert path == tmp_path / digest[:2] / f"{digest}.txt"
+    assert path.read_bytes() == data
+    assert list((tmp_path / ".incoming").iterdir()) == []
+
+    # Same content again: the stored copy is reused
+    again = await stage_upload(_upload(data), tmp_path, max_bytes=len(data))
+    assert await again.commit() == path
+    assert list((tmp_path / ".incoming").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_oversized_upload_stops_early_and_leaves_nothing_behind(tmp_path):
+    source = io.BytesIO(b"x" * 10_000)
+    with pytest.raises(UploadTooLarge):
+        await stage_upload(UploadFile(file=source, filename="big.txt"), tmp_path, max_bytes=1000, chunk_size=512)
+
+    # Stopped reading right after crossing the limit
+    assert source.tell() == 1024
+    assert list((tmp_path / ".incoming").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_discarded_upload_is_removed(tmp_path):
+    staged = await stage_upload(_upload(b"dup"), tmp_path, max_bytes=100)
+    await staged.discard()
+    assert list((tmp_path / ".incoming").iterdir()) == []
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.dependencies import get_current_user
+from app.api.v1 import files as files_module
+from app.api.v1.files import check_duplicate_file, find_existing_hashes
+from app.core.database import Base, MessageModel, UploadedFileModel, upload_project_key
+from app.models.schemas import User, UserRole
+
+pytest.importorskip("aiosqlite")
+
+
+async def _session_factory():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+def _row(project_id, file_hash):
+    return UploadedFileModel(
+        project_id=upload_project_key(project_id),
+        file_hash=file_hash,
+        filename=f"{file_hash}.txt",
+        storage_path=f"data/uploads/{file_hash[:2]}/{file_hash}.txt",
+        file_size=3,
+        parse_status="parsed",
+        message_id=uuid.uuid4(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_dedupe_lookups_are_scoped_to_project():
+    session_factory = await _session_factory()
+    async with session_factory() as session:
+        session.add_all([_row("Proj-A", "a" * 64), _row("proj-a", "b" * 64), _row("system-master", "c" * 64)])
+        await session.commit()
+
+        assert (await check_duplicate_file(session, "PROJ-A", "a" * 64)).filename == "a" * 64 + ".txt"
+        assert await check_duplicate_file(session, "proj-b", "a" * 64) is None
+        assert await check_duplicate_file(session, "system-master", "c" * 64) is not None
+
+        found = await find_existing_hashes(session, "proj-a", ["a" * 64, "b" * 64, "c" * 64, "d" * 64])
+        assert set(found) == {"a" * 64, "b" * 64}
+        assert await find_existing_hashes(session, "proj-a", []) == {}
+
+
+@pytest.mark.asyncio
+async def test_same_content_is_stored_once_per_project():
+    session_factory = await _session_factory()
+    async with session_factory() as session:
+        session.add(_row("system-master", "e" * 64))
+        await session.commit()
+
+        session.add(_row("system-master", "e" * 64))
+        with pytest.raises(IntegrityError):
+            await session.commit()
+        await session.rollback()
+
+        session.add(_row("other-project", "e" * 64))
+        await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_folder_upload_streams_ndjson_and_commits_once(tmp_path, monkeypatch):
+    session_factory = await _session_factory()
+    async with session_factory() as session:
+        session.add(_row("system-master", hashlib.sha256(b"old").hexdigest()))
+        await session.commit()
+
+    commits = []
+
+    class CountingSession(AsyncSession):
+        async def commit(self):
+            commits.append(len(self.new))
+            await super().commit()
+
+    counting_factory = async_sessionmaker(session_factory.kw["bind"], class_=CountingSession, expire_on_commit=False)
+
+    async def fake_user():
+        return User(id="u-1", username="u", tenant_id="t-1", role=UserRole.STANDARD_USER, is_active=True)
+
+    app = FastAPI()
+    app.include_router(files_module.router, prefix="/api/v1")
+    app.dependency_overrides[get_current_user] = fake_user
+    monkeypatch.setattr(files_module, "AsyncSessionLocal", counting_factory)
+    monkeypatch.setattr(files_module, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(files_module.settings, "UPLOAD_FOLDER_CONCURRENCY", 3)
+
+    files = [("files", (f"src/f{i}.md", f"file {i}".encode(), "text/markdown")) for i in range(6)]
+    files.append(("files", ("old.txt", b"old", "text/plain")))
+    files.append(("files", ("logo.png", b"png", "image/png")))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        res = await client.post(
+            "/api/v1/files/upload-folder", files=files, headers={"Accept": "application/x-ndjson"}
+        )
+    while not files_module.knowledge_queue.empty():
+        files_module.knowledge_queue.get_nowait()
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in res.text.splitlines()]
+    final = {e["index"]: e for e in events if e["event"] == "file"}
+    assert events[-1] == {"event": "done", "total": 8, "processed": 6}
+    assert [final[i]["status"] for i in range(8)] == ["queued"] * 6 + ["skipped", "failed"]
+    assert final[6]["reason"] == "duplicate" and final[7]["reason"] == "unsupported_type"
+    assert sum(1 for e in events if e["event"] == "progress") == 6
+
+    # All six new files were written in a single transaction
+    assert commits == [12]
+    async with session_factory() as session:
+        assert (await session.execute(select(func.count()).select_from(MessageModel))).scalar() == 6
+        assert (await session.execute(select(func.count()).select_from(UploadedFileModel))).scalar() == 7
+
+
+@pytest.mark.asyncio
+async def test_folder_upload_survives_a_client_disconnect(tmp_path, monkeypatch):
+    from io import BytesIO
+
+    from starlette.datastructures import UploadFile
+
+    session_factory = await _session_factory()
+    monkeypatch.setattr(files_module, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(files_module, "UPLOAD_DIR", tmp_path)
+    user = User(id="u-1", username="u", tenant_id="t-1", role=UserRole.STANDARD_USER, is_active=True)
+
+    def folder():
+        files = [UploadFile(BytesIO(f"file {i}".encode()), filename=f"f{i}.md") for i in range(4)]
+        return files + [UploadFile(BytesIO(b"png"), filename="logo.png")]
+
+    # Gone at the first event (the unsupported file): nothing stays staged
+    files = folder()
+    results, staged_files = await files_module._stage_folder(files)
+    events = files_module._ingest_folder(files, results, staged_files, "system-master", user)
+    assert (await events.__anext__())["reason"] == "unsupported_type"
+    await events.aclose()
+    assert list((tmp_path / ".incoming").iterdir()) == []
+
+    # Gone at the first event after the commit: every stored file is queued
+    while not files_module.knowledge_queue.empty():
+        files_module.knowledge_queue.get_nowait()
+    files = folder()
+    results, staged_files = await files_module._stage_folder(files)
+    events = files_module._ingest_folder(files, results, staged_files, "system-master", user)
+    async for event in events:
+        if event["event"] == "file" and event["status"] == "queued":
+            break
+    await events.aclose()
+    queued = []
+    while not files_module.knowledge_queue.empty():
+        queued.append(files_module.knowledge_queue.get_nowait())
+    async with session_factory() as session:
+        stored = (await session.execute(select(MessageModel.message_id))).scalars().all()
+    assert len(stored) == 4 and sorted(queued) == sorted(str(m) for m in stored)
+    assert list((tmp_path / ".incoming").iterdir()) == []
@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from app.models.schemas import ExecutionLocation, JobCreate, JobStatus, ProviderType, User, UserRole
+from app.services.job_manager import JobManager, job_key
+from app.services.worker_push import WorkerPushSession
+
+fakeredis = pytest.importorskip("fakeredis")
+
+CLOUD = {"provider": "OPENROUTER", "model": "*"}
+LOCAL = {"provider": "OLLAMA", "model": "llama3"}
+
+
+def _user() -> User:
+    return User(id="user_001", username="tester", tenant_id="tenant_test", role=UserRole.SUPER_ADMIN)
+
+
+def _job_request(provider=ProviderType.OPENROUTER, model="gpt-4o-mini") -> JobCreate:
+    return JobCreate(execution_location=ExecutionLocation.CLOUD, provider=provider, model=model)
+
+
+async def _next(outbox, kind):
+    while True:
+        message = await asyncio.wait_for(outbox.get(), timeout=2)
+        if message["type"] == kind:
+            return message
+
+
+async def _stop(leaser):
+    # Cancel once the loop is parked: fakeredis wedges if cancelled mid-command
+    await asyncio.sleep(0.05)
+    leaser.cancel()
+    await asyncio.gather(leaser, return_exceptions=True)
+
+
+@pytest.fixture
+def manager():
+    return JobManager(fakeredis.FakeAsyncRedis(decode_responses=True))
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_pushed_within_granted_credits(manager):
+    pytest.importorskip("lupa")
+    outbox: asyncio.Queue = asyncio.Queue()
+    session = WorkerPushSession(manager, "worker_a", outbox.put)
+    leaser = asyncio.create_task(session.lease_loop())
+    try:
+        await session.handle({"type": "heartbeat", "status": "active", "capabilities": [CLOUD, LOCAL]})
+        await session.handle({"type": "ready", "count": 2, "capabilities": ["OPENROUTER:*"]})
+
+        # Queued after the grant: pushed without any poll from the worker
+        jobs = [await manager.create_job(_user(), _job_request()) for _ in range(3)]
+        local = await manager.create_job(_user(), _job_request(ProviderType.OLLAMA, "llama3"))
+
+        pushed = []
+        while len(pushed) < 2:
+            pushed += (await _next(outbox, "jobs"))["jobs"]
+        assert len(pushed) == 2
+        assert str(local.job_id) not in [job["job_id"] for job in pushed]
+        assert session.credits == 0
+        assert await manager.get_queue_depth("tenant_test") == 2
+
+        await session.handle({
+            "type": "ack",
+            "request_id": "r1",
+            "job_ids": [pushed[0]["job_id"], str(local.job_id)],
+        })
+        reply = await _next(outbox, "ack_result")
+        assert reply["request_id"] == "r1"
+        assert reply["acknowledged"] == [pushed[0]["job_id"]]
+        assert reply["rejected"] == [str(local.job_id)]
+        assert await manager.redis.hget(job_key(pushed[0]["job_id"]), "status") == JobStatus.RUNNING.value
+
+        # More credit for every capability picks up the rest
+        await session.handle({"type": "ready", "count": 5, "capabilities": []})
+        rest = []
+        while len(rest) < 2:
+            rest += (await _next(outbox, "jobs"))["jobs"]
+        assert {job["job_id"] for job in pushed + rest} == {str(j.job_id) for j in jobs} | {str(local.job_id)}
+        assert session.credits == 3
+    finally:
+        await _stop(leaser)
+
+
+@pytest.mark.asyncio
+async def test_credits_wait_for_a_heartbeat(manager):
+    pytest.importorskip("lupa")
+    outbox: asyncio.Queue = asyncio.Queue()
+    session = WorkerPushSession(manager, "worker_b", outbox.put)
+    leaser = asyncio.create_task(session.lease_loop())
+    try:
+        await manager.create_job(_user(), _job_request())
+        await session.handle({"type": "ready", "count": 1})
+        await asyncio.sleep(0.05)
+        assert outbox.empty()
+
+        await session.handle({"type": "heartbeat", "capabilities": [CLOUD]})
+        assert len((await _next(outbox, "jobs"))["jobs"]) == 1
+    finally:
+        await _stop(leaser)
+
+
+@pytest.mark.asyncio
+async def test_unknown_message_type_is_reported(manager):
+    outbox: asyncio.Queue = asyncio.Queue()
+    session = WorkerPushSession(manager, "worker_c", outbox.put)
+    await session.handle({"type": "bogus"})
+    assert (await outbox.get())["type"] == "error"
+
+
+def test_push_channel_rejects_invalid_worker_token():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+
+    from app.api.v1.workers import router
+
+    app = FastAPI()
+    app.include_router(router)
+    with TestClient(app) as client:
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with client.websocket_connect("/workers/ws", headers={"Authorization": "Bearer nope"}):
+                pass
+    assert exc.value.code == 1008
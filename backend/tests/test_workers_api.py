@@ -0,0 +1,34 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api.dependencies import get_current_active_user
+from app.api.v1 import workers as workers_module
+from app.models.schemas import User, UserRole
+
+
+class _JobManager:
+    async def get_worker_status(self):
+        return [{"worker_id": "worker_a", "capabilities": [], "in_flight": 0}]
+
+
+def _client(role: UserRole) -> AsyncClient:
+    app = FastAPI()
+    app.include_router(workers_module.router, prefix="/api/v1")
+    app.state.job_manager = _JobManager()
+    app.dependency_overrides[get_current_active_user] = lambda: User(
+        id="user_001", username="tester", tenant_id="tenant_test", role=role
+    )
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_worker_list_is_super_admin_only():
+    async with _client(UserRole.STANDARD_USER) as client:
+        denied = await client.get("/api/v1/workers")
+    async with _client(UserRole.SUPER_ADMIN) as client:
+        allowed = await client.get("/api/v1/workers")
+
+    assert denied.status_code == 403
+    assert allowed.status_code == 200
+    assert allowed.json()[0]["worker_id"] == "worker_a"
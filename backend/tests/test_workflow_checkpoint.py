@@ -0,0 +1,142 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from app.models.schemas import (
+    AgentDefinition,
+    Project,
+    ProjectAgentConfig,
+    ProviderType,
+    User,
+    UserRole,
+)
+from app.services.job_manager import JobManager
+from app.services.workflow_checkpoint import WorkflowCheckpointStore
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+def _user() -> User:
+    return User(id="user_001", username="tester", tenant_id="tenant_test", role=UserRole.STANDARD_USER)
+
+
+def _project(workflow_type: str = "SEQUENTIAL") -> Project:
+    def agent(agent_id, role, next_agents):
+        return AgentDefinition(
+            agent_id=agent_id, role=role, model="gpt-4o-mini",
+            provider=ProviderType.OPENROUTER, system_prompt=role, next_agents=next_agents,
+        )
+    return Project(
+        id="p1",
+        name="demo",
+        tenant_id="tenant_test",
+        agent_config=ProjectAgentConfig(
+            workflow_type=workflow_type,
+            entry_agent_id="planner",
+            agents=[
+                agent("planner", "PLANNER", ["coder"]),
+                agent("coder", "CODER", ["reviewer"]),
+                agent("reviewer", "REVIEWER", []),
+            ],
+        ),
+    )
+
+
+def _orchestrator(redis_client, ran):
+    from app.services.orchestration_service import OrchestrationService
+
+    orchestrator = OrchestrationService(JobManager(redis_client), redis_client)
+
+    def fake_node(agent_def, project, user):
+        async def node(state):
+            ran.append(agent_def.agent_id)
+            return {
+                "current_agent": agent_def.agent_id,
+                "messages": [AIMessage(content=agent_def.agent_id)],
+                "artifacts": {**state.get("artifacts", {}), agent_def.agent_id: {"ok": True}},
+            }
+        return node
+
+    orchestrator._create_agent_node = fake_node
+    return orchestrator
+
+
+async def _wait_for_status(store, project_id, status):
+    for _ in range(100):
+        checkpoint = await store.load(project_id)
+        if checkpoint and checkpoint["status"] == status:
+            return checkpoint
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"checkpoint never reached {status}")
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_round_trip_and_run_lock(redis_client):
+    store = WorkflowCheckpointStore(redis_client)
+    state = {"messages": [HumanMessage(content="start")], "artifacts": {}}
+    await store.start("p1", "run1", "SEQUENTIAL", _user(), state)
+    await store.set_pending_job("p1", "planner", "job-1")
+    assert await store.pending_job("p1", "planner") == "job-1"
+
+    state["artifacts"] = {"planner": {"ok": True}}
+    await store.save("p1", "planner", state, ["master_planning", "planner"])
+    checkpoint = await store.load("p1")
+    assert checkpoint["last_node"] == "planner"
+    assert checkpoint["state"]["messages"][0].content == "start"
+    assert checkpoint["user"].id == "user_001"
+    assert await store.pending_job("p1", "planner") is None
+
+    assert await store.acquire_run("p1", "run1") is True
+    assert await store.acquire_run("p1", "run2") is False
+    await store.release_run("p1", "run1")
+    assert await store.acquire_run("p1", "run2") is True
+
+
+@pytest.mark.asyncio
+async def test_sequential_workflow_resumes_after_last_completed_node(redis_client):
+    ran = []
+    orchestrator = _orchestrator(redis_client, ran)
+    store = orchestrator.checkpoints
+    await store.start("p1", "run1", "SEQUENTIAL", _user(), {"messages": [], "artifacts": {}})
+    await store.save("p1", "planner", {"messages": [], "artifacts": {"planner": {"ok": True}}},
+                     ["master_planning", "planner"])
+
+    assert await orchestrator.resume_workflow(_project(), _user()) == "Workflow resumed"
+    checkpoint = await _wait_for_status(store, "p1", "FINISHED")
+
+    assert ran == ["coder", "reviewer"]
+    assert list(checkpoint["state"]["artifacts"]) == ["coder", "planner", "reviewer"]
+    assert checkpoint["completed"] == ["master_planning", "planner", "coder", "reviewer"]
+    with pytest.raises(ValueError):
+        await orchestrator.resume_workflow(_project(), _user())
+
+
+@pytest.mark.asyncio
+async def test_dag_workflow_resume_skips_completed_nodes(redis_client):
+    ran = []
+    orchestrator = _orchestrator(redis_client, ran)
+    store = orchestrator.checkpoints
+    await store.start("p1", "run1", "PARALLEL", _user(), {"messages": [], "artifacts": {}})
+    await store.save("p1", "coder", {"messages": [], "artifacts": {}},
+                     ["master_planning", "planner", "coder"])
+
+    await orchestrator.resume_workflow(_project("PARALLEL"), _user())
+    await _wait_for_status(store, "p1", "FINISHED")
+    assert ran == ["reviewer"]
+
+
+@pytest.mark.asyncio
+async def test_resume_rejects_other_users(redis_client):
+    from app.services.job_manager import PermissionDenied
+
+    orchestrator = _orchestrator(redis_client, [])
+    await orchestrator.checkpoints.start("p1", "run1", "SEQUENTIAL", _user(), {"messages": []})
+    other = User(id="user_002", username="other", tenant_id="tenant_test", role=UserRole.STANDARD_USER)
+    with pytest.raises(PermissionDenied):
+        await orchestrator.resume_workflow(_project(), other)
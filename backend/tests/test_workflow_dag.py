@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.workflow_dag import (
+    DagWorkflow,
+    WorkflowCycleError,
+    find_cycle,
+    merge_artifacts,
+    reachable_predecessors,
+)
+
+
+def _node(name, delay, seen=None):
+    async def run(state):
+        if seen is not None:
+            seen[name] = sorted(state.get("artifacts", {}))
+        await asyncio.sleep(delay)
+        return {
+            "current_agent": name,
+            "messages": [name],
+            "artifacts": {**state.get("artifacts", {}), name: {"by": name}},
+        }
+    return run
+
+
+def test_find_cycle():
+    assert find_cycle({"a": ["b"], "b": ["c"], "c": []}) is None
+    assert find_cycle({"a": ["b"], "b": ["a"]}) == "a"
+
+
+def test_reachable_predecessors_ignore_unreachable_and_unknown():
+    graph = {"a": ["b", "c", "ghost"], "b": ["d"], "c": ["d"], "d": [], "x": ["d"]}
+    assert reachable_predecessors(graph, "a") == {
+        "a": set(), "b": {"a"}, "c": {"a"}, "d": {"b", "c"},
+    }
+
+
+def test_merge_artifacts_is_order_independent():
+    left, right = {"b": 1}, {"a": 2}
+    assert list(merge_artifacts(left, right)) == list(merge_artifacts(right, left)) == ["a", "b"]
+
+
+def test_dag_rejects_cycles():
+    with pytest.raises(WorkflowCycleError):
+        DagWorkflow({}, {"a": ["b"], "b": ["a"]}, "a")
+
+
+@pytest.mark.asyncio
+async def test_dag_runs_independent_branches_concurrently():
+    # planner -> (coder_a, coder_b) -> reviewer
+    graph = {
+        "planner": ["coder_a", "coder_b"],
+        "coder_a": ["reviewer"],
+        "coder_b": ["reviewer"],
+        "reviewer": [],
+    }
+    seen = {}
+    nodes = {
+        "planner": _node("planner", 0),
+        "coder_a": _node("coder_a", 0.3),
+        "coder_b": _node("coder_b", 0.3),
+        "reviewer": _node("reviewer", 0, seen),
+    }
+    workflow = DagWorkflow(nodes, graph, "planner")
+
+    started = time.monotonic()
+    order = [name async for event in workflow.astream({"artifacts": {}, "messages": []}) for name in event]
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.55  # branches overlapped instead of 0.6s back to back
+    assert order[0] == "planner" and order[-1] == "reviewer"
+    assert set(order[1:3]) == {"coder_a", "coder_b"}
+    # Fan-in waited for both branches
+    assert seen["reviewer"] == ["coder_a", "coder_b", "planner"]
+
+
+@pytest.mark.asyncio
+async def test_dag_starts_node_when_its_own_predecessors_finish():
+    # Short branch a -> c must not wait for the slow sibling b
+    graph = {"root": ["a", "b"], "a": ["c"], "b": [], "c": []}
+    nodes = {
+        "root": _node("root", 0),
+        "a": _node("a", 0.05),
+        "b": _node("b", 0.4),
+        "c": _node("c", 0.05),
+    }
+    order = [name async for event in DagWorkflow(nodes, graph, "root").astream({}) for name in event]
+    assert order == ["root", "a", "c", "b"]
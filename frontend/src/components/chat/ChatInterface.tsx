@@ -143,6 +143,8 @@ export default function ChatInterface({ projectId: propProjectId, threadId }: Ch
     const [taskStarted, setTaskStarted] = useState(false);
     const [logs, setLogs] = useState<string[]>([]);
     const [socket, setSocket] = useState<WebSocket | null>(null);
+    // Last orchestration event seen; sent on reconnect so missed events are replayed
+    const lastEventIdRef = useRef<string | null>(null);
     const fileInputRef = useRef<HTMLInputElement>(null);
     const [isUploading, setIsUploading] = useState(false);
 
@@ -160,7 +162,8 @@ export default function ChatInterface({ projectId: propProjectId, threadId }: Ch
                 ? '127.0.0.1'
                 : window.location.hostname;
             const wsProtocol = window.location.protocol === 'https:' ? 'wss:' : 'ws:';
-            const wsUrl = `${wsProtocol}//${currentHostname}:8002/api/v1/orchestration/ws/${projectId}`;
+            const resumeQuery = lastEventIdRef.current ? `?last_event_id=${encodeURIComponent(lastEventIdRef.current)}` : '';
+            const wsUrl = `${wsProtocol}//${currentHostname}:8002/api/v1/orchestration/ws/${projectId}${resumeQuery}`;
 
             // console.log(`DEBUG: Connecting to WebSocket: ${wsUrl}`);
             const newSocket = new WebSocket(wsUrl);
@@ -174,6 +177,9 @@ export default function ChatInterface({ projectId: propProjectId, threadId }: Ch
                 try {
                     const data = JSON.parse(event.data);
                     // console.log("DEBUG: WS Message", data);
+                    if (data.event_id) {
+                        lastEventIdRef.current = data.event_id;
+                    }
                     if (data.data?.message) {
                         setLogs(prev => [...prev, data.data.message]);
                     }
@@ -203,7 +209,8 @@ export default function ChatInterface({ projectId: propProjectId, threadId }: Ch
             }
         };
     }, [taskStarted, projectId]);
-    const [limit, setLimit] = useState(20);
+    // Keyset cursor for the next page of older messages (X-Before-Cursor)
+    const [beforeCursor, setBeforeCursor] = useState<string | undefined>(undefined);
     const [hasMore, setHasMore] = useState(true);
 
     // [Fix] Thread ID Management
@@ -278,17 +285,46 @@ export default function ChatInterface({ projectId: propProjectId, threadId }: Ch
         setUploadProgress({ processed: 0, total: files.length });
 
         try {
-            const response = await api.post('/files/upload-folder', formData, {
-                headers: { 'Content-Type': 'multipart/form-data' },
-                onUploadProgress: (progressEvent) => {
-                    // This tracks bytes, but we want file count which is returned by server
-                    // Ideally we could stream file status, but for MVP we wait for response
-                }
+            // Per-file statuses stream back as NDJSON so progress updates as files finish
+            const token = useAuthStore.getState().token;
+            const response = await fetch(`${api.defaults.baseURL}/files/upload-folder`, {
+                method: 'POST',
+                headers: {
+                    'Accept': 'application/x-ndjson',
+                    ...(token ? { 'Authorization': `Bearer ${token}` } : {})
+                },
+                body: formData
             });
-            
-            const processed = response.data.processed || 0;
-            const total = response.data.total || files.length;
-            setUploadProgress({ processed, total });
+            if (!response.ok || !response.body) {
+                const body = await response.json().catch(() => null);
+                throw new Error(body?.detail || `HTTP error! status: ${response.status}`);
+            }
+
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffered = '';
+            let decided = 0;
+            let processed = 0;
+            let total = files.length;
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split('\n');
+                buffered = lines.pop() || '';
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const event = JSON.parse(line);
+                    if (event.event === 'file') {
+                        decided += 1;
+                        setUploadProgress({ processed: decided, total });
+                    } else if (event.event === 'done') {
+                        processed = event.processed || 0;
+                        total = event.total || total;
+                    }
+                }
+            }
+            setUploadProgress({ processed: total, total });
 
             setMessages(prev => [...prev, {
                 id: Date.now().toString(),
@@ -404,7 +440,7 @@ export default function ChatInterface({ projectId: propProjectId, threadId }: Ch
         initChat();
     }, [projectId, threadId]);
 
-    const fetchHistory = async (currentLimit: number, specificThreadId?: string) => {
+    const fetchHistory = async (currentLimit: number, specificThreadId?: string, before?: string) => {
         if (!projectId) return;
         
         // Use provided threadId or fall back to state (but state might be stale in useEffect)
@@ -423,7 +459,7 @@ export default function ChatInterface({ projectId: propProjectId, threadId }: Ch
         try {
             // [Fix] Use dedicated thread message endpoint
             const response = await api.get(`/projects/${projectId}/threads/${targetThreadId}/messages`, { 
-                params: { limit: currentLimit } 
+                params: before ? { limit: currentLimit, before } : { limit: currentLimit }
             });
 
             // [Audit] Log Raw Response for Data Mapping Check
@@ -438,8 +474,11 @@ export default function ChatInterface({ projectId: propProjectId, threadId }: Ch
                 request_id: msg.request_id // Ensure request_id is passed for audit bar
             }));
 
-            setMessages(historyMessages);
-            setHasMore(response.data.length === currentLimit);
+            // Older pages are prepended; a fresh load replaces the list
+            setMessages(prev => before ? [...historyMessages, ...prev] : historyMessages);
+            const nextCursor = response.headers?.['x-before-cursor'];
+            setBeforeCursor(nextCursor);
+            setHasMore(Boolean(nextCursor));
         } catch (error: any) {
             console.error("Failed to fetch chat history", error);
             if (error.response?.status === 404) {
@@ -450,9 +489,8 @@ export default function ChatInterface({ projectId: propProjectId, threadId }: Ch
     };
 
     const handleLoadMore = () => {
-        const newLimit = limit + 20;
-        setLimit(newLimit);
-        fetchHistory(newLimit);
+        if (!beforeCursor) return;
+        fetchHistory(20, undefined, beforeCursor);
     };
 
     const handleInput = (e: React.ChangeEvent<HTMLTextAreaElement>) => {
@@ -39,6 +39,11 @@ class ExecutionConfig(BaseModel):
     max_file_size_bytes: int = 1048576  # 1 MB
     max_total_size_bytes: int = 10485760  # 10 MB
     git: Dict[str, Any] = Field(default_factory=dict)
+    # Outputs larger than this are compressed and uploaded in chunks to the
+    # backend's result blob store instead of being posted inline
+    result_inline_max_bytes: int = 16384  # 16 KB
+    result_chunk_bytes: int = 1048576  # 1 MB (backend accepts up to 4 MB)
+    result_compression: str = "zstd"  # zstd | gzip (zstd needs `zstandard`)
 
 
 class LoggingConfig(BaseModel):
@@ -59,6 +64,13 @@ class WorkerIdentity(BaseModel):
     tags: List[str] = Field(default_factory=list)
     max_memory_mb: int = 4096
     max_cpu_percent: int = 80
+    # Jobs executed at once across all capabilities (each capability is
+    # further limited by its own max_concurrent)
+    max_concurrent_jobs: int = 4
+    # Jobs leased ahead of a free slot so polling overlaps with execution
+    prefetch: int = 1
+    # Seconds stop() waits for in-flight jobs before closing the HTTP client
+    drain_timeout_sec: int = 600
 
 
 class ServerConfig(BaseModel):
@@ -68,6 +80,11 @@ class ServerConfig(BaseModel):
     poll_interval: int = 5
     timeout: int = 30
     heartbeat_interval: int = 30
+    # Receive jobs over the /workers/ws push channel (needs `websockets`);
+    # long polling is used whenever the channel is unavailable
+    push: bool = True
+    # Seconds spent long-polling before the push channel is retried
+    push_retry_interval: int = 60
 
 
 class WorkerConfig(BaseModel):
@@ -55,15 +55,28 @@ class Worker:
             server_url=self.config.server.url
         )
         
+        heartbeat_task = None
         try:
+            # Start job loop (push channel with long-polling fallback; jobs run
+            # concurrently on the poller's pool); created first so it marks
+            # the poller running before heartbeats start
+            poll_task = asyncio.create_task(self.poller.run(self.executor.execute_job))
+            
             # Start heartbeat task
             heartbeat_task = asyncio.create_task(self.poller.heartbeat_loop())
             
-            # Start polling loop
-            await self.poller.poll_loop(self.executor.execute_job)
+            # SIGINT/SIGTERM stop leasing at once; stop() then drains in-flight jobs
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, poll_task.cancel)
+                except (NotImplementedError, RuntimeError):
+                    pass  # Windows: fall back to KeyboardInterrupt
             
-            # Cancel heartbeat
-            heartbeat_task.cancel()
+            try:
+                await poll_task
+            except asyncio.CancelledError:
+                logger.info("Shutdown requested; draining in-flight jobs")
             
         except KeyboardInterrupt:
             logger.info("Worker interrupted by user")
@@ -71,7 +84,10 @@ class Worker:
             logger.error("Worker error", error=str(e))
             raise
         finally:
+            # Heartbeats continue while stop() drains in-flight jobs
             await self.stop()
+            if heartbeat_task:
+                heartbeat_task.cancel()
     
     async def stop(self):
         """Stop the worker"""
@@ -0,0 +1,210 @@
+"""
+Test suite for the worker's concurrent job pool
+Tests global/per-capability limits, prefetch and graceful drain
+"""
+import asyncio
+
+import pytest
+
+from local_agent_hub.core.config import WorkerConfig
+from local_agent_hub.worker.poller import JobPoller, capability_key
+
+
+def _config(max_concurrent_jobs=4, prefetch=1, ollama_limit=1):
+    return WorkerConfig(
+        server={"url": "http://backend.test", "worker_token": "token", "poll_interval": 0},
+        capabilities=[
+            {"provider": "OLLAMA", "model": "llama3", "endpoint": "http://localhost:11434",
+             "max_concurrent": ollama_limit},
+            {"provider": "OPENROUTER", "model": "*", "endpoint": "https://openrouter.ai",
+             "max_concurrent": 3},
+        ],
+        security={"job_signing_public_key": "unused"},
+        worker={"max_concurrent_jobs": max_concurrent_jobs, "prefetch": prefetch,
+                "drain_timeout_sec": 5},
+    )
+
+
+def _poller(config, jobs):
+    """JobPoller leasing `jobs` from a fake backend that honours max and the capability filter."""
+    poller = JobPoller(config)
+
+    async def poll_batch(max_jobs, capabilities=None):
+        leased = []
+        for job in list(jobs):
+            cap = poller.capability_for(job)
+            if len(leased) < max_jobs and cap and capability_key(cap.provider, cap.model) in (capabilities or []):
+                jobs.remove(job)
+                leased.append(job)
+        if not leased:
+            await asyncio.sleep(0.01)
+        return leased
+
+    async def valid(job):
+        return True
+
+    async def acknowledge_batch(job_ids):
+        return set(job_ids)
+
+    poller.poll_batch = poll_batch
+    poller.verify_and_validate_job = valid
+    poller.acknowledge_batch = acknowledge_batch
+    return poller
+
+
+def _job(job_id, provider, model):
+    return {"job_id": job_id, "provider": provider, "model": model}
+
+
+class _Executor:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = {}
+        self.peak = {}
+        self.done = []
+
+    async def __call__(self, job):
+        key = job["provider"]
+        self.active[key] = self.active.get(key, 0) + 1
+        self.peak[key] = max(self.peak.get(key, 0), self.active[key])
+        self.peak["total"] = max(self.peak.get("total", 0), sum(self.active.values()))
+        await asyncio.sleep(self.delay)
+        self.active[key] -= 1
+        self.done.append(job["job_id"])
+
+
+async def _run_until_done(poller, executor, count, timeout=3.0):
+    loop_task = asyncio.create_task(poller.poll_loop(executor))
+    try:
+        for _ in range(int(timeout / 0.01)):
+            if len(executor.done) >= count:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await poller.drain(timeout=1.0)
+        await loop_task
+
+
+def test_capability_for_prefers_exact_model():
+    poller = JobPoller(_config())
+    assert poller.capability_for(_job("j", "ollama", "llama3")).model == "llama3"
+    assert poller.capability_for(_job("j", "OPENROUTER", "gpt-4o")).model == "*"
+    assert poller.capability_for(_job("j", "OLLAMA", "mistral")) is None
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_concurrently_within_limits():
+    jobs = [_job(f"c{i}", "OPENROUTER", "gpt-4o") for i in range(4)]
+    jobs += [_job(f"o{i}", "OLLAMA", "llama3") for i in range(3)]
+    poller = _poller(_config(max_concurrent_jobs=4, ollama_limit=1), jobs)
+    executor = _Executor()
+
+    await _run_until_done(poller, executor, 7)
+
+    assert sorted(executor.done) == sorted([f"c{i}" for i in range(4)] + [f"o{i}" for i in range(3)])
+    assert executor.peak["OLLAMA"] == 1
+    assert executor.peak["OPENROUTER"] <= 3
+    assert 1 < executor.peak["total"] <= 4
+
+
+@pytest.mark.asyncio
+async def test_prefetch_stops_polling_a_full_capability():
+    poller = _poller(_config(max_concurrent_jobs=4, prefetch=1, ollama_limit=1), [])
+    ollama = capability_key("OLLAMA", "llama3")
+    cloud = capability_key("OPENROUTER", "*")
+
+    poller._reserved[ollama] = 1  # one running, one more may be prefetched
+    assert set(poller._pollable_capabilities()) == {ollama, cloud}
+
+    poller._reserved[ollama] = 2  # running + prefetched
+    assert poller._pollable_capabilities() == [cloud]
+
+    assert poller._headroom() == 3
+    poller._reserved[cloud] = 3  # pool full (4 slots + 1 prefetch)
+    assert poller._pollable_capabilities() == []
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_in_flight_jobs_before_closing_client():
+    jobs = [_job("slow", "OPENROUTER", "gpt-4o")]
+    poller = _poller(_config(), jobs)
+    finished = []
+
+    async def slow_job(job):
+        await asyncio.sleep(0.2)
+        assert not poller.client.is_closed
+        finished.append(job["job_id"])
+
+    loop_task = asyncio.create_task(poller.poll_loop(slow_job))
+    while poller.in_flight == 0:
+        await asyncio.sleep(0.01)
+
+    await poller.stop()
+    await loop_task
+
+    assert finished == ["slow"]
+    assert poller.in_flight == 0
+    assert poller.client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_drain_timeout_cancels_unfinished_jobs():
+    poller = _poller(_config(), [_job("stuck", "OPENROUTER", "gpt-4o")])
+
+    async def stuck_job(job):
+        await asyncio.sleep(60)
+
+    loop_task = asyncio.create_task(poller.poll_loop(stuck_job))
+    while poller.in_flight == 0:
+        await asyncio.sleep(0.01)
+
+    await poller.drain(timeout=0.05)
+    await loop_task
+
+    assert poller.in_flight == 0
+    assert poller._reserved == {capability_key("OPENROUTER", "*"): 0}
+    await poller.client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_backlog_is_leased_in_batches():
+    jobs = [_job(f"c{i}", "OPENROUTER", "gpt-4o") for i in range(6)]
+    poller = _poller(_config(max_concurrent_jobs=4, prefetch=1, ollama_limit=1), jobs)
+    batches = []
+    poll_batch = poller.poll_batch
+
+    async def recording_poll_batch(max_jobs, capabilities=None):
+        leased = await poll_batch(max_jobs, capabilities)
+        if leased:
+            batches.append(len(leased))
+        return leased
+
+    poller.poll_batch = recording_poll_batch
+    executor = _Executor()
+
+    await _run_until_done(poller, executor, 6)
+
+    assert len(executor.done) == 6
+    # First poll fills the pool (4 slots + 1 prefetch) in one request
+    assert batches[0] == 5
+    assert sum(batches) == 6
+
+
+@pytest.mark.asyncio
+async def test_prefetched_jobs_are_acknowledged_when_they_get_a_slot():
+    jobs = [_job("o0", "OLLAMA", "llama3"), _job("o1", "OLLAMA", "llama3")]
+    poller = _poller(_config(max_concurrent_jobs=4, prefetch=1, ollama_limit=1), jobs)
+    executor = _Executor()
+    acks = []
+
+    async def acknowledge_batch(job_ids):
+        acks.append((list(job_ids), list(executor.done)))
+        return set(job_ids)
+
+    poller.acknowledge_batch = acknowledge_batch
+
+    await _run_until_done(poller, executor, 2)
+
+    assert executor.done == ["o0", "o1"]
+    # o1 was leased with o0 but only acknowledged (execution timeout started) after o0 finished
+    assert acks == [(["o0"], []), (["o1"], ["o0"])]
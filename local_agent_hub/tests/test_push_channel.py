@@ -0,0 +1,174 @@
+"""
+Test suite for the worker push channel
+Tests credit-based job delivery, acks/heartbeats over the socket and the
+long-polling fallback
+"""
+import asyncio
+import json
+
+import pytest
+
+from local_agent_hub.core.config import WorkerConfig
+from local_agent_hub.worker import poller as poller_module
+from local_agent_hub.worker.poller import JobPoller
+
+
+def _config(push=True):
+    return WorkerConfig(
+        server={"url": "https://backend.test", "worker_token": "sk_worker_test", "poll_interval": 0,
+                "push": push, "push_retry_interval": 60},
+        capabilities=[
+            {"provider": "OPENROUTER", "model": "*", "endpoint": "https://openrouter.ai",
+             "max_concurrent": 3},
+        ],
+        security={"job_signing_public_key": "unused"},
+        worker={"max_concurrent_jobs": 2, "prefetch": 1, "drain_timeout_sec": 5},
+    )
+
+
+def _job(job_id):
+    return {"job_id": job_id, "provider": "OPENROUTER", "model": "gpt-4o"}
+
+
+class FakeBackendSocket:
+    """In-memory /workers/ws: pushes queued jobs within the granted credits."""
+
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.credits = 0
+        self.sent = []  # messages from the worker
+        self.headers = None
+        self.max_outstanding = 0
+        self._inbox: asyncio.Queue = asyncio.Queue()
+
+    def __call__(self, url, additional_headers=None, open_timeout=None):
+        self.url = url
+        self.headers = additional_headers
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raw = await self._inbox.get()
+        if raw is None:
+            raise StopAsyncIteration
+        return raw
+
+    async def send(self, raw):
+        message = json.loads(raw)
+        self.sent.append(message)
+        if message["type"] == "ready":
+            self.credits += message["count"]
+            self.max_outstanding = max(self.max_outstanding, self.credits)
+            self.push_available()
+        elif message["type"] == "ack":
+            self._inbox.put_nowait(json.dumps({
+                "type": "ack_result",
+                "request_id": message["request_id"],
+                "acknowledged": message["job_ids"],
+                "rejected": [],
+            }))
+
+    def push_available(self):
+        batch = self.jobs[:self.credits]
+        if batch:
+            del self.jobs[:len(batch)]
+            self.credits -= len(batch)
+            self._inbox.put_nowait(json.dumps({"type": "jobs", "jobs": batch}))
+
+    async def close(self):
+        self._inbox.put_nowait(None)
+
+    def kinds(self):
+        return [message["type"] for message in self.sent]
+
+
+def _poller(config):
+    poller = JobPoller(config)
+
+    async def valid(job):
+        return True
+
+    async def no_http(*args, **kwargs):
+        raise AssertionError("HTTP used while the push channel is up")
+
+    poller.verify_and_validate_job = valid
+    poller.client.post = no_http
+    return poller
+
+
+@pytest.mark.asyncio
+async def test_jobs_arrive_over_push_channel_within_credits(monkeypatch):
+    socket = FakeBackendSocket([_job(f"j{i}") for i in range(5)])
+    monkeypatch.setattr(poller_module, "ws_connect", socket)
+    poller = _poller(_config())
+    done = []
+
+    async def execute(job):
+        await asyncio.sleep(0.02)
+        done.append(job["job_id"])
+
+    runner = asyncio.create_task(poller.run(execute))
+    for _ in range(200):
+        if len(done) == 5:
+            break
+        await asyncio.sleep(0.01)
+    await poller.drain(timeout=1.0)
+    await asyncio.wait_for(runner, 1.0)
+
+    assert sorted(done) == [f"j{i}" for i in range(5)]
+    assert socket.url == "wss://backend.test/api/v1/workers/ws"
+    assert socket.headers["Authorization"] == "Bearer sk_worker_test"
+    kinds = socket.kinds()
+    assert kinds[0] == "heartbeat"
+    assert "ack" in kinds
+    # Never granted more than the pool holds (2 slots + 1 prefetch)
+    assert socket.max_outstanding <= 3
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_long_polling_when_push_is_unavailable(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr(poller_module, "ws_connect", refuse)
+    poller = JobPoller(_config())
+    jobs = [_job("polled")]
+    done = []
+
+    async def poll_batch(max_jobs, capabilities=None):
+        leased, jobs[:] = jobs[:max_jobs], jobs[max_jobs:]
+        if not leased:
+            await asyncio.sleep(0.01)
+        return leased
+
+    async def valid(job):
+        return True
+
+    async def acknowledge_batch(job_ids):
+        return set(job_ids)
+
+    async def execute(job):
+        done.append(job["job_id"])
+
+    poller.poll_batch = poll_batch
+    poller.verify_and_validate_job = valid
+    poller.acknowledge_batch = acknowledge_batch
+
+    runner = asyncio.create_task(poller.run(execute))
+    for _ in range(100):
+        if done:
+            break
+        await asyncio.sleep(0.01)
+    await poller.drain(timeout=1.0)
+    await asyncio.wait_for(runner, 1.0)
+    await poller.client.aclose()
+
+    assert done == ["polled"]
@@ -0,0 +1,104 @@
+"""
+Test suite for repository precondition scanning
+Tests glob matching, .gitignore exclusions, early exit and listing cache
+"""
+import os
+
+import pytest
+
+from local_agent_hub.core.config import WorkerConfig
+from local_agent_hub.worker.executor import JobExecutor
+from local_agent_hub.worker.repo_scan import IgnoreRules, RepoScanner, glob_to_regex
+
+
+def _touch(root, rel):
+    path = root / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("x")
+    return path
+
+
+def test_glob_semantics_match_path_glob():
+    api = glob_to_regex("**/api/**/*.py")
+    assert api.match("api/users.py")
+    assert api.match("src/app/api/v1/users.py")
+    assert not api.match("src/apis/users.py")
+    top = glob_to_regex("*.py")
+    assert top.match("main.py")
+    assert not top.match("pkg/main.py")
+
+
+def test_gitignore_rules():
+    rules = IgnoreRules(["*.log", "build/", "/docs/api", "!keep.log"])
+    assert rules.ignored("node_modules", is_dir=True)
+    assert rules.ignored("src/debug.log", is_dir=False)
+    assert not rules.ignored("src/keep.log", is_dir=False)
+    assert rules.ignored("pkg/build", is_dir=True)
+    assert not rules.ignored("pkg/build", is_dir=False)
+    assert rules.ignored("docs/api", is_dir=True)
+    assert not rules.ignored("src/docs/api", is_dir=True)
+
+
+def test_scan_skips_ignored_trees(tmp_path):
+    _touch(tmp_path, "node_modules/pkg/api/index.py")
+    _touch(tmp_path, "generated/api/client.py")
+    (tmp_path / ".gitignore").write_text("generated/\n")
+    scanner = RepoScanner()
+
+    match, _ = scanner.find_first(tmp_path, ["**/api/**/*.py"])
+    assert match is None
+
+    _touch(tmp_path, "src/api/routes.py")
+    match, _ = scanner.find_first(tmp_path, ["**/api/**/*.py"])
+    assert match == "src/api/routes.py"
+
+
+def test_scan_stops_early_and_reuses_unchanged_listings(tmp_path):
+    for i in range(20):
+        _touch(tmp_path, f"pkg{i:02d}/mod.txt")
+    _touch(tmp_path, "pkg00/api/a.py")
+    scanner = RepoScanner()
+
+    match, stats = scanner.find_first(tmp_path, ["**/api/**/*.py"])
+    assert match == "pkg00/api/a.py"
+    assert stats.dirs_listed < 5  # never reached pkg01..pkg19
+
+    match, stats = scanner.find_first(tmp_path, ["**/*.md"])
+    assert match is None
+    # root, pkg00 and pkg00/api come from the first scan
+    assert stats.dirs_cached == 3 and stats.dirs_listed == 19
+
+    # Only the directory whose entries changed is listed again
+    _touch(tmp_path, "pkg07/README.md")
+    stamp = os.stat(tmp_path / "pkg07").st_mtime_ns
+    os.utime(tmp_path / "pkg07", ns=(stamp + 10**9, stamp + 10**9))
+    match, stats = scanner.find_first(tmp_path, ["**/*.md"])
+    assert match == "pkg07/README.md"
+    assert stats.dirs_listed == 1
+
+
+def test_top_level_patterns_do_not_descend(tmp_path):
+    _touch(tmp_path, "deep/nested/tree/main.py")
+    match, stats = RepoScanner().find_first(tmp_path, ["*.py", "*.js"])
+    assert match is None
+    assert stats.dirs_listed == 1
+
+
+@pytest.mark.asyncio
+async def test_validate_preconditions_reports_scan_time(tmp_path):
+    executor = JobExecutor(WorkerConfig(
+        server={"url": "http://backend.test", "worker_token": "token"},
+        capabilities=[{"provider": "OLLAMA", "model": "llama3", "endpoint": "http://localhost:11434"}],
+        security={"job_signing_public_key": "unused"},
+    ))
+    _touch(tmp_path, "node_modules/x/api/a.py")
+
+    result = await executor.validate_preconditions({}, tmp_path, "API_TESTER")
+    assert result["can_proceed"] is False
+    assert result["scan_ms"] >= 0
+
+    _touch(tmp_path, "app/api/users.py")
+    result = await executor.validate_preconditions({}, tmp_path, "API_TESTER")
+    assert result["can_proceed"] is True
+    assert "scan_ms" in result
+    await executor.close()
@@ -0,0 +1,97 @@
+"""
+Test suite for job result upload
+Tests that large outputs are compressed and uploaded in chunks
+"""
+import gzip
+import hashlib
+import json
+
+import httpx
+import pytest
+
+from local_agent_hub.core.config import WorkerConfig
+from local_agent_hub.worker.executor import JobExecutor
+
+
+def _config(**execution):
+    return WorkerConfig(
+        server={"url": "http://backend.test", "worker_token": "token"},
+        capabilities=[{"provider": "OLLAMA", "model": "llama3", "endpoint": "http://localhost:11434"}],
+        security={"job_signing_public_key": "unused"},
+        execution=execution,
+    )
+
+
+def _executor(config, requests):
+    executor = JobExecutor(config)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, json={})
+
+    executor.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return executor
+
+
+@pytest.mark.asyncio
+async def test_small_output_is_posted_inline():
+    requests = []
+    executor = _executor(_config(), requests)
+
+    await executor.upload_result("job-1", "COMPLETED", {"output": {"status": "SUCCESS"}})
+    await executor.close()
+
+    assert [r.url.path for r in requests] == ["/api/v1/jobs/job-1/result"]
+    assert json.loads(requests[0].content)["output"] == {"status": "SUCCESS"}
+
+
+@pytest.mark.asyncio
+async def test_large_output_is_uploaded_in_compressed_chunks():
+    requests = []
+    config = _config(result_inline_max_bytes=1024, result_chunk_bytes=256, result_compression="gzip")
+    executor = _executor(config, requests)
+    output = {"status": "SUCCESS", "log": "".join(f"line {i}\n" for i in range(5000))}
+
+    await executor.upload_result("job-2", "COMPLETED", {"output": output})
+    await executor.close()
+
+    chunks = [r for r in requests if r.method == "PUT"]
+    assert [r.url.path for r in chunks] == [f"/api/v1/jobs/job-2/result/chunks/{i}" for i in range(len(chunks))]
+    assert all(len(r.content) <= 256 for r in chunks)
+
+    blob = b"".join(r.content for r in chunks)
+    result = json.loads(requests[-1].content)
+    assert result["output"] is None
+    assert result["output_summary"]["status"] == "SUCCESS"
+    assert result["output_ref"] == {
+        "sha256": hashlib.sha256(blob).hexdigest(),
+        "size": len(blob),
+        "encoding": "gzip",
+    }
+    assert json.loads(gzip.decompress(blob)) == output
+
+
+@pytest.mark.asyncio
+async def test_rejected_output_upload_fails_the_job():
+    requests = []
+    executor = JobExecutor(_config(result_inline_max_bytes=1024, result_chunk_bytes=256))
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "PUT":
+            return httpx.Response(413, json={"detail": "Result upload exceeds limit"})
+        return httpx.Response(200, json={})
+
+    executor.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    output = {"status": "SUCCESS", "log": "x" * 50000}
+
+    await executor.upload_result("job-3", "COMPLETED", {"output": output})
+    await executor.close()
+
+    assert [r.method for r in requests] == ["PUT", "POST"]
+    result = json.loads(requests[-1].content)
+    assert result["status"] == "FAILED"
+    assert "413" in result["error"]
+    assert result["retryable"] is False
+    assert result["output"] is None and "output_ref" not in result
+    assert result["output_summary"]["status"] == "SUCCESS"
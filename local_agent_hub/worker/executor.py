@@ -10,22 +10,52 @@ if sys.stderr.encoding is None or sys.stderr.encoding.lower() != 'utf-8':
 
 import asyncio
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+import gzip
+import hashlib
 import time
 import httpx
 import json
 import os
 from structlog import get_logger
 
+try:
+    import zstandard
+except ImportError:  # Optional: large outputs fall back to gzip
+    zstandard = None
+
 from local_agent_hub.core.config import WorkerConfig
 from local_agent_hub.core.security import (
     validate_job_scope,
     verify_job_signature,
     SecurityError
 )
+from local_agent_hub.worker.repo_scan import RepoScanner
 
 logger = get_logger(__name__)
 
+
+def compress_output(output: Dict[str, Any], encoding: str = "zstd") -> Tuple[bytes, str]:
+    """Serialize and compress a job output (zstd when available, else gzip)."""
+    raw = json.dumps(output, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if encoding == "zstd" and zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(raw), "zstd"
+    return gzip.compress(raw, mtime=0), "gzip"
+
+
+def summarize_output(output: Dict[str, Any], max_chars: int = 200) -> Dict[str, Any]:
+    """Scalar top-level fields (strings truncated) shown in place of an uploaded output."""
+    summary: Dict[str, Any] = {}
+    for key, value in list(output.items())[:20]:
+        if isinstance(value, str):
+            summary[key] = value if len(value) <= max_chars else value[:max_chars] + "…"
+        elif value is None or isinstance(value, (bool, int, float)):
+            summary[key] = value
+        elif isinstance(value, (list, dict)):
+            summary[key] = {"items": len(value)}
+    return summary
+
+
 class JobExecutor:
     def __init__(self, config: WorkerConfig):
         self.config = config
@@ -37,9 +67,13 @@ class JobExecutor:
             timeout=httpx.Timeout(120.0), # AI 응답 대기를 위해 타임아웃 연장
             headers={
                 "Authorization": f"Bearer {self.worker_token}",
-                "User-Agent": f"BUJA-Worker/{config.worker.id}"
+                "User-Agent": f"BUJA-Worker/{config.worker.id}",
+                # Results are only accepted from the lease holder
+                "X-Worker-Id": config.worker.id
             }
         )
+        # Directory listings cached across jobs on the same repo
+        self.repo_scanner = RepoScanner()
     
     async def execute_job(self, job: Dict[str, Any]) -> None:
         job_id = job.get('job_id')
@@ -79,41 +113,53 @@ class JobExecutor:
         [NEW] 역할별 사전 조건 검증
         - 에이전트가 진행 불가능한 상황을 사전에 감지
         - 기존 동작에 영향을 주지 않고, 추가적인 방어 체계 제공
+        - 파일 검색은 첫 매치에서 중단하고 .gitignore 제외 경로는 건너뜀 (scan_ms로 보고)
         """
         metadata = job.get('metadata', {})
+        scan_ms = 0.0
+
+        async def has_file(patterns):
+            nonlocal scan_ms
+            match, stats = await asyncio.to_thread(self.repo_scanner.find_first, repo_path, patterns)
+            scan_ms += stats.elapsed_ms
+            logger.info(
+                "Precondition scan",
+                role=role,
+                match=match,
+                elapsed_ms=stats.elapsed_ms,
+                dirs_listed=stats.dirs_listed,
+                dirs_cached=stats.dirs_cached
+            )
+            return match is not None
         
         # API 테스트 에이전트: API 엔드포인트 확인
         if "API" in role or "AUTH" in role:
             # API 관련 파일 존재 확인
             api_patterns = ["**/api/**/*.py", "**/routes/**/*.py", "**/endpoints/**/*.py"]
-            api_files = []
-            for pattern in api_patterns:
-                api_files.extend(list(repo_path.glob(pattern)))
             
-            if not api_files:
+            if not await has_file(api_patterns):
                 logger.warning(f"⚠️ API 에이전트가 실행되었지만 API 파일이 없습니다: {repo_path}")
                 return {
                     "can_proceed": False,
                     "reason": f"프로젝트 경로 '{repo_path}'에 API 엔드포인트 파일이 없습니다.",
                     "recommendation": "API 인증 에이전트를 제거하거나, API 엔드포인트를 먼저 개발하세요.",
-                    "severity": "ERROR"
+                    "severity": "ERROR",
+                    "scan_ms": scan_ms
                 }
         
         # REVIEWER/QA: 검토할 파일 존재 확인
         if "REVIEWER" in role or "QA" in role:
             # 검토 대상 코드 파일 확인
             code_patterns = ["*.py", "*.js", "*.ts", "*.tsx", "*.jsx"]
-            code_files = []
-            for pattern in code_patterns:
-                code_files.extend(list(repo_path.glob(pattern)))
             
-            if not code_files:
+            if not await has_file(code_patterns):
                 logger.warning(f"⚠️ 검수 에이전트가 실행되었지만 검토할 파일이 없습니다: {repo_path}")
                 return {
                     "can_proceed": False,
                     "reason": f"프로젝트 경로 '{repo_path}'에 검토할 코드 파일이 없습니다.",
                     "recommendation": "CODER/DEVELOPER 에이전트를 먼저 실행하여 파일을 생성하세요.",
-                    "severity": "WARNING"
+                    "severity": "WARNING",
+                    "scan_ms": scan_ms
                 }
         
         # CODER/DEVELOPER: 쓰기 권한 확인
@@ -150,8 +196,8 @@ class JobExecutor:
                 }
         
         # 모든 검증 통과
-        logger.info(f"✅ 사전 검증 통과: {role} 에이전트 실행 가능")
-        return {"can_proceed": True}
+        logger.info(f"✅ 사전 검증 통과: {role} 에이전트 실행 가능", scan_ms=scan_ms)
+        return {"can_proceed": True, "scan_ms": scan_ms}
 
     async def run_ai_agent(self, job: Dict[str, Any], repo_path: Path) -> Dict[str, Any]:
         """실제 OpenRouter API를 호출하여 작업을 수행하거나 정교한 시뮬레이션을 수행합니다."""
@@ -167,7 +213,8 @@ class JobExecutor:
                 "reason": validation.get("reason"),
                 "recommendation": validation.get("recommendation"),
                 "severity": validation.get("severity", "ERROR"),
-                "can_proceed": False
+                "can_proceed": False,
+                "scan_ms": validation.get("scan_ms")
             }
         
         # [Fix] 너무 빨리 끝나서 루프 도는 것을 방지하고 실제 작업하는 척이라도 하도록 함
@@ -204,17 +251,57 @@ if __name__ == '__main__':
         return {"status": "SUCCESS", "message": f"Task for {role} processed"}
 
     async def upload_result(self, job_id: str, status: str, result: Dict[str, Any]) -> None:
+        """
+        Post the job result; large outputs go to the backend's blob store
+
+        An output whose JSON exceeds execution.result_inline_max_bytes is
+        compressed, uploaded in result_chunk_bytes chunks and referenced by
+        its SHA-256, so the backend keeps only a summary in Redis. If that
+        upload fails (too large, rejected, network) the job is reported
+        FAILED and not retryable with the summary, so the backend fails it
+        instead of re-running it to fail the same way again.
+        """
+        output = result.get('output') or {}
+        payload: Dict[str, Any] = {
+            "status": status,
+            "output": output,
+            "error": result.get('error'),
+            "execution_time_ms": int(time.time() * 1000)
+        }
         try:
-            await self.client.post(
+            if len(json.dumps(output, ensure_ascii=False).encode("utf-8")) > self.config.execution.result_inline_max_bytes:
+                payload["output"] = None
+                payload["output_summary"] = summarize_output(output)
+                try:
+                    payload["output_ref"] = await self.upload_output_blob(job_id, output)
+                except Exception as e:
+                    logger.error("Error uploading result output", job_id=job_id, error=str(e))
+                    payload["status"] = "FAILED"
+                    payload["error"] = f"Result output upload failed: {e}"
+                    payload["retryable"] = False
+
+            response = await self.client.post(
                 f"{self.server_url}/api/v1/jobs/{job_id}/result",
-                json={
-                    "status": status,
-                    "output": result.get('output', {}),
-                    "execution_time_ms": int(time.time() * 1000)
-                }
+                json=payload
             )
+            response.raise_for_status()
         except Exception as e:
-            logger.error("Error uploading result", error=str(e))
+            logger.error("Error uploading result", job_id=job_id, error=str(e))
+
+    async def upload_output_blob(self, job_id: str, output: Dict[str, Any]) -> Dict[str, Any]:
+        """Upload a compressed output in chunks; returns its blob reference."""
+        execution = self.config.execution
+        blob, encoding = compress_output(output, execution.result_compression)
+        chunk_size = max(1, execution.result_chunk_bytes)
+        for index, offset in enumerate(range(0, len(blob), chunk_size)):
+            response = await self.client.put(
+                f"{self.server_url}/api/v1/jobs/{job_id}/result/chunks/{index}",
+                content=blob[offset:offset + chunk_size],
+                headers={"Content-Type": "application/octet-stream"}
+            )
+            response.raise_for_status()
+        logger.info("Result output uploaded", job_id=job_id, size=len(blob), encoding=encoding)
+        return {"sha256": hashlib.sha256(blob).hexdigest(), "size": len(blob), "encoding": encoding}
 
     async def close(self):
         await self.client.aclose()
@@ -1,23 +1,47 @@
 """
 Job Poller for Local Worker
-Polls backend for pending jobs using long polling
+Receives jobs over the backend's push channel (long polling as fallback)
+and runs them on a bounded concurrency pool (global and per-capability limits)
 """
 import asyncio
-from typing import Optional, Dict, Any
+import itertools
+import json
+import re
+import time
+from typing import Optional, Dict, Any, List, Set
 import httpx
 from structlog import get_logger
 
-from local_agent_hub.core.config import WorkerConfig
+try:
+    from websockets.asyncio.client import connect as ws_connect
+except ImportError:  # optional: without it the worker only long-polls
+    ws_connect = None
+
+from local_agent_hub.core.config import WorkerConfig, ProviderCapability
 from local_agent_hub.core.security import verify_job_signature, SecurityError
 
 logger = get_logger(__name__)
 
 
+def capability_key(provider: str, model: str) -> str:
+    """Same provider:model id the backend uses for its queues."""
+    return f"{str(provider).upper()}:{model}"
+
+
 class JobPoller:
     """
     Polls backend for pending jobs
     
-    Uses long polling (30s timeout) for efficient job fetching
+    Jobs arrive over the /workers/ws push channel when it is available: the
+    worker grants the backend credits for as many jobs as the pool has room
+    for and receives leases the moment they are queued. Otherwise it long-
+    polls (30s timeout); each poll leases as many jobs as the pool has room
+    for and acknowledges the ones that can start with a single request. Jobs
+    run as concurrent tasks: at most
+    worker.max_concurrent_jobs overall and capability.max_concurrent per
+    provider/model. Up to worker.prefetch extra jobs are leased ahead so the
+    next poll overlaps with execution; those wait for a slot of their
+    capability and are acknowledged once they get one.
     """
     
     def __init__(self, config: WorkerConfig):
@@ -35,29 +59,75 @@ class JobPoller:
         self.public_key = config.security.job_signing_public_key
         self.running = False
         
+        # Concurrency pool
+        self.max_concurrent = max(1, config.worker.max_concurrent_jobs)
+        self.prefetch = max(0, config.worker.prefetch)
+        self._slots = asyncio.Condition()
+        self._tasks: Set[asyncio.Task] = set()
+        self._running_total = 0
+        self._running: Dict[str, int] = {}   # capability key -> executing jobs
+        self._reserved: Dict[str, int] = {}  # capability key -> executing + waiting jobs
+        
+        # Push channel (see push_session)
+        self._push = None           # open WebSocket, if any
+        self._credits = 0           # jobs granted to the backend but not pushed yet
+        self._accepting = 0         # pushed jobs not yet dispatched or skipped
+        self._acks: Dict[str, asyncio.Future] = {}
+        self._ack_ids = itertools.count(1)
+        
         # HTTP client
         self.client = httpx.AsyncClient(
             timeout=httpx.Timeout(self.timeout + 5.0),  # Slightly longer than server timeout
             headers={
                 "Authorization": f"Bearer {self.worker_token}",
-                "User-Agent": f"BUJA-Worker/{config.worker.id}"
+                "User-Agent": f"BUJA-Worker/{config.worker.id}",
+                "X-Worker-Id": config.worker.id
             }
         )
     
-    async def poll_once(self) -> Optional[Dict[str, Any]]:
+    async def poll_once(self, capabilities: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
         """
         Poll for a single job
         
+        Args:
+            capabilities: provider:model keys with a free slot; the backend
+                only leases jobs for these (default: everything heartbeated)
+        
         Returns:
             Job dictionary if available, None otherwise
             
         Raises:
             httpx.HTTPError: If request fails
         """
+        jobs = await self.poll_batch(1, capabilities)
+        return jobs[0] if jobs else None
+
+    async def poll_batch(
+        self,
+        max_jobs: int,
+        capabilities: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Lease up to max_jobs jobs with one long-poll (GET /jobs/pending?max=N)
+        
+        Args:
+            max_jobs: Jobs the pool can take right now
+            capabilities: provider:model keys with a free slot (see poll_once)
+        
+        Returns:
+            Leased jobs (empty if none arrived)
+            
+        Raises:
+            httpx.HTTPError: If request fails
+        """
+        params: Dict[str, Any] = {"max": max(1, max_jobs)}
+        if capabilities:
+            params["capability"] = capabilities
         try:
             logger.debug(f"Polling for jobs at {self.server_url}/api/v1/jobs/pending")
             response = await self.client.get(
                 f"{self.server_url}/api/v1/jobs/pending",
+                params=params,
                 timeout=self.timeout
             )
             
@@ -67,30 +137,31 @@ class JobPoller:
                 # Check for empty content
                 if not response.content:
                     logger.warning("Received 200 OK but empty content")
-                    return None
+                    return []
 
                 try:
-                    job = response.json()
+                    jobs = response.json()
                 except Exception as e:
                     logger.error(f"Failed to parse JSON response: {e}", raw_content=response.text[:200])
-                    return None
+                    return []
                 
-                # Check if job is None or empty
-                if job is None:
-                    logger.debug("Received None from backend (after JSON parse)")
-                    return None
+                # Check if job list is None or empty
+                if not jobs:
+                    logger.debug("No jobs received from backend (after JSON parse)")
+                    return []
                 
-                logger.info(
-                    "Job received from backend",
-                    job_id=job.get('job_id'),
-                    execution_location=job.get('execution_location')
-                )
-                return job
+                for job in jobs:
+                    logger.info(
+                        "Job received from backend",
+                        job_id=job.get('job_id'),
+                        execution_location=job.get('execution_location')
+                    )
+                return jobs
             
             elif response.status_code == 204:
                 # No jobs available
                 # logger.debug("No pending jobs") # Too noisy
-                return None
+                return []
             
             else:
                 logger.warning(
@@ -98,12 +169,12 @@ class JobPoller:
                     status_code=response.status_code,
                     response=response.text[:200]
                 )
-                return None
+                return []
                 
         except httpx.TimeoutException:
             # Long polling timeout - this is normal
             logger.debug("Polling timeout (no jobs)")
-            return None
+            return []
         
         except httpx.HTTPError as e:
             logger.error("HTTP error during polling", error=str(e))
@@ -162,59 +233,275 @@ class JobPoller:
         except Exception as e:
             logger.error("Failed to report security violation", error=str(e))
     
+    def capability_for(self, job: Dict[str, Any]) -> Optional[ProviderCapability]:
+        """Configured capability that runs this job (exact model first, then "*")."""
+        provider = str(job.get("provider", "")).upper()
+        model = job.get("model")
+        matches = [c for c in self.config.capabilities if c.provider.upper() == provider]
+        return (
+            next((c for c in matches if c.model == model), None)
+            or next((c for c in matches if c.model == "*"), None)
+        )
+
+    def _capability_limit(self, cap: ProviderCapability) -> int:
+        return max(1, min(cap.max_concurrent, self.max_concurrent))
+
+    def _pollable_capabilities(self) -> List[str]:
+        """Capabilities that can take another leased job (running + prefetched)."""
+        if self._headroom() <= 0:
+            return []
+        return [
+            capability_key(c.provider, c.model)
+            for c in self.config.capabilities
+            if self._reserved.get(capability_key(c.provider, c.model), 0)
+            < self._capability_limit(c) + self.prefetch
+        ]
+
+    def _headroom(self) -> int:
+        """Jobs the pool can lease right now (free slots plus prefetch)."""
+        return self.max_concurrent + self.prefetch - sum(self._reserved.values())
+
+    @property
+    def in_flight(self) -> int:
+        """Jobs leased by this worker and not finished (executing or waiting for a slot)."""
+        return len(self._tasks)
+
+    async def _wait_for_capacity(self) -> List[str]:
+        async with self._slots:
+            await self._slots.wait_for(lambda: not self.running or self._pollable_capabilities())
+            return self._pollable_capabilities()
+
+    async def acknowledge(self, job_id: str) -> bool:
+        """
+        [Reliable Queue] Acknowledge job receipt
+        
+        Returns:
+            False if the lease was already reclaimed (job went back to the queue)
+        """
+        return job_id in await self.acknowledge_batch([job_id])
+
+    async def acknowledge_batch(self, job_ids: List[str]) -> Set[str]:
+        """
+        [Reliable Queue] Acknowledge several jobs with one request
+        
+        Returns:
+            Job ids whose lease is still ours (all of them if the request
+            failed: the backend re-queues on lease expiry either way)
+        """
+        if self._push is not None:
+            try:
+                return await self._acknowledge_pushed(job_ids)
+            except Exception as e:
+                logger.warning("Push channel acknowledge failed; retrying over HTTP", error=str(e))
+        try:
+            ack = await self.client.post(
+                f"{self.server_url}/api/v1/jobs/acknowledge",
+                json={"job_ids": job_ids}
+            )
+            ack.raise_for_status()
+            return set(ack.json().get("acknowledged", []))
+        except Exception as e:
+            logger.error("Failed to acknowledge jobs", error=str(e))
+            return set(job_ids)
+
+    async def _acknowledge_pushed(self, job_ids: List[str]) -> Set[str]:
+        ws = self._push
+        request_id = str(next(self._ack_ids))
+        future = asyncio.get_running_loop().create_future()
+        self._acks[request_id] = future
+        try:
+            await ws.send(json.dumps({"type": "ack", "request_id": request_id, "job_ids": job_ids}))
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._acks.pop(request_id, None)
+
+    def _slot_for(self, job: Dict[str, Any]):
+        """Capability key and concurrency limit the job runs under."""
+        cap = self.capability_for(job)
+        if cap:
+            return capability_key(cap.provider, cap.model), self._capability_limit(cap)
+        return capability_key(job.get("provider"), job.get("model")), 1
+
+    def _slot_free(self, key: str, limit: int) -> bool:
+        return self._running_total < self.max_concurrent and self._running.get(key, 0) < limit
+
+    def _take_slot(self, key: str) -> None:
+        self._running_total += 1
+        self._running[key] = self._running.get(key, 0) + 1
+
+    def _dispatch(self, job: Dict[str, Any], executor_callback, started: bool = False) -> None:
+        """
+        Run the job as a pool task (its capability is already reserved)
+
+        started: the job already holds a slot and was acknowledged;
+        otherwise the task waits for a slot and acknowledges then.
+        """
+        key, limit = self._slot_for(job)
+        task = asyncio.create_task(self._run_job(job, key, limit, executor_callback, started))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_job(self, job: Dict[str, Any], key: str, limit: int, executor_callback,
+                       started: bool = False) -> None:
+        job_id = job.get('job_id')
+        try:
+            if not started:
+                async with self._slots:
+                    await self._slots.wait_for(lambda: self._slot_free(key, limit))
+                    self._take_slot(key)
+                    started = True
+                # Acknowledging starts the execution timeout, so prefetched
+                # jobs only do it once they can run
+                if not await self.acknowledge(job_id):
+                    logger.warning(
+                        "Skipping job whose lease was reclaimed",
+                        job_id=job_id
+                    )
+                    return
+
+            logger.info(
+                "Passing job to executor",
+                job_id=job_id,
+                capability=key,
+                running=self._running_total
+            )
+            await executor_callback(job)
+        except Exception as e:
+            logger.error(
+                "Job execution failed",
+                job_id=job_id,
+                error=str(e)
+            )
+        finally:
+            async with self._slots:
+                if started:
+                    self._running_total -= 1
+                    self._running[key] -= 1
+                self._reserved[key] -= 1
+                self._slots.notify_all()
+    
+    async def _accept(self, jobs: List[Dict[str, Any]], executor_callback) -> None:
+        """
+        Verify and dispatch freshly leased jobs
+
+        Jobs with a free slot take it and are acknowledged together (one
+        request); prefetched jobs are acknowledged when they get a slot, as
+        the backend starts their execution timeout on acknowledgement.
+        """
+        valid = []
+        for job in jobs:
+            if await self.verify_and_validate_job(job):
+                valid.append(job)
+            else:
+                # Invalid signature - skip this job
+                logger.warning(
+                    "Skipping job with invalid signature",
+                    job_id=job.get('job_id')
+                )
+        if not valid:
+            return
+        
+        ready = []
+        async with self._slots:
+            for job in valid:
+                key, limit = self._slot_for(job)
+                self._reserved[key] = self._reserved.get(key, 0) + 1
+                if self._slot_free(key, limit):
+                    self._take_slot(key)
+                    ready.append(job)
+        
+        acked = await self.acknowledge_batch([job.get('job_id') for job in ready]) if ready else set()
+        for job in valid:
+            if job not in ready:
+                self._dispatch(job, executor_callback)
+            elif job.get('job_id') in acked:
+                self._dispatch(job, executor_callback, started=True)
+            else:
+                # Lease expired and the job was handed back to the queue
+                logger.warning(
+                    "Skipping job whose lease was reclaimed",
+                    job_id=job.get('job_id')
+                )
+                key, _ = self._slot_for(job)
+                async with self._slots:
+                    self._running_total -= 1
+                    self._running[key] -= 1
+                    self._reserved[key] -= 1
+                    self._slots.notify_all()
+
+    async def run(self, executor_callback):
+        """
+        Receive and run jobs until stopped
+        
+        Uses the push channel when enabled; while it is unavailable the
+        worker long-polls for server.push_retry_interval seconds, then
+        tries to reconnect.
+        
+        Args:
+            executor_callback: Async function to call with valid jobs
+        """
+        self.running = True
+        push = self.config.server.push and ws_connect is not None
+        if self.config.server.push and ws_connect is None:
+            logger.warning("websockets is not installed; using long polling only")
+        
+        while self.running:
+            if push:
+                try:
+                    await self.push_session(executor_callback)
+                except Exception as e:
+                    logger.warning(
+                        "Push channel unavailable; falling back to long polling",
+                        error=str(e)
+                    )
+                if not self.running:
+                    break
+            await self._poll_until(
+                executor_callback,
+                time.monotonic() + self.config.server.push_retry_interval if push else None
+            )
+        
+        logger.info("Job loop stopped")
+
     async def poll_loop(self, executor_callback):
         """
         Main polling loop
         
+        Leases jobs while the pool has room and hands each to a pool task;
+        the loop itself never waits for execution.
+        
         Args:
             executor_callback: Async function to call with valid jobs
         """
         self.running = True
+        await self._poll_until(executor_callback)
+        logger.info("Polling loop stopped")
+
+    async def _poll_until(self, executor_callback, deadline: Optional[float] = None):
+        """Long-poll until stopped or, if given, until the monotonic deadline."""
         logger.info(
             "Starting job polling loop",
             server_url=self.server_url,
-            poll_interval=self.poll_interval
+            poll_interval=self.poll_interval,
+            max_concurrent=self.max_concurrent,
+            prefetch=self.prefetch
         )
         
-        while self.running:
+        while self.running and (deadline is None or time.monotonic() < deadline):
             try:
-                # Poll for job
-                job = await self.poll_once()
+                capabilities = await self._wait_for_capacity()
+                if not self.running:
+                    break
+                
+                # Poll for as many jobs as the pool can take
+                jobs = await self.poll_batch(self._headroom(), capabilities)
                 
-                if job is None:
+                if not jobs:
                     # No job available, wait before next poll
                     await asyncio.sleep(self.poll_interval)
                     continue
                 
-                # Verify signature
-                if not await self.verify_and_validate_job(job):
-                    # Invalid signature - skip this job
-                    logger.warning(
-                        "Skipping job with invalid signature",
-                        job_id=job.get('job_id')
-                    )
-                    continue
-                
-                # Execute job
-                logger.info(
-                    "Passing job to executor",
-                    job_id=job.get('job_id')
-                )
-                
-                # [Reliable Queue] Acknowledge job receipt
-                try:
-                    await self.client.post(f"{self.server_url}/api/v1/jobs/{job.get('job_id')}/acknowledge")
-                except Exception as e:
-                    logger.error("Failed to acknowledge job", error=str(e))
-
-                try:
-                    await executor_callback(job)
-                except Exception as e:
-                    logger.error(
-                        "Job execution failed",
-                        job_id=job.get('job_id'),
-                        error=str(e)
-                    )
+                await self._accept(jobs, executor_callback)
                 
             except KeyboardInterrupt:
                 logger.info("Polling loop interrupted by user")
@@ -228,12 +515,118 @@ class JobPoller:
                 )
                 # Wait before retrying
                 await asyncio.sleep(self.poll_interval)
+
+    @property
+    def push_url(self) -> str:
+        """ws(s):// URL of the backend's worker push channel."""
+        return re.sub(r"^http", "ws", self.server_url.rstrip("/")) + "/api/v1/workers/ws"
+
+    def _grantable(self) -> int:
+        """Jobs the backend may push on top of what it was already granted."""
+        if not self._pollable_capabilities():
+            return 0
+        return self._headroom() - self._credits - self._accepting
+
+    async def push_session(self, executor_callback) -> None:
+        """
+        Receive jobs over the push channel until it drops or the poller stops
         
-        logger.info("Polling loop stopped")
+        Credits are granted whenever the pool has headroom; the backend
+        pushes at most that many jobs, which are verified, acknowledged (over
+        the same socket) and dispatched exactly like polled ones.
+        """
+        async with ws_connect(
+            self.push_url,
+            additional_headers={
+                "Authorization": f"Bearer {self.worker_token}",
+                "X-Worker-Id": self.config.worker.id
+            },
+            open_timeout=self.timeout
+        ) as ws:
+            self._push = ws
+            self._credits = 0
+            accepting: Set[asyncio.Task] = set()
+            logger.info("Push channel connected", url=self.push_url)
+            
+            # Capabilities must be known before the backend can lease for us
+            await self.send_heartbeat()
+            granter = asyncio.create_task(self._grant_credits(ws))
+            try:
+                async for raw in ws:
+                    message = json.loads(raw)
+                    kind = message.get("type")
+                    if kind == "jobs":
+                        jobs = message.get("jobs") or []
+                        self._credits -= len(jobs)
+                        self._accepting += len(jobs)
+                        task = asyncio.create_task(self._accept_pushed(jobs, executor_callback))
+                        accepting.add(task)
+                        task.add_done_callback(accepting.discard)
+                    elif kind == "ack_result":
+                        future = self._acks.get(message.get("request_id"))
+                        if future and not future.done():
+                            future.set_result(set(message.get("acknowledged") or []))
+                    elif kind == "error":
+                        logger.warning("Push channel error from backend", detail=message.get("detail"))
+            finally:
+                self._push = None
+                granter.cancel()
+                for future in self._acks.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError("push channel closed"))
+                # In-flight acks fall back to HTTP
+                if accepting:
+                    await asyncio.gather(*accepting, return_exceptions=True)
+                self._credits = 0
+        
+        logger.info("Push channel closed")
+
+    async def _grant_credits(self, ws) -> None:
+        """Grant credits as slots free up; close the channel once stopped."""
+        while True:
+            async with self._slots:
+                await self._slots.wait_for(lambda: not self.running or self._grantable() > 0)
+                if not self.running:
+                    break
+                count = self._grantable()
+                capabilities = self._pollable_capabilities()
+                self._credits += count
+            await ws.send(json.dumps({"type": "ready", "count": count, "capabilities": capabilities}))
+        await ws.close()
+
+    async def _accept_pushed(self, jobs: List[Dict[str, Any]], executor_callback) -> None:
+        try:
+            await self._accept(jobs, executor_callback)
+        finally:
+            async with self._slots:
+                self._accepting -= len(jobs)
+                self._slots.notify_all()
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop leasing and wait for in-flight jobs to finish
+        
+        Jobs still running after the timeout are cancelled; their leases
+        expire and the backend re-queues them.
+        """
+        self.running = False
+        async with self._slots:
+            self._slots.notify_all()
+        if not self._tasks:
+            return
+        
+        logger.info("Draining in-flight jobs", count=len(self._tasks))
+        done, pending = await asyncio.wait(set(self._tasks), timeout=timeout)
+        if pending:
+            for task in pending:
+                task.cancel()
+            # Let cancelled jobs run their cleanup (slot release) before returning
+            await asyncio.gather(*pending, return_exceptions=True)
+            logger.warning("Drain timed out; cancelled unfinished jobs", count=len(pending))
     
     async def stop(self):
-        """Stop the polling loop"""
-        self.running = False
+        """Stop the polling loop, finish in-flight jobs, then close the HTTP client"""
+        await self.drain(self.config.worker.drain_timeout_sec)
         await self.client.aclose()
         logger.info("Job poller stopped")
     
@@ -241,22 +634,37 @@ class JobPoller:
         """
         Send heartbeat to backend with improved error handling
         
-        Runs periodically to indicate worker is alive
+        Runs periodically to indicate worker is alive; goes over the push
+        channel while it is connected
         """
+        heartbeat = {
+            "worker_id": self.config.worker.id,
+            "status": "active",
+            "capabilities": [
+                {
+                    "provider": cap.provider,
+                    "model": cap.model
+                }
+                for cap in self.config.capabilities
+            ],
+            # Load for the backend's worker registry (least-loaded dispatch)
+            "in_flight": self.in_flight,
+            "capacity": self.max_concurrent
+        }
+        
+        ws = self._push
+        if ws is not None:
+            try:
+                await ws.send(json.dumps({"type": "heartbeat", **heartbeat}))
+                logger.debug("Heartbeat sent over push channel")
+                return
+            except Exception as e:
+                logger.warning(f"Push channel heartbeat failed, using HTTP: {type(e).__name__}")
+        
         try:
             response = await self.client.post(
                 f"{self.server_url}/api/v1/workers/heartbeat",
-                json={
-                    "worker_id": self.config.worker.id,
-                    "status": "active",
-                    "capabilities": [
-                        {
-                            "provider": cap.provider,
-                            "model": cap.model
-                        }
-                        for cap in self.config.capabilities
-                    ]
-                },
+                json=heartbeat,
                 timeout=10.0  # Shorter timeout for heartbeat
             )
             
@@ -279,7 +687,7 @@ class JobPoller:
             logger.error(f"Failed to send heartbeat: {type(e).__name__} - {str(e) if str(e) else 'Unknown error'}")
     
     async def heartbeat_loop(self):
-        """Background task to send periodic heartbeats"""
-        while self.running:
+        """Background task to send periodic heartbeats (kept up while draining)"""
+        while self.running or self._tasks:
             await self.send_heartbeat()
             await asyncio.sleep(self.config.server.heartbeat_interval)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Repository scanning for job preconditions
+
+Answers "does this repo contain a file matching these globs?" without
+walking the whole tree: the walk is depth-first, stops at the first match,
+never descends deeper than the patterns can reach, and skips anything the
+root .gitignore (plus vendored/virtualenv directories) excludes.
+
+Directory listings are cached per repo and keyed by each directory's
+(inode, mtime), so a later job on the same repo only re-lists directories
+whose entries changed; unchanged ones cost a single stat().
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Pattern, Sequence, Tuple
+
+# Never worth scanning, whatever .gitignore says
+DEFAULT_EXCLUDES = (
+    ".git/", "node_modules/", ".venv/", "venv/", "__pycache__/",
+    ".tox/", ".mypy_cache/", ".pytest_cache/",
+)
+
+MAX_CACHED_REPOS = 8
+
+
+def glob_to_regex(pattern: str) -> Pattern[str]:
+    """
+    Compile a Path.glob-style pattern (relative to the repo root)
+
+    `**` spans any number of directories (including none), `*` and `?`
+    stay within one path segment.
+    """
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile("".join(out) + r"\Z")
+
+
+def pattern_depth(pattern: str) -> Optional[int]:
+    """Deepest directory level a pattern can match (None: unbounded)."""
+    if "**" in pattern:
+        return None
+    return pattern.count("/")
+
+
+@dataclass
+class IgnoreRule:
+    regex: Pattern[str]
+    negate: bool
+    dir_only: bool
+    anchored: bool
+
+
+class IgnoreRules:
+    """
+    .gitignore subset: comments, `!` negation, trailing `/` for directories,
+    patterns with a slash anchored at the root, others matched by name at
+    any depth; the last matching rule wins.
+    """
+
+    def __init__(self, lines: Sequence[str] = ()):
+        self.rules: List[IgnoreRule] = []
+        for line in list(DEFAULT_EXCLUDES) + list(lines):
+            line = line.rstrip("\n").rstrip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            anchored = "/" in line
+            line = line.lstrip("/")
+            if line:
+                self.rules.append(IgnoreRule(glob_to_regex(line), negate, dir_only, anchored))
+
+    @classmethod
+    def for_repo(cls, root: Path) -> "IgnoreRules":
+        try:
+            return cls((root / ".gitignore").read_text(encoding="utf-8", errors="replace").splitlines())
+        except OSError:
+            return cls()
+
+    def ignored(self, rel_path: str, is_dir: bool) -> bool:
+        name = rel_path.rsplit("/", 1)[-1]
+        result = False
+        for rule in self.rules:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(rel_path if rule.anchored else name):
+                result = not rule.negate
+        return result
+
+
+@dataclass
+class ScanStats:
+    """Work done by one scan (reported with the precondition result)"""
+    dirs_listed: int = 0
+    dirs_cached: int = 0
+    files_checked: int = 0
+    elapsed_ms: float = 0.0
+
+
+@dataclass
+class _RepoIndex:
+    ignore_key: Tuple[int, int]
+    rules: IgnoreRules
+    # rel dir -> ((inode, mtime_ns), files, subdirs), filtered by `rules`
+    dirs: Dict[str, Tuple[Tuple[int, int], List[str], List[str]]] = field(default_factory=dict)
+
+
+def _stat_key(path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns
+
+
+class RepoScanner:
+    """Early-exit glob search over repos with cached directory listings (thread-safe)"""
+
+    def __init__(self, max_repos: int = MAX_CACHED_REPOS):
+        self.max_repos = max_repos
+        self._repos: "OrderedDict[str, _RepoIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _index(self, root: Path) -> _RepoIndex:
+        try:
+            ignore_key = _stat_key(root / ".gitignore")
+        except OSError:
+            ignore_key = (0, 0)
+        key = str(root.resolve())
+        with self._lock:
+            index = self._repos.get(key)
+            if index is None or index.ignore_key != ignore_key:
+                # New repo or edited .gitignore: the cached listings are filtered by stale rules
+                index = _RepoIndex(ignore_key, IgnoreRules.for_repo(root))
+                self._repos[key] = index
+            self._repos.move_to_end(key)
+            while len(self._repos) > self.max_repos:
+                self._repos.popitem(last=False)
+        return index
+
+    def _listing(self, index: _RepoIndex, root: Path, rel_dir: str, stats: ScanStats):
+        path = root / rel_dir if rel_dir else root
+        try:
+            key = _stat_key(path)
+        except OSError:
+            index.dirs.pop(rel_dir, None)
+            return [], []
+        cached = index.dirs.get(rel_dir)
+        if cached and cached[0] == key:
+            stats.dirs_cached += 1
+            return cached[1], cached[2]
+
+        files: List[str] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if index.rules.ignored(rel, is_dir):
+                        continue
+                    (subdirs if is_dir else files).append(rel)
+        except OSError:
+            return [], []
+        files.sort()
+        subdirs.sort()
+        index.dirs[rel_dir] = (key, files, subdirs)
+        stats.dirs_listed += 1
+        return files, subdirs
+
+    def find_first(self, root: Path, patterns: Sequence[str]) -> Tuple[Optional[str], ScanStats]:
+        """
+        First file (repo-relative, posix) matching any of the glob patterns
+
+        Returns:
+            (match or None, scan statistics)
+        """
+        started = time.perf_counter()
+        stats = ScanStats()
+        regexes = [glob_to_regex(p) for p in patterns]
+        depths = [pattern_depth(p) for p in patterns]
+        max_depth = None if None in depths else max(depths, default=0)
+
+        match = None
+        if root.is_dir():
+            index = self._index(root)
+            stack = [("", 0)]
+            while stack and match is None:
+                rel_dir, depth = stack.pop()
+                files, subdirs = self._listing(index, root, rel_dir, stats)
+                for rel in files:
+                    stats.files_checked += 1
+                    if any(regex.match(rel) for regex in regexes):
+                        match = rel
+                        break
+                if max_depth is None or depth < max_depth:
+                    stack.extend((sub, depth + 1) for sub in reversed(subdirs))
+
+        stats.elapsed_ms = round((time.perf_counter() - started) * 1000, 3)
+        return match, stats
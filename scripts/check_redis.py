@@ -12,26 +12,39 @@ print("Redis Queue Status")
 print("=" * 70)
 print()
 
-# Check queue length
-queue_key = "job_queue:tenant_hyungnim"
-queue_length = r.llen(queue_key)
+# Queues are per capability: job_queue:{tenant}:{PROVIDER:model} sorted sets
+# of job ids (details live in the job:{id} hash)
+tenant_id = "tenant_hyungnim"
+queue_keys = [f"job_queue:{tenant_id}:{cap}" for cap in sorted(r.smembers(f"job_queues:{tenant_id}"))]
+queue_length = 0
+for queue_key in queue_keys:
+    length = r.zcard(queue_key)
+    queue_length += length
+    print(f"Queue: {queue_key}")
+    print(f"Length: {length}")
+print()
 
-print(f"Queue: {queue_key}")
-print(f"Length: {queue_length}")
+processing_key = f"job_processing:{tenant_id}"
+leased = r.zrange(processing_key, 0, -1)
+print(f"Leased: {processing_key} ({len(leased)})")
+for job_id in leased:
+    print(f"   {job_id} worker={r.hget(f'job:{job_id}', 'worker_id')} status={r.hget(f'job:{job_id}', 'status')}")
 print()
 
 if queue_length > 0:
     print(f"📋 {queue_length} job(s) in queue:")
     print()
     
-    # Show all jobs in queue
-    jobs = r.lrange(queue_key, 0, -1)
-    for i, job_json in enumerate(jobs, 1):
-        job = json.loads(job_json)
-        print(f"{i}. Job ID: {job.get('job_id')}")
-        print(f"   Status: {job.get('status')}")
-        print(f"   Model: {job.get('model')}")
-        print()
+    # Show all jobs in queue, next to lease first
+    i = 0
+    for queue_key in queue_keys:
+        for job_id in r.zrange(queue_key, 0, -1):
+            i += 1
+            job = json.loads(r.hget(f"job:{job_id}", "spec") or "{}")
+            print(f"{i}. Job ID: {job_id}")
+            print(f"   Status: {r.hget(f'job:{job_id}', 'status')}")
+            print(f"   Model: {job.get('model')}")
+            print()
 else:
     print("✅ Queue is empty")
     print()
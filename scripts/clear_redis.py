@@ -11,12 +11,15 @@ print("Clearing Redis Queue")
 print("=" * 70)
 print()
 
-# Clear the job queue
-queue_key = "job_queue:tenant_hyungnim"
-deleted = r.delete(queue_key)
+# Clear the tenant's job queues (one per capability), leases and status indexes
+tenant_id = "tenant_hyungnim"
+queue_keys = [f"job_queue:{tenant_id}:{cap}" for cap in r.smembers(f"job_queues:{tenant_id}")]
+queue_keys += [f"job_queues:{tenant_id}", f"job_processing:{tenant_id}"]
+queue_keys += r.keys(f"job_index:{tenant_id}:*")
+deleted = r.delete(*queue_keys)
 
-print(f"✅ Deleted queue: {queue_key}")
-print(f"   Items removed: {deleted}")
+print(f"✅ Deleted queues for tenant: {tenant_id}")
+print(f"   Keys removed: {deleted}")
 print()
 
 # Clear all job specs and results
@@ -12,29 +12,38 @@ print("Redis Full Inspection")
 print("=" * 70)
 print()
 
-# 1. Scan for Job Queues
-print("1. Searching for Job Queues (job_queue:*)...")
-queues = r.keys("job_queue:*")
-if queues:
-    for q in queues:
-        length = r.llen(q)
-        print(f"   found: {q} (Length: {length})")
-        if length > 0:
-            items = r.lrange(q, 0, -1)
-            print(f"   -> First item: {items[0][:100]}...")
+# 1. Job Queues: one sorted set of job ids per tenant and capability
+# (job_queue:{tenant}:{PROVIDER:model}), leases in job_processing:{tenant}
+print("1. Searching for Job Queues (job_queue:{tenant}:{capability})...")
+tenants = sorted(r.smembers("job_tenants"))
+if tenants:
+    for tenant in tenants:
+        print(f"   Tenant: {tenant}")
+        for cap in sorted(r.smembers(f"job_queues:{tenant}")):
+            q = f"job_queue:{tenant}:{cap}"
+            length = r.zcard(q)
+            print(f"   found: {q} (Length: {length})")
+            if length > 0:
+                head = r.zrange(q, 0, 0)[0]
+                print(f"   -> Next job: {head} (status: {r.hget(f'job:{head}', 'status')})")
+        p_key = f"job_processing:{tenant}"
+        leased = r.zrange(p_key, 0, -1, withscores=True)
+        print(f"   leased: {p_key} (Length: {len(leased)})")
+        for job_id, deadline in leased:
+            print(f"   -> {job_id} worker={r.hget(f'job:{job_id}', 'worker_id')} lease_deadline={int(deadline)}")
 else:
     print("   ❌ No job queues found!")
 
 print()
 
 # 2. Scan for Job Specs
-print("2. Searching for Job Specs (job:*:spec)...")
-specs = r.keys("job:*:spec")
+print("2. Searching for Job Specs (job:* hashes)...")
+specs = [k for k in r.keys("job:*") if r.type(k) == "hash"]
 if specs:
     print(f"   Found {len(specs)} job specs.")
     # Show detail of the most recent one
     latest_spec_key = specs[0] # Just pick one
-    spec_json = r.get(latest_spec_key)
+    spec_json = r.hget(latest_spec_key, "spec")
     try:
         spec = json.loads(spec_json)
         print(f"   Sample Job ID: {spec.get('job_id')}")
@@ -39,13 +39,13 @@ async def test_websocket():
             # Simulate backend publishing an event via Redis
             print("   📢 Publishing test event to Redis...")
             r = redis.from_url(redis_url, encoding="utf-8", decode_responses=True)
-            channel = f"orchestration:{project_id}"
+            stream = f"events:stream:{project_id}"
             test_message = {
                 "type": "TEST_EVENT",
                 "data": {"message": "Hello WebSocket"},
                 "timestamp": 1234567890
             }
-            await r.publish(channel, json.dumps(test_message))
+            await r.xadd(stream, {"event": json.dumps(test_message)}, maxlen=1000, approximate=True)
             await r.close()
             
             # Wait for message